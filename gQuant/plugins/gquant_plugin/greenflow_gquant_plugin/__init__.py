@@ -2,14 +2,19 @@ from .client import validation, display  # noqa: F401
 from greenflow.dataframe_flow._node_flow import register_validator
 from greenflow.dataframe_flow._node_flow import register_copy_function
 from greenflow.dataframe_flow._node_flow import register_cleanup
+import sys
 import traceback
-import cudf
-import dask_cudf
 import pandas
 import numpy as np
 import dask.dataframe
 
 
+def _is_gpu_df(df_obj):
+    # a cudf object exists only once its module is imported
+    return any(isinstance(df_obj, getattr(sys.modules[mod], 'DataFrame'))
+               for mod in ('cudf', 'dask_cudf') if mod in sys.modules)
+
+
 def _validate_df(df_to_val, ref_cols, obj):
     '''Validate a cudf or dask_cudf DataFrame.
 
@@ -22,13 +27,13 @@ def _validate_df(df_to_val, ref_cols, obj):
         number of columns. TODO: Create a ValidationError subclass.
 
     '''
-    if isinstance(df_to_val, cudf.DataFrame) and \
+    cudf = sys.modules.get('cudf')
+    if cudf is not None and isinstance(df_to_val, cudf.DataFrame) and \
             len(df_to_val) == 0:
         err_msg = 'Node "{}" produced empty output'.format(obj.uid)
         raise Exception(err_msg)
 
-    if not isinstance(df_to_val, cudf.DataFrame) and \
-       not isinstance(df_to_val, dask_cudf.DataFrame):
+    if not _is_gpu_df(df_to_val):
         return True
 
     i_cols = df_to_val.columns
@@ -100,13 +105,15 @@ def clean_dask(ui_clean):
             traceback.format_exc()
 
 
-register_validator(cudf.DataFrame, _validate_df)
-register_validator(dask_cudf.DataFrame, _validate_df)
+# cudf and dask_cudf are imported by the nodes that use them, registering
+# their types by name keeps them out of the import of this package
+register_validator('cudf.DataFrame', _validate_df)
+register_validator('dask_cudf.DataFrame', _validate_df)
 register_validator(pandas.DataFrame, _validate_df)
 register_validator(dask.dataframe.DataFrame, _validate_df)
 
-register_copy_function(cudf.DataFrame, copy_df)
-register_copy_function(dask_cudf.DataFrame, copy_dask_cudf)
+register_copy_function('cudf.DataFrame', copy_df)
+register_copy_function('dask_cudf.DataFrame', copy_dask_cudf)
 register_copy_function(pandas.DataFrame, copy_df)
 register_copy_function(dask.dataframe.DataFrame, copy_dask_cudf)
 
@@ -1,6 +1,9 @@
 from greenflow.dataframe_flow.portsSpecSchema import (PortsSpecSchema,
                                                    MetaData,
                                                    NodePorts)
+from greenflow.dataframe_flow import Node
+from greenflow.dataframe_flow.cacheBackend import (get_cache_backend,
+                                                   HDF5CacheBackend)
 import cudf
 import dask_cudf
 import os
@@ -135,19 +138,27 @@ class _PortTypesMixin(object):
                              outports={self.OUTPUT_PORT_NAME: retention})
         return meta_data
 
-    def load_cache(self, filename=None) -> dict:
+    def load_cache(self, filename=None, columns=None) -> dict:
         """
         Defines the behavior of how to load the cache file from the `filename`.
         Node can override this method. Default implementation assumes cudf
-        dataframes.
+        dataframes with the hdf5 cache backend. The other backends are
+        handled by `Node.load_cache`.
 
         Arguments
         -------
         filename: str
             filename of the cache file. Leave as none to use default.
+        columns: dict
+            output port name -> list of the columns to load. Leave as none
+            to load all of the columns.
         returns: dict
             dictionary of the output from this node
         """
+        if not isinstance(get_cache_backend(self.cache_backend),
+                          HDF5CacheBackend):
+            return Node.load_cache(self, filename, columns)
+        columns = {} if columns is None else columns
         cache_dir = os.getenv('GREENFLOW_CACHE_DIR', self.cache_dir)
         if filename is None:
             filename = cache_dir + '/' + self.uid + '.hdf5'
@@ -174,7 +185,8 @@ class _PortTypesMixin(object):
                             'Task "{}" port "{}" port type is not set to '
                             'cudf.DataFrame. Attempting to load port data '
                             'with cudf.read_hdf.'.format(self.uid, oport))
-                    output_df[oport] = cudf.read_hdf(hf, key)
+                    output_df[oport] = cudf.read_hdf(
+                        hf, key, columns=columns.get(oport))
         return output_df
 
     def save_cache(self, output_data: dict):
@@ -182,8 +194,12 @@ class _PortTypesMixin(object):
         filesystem cache. Default implementation assumes cudf dataframes.
 
         :param output_data: The output from :meth:`process`. For saving to hdf
-            requires that the dataframe(s) have `to_hdf` method.
+            requires that the dataframe(s) have `to_hdf` method. The other
+            cache backends are handled by `Node.save_cache`.
         '''
+        if not isinstance(get_cache_backend(self.cache_backend),
+                          HDF5CacheBackend):
+            return Node.save_cache(self, output_data)
         cache_dir = os.getenv('GREENFLOW_CACHE_DIR', self.cache_dir)
         os.makedirs(cache_dir, exist_ok=True)
         filename = cache_dir + '/' + self.uid + '.hdf5'
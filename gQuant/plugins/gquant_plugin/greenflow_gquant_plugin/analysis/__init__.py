@@ -1,14 +1,17 @@
-from .outCsvNode import OutCsvNode
-from .sharpeRatioNode import SharpeRatioNode
-from .cumReturnNode import CumReturnNode
-from .barPlotNode import BarPlotNode
-from .linePlotNode import LinePlotNode
-from .rocCurveNode import RocCurveNode
-from .importanceCurve import ImportanceCurveNode
-from .exportXGBoostNode import XGBoostExportNode
-from .scatterPlotNode import ScatterPlotNode
+from greenflow.dataframe_flow.util import lazy_module_attrs
 
-__all__ = ["OutCsvNode", "SharpeRatioNode", "CumReturnNode",
-           "BarPlotNode", "LinePlotNode", "RocCurveNode",
-           "ImportanceCurveNode", "XGBoostExportNode",
-           "ScatterPlotNode"]
+# node name -> module, a module is imported when its node is first used
+_NODE_INDEX = {
+    'OutCsvNode': '.outCsvNode',
+    'SharpeRatioNode': '.sharpeRatioNode',
+    'CumReturnNode': '.cumReturnNode',
+    'BarPlotNode': '.barPlotNode',
+    'LinePlotNode': '.linePlotNode',
+    'RocCurveNode': '.rocCurveNode',
+    'ImportanceCurveNode': '.importanceCurve',
+    'XGBoostExportNode': '.exportXGBoostNode',
+    'ScatterPlotNode': '.scatterPlotNode'
+}
+
+__all__ = list(_NODE_INDEX)
+__getattr__, __dir__ = lazy_module_attrs(__name__, _NODE_INDEX)
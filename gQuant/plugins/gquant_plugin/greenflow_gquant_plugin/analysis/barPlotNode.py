@@ -8,6 +8,7 @@ from .._port_type_node import _PortTypesMixin
 
 
 class BarPlotNode(Node):
+    mutates_inputs = False
 
     def init(self):
         self.INPUT_PORT_NAME = 'stock_in'
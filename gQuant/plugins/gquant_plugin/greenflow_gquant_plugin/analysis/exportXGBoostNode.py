@@ -6,6 +6,7 @@ from greenflow.dataframe_flow.util import get_file_path
 
 
 class XGBoostExportNode(Node):
+    mutates_inputs = False
 
     def init(self):
         self.INPUT_PORT_NAME = 'model_in'
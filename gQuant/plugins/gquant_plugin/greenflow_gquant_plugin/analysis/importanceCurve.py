@@ -7,6 +7,7 @@ from xgboost import Booster
 
 
 class ImportanceCurveNode(Node):
+    mutates_inputs = False
 
     def init(self):
         self.INPUT_PORT_NAME = 'in'
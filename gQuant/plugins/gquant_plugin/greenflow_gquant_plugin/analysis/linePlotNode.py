@@ -7,6 +7,7 @@ from .._port_type_node import _PortTypesMixin
 
 
 class LinePlotNode(Node, _PortTypesMixin):
+    mutates_inputs = False
 
     def init(self):
         self.INPUT_PORT_NAME = 'in'
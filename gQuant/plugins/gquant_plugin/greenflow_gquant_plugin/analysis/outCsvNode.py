@@ -6,6 +6,9 @@ from .._port_type_node import _PortTypesMixin
 
 
 class OutCsvNode(Node, _PortTypesMixin):
+    mutates_inputs = False
+    # writes the csv file, never skipped by the cached runs
+    deterministic = False
 
     def init(self):
         _PortTypesMixin.init(self)
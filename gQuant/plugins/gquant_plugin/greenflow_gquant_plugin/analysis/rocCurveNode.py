@@ -9,6 +9,7 @@ from sklearn import metrics
 
 
 class RocCurveNode(Node, _PortTypesMixin):
+    mutates_inputs = False
 
     def init(self):
         self.INPUT_PORT_NAME = 'in'
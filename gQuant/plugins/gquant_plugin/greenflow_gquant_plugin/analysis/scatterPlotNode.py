@@ -16,6 +16,7 @@ scaleMap = {
 
 
 class ScatterPlotNode(Node, _PortTypesMixin):
+    mutates_inputs = False
 
     def init(self):
         self.INPUT_PORT_NAME = 'in'
@@ -6,6 +6,7 @@ from .._port_type_node import _PortTypesMixin
 
 
 class SharpeRatioNode(Node, _PortTypesMixin):
+    mutates_inputs = False
 
     def init(self):
         self.INPUT_PORT_NAME = 'stock_in'
@@ -1,3 +1,10 @@
-from .simpleBackTest import SimpleBackTestNode
+from greenflow.dataframe_flow.util import lazy_module_attrs
 
-__all__ = ["SimpleBackTestNode"]
+# node name -> module, a module is imported when its node is first used
+_NODE_INDEX = {
+    'SimpleBackTestNode': '.simpleBackTest',
+    'VectorBackTestNode': '.vectorBackTest'
+}
+
+__all__ = list(_NODE_INDEX)
+__getattr__, __dir__ = lazy_module_attrs(__name__, _NODE_INDEX)
@@ -0,0 +1,277 @@
+from greenflow.dataframe_flow import Node
+from greenflow.dataframe_flow.portsSpecSchema import ConfSchema
+import cudf
+import numpy as np
+import pandas as pd
+from .._port_type_node import _PortTypesMixin
+
+__all__ = ['VectorBackTestNode', 'pivot_codes', 'to_matrix', 'from_matrix',
+           'backtest']
+
+SIZINGS = ('signal', 'normalize')
+
+
+def _array_module(arr):
+    """
+    NumPy for a NumPy array, CuPy for a device array. CuPy is imported only
+    for the arrays of a cudf input, the NumPy path does not need it.
+    """
+    if isinstance(arr, np.ndarray):
+        return np
+    import cupy
+    return cupy.get_array_module(arr)
+
+
+def _frame_array_module(df):
+    if isinstance(df, cudf.DataFrame):
+        import cupy
+        return cupy
+    return np
+
+
+def _factorize(xp, values):
+    if xp is np:
+        # hashing, faster than sorting the values
+        return pd.factorize(values, sort=True)
+    uniques = xp.unique(values)
+    return xp.searchsorted(uniques, values), uniques
+
+
+def pivot_codes(df):
+    """
+    Locate the bars of many assets in the time x asset matrices.
+
+    Arguments
+    -------
+    df: pandas.DataFrame or cudf.DataFrame
+        the bars with the `datetime` and `asset` columns
+
+    Returns
+    -----
+    tuple
+        (row of every bar, sorted datetime values as int64, column of every
+        bar, sorted asset ids)
+    """
+    xp = _frame_array_module(df)
+    time_codes, times = _factorize(xp, df['datetime'].astype('int64').values)
+    asset_codes, assets = _factorize(xp, df['asset'].values)
+    return time_codes, times, asset_codes, assets
+
+
+def to_matrix(df, columns):
+    """
+    Pivot the columns of the bars of many assets into time x asset matrices
+    in one scatter, without sorting the bars. The cells of the missing bars
+    are NaN. The matrices are NumPy arrays for a pandas dataframe and CuPy
+    arrays for a cudf dataframe.
+
+    Arguments
+    -------
+    df: pandas.DataFrame or cudf.DataFrame
+        the bars with the `datetime` and `asset` columns
+    columns: list of str
+        the columns to pivot
+
+    Returns
+    -----
+    tuple
+        (sorted datetime values as int64, sorted asset ids, list of the
+        matrices)
+    """
+    xp = _frame_array_module(df)
+    time_codes, times, asset_codes, assets = pivot_codes(df)
+    matrices = []
+    for col in columns:
+        matrix = xp.full((len(times), len(assets)), xp.nan)
+        matrix[time_codes, asset_codes] = df[col].values
+        matrices.append(matrix)
+    return times, assets, matrices
+
+
+def from_matrix(like, times, columns):
+    """
+    Build the dataframe of the same kind as `like` with the datetime column
+    of the int64 `times` and the per time step `columns` arrays.
+    """
+    dtype = like['datetime'].dtype
+    if isinstance(like, cudf.DataFrame):
+        df = cudf.DataFrame()
+        df['datetime'] = cudf.Series(times).astype(dtype)
+    else:
+        df = pd.DataFrame()
+        df['datetime'] = times.astype(dtype)
+    for col, values in columns.items():
+        df[col] = values
+    return df
+
+
+def backtest(signal, returns, sizing='signal', leverage=None, rebalance=1,
+             cost=0.0, slippage=0.0):
+    """
+    Backtest the positions of many assets as array operations over the
+    time x asset matrices. `signal[t]` is the target position held over the
+    period of `returns[t]`, i.e. the signal is already lagged. The weights
+    are set at the rebalance steps and held until the next one. A NaN
+    signal, an asset without a bar, holds no position. The traded amounts
+    are the changes of the weights, they pay the transaction cost and the
+    slippage in proportion.
+
+    Arguments
+    -------
+    signal: numpy.ndarray or cupy.ndarray
+        time x asset matrix of the target positions
+    returns: numpy.ndarray or cupy.ndarray
+        time x asset matrix of the asset returns, NaN for no bar
+    sizing: str
+        'signal' uses the signals as the portfolio weights, 'normalize'
+        scales them to a gross exposure of `leverage`, or 1 if not set
+    leverage: float
+        the maximum gross exposure, the sum of the absolute weights
+    rebalance: int
+        the number of time steps between the rebalances
+    cost: float
+        the transaction cost per unit of traded weight
+    slippage: float
+        the execution price slippage per unit of traded weight
+
+    Returns
+    -----
+    dict
+        the per time step arrays of `strategy_returns` net of the costs,
+        `gross_returns`, `costs`, `turnover` and `leverage`
+    """
+    if sizing not in SIZINGS:
+        raise ValueError('Unknown sizing "{}". Supported sizings are: {}'
+                         .format(sizing, list(SIZINGS)))
+    xp = _array_module(signal)
+    num_steps = signal.shape[0]
+    # size the positions at the rebalance steps only
+    weights = xp.nan_to_num(signal[::rebalance])
+    gross = xp.abs(weights).sum(axis=1)
+    if sizing == 'normalize':
+        target = 1.0 if leverage is None else leverage
+        weights *= (target / xp.where(gross > 0, gross, 1.0))[:, None]
+    elif leverage is not None:
+        scale = leverage / xp.where(gross > leverage, gross, leverage)
+        weights *= scale[:, None]
+    weights = xp.repeat(weights, rebalance, axis=0)[:num_steps]
+
+    trades = weights.copy()
+    trades[1:] -= weights[:-1]
+    turnover = xp.abs(trades, out=trades).sum(axis=1)
+    del trades
+    costs = (cost + slippage) * turnover
+    gross_returns = xp.nansum(weights * returns, axis=1)
+    return {'strategy_returns': gross_returns - costs,
+            'gross_returns': gross_returns,
+            'costs': costs,
+            'turnover': turnover,
+            'leverage': xp.abs(weights).sum(axis=1)}
+
+
+class VectorBackTestNode(_PortTypesMixin, Node):
+    """
+    Backtest the trading signals of many assets at once. The bars are
+    pivoted into time x asset matrices and the positions, the turnover, the
+    costs and the portfolio returns are computed as array operations over
+    them, on GPU for cudf dataframes.
+    """
+    mutates_inputs = False
+
+    def init(self):
+        _PortTypesMixin.init(self)
+        self.INPUT_PORT_NAME = 'bardata_in'
+        self.OUTPUT_PORT_NAME = 'backtest_out'
+
+    def meta_setup(self):
+        cols_required = {"datetime": "date",
+                         "asset": "int64",
+                         "signal": "float64",
+                         "returns": "float64"}
+        retention = {"datetime": "date",
+                     "strategy_returns": "float64",
+                     "gross_returns": "float64",
+                     "costs": "float64",
+                     "turnover": "float64",
+                     "leverage": "float64"}
+        return _PortTypesMixin.retention_meta_setup(self,
+                                                    retention,
+                                                    required=cols_required)
+
+    def ports_setup(self):
+        # the whole history is needed in memory, no dask dataframes
+        return _PortTypesMixin.ports_setup_from_types(
+            self, [cudf.DataFrame, pd.DataFrame])
+
+    def conf_schema(self):
+        json = {
+            "title": "Vectorized Backtest configure",
+            "type": "object",
+            "description": """Backtest the `signal` positions of all the
+            assets against their `returns` with transaction costs,
+            slippage, leverage limit and rebalance frequency. Compute the
+            portfolio `strategy_returns` net of the costs per time step.""",
+            "properties": {
+                "sizing":  {
+                    "type": "string",
+                    "enum": list(SIZINGS),
+                    "default": "signal",
+                    "description": """'signal' uses the signals as the
+                    weights, 'normalize' scales the weights to the gross
+                    exposure of `leverage`"""
+                },
+                "leverage":  {
+                    "type": "number",
+                    "description": """maximum gross exposure, the sum of
+                    the absolute weights""",
+                    "exclusiveMinimum": 0
+                },
+                "rebalance":  {
+                    "type": "integer",
+                    "default": 1,
+                    "description": "number of bars between the rebalances",
+                    "minimum": 1
+                },
+                "cost":  {
+                    "type": "number",
+                    "default": 0.0,
+                    "description": """transaction cost per unit of traded
+                    weight, e.g. 0.0005 for 5 basis points""",
+                    "minimum": 0
+                },
+                "slippage":  {
+                    "type": "number",
+                    "default": 0.0,
+                    "description": """execution price slippage per unit of
+                    traded weight""",
+                    "minimum": 0
+                }
+            }
+        }
+        ui = {
+        }
+        return ConfSchema(json=json, ui=ui)
+
+    def process(self, inputs):
+        """
+        Backtest the `signal` positions of the assets against their
+        `returns`, see `backtest`.
+
+        Arguments
+        -------
+         inputs: list
+            list of input dataframes.
+        Returns
+        -------
+        dataframe
+        """
+        input_df = inputs[self.INPUT_PORT_NAME]
+        times, _, (signal, returns) = to_matrix(input_df,
+                                                ['signal', 'returns'])
+        result = backtest(signal, returns,
+                          sizing=self.conf.get('sizing', 'signal'),
+                          leverage=self.conf.get('leverage'),
+                          rebalance=self.conf.get('rebalance', 1),
+                          cost=self.conf.get('cost', 0.0),
+                          slippage=self.conf.get('slippage', 0.0))
+        return {self.OUTPUT_PORT_NAME: from_matrix(input_df, times, result)}
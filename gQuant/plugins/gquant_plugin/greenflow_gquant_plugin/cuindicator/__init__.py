@@ -6,7 +6,10 @@ from .util import (shift, diff, substract, summation,
                    multiply, division, scale, cumsum)
 from .frac_diff import (fractional_diff, get_weights_floored,
                         port_fractional_diff)
+from .fused import fused
+from .segments import Segments, get_segments
 
 __all__ = ["Ewm", "PEwm", "Rolling", "shift", "diff", "substract",
            "summation", "multiply", "division", "scale", "cumsum",
-           "fractional_diff", "port_fractional_diff", "get_weights_floored"]
+           "fractional_diff", "port_fractional_diff", "get_weights_floored",
+           "fused", "Segments", "get_segments"]
@@ -0,0 +1,141 @@
+import functools
+import numpy as np
+import numba
+from numba import cuda
+from .fused import memoized
+
+__all__ = ["BACKENDS", "gpu_available", "get_backend", "is_gpu_data",
+           "to_array", "to_series", "copy_array", "dispatch"]
+
+# 'cuda' runs the numba.cuda kernels on GPU arrays and cudf Series, 'cpu'
+# runs the numba.njit/NumPy kernels of the `cpu` module on NumPy arrays and
+# pandas Series.
+BACKENDS = ('cuda', 'cpu')
+
+_GPU_AVAILABLE = None
+
+
+def gpu_available():
+    """
+    Check once whether a CUDA device can be used.
+    """
+    global _GPU_AVAILABLE
+    if _GPU_AVAILABLE is None:
+        try:
+            _GPU_AVAILABLE = cuda.is_available()
+        except Exception:
+            _GPU_AVAILABLE = False
+    return _GPU_AVAILABLE
+
+
+def is_gpu_data(data):
+    """
+    Check whether the data lives in GPU memory, i.e. it is a numba
+    DeviceNDArray or a cudf Series.
+    """
+    return (isinstance(data, numba.cuda.cudadrv.devicearray.DeviceNDArray)
+            or hasattr(data, 'to_gpu_array'))
+
+
+def get_backend(*data):
+    """
+    Choose the backend computing on the arrays. The GPU kernels are used if
+    any of the arrays lives in GPU memory and a GPU is present, otherwise
+    the CPU kernels are used for NumPy arrays and pandas Series.
+
+    Arguments
+    -------
+    data: the input arrays or Series, None entries are ignored
+
+    Returns
+    -----
+    str
+        one of the `BACKENDS`
+    """
+    if gpu_available() and any(is_gpu_data(arr) for arr in data
+                               if arr is not None):
+        return 'cuda'
+    return 'cpu'
+
+
+def to_array(data, backend=None):
+    """
+    Get the array of a Series for the kernels of the backend, a numba
+    DeviceNDArray for 'cuda' and a NumPy array for 'cpu'.
+
+    Arguments
+    -------
+    data: numba DeviceNDArray, cudf.Series, numpy.ndarray or pandas.Series
+    backend: str
+        one of the `BACKENDS`. Defaults to the backend of `data`.
+    """
+    if backend is None:
+        backend = get_backend(data)
+    if backend == 'cpu' and isinstance(data, np.ndarray):
+        return data
+    if (backend == 'cuda' and
+            isinstance(data, numba.cuda.cudadrv.devicearray.DeviceNDArray)):
+        return data
+    # the conversion of a Series is memoized in a `fused` scope, so the
+    # arrays of the same Series are the same object
+    return _to_array(data, backend)
+
+
+@memoized
+def _to_array(data, backend):
+    if backend == 'cuda':
+        if hasattr(data, 'to_gpu_array'):
+            return data.to_gpu_array()
+        return cuda.to_device(np.ascontiguousarray(data))
+    if isinstance(data, numba.cuda.cudadrv.devicearray.DeviceNDArray):
+        return data.copy_to_host()
+    if hasattr(data, 'to_array'):
+        # cudf.Series
+        return data.to_array(fillna='pandas')
+    return np.asarray(data)
+
+
+def to_series(arr):
+    """
+    Wrap the result array of a kernel into a Series of the matching
+    dataframe library, cudf for GPU arrays and pandas for NumPy arrays.
+    NaNs are kept as NaNs.
+    """
+    if is_gpu_data(arr):
+        import cudf
+        return cudf.Series(arr, nan_as_null=False)
+    import pandas as pd
+    if isinstance(arr, pd.Series):
+        return arr
+    return pd.Series(arr)
+
+
+def copy_array(arr):
+    """
+    Copy an array without leaving the memory it lives in.
+    """
+    if isinstance(arr, numba.cuda.cudadrv.devicearray.DeviceNDArray):
+        out = cuda.device_array_like(arr)
+        out[:] = arr[:]
+        return out
+    return np.array(arr, dtype=np.float64)
+
+
+def dispatch(cpu_fun):
+    """
+    Decorator of the GPU kernel launchers in `util.py`. The decorated
+    function is called as is if the arrays passed to it live in GPU memory,
+    otherwise `cpu_fun` is called with the arrays converted to NumPy arrays.
+    The keyword arguments only tune the GPU launch and are not passed to
+    `cpu_fun`.
+    """
+    def decorator(gpu_fun):
+        @functools.wraps(gpu_fun)
+        def wrapper(*args, **kwargs):
+            if get_backend(*args) == 'cuda':
+                return gpu_fun(*args, **kwargs)
+            args = [arg if np.isscalar(arg) else to_array(arg, 'cpu')
+                    for arg in args]
+            return cpu_fun(*args)
+        return wrapper
+    return decorator
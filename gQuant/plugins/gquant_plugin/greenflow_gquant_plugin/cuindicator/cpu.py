@@ -0,0 +1,574 @@
+"""
+CPU kernels of the cuindicator functions. They take NumPy arrays, follow
+the NaN handling of the GPU kernels in `windows.py`, `util.py` and
+`frac_diff.py`, and return NumPy arrays. The elementwise functions are
+vectorized with NumPy, the window functions are compiled with
+`numba.njit(parallel=True)`. Like the GPU kernels splitting the array into
+thread tiles, the window kernels split the array into chunks of
+`CHUNK_SIZE` elements computed in parallel, each chunk running its window
+incrementally from its first element.
+
+The window functions take the asset `offsets` of a multiple assets array,
+see `Segments`. The chunks never cross an asset boundary and the windows
+of an asset only read its own rows, so the assets are computed in parallel
+without masking the boundaries afterwards. Without offsets the array is a
+single asset.
+"""
+import numpy as np
+import numba
+
+__all__ = ["rolling_window", "ewma_mean", "conv_window", "work_items",
+           "ROLLING_METHODS"]
+
+CHUNK_SIZE = 4096
+
+# window statistics computed by `_moment_window`
+SUM, MEAN, VAR, STD = 0, 1, 2, 3
+
+
+def work_items(offsets, arr_len):
+    """
+    Split the assets into the chunks computed in parallel.
+
+    Arguments
+    -------
+    offsets: numpy.ndarray or None
+        the asset offsets, None for a single asset
+    arr_len: int
+        the array length
+
+    Returns
+    -----
+    numpy.ndarray
+        an array of (start, end, low, high) rows, the chunk [start, end)
+        of the asset [low, high)
+    """
+    if offsets is None:
+        offsets = np.array([0, arr_len], dtype=np.int64)
+    lengths = np.diff(offsets)
+    chunks = (lengths + CHUNK_SIZE - 1) // CHUNK_SIZE
+    asset = np.repeat(np.arange(len(lengths)), chunks)
+    # the chunk number within the asset
+    k = np.arange(len(asset)) - np.repeat(np.cumsum(chunks) - chunks, chunks)
+    items = np.empty((len(asset), 4), dtype=np.int64)
+    items[:, 2] = offsets[asset]
+    items[:, 3] = offsets[asset + 1]
+    items[:, 0] = items[:, 2] + k * CHUNK_SIZE
+    items[:, 1] = np.minimum(items[:, 0] + CHUNK_SIZE, items[:, 3])
+    return items
+
+
+@numba.njit
+def _kahan_add(s, c, v):
+    """
+    Add v to the sum s, c is the running compensation of the lost low-order
+    bits.
+    """
+    y = v - c
+    t = s + y
+    c = (t - s) - y
+    return t, c
+
+
+@numba.njit
+def _welford_add(count, mean, m2, v):
+    count += 1
+    delta = v - mean
+    mean += delta / count
+    m2 += delta * (v - mean)
+    return count, mean, m2
+
+
+@numba.njit
+def _welford_remove(count, mean, m2, v):
+    if count == 1:
+        return 0, 0.0, 0.0
+    count -= 1
+    delta = v - mean
+    mean -= delta / count
+    m2 -= delta * (v - mean)
+    return count, mean, m2
+
+
+@numba.njit
+def _welford_replace(count, mean, m2, v_in, v_out):
+    """
+    Replace v_out by v_in in a window of constant size.
+    """
+    delta = v_in - v_out
+    mean_old = mean
+    mean += delta / count
+    m2 += delta * (v_in - mean + v_out - mean_old)
+    return count, mean, m2
+
+
+@numba.njit(error_model='numpy')
+def _moment(s, count, mean, m2, min_size, kind):
+    if count < min_size or count == 0:
+        return np.nan
+    if kind == SUM:
+        return s
+    if kind == MEAN:
+        return s / np.float64(count)
+    if count < 2:
+        return np.nan
+    # rounding may leave a tiny negative sum of squares
+    var = max(m2, 0.0) / np.float64(count - 1)
+    if kind == VAR:
+        return var
+    return np.sqrt(var)
+
+
+@numba.njit(parallel=True, error_model='numpy')
+def _moment_window(in_arr, out_arr, window, forward_window, min_size, kind,
+                   items):
+    """
+    Compute the sum, mean, var or std of the window
+    [i - window + 1, i + forward_window] for each element i in O(1) per
+    element. The first window of a chunk is added up, the following ones
+    add the element entering the window and remove the one leaving it. The
+    sum is compensated (Kahan summation), the variance is updated with
+    Welford's algorithm, so neither loses precision on long windows. The
+    Welford updates run on the values re-centred on the first value of the
+    chunk, the rounding of a mean far from zero, e.g. of prices, would make
+    the variance of the short windows drift.
+    """
+    for item in numba.prange(len(items)):
+        start, end, low, high = items[item]
+        s = 0.0
+        c = 0.0
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        shift = 0.0
+        for j in range(max(start - window + 1, low), high):
+            if not np.isnan(in_arr[j]):
+                shift = in_arr[j]
+                break
+        first = True
+        for i in range(start, end):
+            if i - low < window - 1 or i + forward_window >= high:
+                out_arr[i] = np.nan
+                continue
+            if first:
+                for j in range(i - window + 1, i + forward_window + 1):
+                    v = in_arr[j]
+                    if not np.isnan(v):
+                        s, c = _kahan_add(s, c, v)
+                        count, mean, m2 = _welford_add(count, mean, m2,
+                                                       v - shift)
+                first = False
+            else:
+                v_in = in_arr[i + forward_window]
+                v_out = in_arr[i - window]
+                in_valid = not np.isnan(v_in)
+                out_valid = not np.isnan(v_out)
+                if in_valid:
+                    s, c = _kahan_add(s, c, v_in)
+                if out_valid:
+                    s, c = _kahan_add(s, c, -v_out)
+                if in_valid and out_valid:
+                    count, mean, m2 = _welford_replace(count, mean, m2,
+                                                       v_in - shift,
+                                                       v_out - shift)
+                elif in_valid:
+                    count, mean, m2 = _welford_add(count, mean, m2,
+                                                   v_in - shift)
+                elif out_valid:
+                    count, mean, m2 = _welford_remove(count, mean, m2,
+                                                      v_out - shift)
+            out_arr[i] = _moment(s, count, mean, m2, min_size, kind)
+
+
+@numba.njit(parallel=True)
+def _extreme_window(in_arr, out_arr, window, forward_window, min_size,
+                    maximum, items):
+    """
+    Compute the max (or min) of the non-NaN elements of each window in O(1)
+    amortized per element. The window keeps a monotonic deque of the
+    indices of its candidate extremes: the element entering the window
+    drops the candidates it dominates from the back, the candidate leaving
+    the window is dropped from the front, and the front is the extreme.
+    """
+    size = window + forward_window
+    for item in numba.prange(len(items)):
+        start, end, low, high = items[item]
+        # ring buffer of the deque, `head` is the front, `tail` is one past
+        # the back
+        deque = np.empty(size, dtype=np.int64)
+        head = 0
+        tail = 0
+        count = 0
+        # the next element to enter the window
+        right = -1
+        first = True
+        for i in range(start, end):
+            if i - low < window - 1 or i + forward_window >= high:
+                out_arr[i] = np.nan
+                continue
+            left = i - window + 1
+            if first:
+                right = left
+                first = False
+            elif not np.isnan(in_arr[left - 1]):
+                count -= 1
+            while tail > head and deque[head % size] < left:
+                head += 1
+            while right <= i + forward_window:
+                v = in_arr[right]
+                if not np.isnan(v):
+                    while tail > head:
+                        back = in_arr[deque[(tail - 1) % size]]
+                        if (maximum and back > v) or (not maximum and
+                                                      back < v):
+                            break
+                        tail -= 1
+                    deque[tail % size] = right
+                    tail += 1
+                    count += 1
+                right += 1
+            if count >= min_size and tail > head:
+                out_arr[i] = in_arr[deque[head % size]]
+            else:
+                out_arr[i] = np.nan
+
+
+def _valid_index(items, window, forward_window):
+    """
+    The index of the elements whose window fits into their asset.
+    """
+    low = np.repeat(items[:, 2], items[:, 1] - items[:, 0])
+    high = np.repeat(items[:, 3], items[:, 1] - items[:, 0])
+    index = np.arange(len(low))
+    return np.flatnonzero((index - low >= window - 1) &
+                          (index + forward_window < high))
+
+
+def rolling_mean(in_arr, out_arr, window, forward_window, min_size, items):
+    _moment_window(in_arr, out_arr, window, forward_window, min_size, MEAN,
+                   items)
+
+
+def rolling_sum(in_arr, out_arr, window, forward_window, min_size, items):
+    _moment_window(in_arr, out_arr, window, forward_window, min_size, SUM,
+                   items)
+
+
+def rolling_var(in_arr, out_arr, window, forward_window, min_size, items):
+    _moment_window(in_arr, out_arr, window, forward_window, min_size, VAR,
+                   items)
+
+
+def rolling_std(in_arr, out_arr, window, forward_window, min_size, items):
+    _moment_window(in_arr, out_arr, window, forward_window, min_size, STD,
+                   items)
+
+
+def rolling_max(in_arr, out_arr, window, forward_window, min_size, items):
+    _extreme_window(in_arr, out_arr, window, forward_window, min_size, True,
+                    items)
+
+
+def rolling_min(in_arr, out_arr, window, forward_window, min_size, items):
+    _extreme_window(in_arr, out_arr, window, forward_window, min_size, False,
+                    items)
+
+
+def backward_diff(in_arr, out_arr, window, forward_window, min_size, items):
+    out_arr[:] = np.nan
+    index = _valid_index(items, window, forward_window)
+    out_arr[index] = in_arr[index] - in_arr[index - window + 1]
+
+
+def backward_shift(in_arr, out_arr, window, forward_window, min_size, items):
+    out_arr[:] = np.nan
+    index = _valid_index(items, window, forward_window)
+    out_arr[index] = in_arr[index - window + 1]
+
+
+def forward_diff(in_arr, out_arr, window, forward_window, min_size, items):
+    out_arr[:] = np.nan
+    index = _valid_index(items, window, forward_window)
+    out_arr[index] = in_arr[index] - in_arr[index + forward_window]
+
+
+def forward_shift(in_arr, out_arr, window, forward_window, min_size, items):
+    out_arr[:] = np.nan
+    index = _valid_index(items, window, forward_window)
+    out_arr[index] = in_arr[index + forward_window]
+
+
+# Rolling method name -> CPU window function
+ROLLING_METHODS = {
+    'mean': rolling_mean,
+    'sum': rolling_sum,
+    'var': rolling_var,
+    'std': rolling_std,
+    'max': rolling_max,
+    'min': rolling_min,
+    'backward_diff': backward_diff,
+    'backward_shift': backward_shift,
+    'forward_diff': forward_diff,
+    'forward_shift': forward_shift
+}
+
+
+def rolling_window(method, in_arr, window, forward_window, min_size,
+                   offsets=None):
+    """
+    Compute the rolling window function of every asset on CPU.
+
+    Arguments
+    -------
+    method: str
+        one of the `ROLLING_METHODS` keys
+    in_arr: numpy.ndarray
+        input array
+    window: int
+        the history window size
+    forward_window: int
+        the window size in the forward direction
+    min_size: int
+        the minimum number of non-na elements
+    offsets: numpy.ndarray
+        the asset offsets, see `Segments`. Defaults to a single asset.
+
+    Returns
+    -----
+    numpy.ndarray
+    """
+    out_arr = np.empty(len(in_arr), dtype=np.float64)
+    ROLLING_METHODS[method](in_arr, out_arr, window, forward_window,
+                            min_size, work_items(offsets, len(in_arr)))
+    return out_arr
+
+
+@numba.njit(parallel=True, error_model='numpy')
+def _ewma_window(in_arr, out_arr, window, span, min_size, items):
+    """
+    Compute the exponentially weighted moving average of the last `window`
+    elements of each asset. The first `span - 1` elements of every asset
+    are NaN.
+    """
+    alpha = 2.0 / (span + 1)
+    decay = 1.0 - alpha
+    for item in numba.prange(len(items)):
+        start, end, low, high = items[item]
+        s = 0.0
+        total_weight = 0.0
+        lam = 1.0
+        counter = 0
+        average_size = 0
+        first = True
+        for i in range(start, end):
+            # number of elements between the asset beginning and i
+            age = i - low
+            if age < span - 1:
+                out_arr[i] = np.nan
+                continue
+            if first:
+                for j in range(min(age + 1, window)):
+                    v = in_arr[i - j]
+                    if not np.isnan(v):
+                        s += v * lam
+                        total_weight += lam
+                        average_size += 1
+                    counter += 1
+                    lam *= decay
+                first = False
+            else:
+                if counter >= window:
+                    v = in_arr[i - window]
+                    if not np.isnan(v):
+                        s -= v * lam / decay
+                        total_weight -= lam / decay
+                        average_size -= 1
+                else:
+                    counter += 1
+                    lam *= decay
+                v = in_arr[i]
+                s *= decay
+                total_weight *= decay
+                if not np.isnan(v):
+                    s += v
+                    total_weight += 1.0
+                    average_size += 1
+            if average_size >= min_size:
+                out_arr[i] = s / total_weight
+            else:
+                out_arr[i] = np.nan
+
+
+def ewma_mean(in_arr, span, window, min_size, offsets=None):
+    """
+    Compute the exponentially weighted moving average of the last `window`
+    elements of every asset on CPU, see `Ewm` and `PEwm`.
+    """
+    out_arr = np.empty(len(in_arr), dtype=np.float64)
+    _ewma_window(in_arr, out_arr, window, span, min_size,
+                 work_items(offsets, len(in_arr)))
+    return out_arr
+
+
+@numba.njit(parallel=True)
+def _conv_window(in_arr, weight_arr, out_arr, min_size, items):
+    window = len(weight_arr)
+    for item in numba.prange(len(items)):
+        start, end, low, high = items[item]
+        for i in range(start, end):
+            if i - low < window - 1:
+                out_arr[i] = np.nan
+                continue
+            s = 0.0
+            count = 0
+            for j in range(window):
+                v = in_arr[i - j]
+                if not np.isnan(v):
+                    s += v * weight_arr[window - 1 - j]
+                    count += 1
+            out_arr[i] = s if count >= min_size else np.nan
+
+
+def conv_window(in_arr, weight_arr, min_size, offsets=None):
+    """
+    1D convolution of `in_arr` with the `weight_arr` kernel on CPU, see
+    `fractional_diff`.
+    """
+    out_arr = np.empty(len(in_arr), dtype=np.float64)
+    _conv_window(in_arr, weight_arr, out_arr, min_size,
+                 work_items(offsets, len(in_arr)))
+    return out_arr
+
+
+def _previous(arr):
+    # the element before i, wrapping around like the GPU kernels reading
+    # arr[i - 1] at i == 0
+    return np.roll(arr, 1)
+
+
+def _fill_starts(out_arr, asset_ind, value):
+    if asset_ind is None:
+        out_arr[:1] = value
+    else:
+        out_arr[asset_ind == 1] = value
+    return out_arr
+
+
+def upDownMove(high_arr, low_arr):
+    up_move = np.empty(len(high_arr))
+    do_move = np.empty(len(high_arr))
+    up_move[:-1] = high_arr[1:] - high_arr[:-1]
+    do_move[:-1] = low_arr[:-1] - low_arr[1:]
+    upD_arr = np.where((up_move > do_move) & (up_move > 0), up_move, 0.0)
+    doD_arr = np.where((do_move > up_move) & (do_move > 0), do_move, 0.0)
+    nan = np.isnan(up_move) | np.isnan(do_move)
+    nan[-1:] = True
+    upD_arr[nan] = np.nan
+    doD_arr[nan] = np.nan
+    return upD_arr, doD_arr
+
+
+def ultimate_osc(high_arr, low_arr, close_arr, asset_ind=None):
+    close_prev = _previous(close_arr)
+    low_min = np.minimum(low_arr, close_prev)
+    TR_arr = np.maximum(high_arr, close_prev) - low_min
+    BP_arr = close_arr - low_min
+    return (_fill_starts(TR_arr, asset_ind, 0.0),
+            _fill_starts(BP_arr, asset_ind, 0.0))
+
+
+def port_ultimate_osc(asset_ind, high_arr, low_arr, close_arr):
+    return ultimate_osc(high_arr, low_arr, close_arr, asset_ind)
+
+
+def abs_arr(in_arr):
+    return np.abs(in_arr)
+
+
+def true_range(high_arr, low_arr, close_arr, asset_ind=None):
+    close_prev = _previous(close_arr)
+    out_arr = (np.maximum(high_arr, close_prev) -
+               np.minimum(low_arr, close_prev))
+    return _fill_starts(out_arr, asset_ind, 0.0)
+
+
+def port_true_range(asset_ind, high_arr, low_arr, close_arr):
+    return true_range(high_arr, low_arr, close_arr, asset_ind)
+
+
+def _mask_index(asset_ind, beg, end):
+    arr_len = len(asset_ind)
+    starts = np.flatnonzero(asset_ind == 1)
+    index = (starts[:, None] + np.arange(beg, end)[None, :]).ravel()
+    index = index[index < arr_len]
+    # the GPU kernel wraps negative positions around the end of the array
+    index[index < 0] += arr_len
+    return index[index >= 0]
+
+
+def port_mask_nan(asset_ind, input_arr, beg, end):
+    input_arr[_mask_index(asset_ind, beg, end)] = np.nan
+
+
+def port_mask_zero(asset_ind, input_arr, beg, end):
+    input_arr[_mask_index(asset_ind, beg, end)] = 0
+
+
+def average_price(high_arr, low_arr, close_arr):
+    return (high_arr + low_arr + close_arr) / 3.0
+
+
+def money_flow(pp_arr, volume_arr, asset_ind=None):
+    out_arr = np.where(pp_arr > _previous(pp_arr), pp_arr * volume_arr, 0.0)
+    return _fill_starts(out_arr, asset_ind, 0.0)
+
+
+def port_money_flow(asset_ind, pp_arr, volume_arr):
+    return money_flow(pp_arr, volume_arr, asset_ind)
+
+
+def onbalance_volume(close_arr, volume_arr, asset_ind=None):
+    change = close_arr - _previous(close_arr)
+    out_arr = np.where(change > 0, volume_arr,
+                       np.where(change == 0, 0.0, -volume_arr))
+    return _fill_starts(out_arr.astype(np.float64), asset_ind, 0.0)
+
+
+def port_onbalance_volume(asset_ind, close_arr, volume_arr):
+    return onbalance_volume(close_arr, volume_arr, asset_ind)
+
+
+def lowhigh_diff(high_arr, low_arr, asset_ind=None):
+    out_arr = (np.abs(high_arr - _previous(low_arr)) -
+               np.abs(low_arr - _previous(high_arr)))
+    return _fill_starts(out_arr, asset_ind, 0.0)
+
+
+def port_lowhigh_diff(asset_ind, high_arr, low_arr):
+    return lowhigh_diff(high_arr, low_arr, asset_ind)
+
+
+def substract(in_arr1, in_arr2):
+    return in_arr1 - in_arr2
+
+
+def summation(in_arr1, in_arr2):
+    return in_arr1 + in_arr2
+
+
+def multiply(in_arr1, in_arr2):
+    return in_arr1 * in_arr2
+
+
+def division(in_arr1, in_arr2):
+    # x / 0 is inf, -inf or nan as in the GPU kernel
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return in_arr1 / in_arr2
+
+
+def scale(in_arr1, scaler):
+    return in_arr1 * scaler
+
+
+def cumsum(in_arr):
+    return np.cumsum(in_arr)
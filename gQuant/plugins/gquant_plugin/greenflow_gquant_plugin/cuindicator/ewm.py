@@ -1,5 +1,9 @@
 from numba import cuda
 import numba
+import numpy as np
+from . import cpu
+from .backend import get_backend, to_array
+from .fused import lookup
 from .windows import (ewma_mean_window)
 
 
@@ -81,7 +85,8 @@ class Ewm(object):
 
         Arguments:
             span: the span parameter in the exponential weighted moving average
-            input_arr: the input GPU array or cudf.Series
+            input_arr: the input GPU array or cudf.Series. A NumPy array or
+                       pandas.Series is computed on CPU, see `backend`
             min_periods: the minimum number of non-na elements need to get an
                          output
             thread_tile: each thread will be responsible for `thread_tile`
@@ -92,16 +97,19 @@ class Ewm(object):
                                 number, the better the accuracy but slower in
                                 performance
         """
-        if isinstance(input_arr, numba.cuda.cudadrv.devicearray.DeviceNDArray):
-            self.gpu_in = input_arr
-        else:
-            self.gpu_in = input_arr.to_gpu_array()
         if min_periods is None:
             self.min_periods = span
         else:
             self.min_periods = min_periods
         self.span = span
         self.window = span * expand_multiplier
+        self.backend = get_backend(input_arr)
+        if self.backend == 'cpu':
+            self.cpu_in = np.asarray(to_array(input_arr, self.backend),
+                                     dtype=np.float64)
+            self.array_len = len(self.cpu_in)
+            return
+        self.gpu_in = to_array(input_arr, self.backend)
         self.number_of_threads = number_of_threads
         self.array_len = len(self.gpu_in)
         self.thread_tile = thread_tile
@@ -113,6 +121,20 @@ class Ewm(object):
             (self.number_of_threads * self.thread_tile + self.window - 1)
 
     def apply(self, method):
+        in_arr = self.cpu_in if self.backend == 'cpu' else self.gpu_in
+        return lookup('Ewm',
+                      (method, in_arr, self.span, self.window,
+                       self.min_periods),
+                      lambda: self._apply(method))
+
+    def _apply(self, method):
+        if self.backend == 'cpu':
+            if method is not ewma_mean_window:
+                raise ValueError(
+                    'The window function "{}" has no CPU implementation'
+                    .format(getattr(method, '__name__', method)))
+            return cpu.ewma_mean(self.cpu_in, self.span, self.window,
+                                 self.min_periods)
         gpu_out = numba.cuda.device_array_like(self.gpu_in)
         kernel = get_ewm_kernel(method)
         kernel[(self.number_of_blocks,),
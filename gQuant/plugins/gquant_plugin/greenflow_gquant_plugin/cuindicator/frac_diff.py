@@ -2,7 +2,10 @@ import numba
 import cmath
 import numpy as np
 from numba import cuda
+from . import cpu
+from .backend import get_backend, to_array
 from .util import port_mask_nan
+from .segments import get_segments
 
 __all__ = ["fractional_diff", "get_weights_floored", "port_fractional_diff"]
 
@@ -166,7 +169,8 @@ def fractional_diff(input_arr, d=0.5, floor=1e-3, min_periods=None,
     Arguments:
     -------
       input_arr: numba.cuda.DeviceNDArray or cudf.Series
-        the input array to compute the fractional difference
+        the input array to compute the fractional difference. A NumPy array
+        or pandas.Series is computed on CPU
       d: float
         the differencing value. range from 0 to 1
       floor: float
@@ -183,28 +187,39 @@ def fractional_diff(input_arr, d=0.5, floor=1e-3, min_periods=None,
     Returns
     -------
     (numba.cuda.DeviceNDArray, np.array)
-        the computed fractional difference array and the weight array tuple
+        the computed fractional difference array and the weight array tuple.
+        The array is a NumPy array if computed on CPU.
 
     """
-    if isinstance(input_arr, numba.cuda.cudadrv.devicearray.DeviceNDArray):
-        gpu_in = input_arr
-    else:
-        gpu_in = input_arr.to_gpu_array()
+    return _fractional_diff(input_arr, d, floor, min_periods, thread_tile,
+                            number_of_threads)
+
 
+def _fractional_diff(input_arr, d, floor, min_periods, thread_tile,
+                     number_of_threads, segments=None):
     # compute the weights for the fractional difference
     weights = get_weights_floored(d=d,
                                   num_k=len(input_arr),
                                   floor=floor)[::-1, 0]
     weights_out = np.ascontiguousarray(weights)
-    weights = numba.cuda.to_device(weights_out)
 
-    window = len(weights)
+    window = len(weights_out)
 
     if min_periods is None:
         min_periods = window
     else:
         min_periods = min_periods
 
+    backend = get_backend(input_arr)
+    if backend == 'cpu':
+        cpu_in = np.asarray(to_array(input_arr, backend), dtype=np.float64)
+        offsets = None if segments is None else segments.offsets
+        return (cpu.conv_window(cpu_in, weights_out, min_periods, offsets),
+                weights_out)
+
+    gpu_in = to_array(input_arr, backend)
+    weights = numba.cuda.to_device(weights_out)
+
     number_of_threads = number_of_threads
     array_len = len(gpu_in)
 
@@ -229,6 +244,8 @@ def fractional_diff(input_arr, d=0.5, floor=1e-3, min_periods=None,
                                    array_len,
                                    thread_tile,
                                    min_periods)
+    if segments is not None:
+        port_mask_nan(segments.flags(backend), gpu_out, 0, window - 1)
     return gpu_out, weights_out
 
 
@@ -242,9 +259,9 @@ def port_fractional_diff(asset_indicator, input_arr, d=0.5, floor=1e-3,
 
     Arguments:
     -------
-      asset_indicator: cudf.Series
+      asset_indicator: cudf.Series or Segments
         the integer indicator array to indicate the start of the different
-        asset
+        asset, or the asset `Segments`
       input_arr: numba.cuda.DeviceNDArray or cudf.Series
         the input array to compute the fractional difference
       d: float
@@ -265,10 +282,6 @@ def port_fractional_diff(asset_indicator, input_arr, d=0.5, floor=1e-3,
     (numba.cuda.DeviceNDArray, np.array)
         the computed fractional difference array and the weight array tuple
     """
-    out, weights = fractional_diff(input_arr, d=d, floor=floor,
-                                   min_periods=min_periods,
-                                   thread_tile=thread_tile,
-                                   number_of_threads=number_of_threads)
-    port_mask_nan(asset_indicator.to_gpu_array(), out, 0,
-                  len(weights) - 1)
-    return out, weights
+    return _fractional_diff(input_arr, d, floor, min_periods, thread_tile,
+                            number_of_threads,
+                            segments=get_segments(asset_indicator))
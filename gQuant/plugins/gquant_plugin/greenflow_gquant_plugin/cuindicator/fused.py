@@ -0,0 +1,148 @@
+"""
+Fused computation of several technical indicators.
+
+The indicators share a lot of intermediate results, e.g. the EMAs of the
+same span of the close price in MACD, Trix and the EMA itself, or the true
+range in the ATR, ADX and Vortex indicators. Inside a `fused` scope the
+building blocks of the indicators (array conversion, `Ewm`, `PEwm`, the
+`Rolling` reductions and the true range / up-down move kernels) are
+memoized by their arguments, so a common sub-expression of the indicators
+is computed once no matter how many indicators use it:
+
+    with fused():
+        macd = port_macd(indicator, close, 12, 26)
+        ema = port_exponential_moving_average(indicator, close, 12)
+
+Arrays are keyed by identity, numbers and strings by value. A result is
+dropped as soon as one of the arrays it is keyed by is garbage collected,
+so the scope does not keep the temporary arrays of the indicators alive and
+an identity is never reused for a stale result. Outside of a scope nothing
+is memoized.
+"""
+import contextlib
+import functools
+import numbers
+import threading
+import weakref
+
+__all__ = ["FusedScope", "fused", "lookup", "memoized"]
+
+_local = threading.local()
+
+
+class FusedScope(object):
+    """
+    The memoized results of the building blocks computed in a `fused`
+    scope.
+    """
+
+    def __init__(self):
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+        self._finalizers = []
+        self._alive = []
+
+    def __len__(self):
+        return len(self.results)
+
+    def add(self, key, args, result):
+        self.results[key] = result
+        for arg in args:
+            if _key_of(arg)[0] != 'id':
+                continue
+            try:
+                self._finalizers.append(
+                    weakref.finalize(arg, self.results.pop, key, None))
+            except TypeError:
+                # not weakly referenceable, keep it alive to keep its
+                # identity
+                self._alive.append(arg)
+
+    def close(self):
+        for finalizer in self._finalizers:
+            finalizer.detach()
+        self._finalizers = []
+        self._alive = []
+        self.results.clear()
+
+
+def _key_of(arg):
+    if arg is None or isinstance(arg, (numbers.Number, str)):
+        return ('v', arg)
+    return ('id', id(arg))
+
+
+def _active_scope():
+    return getattr(_local, 'scope', None)
+
+
+@contextlib.contextmanager
+def fused():
+    """
+    Open a scope memoizing the common sub-expressions of the indicators
+    computed inside it. A nested scope reuses the outer one.
+
+    Returns
+    -----
+    FusedScope
+    """
+    scope = _active_scope()
+    if scope is not None:
+        yield scope
+        return
+    scope = FusedScope()
+    _local.scope = scope
+    try:
+        yield scope
+    finally:
+        _local.scope = None
+        scope.close()
+
+
+def lookup(name, args, compute, copy=None):
+    """
+    Get the result of `compute()` memoized under `name` and `args` in the
+    active scope, or just compute it if there is no active scope.
+
+    Arguments
+    -------
+    name: str
+        the name of the building block
+    args: tuple
+        the arguments the result depends on
+    compute: callable
+        computes the result
+    copy: callable
+        copies the result. Pass it if the callers modify the result in
+        place, every caller gets its own copy then.
+    """
+    scope = _active_scope()
+    if scope is None:
+        return compute()
+    key = (name,) + tuple(_key_of(arg) for arg in args)
+    if key in scope.results:
+        scope.hits += 1
+        result = scope.results[key]
+    else:
+        scope.misses += 1
+        result = compute()
+        scope.add(key, args, result)
+    if copy is not None:
+        return copy(result)
+    return result
+
+
+def memoized(fun):
+    """
+    Decorator memoizing a function of arrays and scalars in the active
+    `fused` scope.
+    """
+    name = fun.__module__ + '.' + fun.__qualname__
+
+    @functools.wraps(fun)
+    def wrapper(*args, **kwargs):
+        key_args = args + tuple(kwargs[k] for k in sorted(kwargs))
+        key_name = name + str(tuple(sorted(kwargs)))
+        return lookup(key_name, key_args, lambda: fun(*args, **kwargs))
+    return wrapper
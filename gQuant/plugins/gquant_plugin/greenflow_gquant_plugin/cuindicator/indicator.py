@@ -2,10 +2,10 @@ from .util import shift, diff
 from .rolling import Rolling
 from .ewm import Ewm
 from .pewm import PEwm
-import cudf
+from .backend import get_backend, to_array, to_series, copy_array
+from .segments import get_segments
 import collections
 import math
-import numba
 from .util import (substract, summation, multiply,
                    division, upDownMove, abs_arr,
                    true_range, lowhigh_diff, money_flow,
@@ -16,6 +16,12 @@ from .util import (substract, summation, multiply,
                    port_ultimate_osc, port_mask_zero)
 
 
+def _flags(segments, arr):
+    # the asset indicator array of the segments for the kernels computing
+    # on `arr`
+    return segments.flags(get_backend(arr))
+
+
 def moving_average(close_arr, n):
     """Calculate the moving average for the given data.
 
@@ -24,7 +30,7 @@ def moving_average(close_arr, n):
     :return: moving average in cu.Series
     """
     MA = Rolling(n, close_arr).mean()
-    return cudf.Series(MA, nan_as_null=False)
+    return to_series(MA)
 
 
 def exponential_moving_average(close_arr, n):
@@ -35,7 +41,7 @@ def exponential_moving_average(close_arr, n):
     :return: expoential weighted moving average in cu.Series
     """
     EMA = Ewm(n, close_arr).mean()
-    return cudf.Series(EMA, nan_as_null=False)
+    return to_series(EMA)
 
 
 def port_exponential_moving_average(asset_indicator, close_arr, n):
@@ -48,7 +54,7 @@ def port_exponential_moving_average(asset_indicator, close_arr, n):
     :return: expoential weighted moving average in cu.Series
     """
     EMA = PEwm(n, close_arr, asset_indicator).mean()
-    return cudf.Series(EMA, nan_as_null=False)
+    return to_series(EMA)
 
 
 def port_moving_average(asset_indicator, close_arr, n):
@@ -59,9 +65,8 @@ def port_moving_average(asset_indicator, close_arr, n):
     :param n: time steps
     :return: expoential weighted moving average in cu.Series
     """
-    MA = Rolling(n, close_arr).mean()
-    port_mask_nan(asset_indicator.to_gpu_array(), MA, 0, n - 1)
-    return cudf.Series(MA, nan_as_null=False)
+    MA = Rolling(n, close_arr, segments=asset_indicator).mean()
+    return to_series(MA)
 
 
 def momentum(close_arr, n):
@@ -72,7 +77,7 @@ def momentum(close_arr, n):
     :param n: time steps
     :return: momentum in cu.Series
     """
-    return cudf.Series(diff(close_arr, n), nan_as_null=False)
+    return to_series(diff(close_arr, n))
 
 
 def rate_of_change(close_arr, n):
@@ -84,7 +89,7 @@ def rate_of_change(close_arr, n):
     """
     M = diff(close_arr, n - 1)
     N = shift(close_arr, n - 1)
-    return cudf.Series(division(M, N), nan_as_null=False)
+    return to_series(division(M, N))
 
 
 def port_rate_of_change(asset_indicator, close_arr, n):
@@ -95,14 +100,11 @@ def port_rate_of_change(asset_indicator, close_arr, n):
     :param n: time steps
     :return: rate of change in cu.Series
     """
-    M = diff(close_arr, n - 1)
-    N = shift(close_arr, n - 1)
+    segments = get_segments(asset_indicator)
+    M = diff(close_arr, n - 1, segments)
+    N = shift(close_arr, n - 1, segments)
     out = division(M, N)
-    if n - 1 >= 0:
-        port_mask_nan(asset_indicator.to_gpu_array(), out, 0, n - 1)
-    else:
-        port_mask_nan(asset_indicator.to_gpu_array(), out, n - 1, 0)
-    return cudf.Series(out, nan_as_null=False)
+    return to_series(out)
 
 
 def port_diff(asset_indicator, close_arr, n):
@@ -113,12 +115,8 @@ def port_diff(asset_indicator, close_arr, n):
     :param n: time steps
     :return: diff in cu.Series
     """
-    M = diff(close_arr.to_gpu_array(), n)
-    if n >= 0:
-        port_mask_nan(asset_indicator.to_gpu_array(), M, 0, n)
-    else:
-        port_mask_nan(asset_indicator.to_gpu_array(), M, n, 0)
-    return cudf.Series(M, nan_as_null=False)
+    M = diff(to_array(close_arr), n, get_segments(asset_indicator))
+    return to_series(M)
 
 
 def port_shift(asset_indicator, close_arr, n):
@@ -129,12 +127,8 @@ def port_shift(asset_indicator, close_arr, n):
     :param n: time steps
     :return: shift in cu.Series
     """
-    M = shift(close_arr.to_gpu_array(), n)
-    if n >= 0:
-        port_mask_nan(asset_indicator.to_gpu_array(), M, 0, n)
-    else:
-        port_mask_nan(asset_indicator.to_gpu_array(), M, n, 0)
-    return cudf.Series(M, nan_as_null=False)
+    M = shift(to_array(close_arr), n, get_segments(asset_indicator))
+    return to_series(M)
 
 
 def bollinger_bands(close_arr, n):
@@ -147,16 +141,15 @@ def bollinger_bands(close_arr, n):
     """
     MA = Rolling(n, close_arr).mean()
     MSD = Rolling(n, close_arr).std()
-    close_arr_gpu = numba.cuda.device_array_like(close_arr.to_gpu_array())
-    close_arr_gpu[:] = close_arr.to_gpu_array()[:]
+    close_arr_gpu = copy_array(to_array(close_arr))
     close_arr_gpu[0:n-1] = math.nan
     MSD_4 = scale(MSD, 4.0)
     b1 = division(MSD_4, MA)
     b2 = division(summation(substract(close_arr_gpu, MA), scale(MSD, 2.0)),
                   MSD_4)
     out = collections.namedtuple('Bollinger', 'b1 b2')
-    return out(b1=cudf.Series(b1, nan_as_null=False),
-               b2=cudf.Series(b2, nan_as_null=False))
+    return out(b1=to_series(b1),
+               b2=to_series(b2))
 
 
 def port_bollinger_bands(asset_indicator, close_arr, n):
@@ -168,20 +161,18 @@ def port_bollinger_bands(asset_indicator, close_arr, n):
     :param n: time steps
     :return: b1 b2
     """
-    MA = Rolling(n, close_arr).mean()
-    port_mask_nan(asset_indicator.to_gpu_array(), MA, 0, n - 1)
-    MSD = Rolling(n, close_arr).std()
-    port_mask_nan(asset_indicator.to_gpu_array(), MSD, 0, n - 1)
-    close_arr_gpu = numba.cuda.device_array_like(close_arr.to_gpu_array())
-    close_arr_gpu[:] = close_arr.to_gpu_array()[:]
+    segments = get_segments(asset_indicator)
+    MA = Rolling(n, close_arr, segments=segments).mean()
+    MSD = Rolling(n, close_arr, segments=segments).std()
+    close_arr_gpu = copy_array(to_array(close_arr))
     close_arr_gpu[0:n-1] = math.nan
     MSD_4 = scale(MSD, 4.0)
     b1 = division(MSD_4, MA)
     b2 = division(summation(substract(close_arr_gpu, MA), scale(MSD, 2.0)),
                   MSD_4)
     out = collections.namedtuple('Bollinger', 'b1 b2')
-    return out(b1=cudf.Series(b1, nan_as_null=False),
-               b2=cudf.Series(b2, nan_as_null=False))
+    return out(b1=to_series(b1),
+               b2=to_series(b2))
 
 
 def trix(close_arr, n):
@@ -194,7 +185,7 @@ def trix(close_arr, n):
     EX1 = Ewm(n, close_arr).mean()
     EX2 = Ewm(n, EX1).mean()
     EX3 = Ewm(n, EX2).mean()
-    return rate_of_change(cudf.Series(EX3, nan_as_null=False), 2)
+    return rate_of_change(to_series(EX3), 2)
 
 
 def port_trix(asset_indicator, close_arr, n):
@@ -205,10 +196,11 @@ def port_trix(asset_indicator, close_arr, n):
     :param n: time steps
     :return: expoential weighted moving average in cu.Series
     """
-    EX1 = PEwm(n, close_arr, asset_indicator).mean()
-    EX2 = PEwm(n, EX1, asset_indicator).mean()
-    EX3 = PEwm(n, EX2, asset_indicator).mean()
-    return rate_of_change(cudf.Series(EX3, nan_as_null=False), 2)
+    segments = get_segments(asset_indicator)
+    EX1 = PEwm(n, close_arr, segments).mean()
+    EX2 = PEwm(n, EX1, segments).mean()
+    EX3 = PEwm(n, EX2, segments).mean()
+    return rate_of_change(to_series(EX3), 2)
 
 
 def macd(close_arr, n_fast, n_slow):
@@ -226,9 +218,9 @@ def macd(close_arr, n_fast, n_slow):
     MACDsign = Ewm(average_window, MACD).mean()
     MACDdiff = substract(MACD, MACDsign)
     out = collections.namedtuple('MACD', 'MACD MACDsign MACDdiff')
-    return out(MACD=cudf.Series(MACD, nan_as_null=False),
-               MACDsign=cudf.Series(MACDsign, nan_as_null=False),
-               MACDdiff=cudf.Series(MACDdiff, nan_as_null=False))
+    return out(MACD=to_series(MACD),
+               MACDsign=to_series(MACDsign),
+               MACDdiff=to_series(MACDdiff))
 
 
 def port_macd(asset_indicator, close_arr, n_fast, n_slow):
@@ -240,16 +232,17 @@ def port_macd(asset_indicator, close_arr, n_fast, n_slow):
     :param n_slow: slow time steps
     :return: MACD MACDsign MACDdiff
     """
-    EMAfast = PEwm(n_fast, close_arr, asset_indicator).mean()
-    EMAslow = PEwm(n_slow, close_arr, asset_indicator).mean()
+    segments = get_segments(asset_indicator)
+    EMAfast = PEwm(n_fast, close_arr, segments).mean()
+    EMAslow = PEwm(n_slow, close_arr, segments).mean()
     MACD = substract(EMAfast, EMAslow)
     average_window = 9
-    MACDsign = PEwm(average_window, MACD, asset_indicator).mean()
+    MACDsign = PEwm(average_window, MACD, segments).mean()
     MACDdiff = substract(MACD, MACDsign)
     out = collections.namedtuple('MACD', 'MACD MACDsign MACDdiff')
-    return out(MACD=cudf.Series(MACD, nan_as_null=False),
-               MACDsign=cudf.Series(MACDsign, nan_as_null=False),
-               MACDdiff=cudf.Series(MACDdiff, nan_as_null=False))
+    return out(MACD=to_series(MACD),
+               MACDsign=to_series(MACDsign),
+               MACDdiff=to_series(MACDdiff))
 
 
 def average_true_range(high_arr, low_arr, close_arr, n):
@@ -262,10 +255,10 @@ def average_true_range(high_arr, low_arr, close_arr, n):
     :param n: time steps
     :return: average true range indicator
     """
-    tr = true_range(high_arr.to_gpu_array(), low_arr.to_gpu_array(),
-                    close_arr.to_gpu_array())
+    tr = true_range(to_array(high_arr), to_array(low_arr),
+                    to_array(close_arr))
     ATR = Ewm(n, tr).mean()
-    return cudf.Series(ATR, nan_as_null=False)
+    return to_series(ATR)
 
 
 def port_average_true_range(asset_indicator, high_arr,
@@ -279,12 +272,13 @@ def port_average_true_range(asset_indicator, high_arr,
     :param n: time steps
     :return: average true range indicator
     """
-    tr = port_true_range(asset_indicator.to_gpu_array(),
-                         high_arr.to_gpu_array(),
-                         low_arr.to_gpu_array(),
-                         close_arr.to_gpu_array())
-    ATR = PEwm(n, tr, asset_indicator).mean()
-    return cudf.Series(ATR, nan_as_null=False)
+    segments = get_segments(asset_indicator)
+    tr = port_true_range(_flags(segments, high_arr),
+                         to_array(high_arr),
+                         to_array(low_arr),
+                         to_array(close_arr))
+    ATR = PEwm(n, tr, segments).mean()
+    return to_series(ATR)
 
 
 def ppsr(high_arr, low_arr, close_arr):
@@ -295,9 +289,9 @@ def ppsr(high_arr, low_arr, close_arr):
     :param close_arr: close price of the bar, expect series from cudf
     :return: PP R1 S1 R2 S2 R3 S3
     """
-    high_gpu = high_arr.to_gpu_array()
-    low_gpu = low_arr.to_gpu_array()
-    close_gpu = close_arr.to_gpu_array()
+    high_gpu = to_array(high_arr)
+    low_gpu = to_array(low_arr)
+    close_gpu = to_array(close_arr)
     PP = average_price(high_gpu, low_gpu, close_gpu)
     R1 = substract(scale(PP, 2.0), low_gpu)
     S1 = substract(scale(PP, 2.0), high_gpu)
@@ -306,13 +300,13 @@ def ppsr(high_arr, low_arr, close_arr):
     R3 = summation(high_gpu, scale(substract(PP, low_gpu), 2.0))
     S3 = substract(low_gpu, scale(substract(high_gpu, PP), 2.0))
     out = collections.namedtuple('PPSR', 'PP R1 S1 R2 S2 R3 S3')
-    return out(PP=cudf.Series(PP, nan_as_null=False),
-               R1=cudf.Series(R1, nan_as_null=False),
-               S1=cudf.Series(S1, nan_as_null=False),
-               R2=cudf.Series(R2, nan_as_null=False),
-               S2=cudf.Series(S2, nan_as_null=False),
-               R3=cudf.Series(R3, nan_as_null=False),
-               S3=cudf.Series(S3, nan_as_null=False))
+    return out(PP=to_series(PP),
+               R1=to_series(R1),
+               S1=to_series(S1),
+               R2=to_series(R2),
+               S2=to_series(S2),
+               R3=to_series(R3),
+               S3=to_series(S3))
 
 
 def port_ppsr(asset_indicator, high_arr, low_arr, close_arr):
@@ -324,9 +318,9 @@ def port_ppsr(asset_indicator, high_arr, low_arr, close_arr):
     :param close_arr: close price of the bar, expect series from cudf
     :return: PP R1 S1 R2 S2 R3 S3
     """
-    high_gpu = high_arr.to_gpu_array()
-    low_gpu = low_arr.to_gpu_array()
-    close_gpu = close_arr.to_gpu_array()
+    high_gpu = to_array(high_arr)
+    low_gpu = to_array(low_arr)
+    close_gpu = to_array(close_arr)
     PP = average_price(high_gpu, low_gpu, close_gpu)
     R1 = substract(scale(PP, 2.0), low_gpu)
     S1 = substract(scale(PP, 2.0), high_gpu)
@@ -335,13 +329,13 @@ def port_ppsr(asset_indicator, high_arr, low_arr, close_arr):
     R3 = summation(high_gpu, scale(substract(PP, low_gpu), 2.0))
     S3 = substract(low_gpu, scale(substract(high_gpu, PP), 2.0))
     out = collections.namedtuple('PPSR', 'PP R1 S1 R2 S2 R3 S3')
-    return out(PP=cudf.Series(PP, nan_as_null=False),
-               R1=cudf.Series(R1, nan_as_null=False),
-               S1=cudf.Series(S1, nan_as_null=False),
-               R2=cudf.Series(R2, nan_as_null=False),
-               S2=cudf.Series(S2, nan_as_null=False),
-               R3=cudf.Series(R3, nan_as_null=False),
-               S3=cudf.Series(S3, nan_as_null=False))
+    return out(PP=to_series(PP),
+               R1=to_series(R1),
+               S1=to_series(S1),
+               R2=to_series(R2),
+               S2=to_series(S2),
+               R3=to_series(R3),
+               S3=to_series(S3))
 
 
 def stochastic_oscillator_k(high_arr, low_arr, close_arr):
@@ -381,7 +375,7 @@ def stochastic_oscillator_d(high_arr, low_arr, close_arr, n):
     """
     SOk = stochastic_oscillator_k(high_arr, low_arr, close_arr)
     SOd = Ewm(n, SOk).mean()
-    return cudf.Series(SOd, nan_as_null=False)
+    return to_series(SOd)
 
 
 def port_stochastic_oscillator_d(asset_indicator, high_arr, low_arr,
@@ -397,7 +391,7 @@ def port_stochastic_oscillator_d(asset_indicator, high_arr, low_arr,
     """
     SOk = stochastic_oscillator_k(high_arr, low_arr, close_arr)
     SOd = PEwm(n, SOk, asset_indicator).mean()
-    return cudf.Series(SOd, nan_as_null=False)
+    return to_series(SOd)
 
 
 def average_directional_movement_index(high_arr, low_arr, close_arr, n, n_ADX):
@@ -410,17 +404,17 @@ def average_directional_movement_index(high_arr, low_arr, close_arr, n, n_ADX):
     :param n_ADX: time steps to do EWM average of ADX
     :return: Average Directional Movement Index in cudf.Series
     """
-    UpI, DoI = upDownMove(high_arr.to_gpu_array(),
-                          low_arr.to_gpu_array())
+    UpI, DoI = upDownMove(to_array(high_arr),
+                          to_array(low_arr))
     last_ele = len(high_arr) - 1
-    tr = true_range(high_arr.to_gpu_array(), low_arr.to_gpu_array(),
-                    close_arr.to_gpu_array())
+    tr = true_range(to_array(high_arr), to_array(low_arr),
+                    to_array(close_arr))
     ATR = Ewm(n, tr).mean()
     PosDI = division(Ewm(n, UpI).mean(), ATR)
     NegDI = division(Ewm(n, DoI).mean(), ATR)
     NORM = division(abs_arr(substract(PosDI, NegDI)), summation(PosDI, NegDI))
     NORM[last_ele] = math.nan
-    ADX = cudf.Series(Ewm(n_ADX, NORM).mean(), nan_as_null=False)
+    ADX = to_series(Ewm(n_ADX, NORM).mean())
     return ADX
 
 
@@ -437,19 +431,21 @@ def port_average_directional_movement_index(asset_indicator,
     :param n_ADX: time steps to do EWM average of ADX
     :return: Average Directional Movement Index in cudf.Series
     """
-    UpI, DoI = upDownMove(high_arr.to_gpu_array(),
-                          low_arr.to_gpu_array())
-    tr = port_true_range(asset_indicator.to_gpu_array(),
-                         high_arr.to_gpu_array(),
-                         low_arr.to_gpu_array(),
-                         close_arr.to_gpu_array())
-    ATR = PEwm(n, tr, asset_indicator).mean()
-    PosDI = division(PEwm(n, UpI, asset_indicator).mean(), ATR)
-    NegDI = division(PEwm(n, DoI, asset_indicator).mean(), ATR)
+    segments = get_segments(asset_indicator)
+    flags = _flags(segments, high_arr)
+    UpI, DoI = upDownMove(to_array(high_arr),
+                          to_array(low_arr))
+    tr = port_true_range(flags,
+                         to_array(high_arr),
+                         to_array(low_arr),
+                         to_array(close_arr))
+    ATR = PEwm(n, tr, segments).mean()
+    PosDI = division(PEwm(n, UpI, segments).mean(), ATR)
+    NegDI = division(PEwm(n, DoI, segments).mean(), ATR)
     NORM = division(abs_arr(substract(PosDI, NegDI)), summation(PosDI, NegDI))
-    port_mask_nan(asset_indicator.to_gpu_array(), NORM, -1, 0)
-    ADX = cudf.Series(PEwm(n_ADX, NORM, asset_indicator).mean(),
-                      nan_as_null=False)
+    # the last move of an asset is computed from the next asset
+    port_mask_nan(flags, NORM, -1, 0)
+    ADX = to_series(PEwm(n_ADX, NORM, segments).mean())
     return ADX
 
 
@@ -465,14 +461,14 @@ def vortex_indicator(high_arr, low_arr, close_arr, n):
     :param n: time steps to do EWM average
     :return:  Vortex Indicator in cudf.Series
     """
-    TR = true_range(high_arr.to_gpu_array(), low_arr.to_gpu_array(),
-                    close_arr.to_gpu_array())
+    TR = true_range(to_array(high_arr), to_array(low_arr),
+                    to_array(close_arr))
 
-    VM = lowhigh_diff(high_arr.to_gpu_array(),
-                      low_arr.to_gpu_array())
+    VM = lowhigh_diff(to_array(high_arr),
+                      to_array(low_arr))
 
     VI = division(Rolling(n, VM).sum(), Rolling(n, TR).sum())
-    return cudf.Series(VI, nan_as_null=False)
+    return to_series(VI)
 
 
 def port_vortex_indicator(asset_indicator, high_arr, low_arr, close_arr, n):
@@ -488,18 +484,20 @@ def port_vortex_indicator(asset_indicator, high_arr, low_arr, close_arr, n):
     :param n: time steps to do EWM average
     :return:  Vortex Indicator in cudf.Series
     """
-    TR = port_true_range(asset_indicator.to_gpu_array(),
-                         high_arr.to_gpu_array(),
-                         low_arr.to_gpu_array(),
-                         close_arr.to_gpu_array())
+    segments = get_segments(asset_indicator)
+    flags = _flags(segments, high_arr)
+    TR = port_true_range(flags,
+                         to_array(high_arr),
+                         to_array(low_arr),
+                         to_array(close_arr))
 
-    VM = port_lowhigh_diff(asset_indicator.to_gpu_array(),
-                           high_arr.to_gpu_array(),
-                           low_arr.to_gpu_array())
+    VM = port_lowhigh_diff(flags,
+                           to_array(high_arr),
+                           to_array(low_arr))
 
-    VI = division(Rolling(n, VM).sum(), Rolling(n, TR).sum())
-    port_mask_nan(asset_indicator.to_gpu_array(), VI, 0, n - 1)
-    return cudf.Series(VI, nan_as_null=False)
+    VI = division(Rolling(n, VM, segments=segments).sum(),
+                  Rolling(n, TR, segments=segments).sum())
+    return to_series(VI)
 
 
 def kst_oscillator(close_arr, r1, r2, r3, r4, n1, n2, n3, n4):
@@ -529,7 +527,7 @@ def kst_oscillator(close_arr, r1, r2, r3, r4, n1, n2, n3, n4):
     term3 = scale(Rolling(n3, division(M3, N3)).sum(), 3.0)
     term4 = scale(Rolling(n4, division(M4, N4)).sum(), 4.0)
     KST = summation(summation(summation(term1, term2), term3), term4)
-    return cudf.Series(KST, nan_as_null=False)
+    return to_series(KST)
 
 
 def port_kst_oscillator(asset_indicator, close_arr,
@@ -548,32 +546,24 @@ def port_kst_oscillator(asset_indicator, close_arr,
     :param n4: n4 time steps
     :return:  KST Oscillator in cudf.Series
     """
-    M1 = diff(close_arr, r1 - 1)
-    N1 = shift(close_arr, r1 - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), M1, 0, r1 - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), N1, 0, r1 - 1)
-    M2 = diff(close_arr, r2 - 1)
-    N2 = shift(close_arr, r2 - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), M2, 0, r2 - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), N2, 0, r2 - 1)
-    M3 = diff(close_arr, r3 - 1)
-    N3 = shift(close_arr, r3 - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), M3, 0, r3 - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), N3, 0, r3 - 1)
-    M4 = diff(close_arr, r4 - 1)
-    N4 = shift(close_arr, r4 - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), M4, 0, r4 - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), N4, 0, r4 - 1)
-    term1 = Rolling(n1, division(M1, N1)).sum()
-    port_mask_nan(asset_indicator.to_gpu_array(), term1, 0, n1 - 1)
-    term2 = scale(Rolling(n2, division(M2, N2)).sum(), 2.0)
-    port_mask_nan(asset_indicator.to_gpu_array(), term2, 0, n2 - 1)
-    term3 = scale(Rolling(n3, division(M3, N3)).sum(), 3.0)
-    port_mask_nan(asset_indicator.to_gpu_array(), term3, 0, n3 - 1)
-    term4 = scale(Rolling(n4, division(M4, N4)).sum(), 4.0)
-    port_mask_nan(asset_indicator.to_gpu_array(), term4, 0, n4 - 1)
+    segments = get_segments(asset_indicator)
+    M1 = diff(close_arr, r1 - 1, segments)
+    N1 = shift(close_arr, r1 - 1, segments)
+    M2 = diff(close_arr, r2 - 1, segments)
+    N2 = shift(close_arr, r2 - 1, segments)
+    M3 = diff(close_arr, r3 - 1, segments)
+    N3 = shift(close_arr, r3 - 1, segments)
+    M4 = diff(close_arr, r4 - 1, segments)
+    N4 = shift(close_arr, r4 - 1, segments)
+    term1 = Rolling(n1, division(M1, N1), segments=segments).sum()
+    term2 = scale(Rolling(n2, division(M2, N2), segments=segments).sum(),
+                  2.0)
+    term3 = scale(Rolling(n3, division(M3, N3), segments=segments).sum(),
+                  3.0)
+    term4 = scale(Rolling(n4, division(M4, N4), segments=segments).sum(),
+                  4.0)
     KST = summation(summation(summation(term1, term2), term3), term4)
-    return cudf.Series(KST, nan_as_null=False)
+    return to_series(KST)
 
 
 def relative_strength_index(high_arr, low_arr, n):
@@ -584,8 +574,8 @@ def relative_strength_index(high_arr, low_arr, n):
     :param n: time steps to do EWM average
     :return: Relative Strength Index in cudf.Series
     """
-    UpI, DoI = upDownMove(high_arr.to_gpu_array(),
-                          low_arr.to_gpu_array())
+    UpI, DoI = upDownMove(to_array(high_arr),
+                          to_array(low_arr))
     UpI_s = shift(UpI, 1)
     UpI_s[0] = 0
     DoI_s = shift(DoI, 1)
@@ -593,7 +583,7 @@ def relative_strength_index(high_arr, low_arr, n):
     PosDI = Ewm(n, UpI_s).mean()
     NegDI = Ewm(n, DoI_s).mean()
     RSI = division(PosDI, summation(PosDI, NegDI))
-    return cudf.Series(RSI, nan_as_null=False)
+    return to_series(RSI)
 
 
 def port_relative_strength_index(asset_indicator, high_arr, low_arr, n):
@@ -605,24 +595,19 @@ def port_relative_strength_index(asset_indicator, high_arr, low_arr, n):
     :param n: time steps to do EWM average
     :return: Relative Strength Index in cudf.Series
     """
-    UpI, DoI = upDownMove(high_arr.to_gpu_array(),
-                          low_arr.to_gpu_array())
+    segments = get_segments(asset_indicator)
+    flags = _flags(segments, high_arr)
+    UpI, DoI = upDownMove(to_array(high_arr),
+                          to_array(low_arr))
+    # no move at the beginning of every asset
     UpI_s = shift(UpI, 1)
-    UpI_s[0] = 0
-    UpI_s = cudf.Series(UpI_s,
-                        nan_as_null=False) * (1.0
-                                              - asset_indicator.reset_index(
-                                                  drop=True))
+    port_mask_zero(flags, UpI_s, 0, 1)
     DoI_s = shift(DoI, 1)
-    DoI_s[0] = 0
-    DoI_s = cudf.Series(DoI_s,
-                        nan_as_null=False) * (1.0
-                                              - asset_indicator.reset_index(
-                                                  drop=True))
-    PosDI = PEwm(n, UpI_s, asset_indicator).mean()
-    NegDI = PEwm(n, DoI_s, asset_indicator).mean()
+    port_mask_zero(flags, DoI_s, 0, 1)
+    PosDI = PEwm(n, UpI_s, segments).mean()
+    NegDI = PEwm(n, DoI_s, segments).mean()
     RSI = division(PosDI, summation(PosDI, NegDI))
-    return cudf.Series(RSI, nan_as_null=False)
+    return to_series(RSI)
 
 
 def mass_index(high_arr, low_arr, n1, n2):
@@ -639,7 +624,7 @@ def mass_index(high_arr, low_arr, n1, n2):
     EX2 = Ewm(n1, EX1).mean()
     Mass = division(EX1, EX2)
     MassI = Rolling(n2, Mass).sum()
-    return cudf.Series(MassI, nan_as_null=False)
+    return to_series(MassI)
 
 
 def port_mass_index(asset_indicator, high_arr, low_arr, n1, n2):
@@ -652,13 +637,13 @@ def port_mass_index(asset_indicator, high_arr, low_arr, n1, n2):
     :param n1: n2 time steps
     :return: Mass Index in cudf.Series
     """
+    segments = get_segments(asset_indicator)
     Range = high_arr - low_arr
-    EX1 = PEwm(n1, Range, asset_indicator).mean()
-    EX2 = PEwm(n1, EX1, asset_indicator).mean()
+    EX1 = PEwm(n1, Range, segments).mean()
+    EX2 = PEwm(n1, EX1, segments).mean()
     Mass = division(EX1, EX2)
-    MassI = Rolling(n2, Mass).sum()
-    port_mask_nan(asset_indicator.to_gpu_array(), MassI, 0, n2 - 1)
-    return cudf.Series(MassI, nan_as_null=False)
+    MassI = Rolling(n2, Mass, segments=segments).sum()
+    return to_series(MassI)
 
 
 def true_strength_index(close_arr, r, s):
@@ -676,7 +661,7 @@ def true_strength_index(close_arr, r, s):
     EMA2 = Ewm(s, EMA1).mean()
     aEMA2 = Ewm(s, aEMA1).mean()
     TSI = division(EMA2, aEMA2)
-    return cudf.Series(TSI, nan_as_null=False)
+    return to_series(TSI)
 
 
 def port_true_strength_index(asset_indicator, close_arr, r, s):
@@ -688,15 +673,15 @@ def port_true_strength_index(asset_indicator, close_arr, r, s):
     :param s: s time steps
     :return: True Strength Index in cudf.Series
     """
-    M = diff(close_arr, 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), M, 0, 1)
+    segments = get_segments(asset_indicator)
+    M = diff(close_arr, 1, segments)
     aM = abs_arr(M)
-    EMA1 = PEwm(r, M, asset_indicator).mean()
-    aEMA1 = PEwm(r, aM, asset_indicator).mean()
-    EMA2 = PEwm(s, EMA1, asset_indicator).mean()
-    aEMA2 = PEwm(s, aEMA1, asset_indicator).mean()
+    EMA1 = PEwm(r, M, segments).mean()
+    aEMA1 = PEwm(r, aM, segments).mean()
+    EMA2 = PEwm(s, EMA1, segments).mean()
+    aEMA2 = PEwm(s, aEMA1, segments).mean()
     TSI = division(EMA2, aEMA2)
-    return cudf.Series(TSI, nan_as_null=False)
+    return to_series(TSI)
 
 
 def chaikin_oscillator(high_arr, low_arr, close_arr, volume_arr, n1, n2):
@@ -712,9 +697,7 @@ def chaikin_oscillator(high_arr, low_arr, close_arr, volume_arr, n1, n2):
     """
     ad = (2.0 * close_arr - high_arr - low_arr) / (
         high_arr - low_arr) * volume_arr
-    Chaikin = cudf.Series(Ewm(n1, ad).mean(),
-                          nan_as_null=False) - cudf.Series(Ewm(n2, ad).mean(),
-                                                           nan_as_null=False)
+    Chaikin = to_series(Ewm(n1, ad).mean()) - to_series(Ewm(n2, ad).mean())
     return Chaikin
 
 
@@ -731,11 +714,12 @@ def port_chaikin_oscillator(asset_indicator, high_arr, low_arr,
     :param n2: n2 time steps
     :return: Chaikin Oscillator indicator in cudf.Series
     """
+    segments = get_segments(asset_indicator)
     ad = (2.0 * close_arr - high_arr - low_arr) / (
         high_arr - low_arr) * volume_arr
-    first = PEwm(n1, ad, asset_indicator).mean()
-    second = PEwm(n2, ad, asset_indicator).mean()
-    Chaikin = cudf.Series(substract(first, second), nan_as_null=False)
+    first = PEwm(n1, ad, segments).mean()
+    second = PEwm(n2, ad, segments).mean()
+    Chaikin = to_series(substract(first, second))
     return Chaikin
 
 
@@ -749,15 +733,15 @@ def money_flow_index(high_arr, low_arr, close_arr, volume_arr, n):
     :param n: time steps
     :return: Money Flow Index in cudf.Series
     """
-    PP = average_price(high_arr.to_gpu_array(),
-                       low_arr.to_gpu_array(),
-                       close_arr.to_gpu_array())
+    PP = average_price(to_array(high_arr),
+                       to_array(low_arr),
+                       to_array(close_arr))
 
-    PosMF = money_flow(PP, volume_arr.to_gpu_array())
+    PosMF = money_flow(PP, to_array(volume_arr))
     MFR = division(PosMF,
-                   (multiply(PP, volume_arr.to_gpu_array())))  # TotMF
+                   (multiply(PP, to_array(volume_arr))))  # TotMF
     MFI = Rolling(n, MFR).mean()
-    return cudf.Series(MFI, nan_as_null=False)
+    return to_series(MFI)
 
 
 def port_money_flow_index(asset_indicator, high_arr, low_arr,
@@ -772,17 +756,17 @@ def port_money_flow_index(asset_indicator, high_arr, low_arr,
     :param n: time steps
     :return: Money Flow Index in cudf.Series
     """
-    PP = average_price(high_arr.to_gpu_array(),
-                       low_arr.to_gpu_array(),
-                       close_arr.to_gpu_array())
+    segments = get_segments(asset_indicator)
+    PP = average_price(to_array(high_arr),
+                       to_array(low_arr),
+                       to_array(close_arr))
 
-    PosMF = port_money_flow(asset_indicator.to_gpu_array(), PP,
-                            volume_arr.to_gpu_array())
+    PosMF = port_money_flow(_flags(segments, high_arr), PP,
+                            to_array(volume_arr))
     MFR = division(PosMF,
-                   (multiply(PP, volume_arr.to_gpu_array())))  # TotMF
-    MFI = Rolling(n, MFR).mean()
-    port_mask_nan(asset_indicator.to_gpu_array(), MFI, 0, n - 1)
-    return cudf.Series(MFI, nan_as_null=False)
+                   (multiply(PP, to_array(volume_arr))))  # TotMF
+    MFI = Rolling(n, MFR, segments=segments).mean()
+    return to_series(MFI)
 
 
 def on_balance_volume(close_arr, volume_arr, n):
@@ -793,10 +777,10 @@ def on_balance_volume(close_arr, volume_arr, n):
     :param n: time steps
     :return: On-Balance Volume in cudf.Series
     """
-    OBV = onbalance_volume(close_arr.to_gpu_array(),
-                           volume_arr.to_gpu_array())
+    OBV = onbalance_volume(to_array(close_arr),
+                           to_array(volume_arr))
     OBV_ma = Rolling(n, OBV).mean()
-    return cudf.Series(OBV_ma, nan_as_null=False)
+    return to_series(OBV_ma)
 
 
 def port_on_balance_volume(asset_indicator, close_arr, volume_arr, n):
@@ -808,12 +792,12 @@ def port_on_balance_volume(asset_indicator, close_arr, volume_arr, n):
     :param n: time steps
     :return: On-Balance Volume in cudf.Series
     """
-    OBV = port_onbalance_volume(asset_indicator.to_gpu_array(),
-                                close_arr.to_gpu_array(),
-                                volume_arr.to_gpu_array())
-    OBV_ma = Rolling(n, OBV).mean()
-    port_mask_nan(asset_indicator.to_gpu_array(), OBV_ma, 0, n - 1)
-    return cudf.Series(OBV_ma, nan_as_null=False)
+    segments = get_segments(asset_indicator)
+    OBV = port_onbalance_volume(_flags(segments, close_arr),
+                                to_array(close_arr),
+                                to_array(volume_arr))
+    OBV_ma = Rolling(n, OBV, segments=segments).mean()
+    return to_series(OBV_ma)
 
 
 def force_index(close_arr, volume_arr, n):
@@ -825,7 +809,7 @@ def force_index(close_arr, volume_arr, n):
     :return: Force Index in cudf.Series
     """
     F = multiply(diff(close_arr, n), diff(volume_arr, n))
-    return cudf.Series(F, nan_as_null=False)
+    return to_series(F)
 
 
 def port_force_index(asset_indicator, close_arr, volume_arr, n):
@@ -837,9 +821,10 @@ def port_force_index(asset_indicator, close_arr, volume_arr, n):
     :param n: time steps
     :return: Force Index in cudf.Series
     """
-    F = multiply(diff(close_arr, n), diff(volume_arr, n))
-    port_mask_nan(asset_indicator.to_gpu_array(), F, 0, n)
-    return cudf.Series(F, nan_as_null=False)
+    segments = get_segments(asset_indicator)
+    F = multiply(diff(close_arr, n, segments),
+                 diff(volume_arr, n, segments))
+    return to_series(F)
 
 
 def ease_of_movement(high_arr, low_arr, volume_arr, n):
@@ -851,15 +836,15 @@ def ease_of_movement(high_arr, low_arr, volume_arr, n):
     :param n: time steps
     :return: Ease of Movement in cudf.Series
     """
-    high_arr_gpu = high_arr.to_gpu_array()
-    low_arr_gpu = low_arr.to_gpu_array()
+    high_arr_gpu = to_array(high_arr)
+    low_arr_gpu = to_array(low_arr)
 
     EoM = division(multiply(summation(diff(high_arr_gpu, 1),
                                       diff(low_arr_gpu, 1)),
                             substract(high_arr_gpu, low_arr_gpu)),
-                   scale(volume_arr.to_gpu_array(), 2.0))
+                   scale(to_array(volume_arr), 2.0))
     Eom_ma = Rolling(n, EoM).mean()
-    return cudf.Series(Eom_ma, nan_as_null=False)
+    return to_series(Eom_ma)
 
 
 def port_ease_of_movement(asset_indicator, high_arr, low_arr, volume_arr, n):
@@ -872,17 +857,16 @@ def port_ease_of_movement(asset_indicator, high_arr, low_arr, volume_arr, n):
     :param n: time steps
     :return: Ease of Movement in cudf.Series
     """
-    high_arr_gpu = high_arr.to_gpu_array()
-    low_arr_gpu = low_arr.to_gpu_array()
+    segments = get_segments(asset_indicator)
+    high_arr_gpu = to_array(high_arr)
+    low_arr_gpu = to_array(low_arr)
 
-    EoM = division(multiply(summation(diff(high_arr_gpu, 1),
-                                      diff(low_arr_gpu, 1)),
+    EoM = division(multiply(summation(diff(high_arr_gpu, 1, segments),
+                                      diff(low_arr_gpu, 1, segments)),
                             substract(high_arr_gpu, low_arr_gpu)),
-                   scale(volume_arr.to_gpu_array(), 2.0))
-    port_mask_nan(asset_indicator.to_gpu_array(), EoM, 0, 1)
-    Eom_ma = Rolling(n, EoM).mean()
-    port_mask_nan(asset_indicator.to_gpu_array(), Eom_ma, 0, n - 1)
-    return cudf.Series(Eom_ma, nan_as_null=False)
+                   scale(to_array(volume_arr), 2.0))
+    Eom_ma = Rolling(n, EoM, segments=segments).mean()
+    return to_series(Eom_ma)
 
 
 def ultimate_oscillator(high_arr, low_arr, close_arr):
@@ -893,16 +877,16 @@ def ultimate_oscillator(high_arr, low_arr, close_arr):
     :param close_arr: close price of the bar, expect series from cudf
     :return: Ultimate Oscillator in cudf.Series
     """
-    TR_l, BP_l = ultimate_osc(high_arr.to_gpu_array(),
-                              low_arr.to_gpu_array(),
-                              close_arr.to_gpu_array())
+    TR_l, BP_l = ultimate_osc(to_array(high_arr),
+                              to_array(low_arr),
+                              to_array(close_arr))
     term1 = division(scale(Rolling(7, BP_l).sum(), 4.0),
                      Rolling(7, TR_l).sum())
     term2 = division(scale(Rolling(14, BP_l).sum(), 2.0),
                      Rolling(14, TR_l).sum())
     term3 = division(Rolling(28, BP_l).sum(), Rolling(28, TR_l).sum())
     UltO = summation(summation(term1, term2), term3)
-    return cudf.Series(UltO, nan_as_null=False)
+    return to_series(UltO)
 
 
 def port_ultimate_oscillator(asset_indicator, high_arr, low_arr, close_arr):
@@ -914,20 +898,19 @@ def port_ultimate_oscillator(asset_indicator, high_arr, low_arr, close_arr):
     :param close_arr: close price of the bar, expect series from cudf
     :return: Ultimate Oscillator in cudf.Series
     """
-    TR_l, BP_l = port_ultimate_osc(asset_indicator.to_gpu_array(),
-                                   high_arr.to_gpu_array(),
-                                   low_arr.to_gpu_array(),
-                                   close_arr.to_gpu_array())
-    term1 = division(scale(Rolling(7, BP_l).sum(), 4.0),
-                     Rolling(7, TR_l).sum())
-    term2 = division(scale(Rolling(14, BP_l).sum(), 2.0),
-                     Rolling(14, TR_l).sum())
-    term3 = division(Rolling(28, BP_l).sum(), Rolling(28, TR_l).sum())
-    port_mask_nan(asset_indicator.to_gpu_array(), term1, 0, 6)
-    port_mask_nan(asset_indicator.to_gpu_array(), term2, 0, 13)
-    port_mask_nan(asset_indicator.to_gpu_array(), term3, 0, 27)
+    segments = get_segments(asset_indicator)
+    TR_l, BP_l = port_ultimate_osc(_flags(segments, high_arr),
+                                   to_array(high_arr),
+                                   to_array(low_arr),
+                                   to_array(close_arr))
+    term1 = division(scale(Rolling(7, BP_l, segments=segments).sum(), 4.0),
+                     Rolling(7, TR_l, segments=segments).sum())
+    term2 = division(scale(Rolling(14, BP_l, segments=segments).sum(), 2.0),
+                     Rolling(14, TR_l, segments=segments).sum())
+    term3 = division(Rolling(28, BP_l, segments=segments).sum(),
+                     Rolling(28, TR_l, segments=segments).sum())
     UltO = summation(summation(term1, term2), term3)
-    return cudf.Series(UltO, nan_as_null=False)
+    return to_series(UltO)
 
 
 def donchian_channel(high_arr, low_arr, n):
@@ -943,7 +926,7 @@ def donchian_channel(high_arr, low_arr, n):
     dc_l = substract(max_high, min_low)
     dc_l[:n-1] = 0.0
     donchian_chan = shift(dc_l, n - 1)
-    return cudf.Series(donchian_chan, nan_as_null=False)
+    return to_series(donchian_chan)
 
 
 def port_donchian_channel(asset_indicator, high_arr, low_arr, n):
@@ -955,16 +938,14 @@ def port_donchian_channel(asset_indicator, high_arr, low_arr, n):
     :param n: time steps
     :return: donchian channel in cudf.Series
     """
-    max_high = Rolling(n, high_arr).max()
-    port_mask_nan(asset_indicator.to_gpu_array(), max_high, 0, n - 1)
-    min_low = Rolling(n, low_arr).min()
-    port_mask_nan(asset_indicator.to_gpu_array(), min_low, 0, n - 1)
+    segments = get_segments(asset_indicator)
+    max_high = Rolling(n, high_arr, segments=segments).max()
+    min_low = Rolling(n, low_arr, segments=segments).min()
     dc_l = substract(max_high, min_low)
     # dc_l[:n-1] = 0.0
-    port_mask_zero(asset_indicator.to_gpu_array(), dc_l, 0, n - 1)
-    donchian_chan = shift(dc_l, n - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), donchian_chan, 0, n - 1)
-    return cudf.Series(donchian_chan, nan_as_null=False)
+    port_mask_zero(_flags(segments, high_arr), dc_l, 0, n - 1)
+    donchian_chan = shift(dc_l, n - 1, segments)
+    return to_series(donchian_chan)
 
 
 def keltner_channel(high_arr, low_arr, close_arr, n):
@@ -977,11 +958,11 @@ def keltner_channel(high_arr, low_arr, close_arr, n):
     :return: Keltner Channel in cudf.Series
     """
     M = ((high_arr + low_arr + close_arr) / 3.0)
-    KelChM = cudf.Series(Rolling(n, M).mean(), nan_as_null=False)
+    KelChM = to_series(Rolling(n, M).mean())
     U = ((4.0 * high_arr - 2.0 * low_arr + close_arr) / 3.0)
-    KelChU = cudf.Series(Rolling(n, U).mean(), nan_as_null=False)
+    KelChU = to_series(Rolling(n, U).mean())
     D = ((-2.0 * high_arr + 4.0 * low_arr + close_arr) / 3.0)
-    KelChD = cudf.Series(Rolling(n, D).mean(), nan_as_null=False)
+    KelChD = to_series(Rolling(n, D).mean())
     out = collections.namedtuple('Keltner', 'KelChM KelChU KelChD')
     return out(KelChM=KelChM, KelChU=KelChU, KelChD=KelChD)
 
@@ -996,19 +977,17 @@ def port_keltner_channel(asset_indicator, high_arr, low_arr, close_arr, n):
     :param n: time steps
     :return: Keltner Channel in cudf.Series
     """
+    segments = get_segments(asset_indicator)
     M = ((high_arr + low_arr + close_arr) / 3.0)
-    KelChM = Rolling(n, M).mean()
-    port_mask_nan(asset_indicator.to_gpu_array(), KelChM, 0, n - 1)
+    KelChM = Rolling(n, M, segments=segments).mean()
     U = ((4.0 * high_arr - 2.0 * low_arr + close_arr) / 3.0)
-    KelChU = Rolling(n, U).mean()
-    port_mask_nan(asset_indicator.to_gpu_array(), KelChU, 0, n - 1)
+    KelChU = Rolling(n, U, segments=segments).mean()
     D = ((-2.0 * high_arr + 4.0 * low_arr + close_arr) / 3.0)
-    KelChD = Rolling(n, D).mean()
-    port_mask_nan(asset_indicator.to_gpu_array(), KelChD, 0, n - 1)
+    KelChD = Rolling(n, D, segments=segments).mean()
     out = collections.namedtuple('Keltner', 'KelChM KelChU KelChD')
-    return out(KelChM=cudf.Series(KelChM, nan_as_null=False),
-               KelChU=cudf.Series(KelChU, nan_as_null=False),
-               KelChD=cudf.Series(KelChD, nan_as_null=False))
+    return out(KelChM=to_series(KelChM),
+               KelChU=to_series(KelChU),
+               KelChD=to_series(KelChD))
 
 
 def coppock_curve(close_arr, n):
@@ -1025,7 +1004,7 @@ def coppock_curve(close_arr, n):
     N = shift(close_arr, int(n * 14 / 10) - 1)
     ROC2 = division(M, N)
     Copp = Ewm(n, summation(ROC1, ROC2)).mean()
-    return cudf.Series(Copp, nan_as_null=False)
+    return to_series(Copp)
 
 
 def port_coppock_curve(asset_indicator, close_arr, n):
@@ -1036,22 +1015,15 @@ def port_coppock_curve(asset_indicator, close_arr, n):
     :param n: time steps
     :return: Coppock Curve in cudf.Series
     """
-    M = diff(close_arr, int(n * 11 / 10) - 1)
-    N = shift(close_arr, int(n * 11 / 10) - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), M, 0,
-                  int(n * 11 / 10) - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), N, 0,
-                  int(n * 11 / 10) - 1)
+    segments = get_segments(asset_indicator)
+    M = diff(close_arr, int(n * 11 / 10) - 1, segments)
+    N = shift(close_arr, int(n * 11 / 10) - 1, segments)
     ROC1 = division(M, N)
-    M = diff(close_arr, int(n * 14 / 10) - 1)
-    N = shift(close_arr, int(n * 14 / 10) - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), M, 0,
-                  int(n * 14 / 10) - 1)
-    port_mask_nan(asset_indicator.to_gpu_array(), N, 0,
-                  int(n * 14 / 10) - 1)
+    M = diff(close_arr, int(n * 14 / 10) - 1, segments)
+    N = shift(close_arr, int(n * 14 / 10) - 1, segments)
     ROC2 = division(M, N)
-    Copp = PEwm(n, summation(ROC1, ROC2), asset_indicator).mean()
-    return cudf.Series(Copp, nan_as_null=False)
+    Copp = PEwm(n, summation(ROC1, ROC2), segments).mean()
+    return to_series(Copp)
 
 
 def accumulation_distribution(high_arr, low_arr, close_arr, vol_arr, n):
@@ -1067,7 +1039,7 @@ def accumulation_distribution(high_arr, low_arr, close_arr, vol_arr, n):
     ad = (2.0 * close_arr - high_arr - low_arr)/(high_arr - low_arr) * vol_arr
     M = diff(ad, n-1)
     N = shift(ad, n-1)
-    return cudf.Series(division(M, N), nan_as_null=False)
+    return to_series(division(M, N))
 
 
 def port_accumulation_distribution(asset_indicator, high_arr,
@@ -1082,12 +1054,11 @@ def port_accumulation_distribution(asset_indicator, high_arr,
     :param n: time steps
     :return: Accumulation/Distribution in cudf.Series
     """
+    segments = get_segments(asset_indicator)
     ad = (2.0 * close_arr - high_arr - low_arr)/(high_arr - low_arr) * vol_arr
-    M = diff(ad, n-1)
-    port_mask_nan(asset_indicator.to_gpu_array(), M, 0, n - 1)
-    N = shift(ad, n-1)
-    port_mask_nan(asset_indicator.to_gpu_array(), N, 0, n - 1)
-    return cudf.Series(division(M, N), nan_as_null=False)
+    M = diff(ad, n-1, segments)
+    N = shift(ad, n-1, segments)
+    return to_series(division(M, N))
 
 
 def commodity_channel_index(high_arr, low_arr, close_arr, n):
@@ -1099,13 +1070,13 @@ def commodity_channel_index(high_arr, low_arr, close_arr, n):
     :param n: time steps
     :return: Commodity Channel Index in cudf.Series
     """
-    PP = average_price(high_arr.to_gpu_array(),
-                       low_arr.to_gpu_array(),
-                       close_arr.to_gpu_array())
+    PP = average_price(to_array(high_arr),
+                       to_array(low_arr),
+                       to_array(close_arr))
     M = Rolling(n, PP).mean()
     N = Rolling(n, PP).std()
     CCI = division(substract(PP, M), N)
-    return cudf.Series(CCI, nan_as_null=False)
+    return to_series(CCI)
 
 
 def port_commodity_channel_index(asset_indicator, high_arr,
@@ -1119,12 +1090,11 @@ def port_commodity_channel_index(asset_indicator, high_arr,
     :param n: time steps
     :return: Commodity Channel Index in cudf.Series
     """
-    PP = average_price(high_arr.to_gpu_array(),
-                       low_arr.to_gpu_array(),
-                       close_arr.to_gpu_array())
-    M = Rolling(n, PP).mean()
-    port_mask_nan(asset_indicator.to_gpu_array(), M, 0, n - 1)
-    N = Rolling(n, PP).std()
-    port_mask_nan(asset_indicator.to_gpu_array(), N, 0, n - 1)
+    segments = get_segments(asset_indicator)
+    PP = average_price(to_array(high_arr),
+                       to_array(low_arr),
+                       to_array(close_arr))
+    M = Rolling(n, PP, segments=segments).mean()
+    N = Rolling(n, PP, segments=segments).std()
     CCI = division(substract(PP, M), N)
-    return cudf.Series(CCI, nan_as_null=False)
+    return to_series(CCI)
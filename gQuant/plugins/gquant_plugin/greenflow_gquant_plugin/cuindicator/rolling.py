@@ -1,5 +1,10 @@
 from numba import cuda
 import numba
+import numpy as np
+from . import cpu
+from .backend import get_backend, to_array, copy_array
+from .fused import lookup
+from .segments import get_segments
 from .windows import (mean_window, std_window, var_window,
                       min_window, max_window, sum_window,
                       backward_diff_window,
@@ -10,6 +15,25 @@ from .windows import (mean_window, std_window, var_window,
 
 kernel_cache = {}
 
+# GPU window function -> name of the CPU window function in `cpu`
+cpu_methods = {
+    mean_window: 'mean',
+    std_window: 'std',
+    var_window: 'var',
+    max_window: 'max',
+    min_window: 'min',
+    sum_window: 'sum',
+    backward_diff_window: 'backward_diff',
+    backward_shift_window: 'backward_shift',
+    forward_diff_window: 'forward_diff',
+    forward_shift_window: 'forward_shift'
+}
+
+# the window reductions memoized in a `fused` scope. A diff or shift costs
+# as much as copying the memoized result.
+fused_methods = (mean_window, std_window, var_window, max_window,
+                 min_window, sum_window)
+
 
 def get_rolling_kernel(method):
 
@@ -88,7 +112,7 @@ def get_rolling_kernel(method):
 class Rolling(object):
 
     def __init__(self, window, input_arr, min_periods=None, forward_window=0,
-                 thread_tile=48, number_of_threads=64):
+                 thread_tile=48, number_of_threads=64, segments=None):
         """
         The Rolling class that is used to do rolling window computations.
         The window size is `window + forward_window`. The element i uses
@@ -97,27 +121,41 @@ class Rolling(object):
 
         Arguments:
             window: the history window size.
-            input_arr: the input GPU array or cudf.Series
+            input_arr: the input GPU array or cudf.Series. A NumPy array or
+                       pandas.Series is computed on CPU, see `backend`
             min_periods: the minimum number of non-na elements need to get an
                          output
             forward_window: the windows size in the forward direction
             thread_tile: each thread will be responsible for `thread_tile`
                          number of elements in window computation
             number_of_threads: num. of threads in a block for CUDA computation
+            segments: the `Segments` or the asset indicator of a multiple
+                      assets array. The windows of each asset only cover its
+                      own rows, the rows of an asset without a full window
+                      are NaN.
         """
-        if isinstance(input_arr, numba.cuda.cudadrv.devicearray.DeviceNDArray):
-            self.gpu_in = input_arr
-        else:
-            self.gpu_in = input_arr.to_gpu_array()
         if min_periods is None:
             self.min_periods = window + forward_window
         else:
             self.min_periods = min_periods
         self.window = window
         self.forward_window = forward_window
+        self.backend = get_backend(input_arr)
+        self.segments = None
+        if segments is not None:
+            self.segments = get_segments(segments)
+            if self.segments.size != len(input_arr):
+                raise ValueError('The segments cover {} rows, the array has '
+                                 '{}'.format(self.segments.size,
+                                             len(input_arr)))
+        if self.backend == 'cpu':
+            self.cpu_in = np.asarray(to_array(input_arr, self.backend),
+                                     dtype=np.float64)
+            self.array_len = len(self.cpu_in)
+            return
+        self.gpu_in = to_array(input_arr, self.backend)
         self.number_of_threads = number_of_threads
         self.array_len = len(self.gpu_in)
-        self.gpu_out = numba.cuda.device_array_like(self.gpu_in)
         self.thread_tile = thread_tile
         self.number_of_blocks = \
             (self.array_len + (number_of_threads * thread_tile - 1)) // \
@@ -127,6 +165,28 @@ class Rolling(object):
                                    self.window - 1 + self.forward_window)
 
     def apply(self, method):
+        if method not in fused_methods:
+            return self._apply(method)
+        # the callers mask the result in place, so every caller gets a copy
+        # of a result memoized in a `fused` scope
+        in_arr = self.cpu_in if self.backend == 'cpu' else self.gpu_in
+        return lookup('Rolling',
+                      (method, in_arr, self.segments, self.window,
+                       self.forward_window, self.min_periods),
+                      lambda: self._apply(method), copy=copy_array)
+
+    def _apply(self, method):
+        if self.backend == 'cpu':
+            if method not in cpu_methods:
+                raise ValueError(
+                    'The window function "{}" has no CPU implementation'
+                    .format(getattr(method, '__name__', method)))
+            offsets = None
+            if self.segments is not None:
+                offsets = self.segments.offsets
+            return cpu.rolling_window(cpu_methods[method], self.cpu_in,
+                                      self.window, self.forward_window,
+                                      self.min_periods, offsets)
         gpu_out = numba.cuda.device_array_like(self.gpu_in)
         # gpu_out = cudf.Series(gpu_out, nan_as_null=False)
         kernel = get_rolling_kernel(method)
@@ -141,6 +201,14 @@ class Rolling(object):
                                             self.thread_tile,
                                             self.min_periods)
         # numba.cuda.synchronize()
+        if self.segments is not None:
+            # the GPU kernels run over the whole array, blank out the rows
+            # whose window crosses an asset boundary
+            from .util import port_mask_nan
+            flags = self.segments.flags(self.backend)
+            port_mask_nan(flags, gpu_out, 0, self.window - 1)
+            if self.forward_window > 0:
+                port_mask_nan(flags, gpu_out, -self.forward_window, 0)
         return gpu_out
 
     def mean(self):
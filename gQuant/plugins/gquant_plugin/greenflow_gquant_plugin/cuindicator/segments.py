@@ -0,0 +1,105 @@
+import numpy as np
+from numba import cuda
+from .backend import is_gpu_data, to_array
+from .fused import memoized
+
+__all__ = ["Segments", "get_segments"]
+
+
+class Segments(object):
+    """
+    The rows of the assets in a multiple assets array. The rows of the same
+    asset are grouped together, asset k has the rows
+    [offsets[k], offsets[k + 1]).
+
+    The portfolio functions compute the windows of each asset within its own
+    rows, so no asset reads the rows of its neighbours and the results need
+    no masking at the asset boundaries. The CPU kernels compute the assets
+    in parallel.
+    """
+
+    def __init__(self, offsets):
+        """
+        Arguments
+        -------
+        offsets: array of int
+            the first row of every asset followed by the number of rows
+        """
+        offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        if len(offsets) < 1 or offsets[0] != 0:
+            raise ValueError('The asset offsets have to start with 0')
+        if np.any(np.diff(offsets) < 0):
+            raise ValueError('The asset offsets have to be sorted')
+        self.offsets = offsets
+        self._flags = {}
+
+    @classmethod
+    def from_indicator(cls, asset_indicator):
+        """
+        Build the segments of the asset indicator column that is 1 at the
+        first row of every asset, see `AssetIndicatorNode`.
+
+        Arguments
+        -------
+        asset_indicator: cudf.Series, pandas.Series or array
+        """
+        host = np.asarray(to_array(asset_indicator, 'cpu'))
+        starts = np.flatnonzero(host == 1)
+        if len(starts) == 0 or starts[0] != 0:
+            starts = np.concatenate([[0], starts])
+        segments = cls(np.append(starts, len(host)))
+        if len(host) > 0 and host[0] == 1:
+            # keep the flags of the GPU column instead of copying them
+            # back to the device
+            segments._flags['cpu'] = host
+            if is_gpu_data(asset_indicator):
+                segments._flags['cuda'] = to_array(asset_indicator, 'cuda')
+        return segments
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def size(self):
+        """
+        The number of rows of all the assets.
+        """
+        return int(self.offsets[-1])
+
+    @property
+    def starts(self):
+        return self.offsets[:-1]
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def flags(self, backend='cpu'):
+        """
+        The asset indicator array of the backend, 1 at the first row of
+        every asset and 0 elsewhere. It is computed once per backend.
+        """
+        if backend not in self._flags:
+            if backend == 'cuda':
+                self._flags['cuda'] = cuda.to_device(self.flags('cpu'))
+            else:
+                flags = np.zeros(self.size, dtype=np.int32)
+                flags[self.starts[self.lengths > 0]] = 1
+                self._flags['cpu'] = flags
+        return self._flags[backend]
+
+
+@memoized
+def _from_indicator(asset_indicator):
+    return Segments.from_indicator(asset_indicator)
+
+
+def get_segments(asset_indicator):
+    """
+    Get the `Segments` of an asset indicator column. `Segments` are passed
+    through, so the portfolio functions accept both. In a `fused` scope the
+    segments of the same column are built once.
+    """
+    if isinstance(asset_indicator, Segments):
+        return asset_indicator
+    return _from_indicator(asset_indicator)
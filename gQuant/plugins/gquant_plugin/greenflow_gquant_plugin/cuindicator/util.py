@@ -1,4 +1,7 @@
 from .rolling import Rolling
+from . import cpu
+from .backend import dispatch
+from .fused import memoized
 from numba import cuda
 import math
 import numba
@@ -7,20 +10,22 @@ import numba
 number_of_threads = 128
 
 
-def diff(in_arr, n):
+def diff(in_arr, n, segments=None):
     if n < 0:
-        return Rolling(1, in_arr, forward_window=-n).forward_diff()
+        return Rolling(1, in_arr, forward_window=-n,
+                       segments=segments).forward_diff()
     elif n > 0:
-        return Rolling(n + 1, in_arr).backward_diff()
+        return Rolling(n + 1, in_arr, segments=segments).backward_diff()
     else:
         return in_arr
 
 
-def shift(in_arr, n):
+def shift(in_arr, n, segments=None):
     if n < 0:
-        return Rolling(1, in_arr, forward_window=-n).forward_shift()
+        return Rolling(1, in_arr, forward_window=-n,
+                       segments=segments).forward_shift()
     elif n > 0:
-        return Rolling(n + 1, in_arr).backward_shift()
+        return Rolling(n + 1, in_arr, segments=segments).backward_shift()
     else:
         return in_arr
 
@@ -292,6 +297,8 @@ def scale_kernel(in_arr, scaler, out_arr, arr_len):
             out_arr[i] = in_arr[i] * scaler
 
 
+@memoized
+@dispatch(cpu.upDownMove)
 def upDownMove(high_arr, low_arr):
     upD_arr = cuda.device_array_like(high_arr)
     doD_arr = cuda.device_array_like(high_arr)
@@ -306,6 +313,7 @@ def upDownMove(high_arr, low_arr):
     return upD_arr, doD_arr
 
 
+@dispatch(cpu.ultimate_osc)
 def ultimate_osc(high_arr, low_arr, close_arr):
     TR_arr = cuda.device_array_like(high_arr)
     BP_arr = cuda.device_array_like(high_arr)
@@ -322,6 +330,7 @@ def ultimate_osc(high_arr, low_arr, close_arr):
     return TR_arr, BP_arr
 
 
+@dispatch(cpu.port_ultimate_osc)
 def port_ultimate_osc(asset_ind, high_arr, low_arr, close_arr):
     TR_arr = cuda.device_array_like(high_arr)
     BP_arr = cuda.device_array_like(high_arr)
@@ -339,6 +348,7 @@ def port_ultimate_osc(asset_ind, high_arr, low_arr, close_arr):
     return TR_arr, BP_arr
 
 
+@dispatch(cpu.abs_arr)
 def abs_arr(in_arr):
     out_arr = cuda.device_array_like(in_arr)
     array_len = len(in_arr)
@@ -350,6 +360,8 @@ def abs_arr(in_arr):
     return out_arr
 
 
+@memoized
+@dispatch(cpu.true_range)
 def true_range(high_arr, low_arr, close_arr):
     out_arr = cuda.device_array_like(high_arr)
     array_len = len(high_arr)
@@ -363,6 +375,8 @@ def true_range(high_arr, low_arr, close_arr):
     return out_arr
 
 
+@memoized
+@dispatch(cpu.port_true_range)
 def port_true_range(asset_indicator, high_arr, low_arr, close_arr):
     out_arr = cuda.device_array_like(high_arr)
     array_len = len(high_arr)
@@ -378,6 +392,7 @@ def port_true_range(asset_indicator, high_arr, low_arr, close_arr):
     return out_arr
 
 
+@dispatch(cpu.port_mask_nan)
 def port_mask_nan(asset_indicator, input_arr, beg, end):
     array_len = len(input_arr)
     number_of_blocks = (array_len + (
@@ -390,6 +405,7 @@ def port_mask_nan(asset_indicator, input_arr, beg, end):
                                            array_len)
 
 
+@dispatch(cpu.port_mask_zero)
 def port_mask_zero(asset_indicator, input_arr, beg, end):
     array_len = len(input_arr)
     number_of_blocks = (array_len + (
@@ -402,6 +418,7 @@ def port_mask_zero(asset_indicator, input_arr, beg, end):
                                                 array_len)
 
 
+@dispatch(cpu.average_price)
 def average_price(high_arr, low_arr, close_arr):
     out_arr = cuda.device_array_like(high_arr)
     array_len = len(high_arr)
@@ -415,6 +432,7 @@ def average_price(high_arr, low_arr, close_arr):
     return out_arr
 
 
+@dispatch(cpu.money_flow)
 def money_flow(pp_arr, volume_arr):
     out_arr = cuda.device_array_like(pp_arr)
     array_len = len(pp_arr)
@@ -427,6 +445,7 @@ def money_flow(pp_arr, volume_arr):
     return out_arr
 
 
+@dispatch(cpu.port_money_flow)
 def port_money_flow(asset_ind, pp_arr, volume_arr):
     out_arr = cuda.device_array_like(pp_arr)
     array_len = len(pp_arr)
@@ -441,6 +460,7 @@ def port_money_flow(asset_ind, pp_arr, volume_arr):
     return out_arr
 
 
+@dispatch(cpu.onbalance_volume)
 def onbalance_volume(close_arr, volume_arr):
     out_arr = cuda.device_array_like(close_arr)
     array_len = len(close_arr)
@@ -453,6 +473,7 @@ def onbalance_volume(close_arr, volume_arr):
     return out_arr
 
 
+@dispatch(cpu.port_onbalance_volume)
 def port_onbalance_volume(asset_ind, close_arr, volume_arr):
     out_arr = cuda.device_array_like(close_arr)
     array_len = len(close_arr)
@@ -467,6 +488,7 @@ def port_onbalance_volume(asset_ind, close_arr, volume_arr):
     return out_arr
 
 
+@dispatch(cpu.lowhigh_diff)
 def lowhigh_diff(high_arr, low_arr):
     out_arr = cuda.device_array_like(high_arr)
     array_len = len(high_arr)
@@ -479,6 +501,7 @@ def lowhigh_diff(high_arr, low_arr):
     return out_arr
 
 
+@dispatch(cpu.port_lowhigh_diff)
 def port_lowhigh_diff(asset_ind, high_arr, low_arr):
     out_arr = cuda.device_array_like(high_arr)
     array_len = len(high_arr)
@@ -493,6 +516,7 @@ def port_lowhigh_diff(asset_ind, high_arr, low_arr):
     return out_arr
 
 
+@dispatch(cpu.substract)
 def substract(in_arr1, in_arr2):
     out_arr = cuda.device_array_like(in_arr1)
     array_len = len(in_arr1)
@@ -505,6 +529,7 @@ def substract(in_arr1, in_arr2):
     return out_arr
 
 
+@dispatch(cpu.summation)
 def summation(in_arr1, in_arr2):
     out_arr = cuda.device_array_like(in_arr1)
     array_len = len(in_arr1)
@@ -517,6 +542,7 @@ def summation(in_arr1, in_arr2):
     return out_arr
 
 
+@dispatch(cpu.multiply)
 def multiply(in_arr1, in_arr2):
     out_arr = cuda.device_array_like(in_arr1)
     array_len = len(in_arr1)
@@ -529,6 +555,7 @@ def multiply(in_arr1, in_arr2):
     return out_arr
 
 
+@dispatch(cpu.division)
 def division(in_arr1, in_arr2):
     out_arr = cuda.device_array_like(in_arr1)
     array_len = len(in_arr1)
@@ -541,6 +568,7 @@ def division(in_arr1, in_arr2):
     return out_arr
 
 
+@dispatch(cpu.scale)
 def scale(in_arr1, scaler):
     out_arr = cuda.device_array_like(in_arr1)
     array_len = len(in_arr1)
@@ -628,6 +656,7 @@ def correct_kernel(in_arr, block_arr, arr_len):
             in_arr[offset + starting_id] += block_arr[lookup]
 
 
+@dispatch(cpu.cumsum)
 def cumsum(g_input, number_of_threads=1024):
     array_len = len(g_input)
     number_of_blocks = (array_len + (
@@ -1,5 +1,13 @@
-from .csvStockLoader import CsvStockLoader
-from .stockNameLoader import StockNameLoader
-from .classificationGenerator import ClassificationData
+from greenflow.dataframe_flow.util import lazy_module_attrs
 
-__all__ = ["CsvStockLoader", "StockNameLoader", "ClassificationData"]
+# node name -> module, a module is imported when its node is first used
+_NODE_INDEX = {
+    'CsvStockLoader': '.csvStockLoader',
+    'ParquetStockLoader': '.parquetStockLoader',
+    'ParquetStockWriter': '.parquetStockWriter',
+    'StockNameLoader': '.stockNameLoader',
+    'ClassificationData': '.classificationGenerator'
+}
+
+__all__ = list(_NODE_INDEX)
+__getattr__, __dir__ = lazy_module_attrs(__name__, _NODE_INDEX)
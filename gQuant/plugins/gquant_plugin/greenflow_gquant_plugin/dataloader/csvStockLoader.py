@@ -1,3 +1,6 @@
+import copy
+import glob
+import operator
 from greenflow.dataframe_flow import Node
 from greenflow.dataframe_flow.portsSpecSchema import (PortsSpecSchema,
                                                    NodePorts,
@@ -13,6 +16,133 @@ CUDF_PORT_NAME = 'cudf_out'
 DASK_CUDF_PORT_NAME = 'dask_cudf_out'
 PANDAS_PORT_NAME = 'pandas_out'
 
+# the columns read from the stock csv file, their dtypes and their names in
+# the output dataframes
+CSV_COLUMNS = ['DTE', 'OPEN', 'CLOSE', 'HIGH', 'LOW', 'SM_ID', 'VOLUME']
+CSV_DTYPES = {'DTE': 'int64',
+              'OPEN': 'float64',
+              'CLOSE': 'float64',
+              'HIGH': 'float64',
+              'LOW': 'float64',
+              'SM_ID': 'int64',
+              'VOLUME': 'float64'}
+OUTPUT_COLUMNS = ['datetime', 'open', 'close', 'high', 'low', 'asset',
+                  'volume']
+# the number of rows of a chunk streamed by `CsvStockLoader.iter_chunks`
+DEFAULT_CHUNKSIZE = 1000000
+# the operators of the value filters, see `Node.pushdown_predicates`
+FILTER_OPS = {'==': operator.eq,
+              '!=': operator.ne,
+              '<': operator.lt,
+              '<=': operator.le,
+              '>': operator.gt,
+              '>=': operator.ge,
+              'in': lambda column, values: column.isin(values)}
+
+
+def yyyymmdd_to_days(dte):
+    """
+    Convert the YYYYMMDD integer dates into the number of days since
+    1970-01-01 with integer arithmetic only, so no strings are formatted or
+    parsed. Works on cudf.Series, pandas.Series and NumPy arrays.
+
+    Arguments
+    -------
+    dte: integer Series or array
+        the dates as YYYYMMDD integers
+    Returns
+    -------
+    integer Series or array
+    """
+    year = dte // 10000
+    month = dte // 100 % 100
+    day = dte % 100
+    # the days from civil algorithm, the year starts at March 1st so that
+    # the leap day is the last day of the year
+    year = year - (month <= 2).astype('int64')
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = (year_of_era * 365 + year_of_era // 4 -
+                  year_of_era // 100 + day_of_year)
+    return era * 146097 + day_of_era - 719468
+
+
+def _to_output(df):
+    """
+    Turn the csv columns into the output dataframe of the loader.
+    """
+    days = yyyymmdd_to_days(df['DTE'])
+    if isinstance(df, pd.DataFrame):
+        dates = days.values.astype('datetime64[D]').astype('datetime64[ns]')
+    else:
+        dates = (days * 86400000).astype('datetime64[ms]')
+    df = df[CSV_COLUMNS]
+    df['DTE'] = dates
+    df['VOLUME'] /= 1000
+    df.columns = OUTPUT_COLUMNS
+    return df
+
+
+def _filter_value(column, op, value):
+    """
+    The value of a filter compared with the column, the dates of the
+    `datetime` column are given as datetime objects or 'YYYY-MM-DD' strings.
+    """
+    if column != 'datetime':
+        return value
+    if op == 'in':
+        return list(pd.to_datetime(value))
+    return pd.Timestamp(value)
+
+
+def select_rows(df, filters):
+    """
+    Select the rows of the output dataframe satisfying all the filters.
+
+    Arguments
+    -------
+    df: dataframe
+        the output of the loader
+    filters: list
+        list of [column, op, value] conditions, op is a `FILTER_OPS` key
+    Returns
+    -------
+    dataframe
+    """
+    if not filters:
+        return df
+    mask = None
+    for column, op, value in filters:
+        cond = FILTER_OPS[op](df[column], _filter_value(column, op, value))
+        mask = cond if mask is None else mask & cond
+    return df[mask]
+
+
+def read_stock_csv_chunks(path, chunksize, filters=None):
+    """
+    Read the stock csv file into pandas dataframes of `chunksize` rows at
+    most. Only the used columns are parsed, with explicit dtypes.
+
+    Arguments
+    -------
+    path: str
+        the csv file
+    chunksize: int
+        the number of rows of a chunk
+    filters: list
+        the conditions the rows of the chunks are selected by, see
+        `select_rows`
+    Returns
+    -------
+    iterator of pandas.DataFrame
+    """
+    reader = pd.read_csv(path, usecols=CSV_COLUMNS, dtype=CSV_DTYPES,
+                         chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            yield select_rows(_to_output(chunk), filters)
+
 
 class CsvStockLoader(_PortTypesMixin, Node):
 
@@ -64,6 +194,27 @@ class CsvStockLoader(_PortTypesMixin, Node):
                 "path":  {
                     "type": "string",
                     "description": "path to the directory for csv files"
+                },
+                "chunksize":  {
+                    "type": "integer",
+                    "description": """number of rows parsed at a time for
+                    the pandas output, bounds the memory of the csv parser.
+                    The whole file is parsed at once if not set""",
+                    "minimum": 1
+                },
+                "filters": {
+                    "type": "array",
+                    "items": {
+                        "type": "array",
+                        "items": [
+                            {"type": "string", "enum": OUTPUT_COLUMNS},
+                            {"type": "string", "enum": list(FILTER_OPS)},
+                            {}
+                        ]
+                    },
+                    "description": """[column, op, value] conditions the
+                    loaded rows satisfy. The whole file is still parsed, the
+                    rows of every chunk are selected as it is parsed"""
                 }
             }
         }
@@ -74,6 +225,45 @@ class CsvStockLoader(_PortTypesMixin, Node):
         }
         return ConfSchema(json=json, ui=ui)
 
+    def source_files(self):
+        files = []
+        if (self.outport_connected(CUDF_PORT_NAME) or
+                self.outport_connected(PANDAS_PORT_NAME)):
+            files.append(get_file_path(self.conf['file']))
+        if self.outport_connected(DASK_CUDF_PORT_NAME):
+            files.extend(sorted(glob.glob(
+                get_file_path(self.conf['path']) + '/*.csv')))
+        return files
+
+    def push_predicates(self, oport, predicates):
+        """
+        Select the rows of the filter nodes downstream as the file is
+        parsed. The csv file has no statistics to skip the rows by, the
+        gain is in the memory of the chunked pandas output.
+        """
+        filters = [[column, op, value] for column, op, value in predicates
+                   if column in OUTPUT_COLUMNS and op in FILTER_OPS]
+        if not filters:
+            return None
+        conf = copy.deepcopy(self.conf)
+        conf.setdefault('filters', []).extend(filters)
+        return conf
+
+    def iter_chunks(self):
+        """
+        Stream the stock csv file as pandas dataframes of `chunksize` rows,
+        for the consumers that process the bars chunk by chunk instead of
+        holding the whole history in memory.
+
+        Returns
+        -------
+        iterator of pandas.DataFrame
+        """
+        path = get_file_path(self.conf['file'])
+        return read_stock_csv_chunks(path, self.conf.get('chunksize',
+                                                         DEFAULT_CHUNKSIZE),
+                                     self.conf.get('filters'))
+
     def process(self, inputs):
         """
         Load the end of day stock CSV data into cuDF dataframe
@@ -87,37 +277,25 @@ class CsvStockLoader(_PortTypesMixin, Node):
         cudf.DataFrame
         """
         output = {}
+        filters = self.conf.get('filters')
         if self.outport_connected(CUDF_PORT_NAME):
             path = get_file_path(self.conf['file'])
-            df = cudf.read_csv(path)
-            # extract the year, month, day
-            ymd = df['DTE'].astype(
-                'str').str.extract(r'(\d\d\d\d)(\d\d)(\d\d)')
-            # construct the standard datetime str
-            df['DTE'] = ymd[0].str.cat(
-                ymd[1],
-                '-').str.cat(ymd[2], '-').astype('datetime64[ms]')
-            df = df[['DTE', 'OPEN', 'CLOSE', 'HIGH', 'LOW', 'SM_ID', 'VOLUME']]
-            df['VOLUME'] /= 1000
-            # change the names
-            df.columns = ['datetime', 'open', 'close',
-                          'high', 'low', "asset", 'volume']
+            df = cudf.read_csv(path, usecols=CSV_COLUMNS, dtype=CSV_DTYPES)
+            df = select_rows(_to_output(df), filters)
             output.update({CUDF_PORT_NAME: df})
         if self.outport_connected(PANDAS_PORT_NAME):
-            path = get_file_path(self.conf['file'])
-            df = pd.read_csv(path,
-                             converters={'DTE':
-                                         lambda x: pd.Timestamp(str(x))})
-            df = df[['DTE', 'OPEN',
-                     'CLOSE', 'HIGH',
-                     'LOW', 'SM_ID', 'VOLUME']]
-            df['VOLUME'] /= 1000
-            df.columns = ['datetime', 'open', 'close', 'high',
-                          'low', "asset", 'volume']
+            if self.conf.get('chunksize'):
+                df = pd.concat(self.iter_chunks(), ignore_index=True)
+            else:
+                path = get_file_path(self.conf['file'])
+                df = _to_output(pd.read_csv(path, usecols=CSV_COLUMNS,
+                                            dtype=CSV_DTYPES))
+                if filters:
+                    df = select_rows(df, filters).reset_index(drop=True)
             output.update({PANDAS_PORT_NAME: df})
         if self.outport_connected(DASK_CUDF_PORT_NAME):
             path = get_file_path(self.conf['path'])
             df = dask_cudf.read_csv(path+'/*.csv',
                                     parse_dates=['datetime'])
-            output.update({DASK_CUDF_PORT_NAME: df})
+            output.update({DASK_CUDF_PORT_NAME: select_rows(df, filters)})
         return output
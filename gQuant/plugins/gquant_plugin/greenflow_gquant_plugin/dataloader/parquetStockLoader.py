@@ -0,0 +1,332 @@
+import copy
+import datetime
+import os
+from greenflow.dataframe_flow import Node
+from greenflow.dataframe_flow.portsSpecSchema import (PortsSpecSchema,
+                                                      NodePorts,
+                                                      MetaData,
+                                                      ConfSchema)
+import cudf
+import dask_cudf
+import pandas as pd
+import pyarrow.parquet as pq
+from greenflow.dataframe_flow.util import get_file_path
+from .._port_type_node import _PortTypesMixin
+from .csvStockLoader import FILTER_OPS
+
+__all__ = ['ParquetStockLoader', 'partition_dir', 'partition_files']
+
+CUDF_PORT_NAME = 'cudf_out'
+DASK_CUDF_PORT_NAME = 'dask_cudf_out'
+PANDAS_PORT_NAME = 'pandas_out'
+
+COLUMN_TYPES = {"datetime": "date",
+                "asset": "int64",
+                "volume": "float64",
+                "close": "float64",
+                "open": "float64",
+                "high": "float64",
+                "low": "float64"}
+
+
+def partition_dir(path, asset, year):
+    """
+    The directory of the bars of an asset in a year in the dataset at
+    `path`, e.g. `path/asset=22123/year=2010`.
+    """
+    return os.path.join(path, 'asset={}'.format(asset),
+                        'year={}'.format(year))
+
+
+def _parse_partition(name, key):
+    prefix = key + '='
+    if not name.startswith(prefix):
+        return None
+    try:
+        return int(name[len(prefix):])
+    except ValueError:
+        return None
+
+
+def _partitions(path, key):
+    partitions = []
+    for name in os.listdir(path):
+        value = _parse_partition(name, key)
+        if value is not None:
+            partitions.append((value, name))
+    return sorted(partitions)
+
+
+def _to_datetime(date):
+    if date is None or isinstance(date, datetime.datetime):
+        return date
+    return datetime.datetime.strptime(date, '%Y-%m-%d')
+
+
+def _to_date_str(date):
+    return _to_datetime(date).strftime('%Y-%m-%d')
+
+
+def partition_files(path, assets=None, beg=None, end=None):
+    """
+    List the parquet files of the dataset at `path` that may hold bars of
+    the `assets` in the date range [beg, end). The partitions of the other
+    assets and years are skipped without being opened.
+
+    Arguments
+    -------
+    path: str
+        the dataset directory written by `ParquetStockWriter`
+    assets: list of int
+        the asset ids, all the assets if None
+    beg: str or datetime.datetime
+        the start date, inclusive, in format of "Y-m-d"
+    end: str or datetime.datetime
+        the end date, exclusive, in format of "Y-m-d"
+    Returns
+    -------
+    list of str
+    """
+    beg = _to_datetime(beg)
+    end = _to_datetime(end)
+    assets = None if assets is None else set(assets)
+    files = []
+    # the partitions in the order of the asset ids and years, so the bars
+    # are loaded sorted by asset and datetime
+    for asset, asset_name in _partitions(path, 'asset'):
+        if assets is not None and asset not in assets:
+            continue
+        asset_path = os.path.join(path, asset_name)
+        for year, year_name in _partitions(asset_path, 'year'):
+            if beg is not None and datetime.datetime(year + 1, 1, 1) <= beg:
+                continue
+            if end is not None and datetime.datetime(year, 1, 1) >= end:
+                continue
+            year_path = os.path.join(asset_path, year_name)
+            files.extend(os.path.join(year_path, name)
+                         for name in sorted(os.listdir(year_path))
+                         if name.endswith('.parquet'))
+    return files
+
+
+class ParquetStockLoader(_PortTypesMixin, Node):
+    """
+    Load the end of day bar data from the parquet dataset written by
+    `ParquetStockWriter`, partitioned by asset and year. Only the partitions
+    of the selected assets and years are read, and the date range is
+    checked against the row group statistics of the files, so a slice of
+    the history is loaded without reading the rest of it.
+    """
+
+    def ports_setup(self):
+        input_ports = {}
+        output_ports = {
+            CUDF_PORT_NAME: {
+                PortsSpecSchema.port_type: cudf.DataFrame
+            },
+            DASK_CUDF_PORT_NAME: {
+                PortsSpecSchema.port_type: dask_cudf.DataFrame
+            },
+            PANDAS_PORT_NAME: {
+                PortsSpecSchema.port_type: pd.DataFrame
+            }
+        }
+        return NodePorts(inports=input_ports, outports=output_ports)
+
+    def init(self):
+        pass
+
+    def _columns(self):
+        if 'columns' in self.conf:
+            return self.conf['columns']
+        return list(COLUMN_TYPES)
+
+    def meta_setup(self):
+        column_types = {col: COLUMN_TYPES[col] for col in self._columns()
+                        if col in COLUMN_TYPES}
+        out_cols = {
+            CUDF_PORT_NAME: column_types,
+            DASK_CUDF_PORT_NAME: column_types,
+            PANDAS_PORT_NAME: column_types
+        }
+        required = {}
+        metadata = MetaData(inports=required, outports=out_cols)
+        return metadata
+
+    def conf_schema(self):
+        json = {
+            "title": "Stock parquet data loader configure",
+            "type": "object",
+            "description": """Load the stock daily bar data from the parquet
+            dataset partitioned by asset and year""",
+            "properties": {
+                "path":  {
+                    "type": "string",
+                    "description": "path to the directory of the dataset"
+                },
+                "columns": {
+                    "type": "array",
+                    "items": {
+                        "type": "string",
+                        "enum": list(COLUMN_TYPES)
+                    },
+                    "description": """the columns to load, all the columns
+                    if not set"""
+                },
+                "assets": {
+                    "type": "array",
+                    "items": {
+                        "type": "integer"
+                    },
+                    "description": """the asset ids to load, all the assets
+                    if not set"""
+                },
+                "beg":  {
+                    "type": "string",
+                    "description": """start date, inclusive"""
+                },
+                "end":  {
+                    "type": "string",
+                    "description": """end date, exclusive"""
+                },
+                "filters": {
+                    "type": "array",
+                    "items": {
+                        "type": "array",
+                        "items": [
+                            {"type": "string", "enum": list(COLUMN_TYPES)},
+                            {"type": "string", "enum": list(FILTER_OPS)},
+                            {}
+                        ]
+                    },
+                    "description": """[column, op, value] conditions the
+                    loaded rows satisfy, the row groups of the files that
+                    cannot satisfy them are skipped"""
+                }
+            },
+            "required": ["path"],
+        }
+        ui = {
+            "path": {"ui:widget": "PathSelector"}
+        }
+        return ConfSchema(json=json, ui=ui)
+
+    def _files(self):
+        path = get_file_path(self.conf['path'])
+        return partition_files(path, self.conf.get('assets'),
+                               self.conf.get('beg'), self.conf.get('end'))
+
+    def source_files(self):
+        return self._files()
+
+    def _filters(self):
+        filters = []
+        if 'beg' in self.conf:
+            filters.append(('datetime', '>=', _to_datetime(self.conf['beg'])))
+        if 'end' in self.conf:
+            filters.append(('datetime', '<', _to_datetime(self.conf['end'])))
+        filters.extend(tuple(item) for item in self.conf.get('filters', []))
+        return filters if filters else None
+
+    def _select(self, df):
+        """
+        The row group statistics only skip the row groups that cannot
+        satisfy the filters, select the rows satisfying them exactly.
+        """
+        for column, op, value in self._filters() or []:
+            df = df[FILTER_OPS[op](df[column], value)]
+        return df
+
+    def push_predicates(self, oport, predicates):
+        """
+        Load only the rows of the filter nodes downstream. The date ranges
+        and the asset ids narrow the partitions read, the conditions on the
+        other columns skip the row groups.
+        """
+        conf = copy.deepcopy(self.conf)
+        applied = False
+        for column, op, value in predicates:
+            if column == 'datetime':
+                if op in ('>=', '>', '=='):
+                    # '>' loads the rows of the day, the filter drops them
+                    beg = _to_date_str(value)
+                    conf['beg'] = max(conf.get('beg', beg), beg)
+                    applied = True
+                if op in ('<', '<=', '=='):
+                    end = _to_datetime(value)
+                    if op != '<':
+                        end += datetime.timedelta(days=1)
+                    end = _to_date_str(end)
+                    conf['end'] = min(conf.get('end', end), end)
+                    applied = True
+            elif column == 'asset' and op in ('==', 'in'):
+                assets = set([value] if op == '==' else value)
+                if 'assets' in conf:
+                    assets &= set(conf['assets'])
+                conf['assets'] = sorted(assets)
+                applied = True
+            elif column in COLUMN_TYPES and op in FILTER_OPS:
+                conf.setdefault('filters', []).append([column, op, value])
+                applied = True
+        return conf if applied else None
+
+    def _empty(self):
+        """
+        The dataframe of no bars, if no partition is selected.
+        """
+        df = pd.DataFrame()
+        for col in self._columns():
+            dtype = COLUMN_TYPES[col]
+            if dtype == 'date':
+                dtype = 'datetime64[ns]'
+            df[col] = pd.Series(dtype=dtype)
+        return df
+
+    def process(self, inputs):
+        """
+        Load the end of day stock bar data of the selected assets and dates
+        from the parquet dataset
+
+        Arguments
+        -------
+         inputs: list
+             empty list
+        Returns
+        -------
+        dataframe
+        """
+        output = {}
+        files = self._files()
+        columns = self._columns()
+        # the filtered columns are needed to select the rows
+        read_columns = list(columns)
+        for column, _, _ in self._filters() or []:
+            if column not in read_columns:
+                read_columns.append(column)
+        if self.outport_connected(CUDF_PORT_NAME):
+            if files:
+                df = cudf.read_parquet(files, columns=read_columns,
+                                       filters=self._filters())
+                df = self._select(df)[columns].reset_index(drop=True)
+            else:
+                df = cudf.DataFrame.from_pandas(self._empty())
+            output.update({CUDF_PORT_NAME: df})
+        if self.outport_connected(PANDAS_PORT_NAME):
+            if files:
+                table = pq.read_table(files, columns=read_columns,
+                                      filters=self._filters(),
+                                      partitioning=None)
+                df = table.to_pandas()[columns]
+            else:
+                df = self._empty()
+            output.update({PANDAS_PORT_NAME: df})
+        if self.outport_connected(DASK_CUDF_PORT_NAME):
+            if files:
+                df = dask_cudf.read_parquet(files, columns=read_columns,
+                                            filters=self._filters())
+                df = self._select(df)[columns]
+            else:
+                df = dask_cudf.from_cudf(
+                    cudf.DataFrame.from_pandas(self._empty()), npartitions=1)
+            output.update({DASK_CUDF_PORT_NAME: df})
+        return output
@@ -0,0 +1,113 @@
+import os
+from greenflow.dataframe_flow import Node
+from greenflow.dataframe_flow.portsSpecSchema import ConfSchema
+import dask_cudf
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from greenflow.dataframe_flow.util import get_file_path
+from .._port_type_node import _PortTypesMixin
+from .parquetStockLoader import partition_dir
+
+__all__ = ['ParquetStockWriter', 'write_partitions']
+
+PART_FILE = 'part.parquet'
+
+
+def write_partitions(df, path, row_group_size=None):
+    """
+    Write the bars of a pandas dataframe into the parquet dataset at `path`,
+    one file per asset and year sorted by datetime, so the row group
+    statistics of the datetime column are tight. The partitions present in
+    the dataframe are replaced, the other partitions are kept.
+
+    Arguments
+    -------
+    df: pandas.DataFrame
+        the bars with the `asset` and `datetime` columns
+    path: str
+        the dataset directory
+    row_group_size: int
+        the maximum number of rows of a row group
+    """
+    years = df['datetime'].dt.year
+    for (asset, year), group in df.groupby([df['asset'], years], sort=False):
+        directory = partition_dir(path, asset, year)
+        os.makedirs(directory, exist_ok=True)
+        group = group.sort_values('datetime', kind='mergesort')
+        table = pa.Table.from_pandas(group, preserve_index=False)
+        pq.write_table(table, os.path.join(directory, PART_FILE),
+                       row_group_size=row_group_size)
+
+
+class ParquetStockWriter(_PortTypesMixin, Node):
+    """
+    Write the end of day bar data into a parquet dataset partitioned by
+    asset and year, which `ParquetStockLoader` loads without parsing the
+    csv files again.
+    """
+    mutates_inputs = False
+    # writes the dataset, never skipped by the cached runs
+    deterministic = False
+
+    def init(self):
+        _PortTypesMixin.init(self)
+        self.INPUT_PORT_NAME = 'stock_in'
+        self.OUTPUT_PORT_NAME = 'stock_out'
+
+    def meta_setup(self):
+        cols_required = {"datetime": "date",
+                         "asset": "int64"}
+        return _PortTypesMixin.meta_setup(self, required=cols_required)
+
+    def ports_setup(self):
+        return _PortTypesMixin.ports_setup(self)
+
+    def conf_schema(self):
+        json = {
+            "title": "Stock parquet data writer configure",
+            "type": "object",
+            "description": """Write the stock daily bar data into the parquet
+            dataset partitioned by asset and year""",
+            "properties": {
+                "path":  {
+                    "type": "string",
+                    "description": "path to the directory of the dataset"
+                },
+                "row_group_size":  {
+                    "type": "integer",
+                    "description": """maximum number of rows of a row group
+                    in a file""",
+                    "minimum": 1
+                }
+            },
+            "required": ["path"],
+        }
+        ui = {
+            "path": {"ui:widget": "PathSelector"}
+        }
+        return ConfSchema(json=json, ui=ui)
+
+    def process(self, inputs):
+        """
+        Write the input bars into the parquet dataset at `path` in the
+        nodes' conf and pass them through.
+
+        Arguments
+        -------
+         inputs: list
+            list of input dataframes.
+        Returns
+        -------
+        dataframe
+        """
+        raw_input_df = inputs[self.INPUT_PORT_NAME]
+        if isinstance(raw_input_df, dask_cudf.DataFrame):
+            input_df = raw_input_df.compute()  # get the computed value
+        else:
+            input_df = raw_input_df
+        if not isinstance(input_df, pd.DataFrame):
+            input_df = input_df.to_pandas()
+        write_partitions(input_df, get_file_path(self.conf['path']),
+                         self.conf.get('row_group_size'))
+        return {self.OUTPUT_PORT_NAME: raw_input_df}
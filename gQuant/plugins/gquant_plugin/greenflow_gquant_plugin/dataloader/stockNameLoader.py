@@ -57,6 +57,9 @@ class StockNameLoader(_PortTypesMixin, Node):
         metadata = MetaData(inports=required, outports=out_cols)
         return metadata
 
+    def source_files(self):
+        return [get_file_path(self.conf['file'])]
+
     def conf_schema(self):
         json = {
             "title": "Stock name csv file loader configure",
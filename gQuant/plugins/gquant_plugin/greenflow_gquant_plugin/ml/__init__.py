@@ -1,8 +1,13 @@
-from .splitDataNode import DataSplittingNode
-from .xgboostNode import TrainXGBoostNode, InferXGBoostNode
-from .forestInference import ForestInferenceNode
-from .gridRandomSearchNode import GridRandomSearchNode
+from greenflow.dataframe_flow.util import lazy_module_attrs
 
-__all__ = ["DataSplittingNode", "TrainXGBoostNode",
-           "InferXGBoostNode", "ForestInferenceNode",
-           "GridRandomSearchNode"]
+# node name -> module, a module is imported when its node is first used
+_NODE_INDEX = {
+    'DataSplittingNode': '.splitDataNode',
+    'TrainXGBoostNode': '.xgboostNode',
+    'InferXGBoostNode': '.xgboostNode',
+    'ForestInferenceNode': '.forestInference',
+    'GridRandomSearchNode': '.gridRandomSearchNode'
+}
+
+__all__ = list(_NODE_INDEX)
+__getattr__, __dir__ = lazy_module_attrs(__name__, _NODE_INDEX)
@@ -2,11 +2,15 @@ from greenflow.plugin_nodes.util.contextCompositeNode import ContextCompositeNod
 from greenflow.dataframe_flow.portsSpecSchema import (ConfSchema, MetaData,
                                                    PortsSpecSchema, NodePorts)
 from greenflow.dataframe_flow.cache import CACHE_SCHEMA
-from greenflow.dataframe_flow import TaskGraph
+from greenflow.dataframe_flow import TaskGraph, ParameterSweep
 from greenflow.dataframe_flow import Node
 from greenflow.dataframe_flow.util import get_file_path
 from greenflow.dataframe_flow.taskSpecSchema import TaskSpecSchema
 from jsonpath_ng import parse
+from .localSearch import TrialPool
+import itertools
+import math
+import random
 import uuid
 import cudf
 import pandas
@@ -15,6 +19,20 @@ from copy import deepcopy
 __all__ = ["GridRandomSearchNode"]
 
 
+def _loguniform(min_bound, max_bound, base=10):
+    return base ** random.uniform(math.log(min_bound, base),
+                                  math.log(max_bound, base))
+
+
+# the samplers of the local engines, drawing as the tune functions do
+_SAMPLERS = {
+    'randn': lambda args: random.gauss(*args),
+    'uniform': lambda args: random.uniform(*args),
+    'loguniform': lambda args: _loguniform(*args),
+    'choice': random.choice
+}
+
+
 _CONF_JSON = {
     "description": """
     Use Tune to specify a grid search
@@ -253,6 +271,70 @@ _CONF_JSON = {
                 }
             }
         },
+        "engine": {
+            "type": "string",
+            "description": """the search engine. 'tune' runs the trials
+             with Ray Tune. 'sweep' runs the trials in this process,
+             computing the sub-graph nodes not affected by the parameters
+             once for all the trials. 'processes' runs the trials in a pool
+             of local processes, the input dataframes are shared with them
+             in shared memory. The local engines repeat the grid
+             `num_samples` times if there are sampled parameters""",
+            "enum": [
+                "tune",
+                "sweep",
+                "processes"
+            ],
+            "default": "tune"
+        },
+        "scheduler": {
+            "type": "object",
+            "description": """early stopping of the poor configurations.
+             'successive_halving' evaluates all the configurations with the
+             `min_resource` value of the `resource` context parameter, e.g.
+             the boosting rounds or the length of the training period, then
+             keeps the best 1 / `reduction_factor` of them for the next
+             rung, where the resource is `reduction_factor` times larger,
+             up to `max_resource`. The 'tune' engine uses the ASHA
+             scheduler of Ray Tune over the same rungs""",
+            "properties": {
+                "name": {
+                    "type": "string",
+                    "enum": [
+                        "none",
+                        "successive_halving"
+                    ],
+                    "default": "none"
+                },
+                "resource": {
+                    "type": "string",
+                    "description": """the context parameter of the
+                     resource given to the trials"""
+                },
+                "min_resource": {
+                    "type": "number",
+                    "description": "the resource of the first rung",
+                    "default": 1
+                },
+                "max_resource": {
+                    "type": "number",
+                    "description": "the resource of the last rung"
+                },
+                "reduction_factor": {
+                    "type": "number",
+                    "description": """the resource growth and the
+                     pruning rate between the rungs""",
+                    "default": 3,
+                    "exclusiveMinimum": 1
+                }
+            }
+        },
+        "max_workers": {
+            "type": "integer",
+            "description": """number of worker processes of the
+             'processes' engine, the number of CPUs if not set""",
+            "minimum": 1
+        },
         "tune": {
             "type": "object",
             "properties": {
@@ -323,7 +405,8 @@ class GridRandomSearchNode(ContextCompositeNode):
             if 'context' in conf:
                 json = deepcopy(_CONF_JSON)
                 metrics = []
-                task_graph.build(replace=replacementObj)
+                task_graph = self._built_task_graph(cache_key, task_graph,
+                                                    replacementObj)
                 for t in task_graph:
                     node_id = t.get('id')
                     if node_id != '':
@@ -339,6 +422,8 @@ class GridRandomSearchNode(ContextCompositeNode):
                         context.keys())
                 json['properties']['metrics'][
                     'items']['enum'] = metrics
+                json['properties']['scheduler']['properties'][
+                    'resource']['enum'] = list(context.keys())
                 if 'metrics' in self.conf:
                     json['properties']['best'][
                         'properties']['metric']['enum'] = self.conf['metrics']
@@ -390,113 +475,288 @@ class GridRandomSearchNode(ContextCompositeNode):
                         pass
         return out_meta
 
-    def process(self, inputs):
+    def _search_task_graph(self, myinputs):
+        """
+        Load the sub-graph of the search, its input nodes fed by
+        `myinputs`. Returns the task graph and the replacement obj
+        connecting the feeders.
+        """
+        task_graph = TaskGraph.load_taskgraph(
+            get_file_path(self.conf['taskgraph']))
+        task_graph.build()
+
+        replaceObj = {}
+        input_feeders = []
+
+        def inputNode_fun(inputNode, in_ports):
+            inports = inputNode.ports_setup().inports
+
+            class InputFeed(Node):
+
+                def meta_setup(self):
+                    output = {}
+                    for inp in inputNode.inputs:
+                        output[inp['to_port']] = inp[
+                            'from_node'].meta_setup().outports[
+                                inp['from_port']]
+                    # it will be something like { input_port: columns }
+                    return MetaData(inports={}, outports=output)
+
+                def ports_setup(self):
+                    # it will be something like { input_port: types }
+                    return NodePorts(inports={}, outports=inports)
+
+                def conf_schema(self):
+                    return ConfSchema()
+
+                def process(self, empty):
+                    output = {}
+                    for key in inports.keys():
+                        if (inputNode.uid+'@'+key
+                                in myinputs):
+                            output[key] = myinputs[
+                                inputNode.uid+'@'+key]
+                    return output
+
+            uni_id = str(uuid.uuid1())
+            obj = {
+                TaskSpecSchema.task_id: uni_id,
+                TaskSpecSchema.conf: {},
+                TaskSpecSchema.node_type: InputFeed,
+                TaskSpecSchema.inputs: []
+            }
+            input_feeders.append(obj)
+            newInputs = {}
+            for key in inports.keys():
+                if inputNode.uid+'@'+key in myinputs:
+                    newInputs[key] = uni_id+'.'+key
+            for inp in inputNode.inputs:
+                if inp['to_port'] not in in_ports:
+                    # need to keep the old connections
+                    newInputs[inp['to_port']] = (
+                        inp['from_node'].uid + '.' + inp['from_port'])
+            replaceObj.update({inputNode.uid: {
+                TaskSpecSchema.inputs: newInputs}
+            })
+
+        def outNode_fun(outNode, out_ports):
+            pass
+
+        self._make_sub_graph_connection(task_graph,
+                                        inputNode_fun, outNode_fun)
+
+        task_graph.extend(input_feeders)
+        return task_graph, replaceObj
+
+    def _search_trial(self, myinputs, config):
+        """
+        Run the sub-graph with the context parameter values of `config`.
+        Returns the metrics dict.
+        """
+        task_graph, replaceObj = self._search_task_graph(myinputs)
+        outputLists = self.conf['metrics']
+        self.update_conf_for_search(replaceObj, task_graph, config)
+        result = task_graph.run(outputLists, replace=replaceObj)
+        return {item: result[item] for item in outputLists}
+
+    def _tune_best_config(self, inputs):
         import ray
         from ray import tune
+        data_store = {}
+        for key in inputs.keys():
+            v = inputs[key]
+            if isinstance(v, cudf.DataFrame):
+                # it is a work around,
+                # the ray.put doesn't support GPU cudf
+                data_store[key] = ray.put(v.to_pandas())
+            else:
+                data_store[key] = ray.put(v)
+        # here we need to do the hyper parameter search
+
+        def search_fun(config, checkpoint_dir=None):
+            myinputs = {}
+            for key in data_store.keys():
+                v = ray.get(data_store[key])
+                if isinstance(v, pandas.DataFrame):
+                    myinputs[key] = cudf.from_pandas(v)
+                else:
+                    myinputs[key] = v
+            if resources is None:
+                tune.report(**self._search_trial(myinputs, config))
+                return
+            # a report per rung, the scheduler stops the poor trials
+            for resource in resources:
+                trial = dict(config)
+                trial[resource_name] = resource
+                tune.report(**self._search_trial(myinputs, trial))
+        resources = None
+        run_kwargs = {}
+        if self._halving():
+            from ray.tune.schedulers import ASHAScheduler
+            resources = self._rung_resources()
+            resource_name = self.conf['scheduler']['resource']
+            run_kwargs['scheduler'] = ASHAScheduler(
+                time_attr='training_iteration',
+                metric=self.conf['best']['metric'],
+                mode=self.conf['best'].get('mode', 'max'),
+                max_t=len(resources), grace_period=1,
+                reduction_factor=self.conf['scheduler'].get(
+                    'reduction_factor', 3))
+        config = {}
+        for para in self.conf['parameters']:
+            fun_name = para['search']['function']
+            fun = getattr(tune, fun_name)
+            if fun_name == 'grid_search' or fun_name == 'choice':
+                config[para['name']] = fun(para['search']['args'])
+            else:
+                config[para['name']] = fun(*para['search']['args'])
+        analysis = tune.run(search_fun, **self.conf['tune'], config=config,
+                            **run_kwargs)
+        if resources is None:
+            return analysis.get_best_config(**self.conf['best'])
+        # the trials which ran all the rungs
+        trials = [trial for trial in analysis.trials
+                  if trial.last_result.get('training_iteration') ==
+                  len(resources)]
+        configs = []
+        for trial in trials:
+            config = dict(trial.config)
+            config[resource_name] = resources[-1]
+            configs.append(config)
+        return self._best_config(
+            configs, [trial.last_result for trial in trials])
+
+    def _search_configs(self):
+        """
+        The trial configs of the local engines, the product of the
+        grid_search values. It is repeated `num_samples` times with the
+        other parameters sampled anew if there are sampled parameters.
+        """
+        grids = []
+        sampled = []
+        for para in self.conf['parameters']:
+            fun_name = para['search']['function']
+            args = para['search']['args']
+            if fun_name == 'grid_search':
+                grids.append([(para['name'], val) for val in args])
+            elif fun_name in _SAMPLERS:
+                sampled.append((para['name'], _SAMPLERS[fun_name], args))
+            else:
+                raise ValueError(
+                    'Unknown search function "{}" for parameter "{}"'
+                    .format(fun_name, para['name']))
+        num_samples = 1
+        if sampled:
+            num_samples = int(self.conf.get('tune', {}).get('num_samples',
+                                                            1))
+        configs = []
+        for _ in range(num_samples):
+            for items in itertools.product(*grids):
+                config = dict(items)
+                for name, sampler, args in sampled:
+                    config[name] = sampler(args)
+                configs.append(config)
+        return configs
+
+    def _ranked(self, metrics):
+        """
+        The indices of the metrics dicts, the best first.
+        """
+        metric = self.conf['best']['metric']
+        return sorted(range(len(metrics)),
+                      key=lambda index: metrics[index][metric],
+                      reverse=self.conf['best'].get('mode', 'max') == 'max')
+
+    def _best_config(self, configs, metrics):
+        return configs[self._ranked(metrics)[0]]
+
+    def _halving(self):
+        return self.conf.get('scheduler', {}).get(
+            'name', 'none') == 'successive_halving'
+
+    def _rung_resources(self):
+        """
+        The resources of the successive halving rungs, from `min_resource`
+        growing by `reduction_factor` up to `max_resource`.
+        """
+        sched = self.conf['scheduler']
+        if sched.get('resource') not in self.conf.get('context', {}):
+            raise ValueError(
+                'The scheduler resource "{}" is not a context parameter'
+                .format(sched.get('resource')))
+        factor = sched.get('reduction_factor', 3)
+        low = sched.get('min_resource', 1)
+        high = sched['max_resource']
+        if factor <= 1 or not 0 < low <= high:
+            raise ValueError(
+                'The scheduler needs reduction_factor > 1 and '
+                '0 < min_resource <= max_resource')
+        resources = []
+        resource = low
+        while resource < high:
+            resources.append(resource)
+            resource *= factor
+        resources.append(high)
+        if all(float(val).is_integer() for val in (low, high, factor)):
+            resources = [int(round(val)) for val in resources]
+        return resources
+
+    def _search_best_config(self, configs, evaluate):
+        """
+        The best of the `configs`, `evaluate` returns the metrics dicts of a
+        list of configs. With the successive halving scheduler the configs
+        are evaluated rung by rung, keeping the best of every rung.
+        """
+        if not self._halving():
+            return self._best_config(configs, evaluate(configs))
+        resource_name = self.conf['scheduler']['resource']
+        factor = self.conf['scheduler'].get('reduction_factor', 3)
+        resources = self._rung_resources()
+        for rung, resource in enumerate(resources):
+            trials = []
+            for config in configs:
+                trial = dict(config)
+                trial[resource_name] = resource
+                trials.append(trial)
+            ranked = self._ranked(evaluate(trials))
+            if rung == len(resources) - 1:
+                return trials[ranked[0]]
+            keep = max(1, int(len(configs) / factor))
+            configs = [configs[index] for index in ranked[:keep]]
+
+    def _sweep_best_config(self, inputs):
+        task_graph, replaceObj = self._search_task_graph(inputs)
+        sweep = ParameterSweep(task_graph, self.conf['metrics'])
+
+        def evaluate(configs):
+            replaces = []
+            for config in configs:
+                replace = deepcopy(replaceObj)
+                # the context values are written into the confs of the
+                # tasks, keep the confs of every config
+                self.update_conf_for_search(replace, task_graph, config)
+                replaces.append(deepcopy(replace))
+            return sweep.run(replaces)
+        return self._search_best_config(self._search_configs(), evaluate)
+
+    def _processes_best_config(self, inputs):
+        with TrialPool(self, inputs,
+                       max_workers=self.conf.get('max_workers')) as pool:
+            return self._search_best_config(self._search_configs(),
+                                            pool.map)
+
+    def process(self, inputs):
         if self.INPUT_CONFIG in inputs:
             self.conf.update(inputs[self.INPUT_CONFIG].data)
         output = {}
         if self.outport_connected(self.OUTPUT_CONFIG):
-            data_store = {}
-            for key in inputs.keys():
-                v = inputs[key]
-                if isinstance(v, cudf.DataFrame):
-                    # it is a work around,
-                    # the ray.put doesn't support GPU cudf
-                    data_store[key] = ray.put(v.to_pandas())
-                else:
-                    data_store[key] = ray.put(v)
-            # here we need to do the hyper parameter search
-
-            def search_fun(config, checkpoint_dir=None):
-                myinputs = {}
-                for key in data_store.keys():
-                    v = ray.get(data_store[key])
-                    if isinstance(v, pandas.DataFrame):
-                        myinputs[key] = cudf.from_pandas(v)
-                    else:
-                        myinputs[key] = v
-                task_graph = TaskGraph.load_taskgraph(
-                    get_file_path(self.conf['taskgraph']))
-                task_graph.build()
-
-                outputLists = []
-                replaceObj = {}
-                input_feeders = []
-
-                def inputNode_fun(inputNode, in_ports):
-                    inports = inputNode.ports_setup().inports
-
-                    class InputFeed(Node):
-
-                        def meta_setup(self):
-                            output = {}
-                            for inp in inputNode.inputs:
-                                output[inp['to_port']] = inp[
-                                    'from_node'].meta_setup().outports[
-                                        inp['from_port']]
-                            # it will be something like { input_port: columns }
-                            return MetaData(inports={}, outports=output)
-
-                        def ports_setup(self):
-                            # it will be something like { input_port: types }
-                            return NodePorts(inports={}, outports=inports)
-
-                        def conf_schema(self):
-                            return ConfSchema()
-
-                        def process(self, empty):
-                            output = {}
-                            for key in inports.keys():
-                                if (inputNode.uid+'@'+key
-                                        in myinputs):
-                                    output[key] = myinputs[
-                                        inputNode.uid+'@'+key]
-                            return output
-
-                    uni_id = str(uuid.uuid1())
-                    obj = {
-                        TaskSpecSchema.task_id: uni_id,
-                        TaskSpecSchema.conf: {},
-                        TaskSpecSchema.node_type: InputFeed,
-                        TaskSpecSchema.inputs: []
-                    }
-                    input_feeders.append(obj)
-                    newInputs = {}
-                    for key in inports.keys():
-                        if inputNode.uid+'@'+key in myinputs:
-                            newInputs[key] = uni_id+'.'+key
-                    for inp in inputNode.inputs:
-                        if inp['to_port'] not in in_ports:
-                            # need to keep the old connections
-                            newInputs[inp['to_port']] = (
-                                inp['from_node'].uid + '.' + inp['from_port'])
-                    replaceObj.update({inputNode.uid: {
-                        TaskSpecSchema.inputs: newInputs}
-                    })
-
-                def outNode_fun(outNode, out_ports):
-                    pass
-                outputLists = self.conf['metrics']
-
-                self._make_sub_graph_connection(task_graph,
-                                                inputNode_fun, outNode_fun)
-
-                task_graph.extend(input_feeders)
-                self.update_conf_for_search(replaceObj, task_graph, config)
-                result = task_graph.run(outputLists, replace=replaceObj)
-                metric_report = {item: result[item] for item in outputLists}
-                tune.report(**metric_report)
-            config = {}
-            for para in self.conf['parameters']:
-                fun_name = para['search']['function']
-                fun = getattr(tune, fun_name)
-                if fun_name == 'grid_search' or fun_name == 'choice':
-                    config[para['name']] = fun(para['search']['args'])
-                else:
-                    config[para['name']] = fun(*para['search']['args'])
-            analysis = tune.run(search_fun, **self.conf['tune'], config=config)
-            best = analysis.get_best_config(**self.conf['best'])
+            engine = self.conf.get('engine', 'tune')
+            if engine == 'sweep':
+                best = self._sweep_best_config(inputs)
+            elif engine == 'processes':
+                best = self._processes_best_config(inputs)
+            else:
+                best = self._tune_best_config(inputs)
             for key in best.keys():
                 self.conf['context'][key]['value'] = best[key]
             output[self.OUTPUT_CONFIG] = self.conf
@@ -0,0 +1,162 @@
+"""
+Run the trials of a hyper-parameter search in a pool of local processes.
+
+The dataframe inputs of the search are written once into shared memory as
+Arrow IPC streams. The worker processes map them when they start, instead
+of receiving a serialized copy of the inputs with every trial.
+"""
+import collections
+import concurrent.futures
+import multiprocessing
+from multiprocessing import shared_memory
+import cloudpickle
+import cudf
+import pandas
+from greenflow.dataframe_flow.cacheBackend import _to_arrow, _from_arrow
+
+__all__ = ['SharedFrame', 'share_frame', 'attach_frame', 'TrialPool',
+           'run_trials']
+
+# name: name of the shared memory block
+# size: bytes of the Arrow IPC stream in the block
+SharedFrame = collections.namedtuple('SharedFrame', 'name size')
+
+# the search node, its inputs and the mapped shared memory blocks of a
+# worker process, set up by _init_worker
+_WORKER = {}
+
+
+def share_frame(df):
+    """
+    Write the pandas or cudf dataframe into a new shared memory block. The
+    caller closes and unlinks the block once the workers are done.
+
+    Returns
+    -----
+    tuple
+        (SharedFrame, multiprocessing.shared_memory.SharedMemory)
+    """
+    import pyarrow as pa
+    table = _to_arrow(df, 'search', 'input')
+    sizer = pa.MockOutputStream()
+    with pa.ipc.new_stream(sizer, table.schema) as writer:
+        writer.write_table(table)
+    size = sizer.size()
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    sink = pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf))
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    # release the exported buffer, the block cannot be closed before
+    del writer, sink
+    return SharedFrame(shm.name, size), shm
+
+
+def attach_frame(shared):
+    """
+    Read the dataframe of a SharedFrame. The host columns may reference the
+    shared memory, keep the block open while the dataframe is in use.
+
+    Returns
+    -----
+    tuple
+        (dataframe, multiprocessing.shared_memory.SharedMemory)
+    """
+    import pyarrow as pa
+    shm = shared_memory.SharedMemory(name=shared.name)
+    buf = pa.py_buffer(shm.buf)[:shared.size]
+    table = pa.ipc.open_stream(buf).read_all()
+    return _from_arrow(table), shm
+
+
+def _init_worker(payload):
+    node, inputs = cloudpickle.loads(payload)
+    blocks = []
+    for key, val in inputs.items():
+        if isinstance(val, SharedFrame):
+            inputs[key], shm = attach_frame(val)
+            blocks.append(shm)
+    _WORKER.update(node=node, inputs=inputs, blocks=blocks)
+
+
+def _run_trial(config):
+    return _WORKER['node']._search_trial(_WORKER['inputs'], config)
+
+
+class TrialPool(object):
+    """
+    Pool of processes running the search trials of a GridRandomSearchNode,
+    as a context manager. The workers are spawned, not forked, so each one
+    sets up its own GPU context. The inputs are shared with the workers
+    once, for all the trials mapped over the pool.
+
+    Arguments
+    -------
+    node: GridRandomSearchNode
+        the search node, sent to every worker once
+    inputs: dict
+        the node inputs, the dataframes are handed over in shared memory
+    max_workers: int
+        number of worker processes, the number of CPUs if None
+    """
+
+    def __init__(self, node, inputs, max_workers=None):
+        self.node = node
+        self.inputs = inputs
+        self.max_workers = max_workers
+        self.__blocks = []
+        self.__pool = None
+
+    def __enter__(self):
+        try:
+            shared = {}
+            for key, val in self.inputs.items():
+                if isinstance(val, (cudf.DataFrame, pandas.DataFrame)):
+                    shared[key], shm = share_frame(val)
+                    self.__blocks.append(shm)
+                else:
+                    shared[key] = val
+            payload = cloudpickle.dumps((self.node, shared))
+            context = multiprocessing.get_context('spawn')
+            self.__pool = concurrent.futures.ProcessPoolExecutor(
+                self.max_workers, mp_context=context,
+                initializer=_init_worker, initargs=(payload, ))
+        except BaseException:
+            self.close()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.__pool is not None:
+            self.__pool.shutdown()
+            self.__pool = None
+        for shm in self.__blocks:
+            shm.close()
+            shm.unlink()
+        self.__blocks = []
+
+    def map(self, configs):
+        """
+        Run the trials of the context parameter values `configs`.
+
+        Returns
+        -----
+        list
+            the metrics dict of every trial
+        """
+        return list(self.__pool.map(_run_trial, configs))
+
+
+def run_trials(node, inputs, configs, max_workers=None):
+    """
+    Run the search trials of the `configs` in a TrialPool.
+
+    Returns
+    -----
+    list
+        the metrics dict of every trial
+    """
+    with TrialPool(node, inputs, max_workers) as pool:
+        return pool.map(configs)
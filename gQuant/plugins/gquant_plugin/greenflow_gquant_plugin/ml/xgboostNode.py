@@ -16,6 +16,7 @@ __all__ = ['TrainXGBoostNode', 'InferXGBoostNode']
 
 
 class TrainXGBoostNode(_PortTypesMixin, Node):
+    mutates_inputs = False
 
     def init(self):
         self.INPUT_PORT_NAME = 'in'
@@ -344,6 +345,8 @@ class TrainXGBoostNode(_PortTypesMixin, Node):
 
 
 class InferXGBoostNode(Node):
+    # only the data frame gets the prediction column added
+    mutates_inputs = ['data_in']
 
     def init(self):
         self.INPUT_PORT_NAME = 'data_in'
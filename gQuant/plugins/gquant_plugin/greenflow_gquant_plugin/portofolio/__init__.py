@@ -1,3 +1,12 @@
-from .simpleAveragePortOpt import SimpleAveragePortOpt
+from greenflow.dataframe_flow.util import lazy_module_attrs
 
-__all__ = ["SimpleAveragePortOpt"]
+# node name -> module, a module is imported when its node is first used
+_NODE_INDEX = {
+    'SimpleAveragePortOpt': '.simpleAveragePortOpt',
+    'MinVariancePortOpt': '.riskPortOpt',
+    'MeanVariancePortOpt': '.riskPortOpt',
+    'HRPPortOpt': '.riskPortOpt'
+}
+
+__all__ = list(_NODE_INDEX)
+__getattr__, __dir__ = lazy_module_attrs(__name__, _NODE_INDEX)
@@ -0,0 +1,461 @@
+"""
+Batched risk models and allocations of the portfolio optimizer nodes.
+
+The covariance of the asset returns over a window of `L` time steps is
+estimated for many rebalance steps at once as the Ledoit-Wolf shrinkage of
+the sample covariance towards a scaled identity,
+
+    cov = d * I + u.T @ u
+
+with the scalar `d` and the `L x N` factor `u` per rebalance step. The
+`N x N` matrices are not formed for the mean-variance allocations, they are
+solved with the Woodbury identity in the `L` dimensional space of the
+window. The arrays are NumPy or CuPy arrays, the leading axis being the
+rebalance step.
+"""
+import collections
+import numpy as np
+
+__all__ = ['RiskModel', 'risk_model', 'solve_covariance',
+           'mean_variance_weights', 'project_capped_simplex',
+           'bounded_mean_variance_weights', 'seriation', 'hrp_weights',
+           'rebalance_weights']
+
+# bytes of the return windows of a batch of rebalance steps
+BATCH_BYTES = 1 << 28
+
+# d: step vector of the target variances
+# u: step x window x asset covariance factors
+# gram: step x window x window Gram matrices `u @ u.T`
+# eligible: step x asset mask of the assets with a full window
+# means: step x asset mean returns of the windows
+RiskModel = collections.namedtuple('RiskModel', 'd u gram eligible means')
+
+
+def _array_module(arr):
+    """NumPy for a NumPy array, CuPy for a device array. CuPy is imported
+    only for the arrays of a cudf input."""
+    if isinstance(arr, np.ndarray):
+        return np
+    import cupy
+    return cupy.get_array_module(arr)
+
+
+def _to_host(arr):
+    return arr.get() if hasattr(arr, 'get') else arr
+
+
+def _factor_product(u, lam):
+    """`u.T @ lam` of every step, as a row vector product of the
+    contiguous factors."""
+    xp = _array_module(u)
+    return xp.matmul(lam[:, None, :], u)[:, 0, :]
+
+
+def risk_model(returns, steps, window, shrinkage=None):
+    """
+    Estimate the covariances of the returns of the windows before the
+    rebalance steps, the Ledoit-Wolf shrinkage of the sample covariances
+    towards the scaled identity. The shrinkage is computed from the window
+    x window Gram matrices. The assets with a missing return in a window
+    are not eligible at the step.
+
+    Arguments
+    -------
+    returns: numpy.ndarray or cupy.ndarray
+        time x asset matrix of the returns, NaN for no bar
+    steps: numpy.ndarray or cupy.ndarray
+        the rebalance steps, each at least `window`
+    window: int
+        the number of time steps of the windows
+    shrinkage: float
+        the shrinkage intensity in (0, 1], estimated if None. Without
+        shrinkage the identity part of the factored covariances is zero
+        and they cannot be solved.
+
+    Returns
+    -----
+    RiskModel
+    """
+    if shrinkage is not None and not 0 < shrinkage <= 1:
+        raise ValueError(
+            'The shrinkage {} is not in (0, 1]'.format(shrinkage))
+    xp = _array_module(returns)
+    index = steps[:, None] - window + xp.arange(window)
+    x = returns[index]
+    eligible = ~xp.isnan(x).any(axis=1)
+    x = xp.where(eligible[:, None, :], x, 0.0)
+    means = x.mean(axis=1)
+    x -= means[:, None, :]
+
+    num = eligible.sum(axis=1)
+    gram = xp.matmul(x, x.transpose(0, 2, 1))
+    mu = xp.trace(gram, axis1=1, axis2=2) / window / xp.maximum(num, 1)
+    # squared Frobenius norms of the sample covariance and of its distance
+    # to the target
+    norm2 = (gram ** 2).sum(axis=(1, 2)) / window ** 2
+    delta2 = norm2 - mu ** 2 * num
+    if shrinkage is None:
+        diag = xp.diagonal(gram, axis1=1, axis2=2)
+        beta2 = (diag ** 2).sum(axis=1) / window ** 2 - norm2 / window
+        beta2 = xp.clip(beta2, 0.0, delta2)
+        shrinkage = xp.where(delta2 > 0,
+                             beta2 / xp.where(delta2 > 0, delta2, 1.0), 1.0)
+    else:
+        shrinkage = xp.full(len(x), float(shrinkage))
+    scale = (1.0 - shrinkage) / window
+    x *= xp.sqrt(scale)[:, None, None]
+    gram *= scale[:, None, None]
+    return RiskModel(shrinkage * mu, x, gram, eligible, means)
+
+
+def solve_covariance(model, b):
+    """
+    Solve `cov @ w = b` over the eligible assets of every step with the
+    Woodbury identity, the solutions of the other assets are zeros.
+
+    Arguments
+    -------
+    model: RiskModel
+    b: step x asset right hand sides
+
+    Returns
+    -----
+    step x asset solutions
+    """
+    xp = _array_module(model.u)
+    dinv = 1.0 / xp.where(model.d > 0, model.d, xp.inf)
+    y = xp.where(model.eligible, b * dinv[:, None], 0.0)
+    inner = model.gram * dinv[:, None, None]
+    inner += xp.eye(inner.shape[1])
+    z = xp.linalg.solve(inner, xp.matmul(model.u, y[:, :, None]))
+    correction = _factor_product(model.u, z[:, :, 0])
+    return y - correction * dinv[:, None]
+
+
+def mean_variance_weights(model, risk_aversion=None):
+    """
+    The fully invested weights maximizing `means @ w - risk_aversion / 2 *
+    w @ cov @ w`, the minimum variance weights if `risk_aversion` is None.
+    The weights are not bounded.
+
+    Returns
+    -----
+    step x asset weights, zeros at the steps without eligible assets
+    """
+    xp = _array_module(model.u)
+    inv_ones = solve_covariance(model, model.eligible.astype(model.u.dtype))
+    total = inv_ones.sum(axis=1)
+    valid = total > 0
+    total = xp.where(valid, total, 1.0)
+    if risk_aversion is None:
+        weights = inv_ones / total[:, None]
+    else:
+        inv_means = solve_covariance(model, model.means)
+        nu = (risk_aversion - inv_means.sum(axis=1)) / total
+        weights = (inv_means + nu[:, None] * inv_ones) / risk_aversion
+    return xp.where(valid[:, None], weights, 0.0)
+
+
+def project_capped_simplex(v, eligible, lower, upper):
+    """
+    Euclidean projection of the rows of `v` on the weights of the eligible
+    assets in [lower, upper] summing to 1, the other weights being zeros.
+    The sum of the clipped `v - tau` is piecewise linear in `tau`, its
+    breakpoints are sorted to find the `tau` of the sum 1. `upper` is
+    raised to 1 / number of eligible assets if it is lower.
+    """
+    xp = _array_module(v)
+    num = eligible.sum(axis=1)
+    upper = xp.maximum(upper, 1.0 / xp.maximum(num, 1))[:, None]
+    width = upper - lower
+    total = 1.0 - lower * num[:, None]
+    shifted = v - lower
+    # the sum decreases by one slope unit at every `shifted - width` and
+    # increases back at every `shifted`
+    points = xp.concatenate([shifted - width, shifted], axis=1)
+    slopes = xp.concatenate([-xp.ones_like(v), xp.ones_like(v)], axis=1)
+    mask = xp.concatenate([eligible, eligible], axis=1)
+    # the points of the other assets are moved to the end, without slope
+    points = xp.where(mask, points, 0.0)
+    points = xp.where(mask, points, points.max(axis=1, keepdims=True))
+    slopes = xp.where(mask, slopes, 0.0)
+    order = xp.argsort(points, axis=1)
+    points = xp.take_along_axis(points, order, axis=1)
+    slopes = xp.cumsum(xp.take_along_axis(slopes, order, axis=1), axis=1)
+    sums = width * num[:, None] + xp.concatenate(
+        [xp.zeros_like(total),
+         xp.cumsum(slopes[:, :-1] * xp.diff(points, axis=1), axis=1)],
+        axis=1)
+    pos = xp.argmax(sums <= total, axis=1)
+    prev = xp.maximum(pos - 1, 0)[:, None]
+    prev_point = xp.take_along_axis(points, prev, axis=1)
+    prev_sum = xp.take_along_axis(sums, prev, axis=1)
+    prev_slope = xp.take_along_axis(slopes, prev, axis=1)
+    tau = prev_point + (prev_sum - total) / xp.where(prev_slope < 0,
+                                                     -prev_slope, 1.0)
+    tau = xp.where((pos == 0)[:, None], points[:, :1], tau)
+    weights = lower + xp.clip(shifted - tau, 0.0, width)
+    return xp.where(eligible, weights, 0.0)
+
+
+def _dual_value(u_lam, lam, scale, eligible, means, risk_aversion, lower,
+                upper):
+    """
+    The weights minimizing the Lagrangian of the multipliers `lam` of the
+    factor products and the dual value, `u_lam` is `u.T @ lam`.
+    """
+    weights = project_capped_simplex((means - u_lam) / scale, eligible,
+                                     lower, upper)
+    value = ((scale / 2.0 * weights + u_lam - means) * weights).sum(axis=1)
+    value -= (lam * lam).sum(axis=1) / (2.0 * risk_aversion)
+    return weights, value
+
+
+def bounded_mean_variance_weights(model, risk_aversion=None, lower=0.0,
+                                  upper=1.0, max_iter=50, tol=1e-10):
+    """
+    The fully invested weights in [lower, upper] maximizing `means @ w -
+    risk_aversion / 2 * w @ cov @ w`, the minimum variance weights if
+    `risk_aversion` is None.
+
+    The factor products `u @ w` are dualized, the weights minimizing the
+    Lagrangian are the projections of `project_capped_simplex`. The concave
+    dual is maximized over the window dimensional multipliers by the
+    semismooth Newton method with a backtracking line search, all the steps
+    together. The Newton systems involve only the factors of the assets
+    strictly inside the bounds.
+
+    Returns
+    -----
+    step x asset weights
+    """
+    xp = _array_module(model.u)
+    u, eligible = model.u, model.eligible
+    if risk_aversion is None:
+        risk_aversion, means = 1.0, xp.zeros(eligible.shape)
+    else:
+        means = xp.where(eligible, model.means, 0.0)
+    num_steps, window, _ = u.shape
+    scale = (risk_aversion * model.d)[:, None]
+    weights = project_capped_simplex(xp.zeros(means.shape), eligible,
+                                     lower, upper)
+    lam = risk_aversion * xp.matmul(u, weights[:, :, None])[:, :, 0]
+    u_lam = _factor_product(u, lam)
+    weights, value = _dual_value(u_lam, lam, scale, eligible, means,
+                                 risk_aversion, lower, upper)
+    eye = xp.eye(window) / risk_aversion
+    for _ in range(max_iter):
+        grad = xp.matmul(u, weights[:, :, None])[:, :, 0] - lam / risk_aversion
+        # the generalized Hessian, the weights inside the bounds move with
+        # the multipliers keeping their sum
+        inside = (weights > lower) & (weights < upper) & eligible
+        count = inside.sum(axis=1)
+        width = max(int(count.max()), 1)
+        index = xp.argsort(~inside, axis=1, kind='stable')[:, :width]
+        u_in = xp.take_along_axis(u, index[:, None, :], axis=2)
+        u_in *= (xp.arange(width) < count[:, None])[:, None, :]
+        total = u_in.sum(axis=2)
+        hess = xp.matmul(u_in, u_in.transpose(0, 2, 1))
+        hess -= total[:, :, None] * total[:, None, :] / xp.maximum(
+            count, 1)[:, None, None]
+        hess /= scale[:, :, None]
+        hess += eye
+        direction = xp.linalg.solve(hess, grad[:, :, None])[:, :, 0]
+        u_direction = _factor_product(u, direction)
+        # the least dual increase of the Newton steps, rounding aside
+        least = 1e-4 * (grad * direction).sum(axis=1) - \
+            1e-12 * xp.abs(value)
+        # halve the steps of the multipliers until the dual increases
+        step = xp.ones(num_steps)
+        new_weights, new_value = weights.copy(), value.copy()
+        rows = xp.arange(num_steps)
+        for _ in range(30):
+            trial_step = step[rows, None]
+            trial_weights, trial_value = _dual_value(
+                u_lam[rows] + trial_step * u_direction[rows],
+                lam[rows] + trial_step * direction[rows], scale[rows],
+                eligible[rows], means[rows], risk_aversion, lower, upper)
+            accept = trial_value >= value[rows] + step[rows] * least[rows]
+            new_weights[rows[accept]] = trial_weights[accept]
+            new_value[rows[accept]] = trial_value[accept]
+            rows = rows[~accept]
+            if len(rows) == 0:
+                break
+            step[rows] /= 2.0
+        step[rows] = 0.0
+        lam += step[:, None] * direction
+        u_lam += step[:, None] * u_direction
+        change = float(xp.abs(new_weights - weights).max())
+        weights, value = new_weights, new_value
+        if change < tol:
+            break
+    return weights
+
+
+def seriation(corr):
+    """
+    Order the assets so the correlated assets are next to each other, the
+    leaf order of the single linkage clustering of the correlation distance
+    `sqrt((1 - corr) / 2)`. The clusters are merged along the maximum
+    spanning tree of the correlations, grown by Prim's algorithm.
+
+    Arguments
+    -------
+    corr: numpy.ndarray
+        asset x asset correlation matrix, the diagonal is not used
+
+    Returns
+    -----
+    numpy.ndarray
+        the asset order
+    """
+    num = len(corr)
+    best = corr[0].copy()
+    best[0] = -np.inf
+    parent = np.zeros(num, dtype=np.int64)
+    edges = []
+    for _ in range(num - 1):
+        node = int(np.argmax(best))
+        edges.append((float(best[node]), int(parent[node]), node))
+        # the nodes in the tree are not considered again
+        best[node] = -np.inf
+        row = corr[node]
+        closer = row > best
+        closer[best == -np.inf] = False
+        best[closer] = row[closer]
+        parent[closer] = node
+    # merge the clusters from the most correlated edge on, chaining the
+    # leaf list of a cluster after the other
+    root = list(range(num))
+    head = list(range(num))
+    tail = list(range(num))
+    after = [-1] * num
+
+    def find(node):
+        while root[node] != node:
+            root[node] = root[root[node]]
+            node = root[node]
+        return node
+
+    for _, left, right in sorted(edges, key=lambda edge: -edge[0]):
+        left, right = find(left), find(right)
+        after[tail[left]] = head[right]
+        tail[left] = tail[right]
+        root[right] = left
+    order = []
+    node = head[find(0)] if num else -1
+    while node != -1:
+        order.append(node)
+        node = after[node]
+    return np.array(order, dtype=np.int64)
+
+
+def _hrp_step(d, u):
+    """
+    The HRP weights of the assets of the factors `u` (window x asset).
+    """
+    variances = d + (u ** 2).sum(axis=0)
+    # the correlations only order the assets, single precision is enough
+    z = (u / np.sqrt(variances)).T.astype(np.float32)
+    order = seriation(z @ z.T)
+    # prefix sums of the inverse variance weighted terms of the cluster
+    # variances in the asset order
+    inv = 1.0 / variances[order]
+    sum_inv = np.concatenate([[0.0], np.cumsum(inv)])
+    sum_inv2 = np.concatenate([[0.0], np.cumsum(inv * inv)])
+    sum_u = np.concatenate([np.zeros((u.shape[0], 1)),
+                            np.cumsum(u[:, order] * inv, axis=1)], axis=1)
+
+    def cluster_variance(beg, end):
+        total = sum_inv[end] - sum_inv[beg]
+        factor = sum_u[:, end] - sum_u[:, beg]
+        return (d * (sum_inv2[end] - sum_inv2[beg]) +
+                (factor ** 2).sum(axis=0)) / total ** 2
+
+    weights = np.ones(len(order))
+    begs = np.array([0])
+    ends = np.array([len(order)])
+    # bisect all the clusters of a level together
+    while (ends - begs > 1).any():
+        split = ends - begs > 1
+        mids = (begs + ends) // 2
+        var_left = cluster_variance(begs[split], mids[split])
+        var_right = cluster_variance(mids[split], ends[split])
+        alpha = np.ones(len(begs))
+        alpha[split] = var_right / (var_left + var_right)
+        new_begs = np.stack([begs, np.where(split, mids, ends)], axis=1)
+        new_ends = np.stack([np.where(split, mids, ends), ends], axis=1)
+        factors = np.stack([alpha, 1.0 - alpha], axis=1)
+        lengths = (new_ends - new_begs).ravel()
+        weights *= np.repeat(factors.ravel(), lengths)
+        keep = lengths > 0
+        begs, ends = new_begs.ravel()[keep], new_ends.ravel()[keep]
+    result = np.empty(len(order))
+    result[order] = weights
+    return result
+
+
+def hrp_weights(model):
+    """
+    The hierarchical risk parity weights of the eligible assets: the assets
+    are ordered by `seriation` of their correlations, then the weights are
+    split between the halves of the order, recursively, in inverse
+    proportion to the variances of the halves. The clusters of a level of
+    the bisection are weighted together, from prefix sums over the order.
+
+    Returns
+    -----
+    step x asset weights
+    """
+    xp = _array_module(model.u)
+    d, u = _to_host(model.d), _to_host(model.u)
+    eligible = _to_host(model.eligible)
+    weights = np.zeros(eligible.shape)
+    for step in range(len(u)):
+        assets = np.flatnonzero(eligible[step])
+        if len(assets) == 0:
+            continue
+        weights[step, assets] = _hrp_step(d[step], u[step][:, assets])
+    return xp.asarray(weights)
+
+
+def rebalance_weights(returns, window, rebalance, allocate,
+                      shrinkage=None):
+    """
+    The weights held at every time step. The assets are allocated every
+    `rebalance` steps from the covariances of the returns of the `window`
+    steps before, estimated in batches of rebalance steps, and the weights
+    are held until the next rebalance. The weights are zeros before the
+    first full window.
+
+    Arguments
+    -------
+    returns: numpy.ndarray or cupy.ndarray
+        time x asset matrix of the returns, NaN for no bar
+    window: int
+        the number of time steps of the covariance windows
+    rebalance: int
+        the number of time steps between the rebalances
+    allocate: function
+        allocate(model) returns the step x asset weights of a RiskModel
+    shrinkage: float
+        the shrinkage intensity, Ledoit-Wolf estimate if None
+
+    Returns
+    -----
+    time x asset weights
+    """
+    xp = _array_module(returns)
+    num_steps, num_assets = returns.shape
+    steps = xp.arange(window, num_steps, rebalance)
+    if len(steps) == 0:
+        return xp.zeros((num_steps, num_assets))
+    weights = xp.zeros((len(steps), num_assets))
+    batch = max(1, BATCH_BYTES // (window * num_assets * 8))
+    for beg in range(0, len(steps), batch):
+        model = risk_model(returns, steps[beg:beg + batch], window,
+                           shrinkage)
+        weights[beg:beg + batch] = allocate(model)
+    held = xp.searchsorted(steps, xp.arange(num_steps), side='right') - 1
+    return xp.where((held >= 0)[:, None], weights[held], 0.0)
@@ -0,0 +1,196 @@
+from greenflow.dataframe_flow import Node
+from greenflow.dataframe_flow.portsSpecSchema import ConfSchema
+import cudf
+import pandas as pd
+from functools import partial
+from .._port_type_node import _PortTypesMixin
+from ..backtest.vectorBackTest import to_matrix, pivot_codes
+from .riskModel import (rebalance_weights, mean_variance_weights,
+                        bounded_mean_variance_weights, hrp_weights)
+
+__all__ = ['MinVariancePortOpt', 'MeanVariancePortOpt', 'HRPPortOpt']
+
+
+class _RiskPortOpt(_PortTypesMixin, Node):
+    """
+    Base of the portfolio optimizer nodes. The returns of the assets are
+    pivoted into a time x asset matrix, the covariances of all the rebalance
+    steps are estimated in batches and the weights of every batch are
+    allocated together by `allocate`. The weights are added to the bars as
+    the `signal` column, lagged, i.e. they are set from the returns before
+    the bar, as the positions of `VectorBackTestNode`.
+    """
+
+    def init(self):
+        _PortTypesMixin.init(self)
+        self.INPUT_PORT_NAME = 'stock_in'
+        self.OUTPUT_PORT_NAME = 'stock_out'
+
+    def meta_setup(self):
+        cols_required = {"datetime": "date",
+                         "asset": "int64",
+                         "returns": "float64"}
+        addition = {"signal": "float64"}
+        return _PortTypesMixin.addition_meta_setup(self,
+                                                   addition,
+                                                   required=cols_required)
+
+    def ports_setup(self):
+        # the whole history is needed in memory, no dask dataframes
+        return _PortTypesMixin.ports_setup_from_types(
+            self, [cudf.DataFrame, pd.DataFrame])
+
+    def _conf_properties(self):
+        return {
+            "window":  {
+                "type": "integer",
+                "default": 252,
+                "description": """number of bars of the returns the
+                covariances are estimated from""",
+                "minimum": 2
+            },
+            "rebalance":  {
+                "type": "integer",
+                "default": 21,
+                "description": "number of bars between the rebalances",
+                "minimum": 1
+            },
+            "shrinkage":  {
+                "type": "number",
+                "description": """shrinkage intensity of the covariances
+                towards the scaled identity, Ledoit-Wolf estimate if not
+                set""",
+                "exclusiveMinimum": 0,
+                "maximum": 1
+            }
+        }
+
+    def _bounds_properties(self):
+        return {
+            "long_only":  {
+                "type": "boolean",
+                "default": False,
+                "description": "no short positions"
+            },
+            "max_weight":  {
+                "type": "number",
+                "description": """maximum absolute weight of an asset, the
+                weights are not bounded if neither `long_only` nor
+                `max_weight` is set""",
+                "exclusiveMinimum": 0
+            }
+        }
+
+    def _bounded_allocate(self, risk_aversion):
+        long_only = self.conf.get('long_only', False)
+        max_weight = self.conf.get('max_weight')
+        if not long_only and max_weight is None:
+            return partial(mean_variance_weights,
+                           risk_aversion=risk_aversion)
+        upper = 1.0 if max_weight is None else max_weight
+        lower = 0.0 if long_only else -upper
+        return partial(bounded_mean_variance_weights,
+                       risk_aversion=risk_aversion, lower=lower, upper=upper)
+
+    def allocate(self):
+        """
+        The function of a RiskModel returning the step x asset weights.
+        """
+        raise NotImplementedError
+
+    def process(self, inputs):
+        """
+        Allocate the assets at the rebalance steps from the covariances of
+        their `returns` and add the weights held as the `signal` column.
+
+        Arguments
+        -------
+         inputs: list
+            list of input dataframes.
+        Returns
+        -------
+        dataframe
+        """
+        input_df = inputs[self.INPUT_PORT_NAME]
+        time_codes, _, asset_codes, _ = pivot_codes(input_df)
+        _, _, (returns, ) = to_matrix(input_df, ['returns'])
+        weights = rebalance_weights(returns,
+                                    self.conf.get('window', 252),
+                                    self.conf.get('rebalance', 21),
+                                    self.allocate(),
+                                    shrinkage=self.conf.get('shrinkage'))
+        input_df['signal'] = weights[time_codes, asset_codes]
+        return {self.OUTPUT_PORT_NAME: input_df}
+
+
+class MinVariancePortOpt(_RiskPortOpt):
+
+    def conf_schema(self):
+        properties = self._conf_properties()
+        properties.update(self._bounds_properties())
+        json = {
+            "title": "Minimum Variance Portfolio Node configure",
+            "type": "object",
+            "description": """Allocate the assets to the fully invested
+            portfolio of the minimum variance at every rebalance, from the
+            shrunk covariances of the returns of the window before.""",
+            "properties": properties
+        }
+        ui = {
+        }
+        return ConfSchema(json=json, ui=ui)
+
+    def allocate(self):
+        return self._bounded_allocate(None)
+
+
+class MeanVariancePortOpt(_RiskPortOpt):
+
+    def conf_schema(self):
+        properties = self._conf_properties()
+        properties["risk_aversion"] = {
+            "type": "number",
+            "default": 1.0,
+            "description": """the weight of the variance against the mean
+            return, the expected returns are the means over the window""",
+            "exclusiveMinimum": 0
+        }
+        properties.update(self._bounds_properties())
+        json = {
+            "title": "Mean-Variance Portfolio Node configure",
+            "type": "object",
+            "description": """Allocate the assets to the fully invested
+            portfolio maximizing the mean return minus `risk_aversion` / 2
+            times the variance at every rebalance, from the returns of the
+            window before.""",
+            "properties": properties
+        }
+        ui = {
+        }
+        return ConfSchema(json=json, ui=ui)
+
+    def allocate(self):
+        return self._bounded_allocate(self.conf.get('risk_aversion', 1.0))
+
+
+class HRPPortOpt(_RiskPortOpt):
+
+    def conf_schema(self):
+        json = {
+            "title": "Hierarchical Risk Parity Portfolio Node configure",
+            "type": "object",
+            "description": """Allocate the assets by hierarchical risk
+            parity at every rebalance: the assets are ordered by the single
+            linkage clustering of their correlations and the weights are
+            split recursively in inverse proportion to the variances of the
+            clusters. The clustering runs on the CPU, in a loop over the
+            assets at every rebalance: about 0.15 second a rebalance for
+            2000 assets, 6 times the time of the mean-variance nodes.""",
+            "properties": self._conf_properties()
+        }
+        ui = {
+        }
+        return ConfSchema(json=json, ui=ui)
+
+    def allocate(self):
+        return hrp_weights
@@ -4,6 +4,7 @@ from greenflow.dataframe_flow.portsSpecSchema import ConfSchema
 
 
 class SimpleAveragePortOpt(_PortTypesMixin, Node):
+    mutates_inputs = False
 
     def init(self):
         _PortTypesMixin.init(self)
@@ -1,7 +1,11 @@
-from .movingAverageStrategyNode import MovingAverageStrategyNode
-from .portExpMovingAverageStrategyNode import PortExpMovingAverageStrategyNode
-from .xgboostStrategyNode import XGBoostStrategyNode
+from greenflow.dataframe_flow.util import lazy_module_attrs
 
-__all__ = ["MovingAverageStrategyNode",
-           "PortExpMovingAverageStrategyNode",
-           "XGBoostStrategyNode"]
+# node name -> module, a module is imported when its node is first used
+_NODE_INDEX = {
+    'MovingAverageStrategyNode': '.movingAverageStrategyNode',
+    'PortExpMovingAverageStrategyNode': '.portExpMovingAverageStrategyNode',
+    'XGBoostStrategyNode': '.xgboostStrategyNode'
+}
+
+__all__ = list(_NODE_INDEX)
+__getattr__, __dir__ = lazy_module_attrs(__name__, _NODE_INDEX)
@@ -1,27 +1,27 @@
-from .averageNode import AverageNode
-from .assetFilterNode import AssetFilterNode
-from .leftMergeNode import LeftMergeNode
-from .returnFeatureNode import ReturnFeatureNode
-from .sortNode import SortNode
-from .datetimeFilterNode import DatetimeFilterNode
-from .minNode import MinNode
-from .maxNode import MaxNode
-from .valueFilterNode import ValueFilterNode
-from .renameNode import RenameNode
-from .assetIndicatorNode import AssetIndicatorNode
-from .dropNode import DropNode
-from .indicatorNode import IndicatorNode
-from .normalizationNode import NormalizationNode
-from .addSignIndicator import AddSignIndicatorNode
-from .linearEmbedding import LinearEmbeddingNode
-from .onehotEncoding import OneHotEncodingNode
-from .daskComputeNode import DaskComputeNode
-from .persistNode import PersistNode
+from greenflow.dataframe_flow.util import lazy_module_attrs
 
-__all__ = ["AverageNode", "AssetFilterNode", "LeftMergeNode",
-           "ReturnFeatureNode", "SortNode",
-           "DatetimeFilterNode", "MinNode", "MaxNode",
-           "ValueFilterNode", "RenameNode", "AssetIndicatorNode",
-           "DropNode", "IndicatorNode", "NormalizationNode",
-           "AddSignIndicatorNode", "LinearEmbeddingNode",
-           "OneHotEncodingNode", "DaskComputeNode", "PersistNode"]
+# node name -> module, a module is imported when its node is first used
+_NODE_INDEX = {
+    'AverageNode': '.averageNode',
+    'AssetFilterNode': '.assetFilterNode',
+    'LeftMergeNode': '.leftMergeNode',
+    'ReturnFeatureNode': '.returnFeatureNode',
+    'SortNode': '.sortNode',
+    'DatetimeFilterNode': '.datetimeFilterNode',
+    'MinNode': '.minNode',
+    'MaxNode': '.maxNode',
+    'ValueFilterNode': '.valueFilterNode',
+    'RenameNode': '.renameNode',
+    'AssetIndicatorNode': '.assetIndicatorNode',
+    'DropNode': '.dropNode',
+    'IndicatorNode': '.indicatorNode',
+    'NormalizationNode': '.normalizationNode',
+    'AddSignIndicatorNode': '.addSignIndicator',
+    'LinearEmbeddingNode': '.linearEmbedding',
+    'OneHotEncodingNode': '.onehotEncoding',
+    'DaskComputeNode': '.daskComputeNode',
+    'PersistNode': '.persistNode'
+}
+
+__all__ = list(_NODE_INDEX)
+__getattr__, __dir__ = lazy_module_attrs(__name__, _NODE_INDEX)
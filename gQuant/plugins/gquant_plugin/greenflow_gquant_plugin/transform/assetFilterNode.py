@@ -1,3 +1,4 @@
+import operator
 from greenflow.dataframe_flow import Node
 from .._port_type_node import _PortTypesMixin
 from greenflow.dataframe_flow.portsSpecSchema import (ConfSchema,
@@ -5,8 +6,11 @@ from greenflow.dataframe_flow.portsSpecSchema import (ConfSchema,
                                                    PortsSpecSchema, NodePorts)
 from ..dataloader.stockMap import StockMap
 
+_OPS = {'==': operator.eq}
+
 
 class AssetFilterNode(_PortTypesMixin, Node):
+    mutates_inputs = False
 
     def init(self):
         _PortTypesMixin.init(self)
@@ -116,6 +120,15 @@ class AssetFilterNode(_PortTypesMixin, Node):
             json['properties']['asset']['enumNames'] = enumNames
         return ConfSchema(json=json, ui=ui)
 
+    def _predicates(self):
+        return [('asset', '==', self.conf['asset'])]
+
+    def pushdown_predicates(self):
+        if 'asset' not in self.conf:
+            return None
+        return (self.INPUT_PORT_NAME, self.OUTPUT_PORT_NAME,
+                self._predicates())
+
     def process(self, inputs):
         """
         select the asset based on asset id, which is defined in `asset` in the
@@ -130,7 +143,10 @@ class AssetFilterNode(_PortTypesMixin, Node):
         dataframe
         """
         input_df = inputs[self.INPUT_PORT_NAME]
-        output_df = input_df.query('asset==%s' % self.conf["asset"])
+        # select by the predicate pushed down to the loader, so both select
+        # the same rows
+        (column, op, value), = self._predicates()
+        output_df = input_df[_OPS[op](input_df[column], value)]
         output = {self.OUTPUT_PORT_NAME: output_df}
         if self.outport_connected(self.OUTPUT_ASSET_NAME):
             name = self._find_asset_name()
@@ -14,6 +14,7 @@ __all__ = ["DaskComputeNode"]
 
 
 class DaskComputeNode(_PortTypesMixin, Node):
+    mutates_inputs = False
 
     def init(self):
         _PortTypesMixin.init(self)
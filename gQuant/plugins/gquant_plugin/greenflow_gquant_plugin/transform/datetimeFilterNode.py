@@ -8,6 +8,7 @@ __all__ = ['DatetimeFilterNode']
 
 
 class DatetimeFilterNode(_PortTypesMixin, Node):
+    mutates_inputs = False
     """
     A node that is used to select datapoints based on range of time.
     conf["beg"] defines the beginning of the date inclusively and
@@ -64,6 +65,13 @@ class DatetimeFilterNode(_PortTypesMixin, Node):
         }
         return ConfSchema(json=json, ui=ui)
 
+    def pushdown_predicates(self):
+        if 'beg' not in self.conf or 'end' not in self.conf:
+            return None
+        return (self.INPUT_PORT_NAME, self.OUTPUT_PORT_NAME,
+                [('datetime', '>=', self.conf['beg']),
+                 ('datetime', '<', self.conf['end'])])
+
     def process(self, inputs):
         """
         Select the data based on an range of datetime, which is defined in
@@ -82,7 +90,6 @@ class DatetimeFilterNode(_PortTypesMixin, Node):
             datetime.datetime.strptime(self.conf['beg'], '%Y-%m-%d')
         end_date = \
             datetime.datetime.strptime(self.conf['end'], '%Y-%m-%d')
-        df = df.query('datetime<@end_date and datetime>=@beg_date',
-                      local_dict={'beg_date': beg_date,
-                                  'end_date': end_date})
+        # a query string would resolve `datetime` to the module on pandas
+        df = df[(df['datetime'] >= beg_date) & (df['datetime'] < end_date)]
         return {self.OUTPUT_PORT_NAME: df}
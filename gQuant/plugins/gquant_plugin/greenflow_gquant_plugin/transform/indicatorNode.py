@@ -1,7 +1,10 @@
 from .. import cuindicator as ci
+from ..cuindicator.backend import to_series
 from .._port_type_node import _PortTypesMixin
 from greenflow.dataframe_flow.portsSpecSchema import ConfSchema
 from greenflow.dataframe_flow import Node
+import pandas as pd
+import collections
 import copy
 
 IN_DATA = {
@@ -158,13 +161,7 @@ class IndicatorNode(_PortTypesMixin, Node):
         if 'indicators' in self.conf:
             indicators = self.conf['indicators']
             for indicator in indicators:
-                functionId = indicator['function']
-                conf = copy.deepcopy(IN_DATA[functionId])
-                if 'args' in indicator:
-                    if len(conf['args']) != 0:
-                        conf['args'] = indicator['args']
-                if 'columns' in indicator:
-                    conf['columns'] = indicator['columns']
+                conf = self._indicator_conf(indicator)
                 for col in conf['columns']:
                     cols_required[col] = 'float64'
                 if 'outputs' in conf:
@@ -180,6 +177,31 @@ class IndicatorNode(_PortTypesMixin, Node):
     def ports_setup(self):
         return _PortTypesMixin.ports_setup(self)
 
+    def _indicator_conf(self, indicator):
+        functionId = indicator['function']
+        conf = copy.deepcopy(IN_DATA[functionId])
+        if 'args' in indicator:
+            #  a bug work around to ignore the numbers from the client
+            if len(conf['args']) != 0:
+                conf['args'] = indicator['args']
+        if 'columns' in indicator:
+            conf['columns'] = indicator['columns']
+        return conf
+
+    def _plan(self):
+        """
+        Resolve the configured indicators into the list of indicator calls.
+        An indicator configured several times with the same columns and
+        arguments writes the same output columns, so it is called once.
+        """
+        plan = collections.OrderedDict()
+        for indicator in self.conf['indicators']:
+            conf = self._indicator_conf(indicator)
+            key = (conf['function'], tuple(conf['columns']),
+                   tuple(conf.get('args', [])))
+            plan.setdefault(key, conf)
+        return list(plan.values())
+
     def _compose_name(self, indicator, outname=[]):
         name = indicator['function']
         args_name = []
@@ -285,36 +307,47 @@ class IndicatorNode(_PortTypesMixin, Node):
         dataframe
         """
         input_df = inputs[self.INPUT_PORT_NAME]
-        indicators = self.conf['indicators']
-        for indicator in indicators:
-            functionId = indicator['function']
-            conf = copy.deepcopy(IN_DATA[functionId])
-            if 'args' in indicator:
-                #  a bug work around to ignore the numbers from the client
-                if len(conf['args']) != 0:
-                    conf['args'] = indicator['args']
-            if 'columns' in indicator:
-                conf['columns'] = indicator['columns']
-            fun = getattr(ci, indicator['function'])
-            parallel = [input_df['indicator']]
-            data = [input_df[col] for col in conf['columns']]
-            ar = []
-            if 'args' in conf:
-                ar = conf['args']
-            v = fun(*(parallel+data+ar))
-            if isinstance(v, tuple) and 'outputs' in conf:
-                for out in conf['outputs']:
-                    out_col = self._compose_name(conf, [out])
-                    val = getattr(v, out)
-                    val.index = input_df.index
-                    input_df[out_col] = val
-            else:
-                if isinstance(v, tuple):
-                    v = v[0]
-                out_col = self._compose_name(conf, [])
-                v.index = input_df.index
-                input_df[out_col] = v
+        # the columns are read once, the common sub-expressions of the
+        # indicators, e.g. the EMAs of the same span or the true range, are
+        # memoized by the identity of the arrays in the fused scope
+        columns = {}
+
+        def column(name):
+            if name not in columns:
+                columns[name] = input_df[name]
+            return columns[name]
+
+        def assign(out_col, val):
+            if not hasattr(val, 'index'):
+                # port_fractional_diff returns the array
+                val = to_series(val)
+            val.index = input_df.index
+            input_df[out_col] = val
+            # a later indicator may read the new column
+            columns.pop(out_col, None)
+
+        with ci.fused():
+            # the asset segments are found once for all the indicators
+            parallel = [ci.get_segments(column('indicator'))]
+            for conf in self._plan():
+                fun = getattr(ci, conf['function'])
+                data = [column(col) for col in conf['columns']]
+                ar = conf.get('args', [])
+                v = fun(*(parallel+data+ar))
+                if isinstance(v, tuple) and 'outputs' in conf:
+                    for out in conf['outputs']:
+                        assign(self._compose_name(conf, [out]),
+                               getattr(v, out))
+                else:
+                    if isinstance(v, tuple):
+                        v = v[0]
+                    assign(self._compose_name(conf, []), v)
         # remove all the na elements, requires cudf>=0.8
         if "remove_na" in self.conf and self.conf["remove_na"]:
-            input_df = input_df.nans_to_nulls().dropna()
+            if isinstance(input_df, pd.DataFrame):
+                # the indicators of a pandas dataframe are computed on CPU
+                # and pandas treats NaN as null already
+                input_df = input_df.dropna()
+            else:
+                input_df = input_df.nans_to_nulls().dropna()
         return {self.OUTPUT_PORT_NAME: input_df}
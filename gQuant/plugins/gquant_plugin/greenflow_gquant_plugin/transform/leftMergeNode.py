@@ -10,6 +10,7 @@ from .._port_type_node import _PortTypesMixin
 
 
 class LeftMergeNode(_PortTypesMixin, Node):
+    mutates_inputs = False
 
     def init(self):
         self.INPUT_PORT_LEFT_NAME = 'left'
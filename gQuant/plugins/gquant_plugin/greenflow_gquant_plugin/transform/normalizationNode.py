@@ -7,6 +7,7 @@ from collections import OrderedDict
 
 
 class NormalizationNode(_PortTypesMixin, Node):
+    mutates_inputs = False
 
     def init(self):
         _PortTypesMixin.init(self)
@@ -6,6 +6,7 @@ __all__ = ["OneHotEncodingNode"]
 
 
 class OneHotEncodingNode(_PortTypesMixin, Node):
+    mutates_inputs = False
 
     def init(self):
         _PortTypesMixin.init(self)
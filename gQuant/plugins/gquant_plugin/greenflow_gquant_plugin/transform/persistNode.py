@@ -8,6 +8,7 @@ import dask.distributed
 
 
 class PersistNode(_PortTypesMixin, Node):
+    mutates_inputs = False
 
     def init(self):
         _PortTypesMixin.init(self)
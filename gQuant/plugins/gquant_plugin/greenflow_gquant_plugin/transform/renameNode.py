@@ -4,6 +4,7 @@ from .._port_type_node import _PortTypesMixin
 
 
 class RenameNode(_PortTypesMixin, Node):
+    mutates_inputs = False
 
     def init(self):
         _PortTypesMixin.init(self)
@@ -4,6 +4,7 @@ from greenflow.dataframe_flow import Node
 
 
 class SortNode(_PortTypesMixin, Node):
+    mutates_inputs = False
 
     def init(self):
         self.delayed_process = True
@@ -1,9 +1,13 @@
+import operator
 from greenflow.dataframe_flow import Node
 from .._port_type_node import _PortTypesMixin
 from greenflow.dataframe_flow.portsSpecSchema import ConfSchema
 
+_OPS = {'>=': operator.ge, '<=': operator.le}
+
 
 class ValueFilterNode(_PortTypesMixin, Node):
+    mutates_inputs = False
 
     def init(self):
         _PortTypesMixin.init(self)
@@ -49,6 +53,22 @@ class ValueFilterNode(_PortTypesMixin, Node):
         else:
             return ConfSchema(json=json, ui=ui)
 
+    def _predicates(self):
+        predicates = []
+        for column_item in self.conf:
+            column_name = column_item['column']
+            if 'min' in column_item:
+                predicates.append((column_name, '>=', column_item['min']))
+            if 'max' in column_item:
+                predicates.append((column_name, '<=', column_item['max']))
+        return predicates
+
+    def pushdown_predicates(self):
+        predicates = self._predicates()
+        if not predicates:
+            return None
+        return (self.INPUT_PORT_NAME, self.OUTPUT_PORT_NAME, predicates)
+
     def process(self, inputs):
         """
         filter the dataframe based on a list of min/max values. The node's
@@ -65,16 +85,12 @@ class ValueFilterNode(_PortTypesMixin, Node):
         """
 
         input_df = inputs[self.INPUT_PORT_NAME]
-        str_list = []
-        for column_item in self.conf:
-            column_name = column_item['column']
-            if 'min' in column_item:
-                minValue = column_item['min']
-                str_item = '%s >= %f' % (column_name, minValue)
-                str_list.append(str_item)
-            if 'max' in column_item:
-                maxValue = column_item['max']
-                str_item = '%s <= %f' % (column_name, maxValue)
-                str_list.append(str_item)
-        input_df = input_df.query(" and ".join(str_list))
+        # compare against the exact values of the predicates pushed down to
+        # the loader, so both select the same rows
+        mask = None
+        for column, op, value in self._predicates():
+            cond = _OPS[op](input_df[column], value)
+            mask = cond if mask is None else mask & cond
+        if mask is not None:
+            input_df = input_df[mask]
         return {self.OUTPUT_PORT_NAME: input_df}
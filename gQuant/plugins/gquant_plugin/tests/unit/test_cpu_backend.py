@@ -0,0 +1,314 @@
+'''
+CPU Backend Unit Tests
+
+To run unittests:
+
+# Using standard library unittest
+
+python -m unittest -v
+python -m unittest tests/unit/test_cpu_backend.py -v
+
+or
+
+python -m unittest discover <test_directory>
+python -m unittest discover -s <directory> -p 'test_*.py'
+
+# Using pytest
+# "conda install pytest" or "pip install pytest"
+pytest -v tests
+pytest -v tests/unit/test_cpu_backend.py
+
+'''
+import warnings
+import pathlib
+import unittest
+import pandas as pd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import greenflow_gquant_plugin.cuindicator as gi
+from greenflow_gquant_plugin.cuindicator import Rolling, Ewm, PEwm, Segments
+from greenflow_gquant_plugin.cuindicator.backend import get_backend
+from . import technical_indicators as ti
+from .utils import make_orderer, error_function
+
+ordered, compare = make_orderer()
+unittest.defaultTestLoader.sortTestMethodsUsing = compare
+
+
+class TestCpuBackend(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter('ignore', category=ImportWarning)
+        warnings.simplefilter('ignore', category=DeprecationWarning)
+        path = pathlib.Path(__file__)
+        self._pandas_data = pd.read_csv(str(path.parent)+'/testdata.csv.gz')
+        self._pandas_data['Volume'] /= 1000.0
+
+        size = 200
+        half = size // 2
+        self.half = half
+        np.random.seed(10)
+        pdf = pd.DataFrame()
+        for col in ['open', 'close', 'high', 'low', 'volume']:
+            pdf[col] = np.random.rand(size)
+        indicator = np.zeros(size, dtype=np.int32)
+        indicator[0] = 1
+        indicator[half] = 1
+        pdf['indicator'] = indicator
+        self._port_data = pdf
+        self._plow_data = pdf[:half].rename(columns=str.capitalize)
+        self._phigh_data = pdf[half:].reset_index(
+            drop=True).rename(columns=str.capitalize)
+
+    def tearDown(self):
+        pass
+
+    def assert_close(self, r_cpu, r_pandas):
+        err = error_function(r_cpu, r_pandas)
+        msg = "bad error %f\n" % (err,)
+        self.assertTrue(np.isclose(err, 0, atol=1e-6), msg)
+
+    @ordered
+    def test_backend_selection(self):
+        '''Test that NumPy and pandas inputs are computed on CPU'''
+        array = np.random.rand(100)
+        self.assertEqual(get_backend(array), 'cpu')
+        self.assertEqual(get_backend(pd.Series(array)), 'cpu')
+        r = Rolling(10, pd.Series(array)).mean()
+        self.assertIsInstance(r, np.ndarray)
+        self.assertTrue(np.isnan(r[:9]).all())
+
+        r = gi.moving_average(pd.Series(array), 10)
+        self.assertIsInstance(r, pd.Series)
+
+        with self.assertRaises(ValueError):
+            Rolling(10, array).apply(None)
+
+    @ordered
+    def test_rolling_functions(self):
+        '''Test the rolling window methods against pandas'''
+        in_arr = pd.Series(np.random.rand(int(1e4)))
+        in_arr[100:110] = np.nan
+        for window in [2, 10, 300]:
+            for method in ['mean', 'max', 'min', 'sum', 'std', 'var']:
+                r_cpu = getattr(Rolling(window, in_arr,
+                                        min_periods=1), method)()
+                r_pandas = getattr(in_arr.rolling(window, min_periods=1),
+                                   method)()
+                # the first window - 1 elements are always NaN
+                self.assert_close(pd.Series(r_cpu[window - 1:]),
+                                  r_pandas[window - 1:])
+
+        r_cpu = Ewm(300, in_arr[200:]).mean()
+        r_pandas = in_arr[200:].ewm(span=300, min_periods=300).mean()
+        self.assert_close(pd.Series(r_cpu), r_pandas)
+
+        self.assert_close(pd.Series(gi.diff(in_arr, 3)), in_arr.diff(3))
+        self.assert_close(pd.Series(gi.diff(in_arr, -3)), in_arr.diff(-3))
+        self.assert_close(pd.Series(gi.shift(in_arr, 3)), in_arr.shift(3))
+        self.assert_close(pd.Series(gi.shift(in_arr, -3)),
+                          in_arr.shift(-3))
+
+    @ordered
+    def test_rolling_accuracy(self):
+        '''Test the streaming rolling windows on long windows and data with a
+        large offset, where running sums lose precision'''
+        in_arr = pd.Series(1e4 + np.random.rand(int(1e5)))
+        in_arr[1000:1300] = np.nan
+        in_arr[5000] = np.nan
+        for window in [5, 252, 2000]:
+            for method in ['mean', 'sum', 'var', 'std', 'max', 'min']:
+                r_cpu = getattr(Rolling(window, in_arr), method)()
+                r_pandas = getattr(in_arr.rolling(window), method)().values
+                msg = "bad %s of window %d" % (method, window)
+                np.testing.assert_array_equal(np.isnan(r_cpu),
+                                              np.isnan(r_pandas), msg)
+                np.testing.assert_allclose(r_cpu, r_pandas, rtol=1e-6,
+                                           err_msg=msg)
+
+        # the short windows of prices, whose variance is tiny against the
+        # square of their mean
+        prices = pd.Series(1e6 + np.cumsum(np.random.randn(int(1e5))) * 0.01)
+        for window in [5, 10]:
+            r_cpu = Rolling(window, prices).var()
+            exact = np.full(len(prices), np.nan)
+            exact[window - 1:] = sliding_window_view(
+                prices.values - 1e6, window).var(axis=1, ddof=1)
+            np.testing.assert_allclose(r_cpu, exact, rtol=1e-6,
+                                       err_msg="bad var of window %d" %
+                                       window)
+
+        # the min/max window looking ahead
+        r_cpu = Rolling(5, in_arr, forward_window=3).max()
+        r_pandas = in_arr.rolling(8).max().shift(-3).values
+        np.testing.assert_array_equal(r_cpu, r_pandas)
+
+    @ordered
+    def test_indicators(self):
+        '''Test the technical indicators computed on CPU'''
+        data = self._pandas_data
+        high, low, close, volume = (data['High'], data['Low'], data['Close'],
+                                    data['Volume'])
+        self.assert_close(gi.moving_average(close, 10),
+                          ti.moving_average(data, 10)['MA_10'])
+        self.assert_close(gi.exponential_moving_average(close, 10),
+                          ti.exponential_moving_average(data, 10)['EMA_10'])
+        self.assert_close(gi.rate_of_change(close, 2),
+                          ti.rate_of_change(data, 2)['ROC_2'])
+        self.assert_close(gi.trix(close, 3), ti.trix(data, 3)['Trix_3'])
+        r = gi.bollinger_bands(close, 20)
+        r_pandas = ti.bollinger_bands(data, 20)
+        self.assert_close(r.b1, r_pandas['BollingerB_20'])
+        self.assert_close(r.b2, r_pandas['Bollinger%b_20'])
+        r = gi.macd(close, 10, 20)
+        r_pandas = ti.macd(data, 10, 20)
+        self.assert_close(r.MACD, r_pandas['MACD_10_20'])
+        self.assert_close(r.MACDsign, r_pandas['MACDsign_10_20'])
+        self.assert_close(r.MACDdiff, r_pandas['MACDdiff_10_20'])
+        self.assert_close(gi.average_true_range(high, low, close, 10),
+                          ti.average_true_range(data, 10)['ATR_10'])
+        r = gi.ppsr(high, low, close)
+        r_pandas = ti.ppsr(data)
+        for out in ['PP', 'R1', 'S1', 'R2', 'S2', 'R3', 'S3']:
+            self.assert_close(getattr(r, out), r_pandas[out])
+        self.assert_close(gi.stochastic_oscillator_d(high, low, close, 10),
+                          ti.stochastic_oscillator_d(data, 10)['SO%d_10'])
+        self.assert_close(
+            gi.average_directional_movement_index(high, low, close, 10, 20),
+            ti.average_directional_movement_index(data, 10, 20)['ADX_10_20'])
+        self.assert_close(gi.vortex_indicator(high, low, close, 10),
+                          ti.vortex_indicator(data, 10)['Vortex_10'])
+        self.assert_close(
+            gi.kst_oscillator(close, 3, 4, 5, 6, 7, 8, 9, 10),
+            ti.kst_oscillator(data, 3, 4, 5, 6, 7, 8, 9,
+                              10)['KST_3_4_5_6_7_8_9_10'])
+        self.assert_close(gi.relative_strength_index(high, low, 10),
+                          ti.relative_strength_index(data, 10)['RSI_10'])
+        self.assert_close(gi.mass_index(high, low, 9, 25),
+                          ti.mass_index(data)['Mass Index'])
+        self.assert_close(gi.true_strength_index(close, 5, 8),
+                          ti.true_strength_index(data, 5, 8)['TSI_5_8'])
+        self.assert_close(
+            gi.chaikin_oscillator(high, low, close, volume, 3, 10),
+            ti.chaikin_oscillator(data)['Chaikin'])
+        self.assert_close(gi.money_flow_index(high, low, close, volume, 10),
+                          ti.money_flow_index(data, 10)['MFI_10'])
+        self.assert_close(gi.on_balance_volume(close, volume, 10),
+                          ti.on_balance_volume(data, 10)['OBV_10'])
+        self.assert_close(gi.force_index(close, volume, 10),
+                          ti.force_index(data, 10)['Force_10'])
+        self.assert_close(gi.ease_of_movement(high, low, volume, 10),
+                          ti.ease_of_movement(data, 10)['EoM_10'])
+        self.assert_close(gi.ultimate_oscillator(high, low, close),
+                          ti.ultimate_oscillator(data)['Ultimate_Osc'])
+        self.assert_close(gi.donchian_channel(high, low, 10)[:-1],
+                          ti.donchian_channel(data, 10)['Donchian_10'][:-1])
+        r = gi.keltner_channel(high, low, close, 10)
+        r_pandas = ti.keltner_channel(data, 10)
+        self.assert_close(r.KelChD, r_pandas['KelChD_10'])
+        self.assert_close(r.KelChM, r_pandas['KelChM_10'])
+        self.assert_close(r.KelChU, r_pandas['KelChU_10'])
+        self.assert_close(gi.coppock_curve(close, 10),
+                          ti.coppock_curve(data, 10)['Copp_10'])
+        self.assert_close(
+            gi.accumulation_distribution(high, low, close, volume, 10),
+            ti.accumulation_distribution(data, 10)['Acc/Dist_ROC_10'])
+        self.assert_close(gi.commodity_channel_index(high, low, close, 10),
+                          ti.commodity_channel_index(data, 10)['CCI_10'])
+        self.assert_close(gi.momentum(close, 10),
+                          ti.momentum(data, 10)['Momentum_10'])
+
+    @ordered
+    def test_port_indicators(self):
+        '''Test the multiple assets technical indicators computed on CPU'''
+        data = self._port_data
+        ind, high, low, close, volume = (data['indicator'], data['high'],
+                                         data['low'], data['close'],
+                                         data['volume'])
+        r = PEwm(3, close, ind).mean()
+        for r_cpu, pdf in [(r[:self.half], self._plow_data),
+                           (r[self.half:], self._phigh_data)]:
+            self.assert_close(pd.Series(r_cpu),
+                              pdf['Close'].ewm(span=3, min_periods=3).mean())
+
+        half = self.half
+        cases = [
+            (gi.port_moving_average(ind, close, 10),
+             lambda pdf: ti.moving_average(pdf, 10)['MA_10']),
+            (gi.port_exponential_moving_average(ind, close, 10),
+             lambda pdf: ti.exponential_moving_average(pdf, 10)['EMA_10']),
+            (gi.port_rate_of_change(ind, close, 10),
+             lambda pdf: ti.rate_of_change(pdf, 10)['ROC_10']),
+            (gi.port_trix(ind, close, 3),
+             lambda pdf: ti.trix(pdf, 3)['Trix_3']),
+            (gi.port_macd(ind, close, 10, 20).MACDdiff,
+             lambda pdf: ti.macd(pdf, 10, 20)['MACDdiff_10_20']),
+            (gi.port_average_true_range(ind, high, low, close, 10),
+             lambda pdf: ti.average_true_range(pdf, 10)['ATR_10']),
+            (gi.port_ppsr(ind, high, low, close).S3,
+             lambda pdf: ti.ppsr(pdf)['S3']),
+            (gi.port_relative_strength_index(ind, high, low, 10),
+             lambda pdf: ti.relative_strength_index(pdf, 10)['RSI_10']),
+            (gi.port_average_directional_movement_index(ind, high, low,
+                                                        close, 10, 20),
+             lambda pdf: ti.average_directional_movement_index(
+                 pdf, 10, 20)['ADX_10_20']),
+            (gi.port_vortex_indicator(ind, high, low, close, 10),
+             lambda pdf: ti.vortex_indicator(pdf, 10)['Vortex_10']),
+            (gi.port_kst_oscillator(ind, close, 3, 4, 5, 6, 7, 8, 9, 10),
+             lambda pdf: ti.kst_oscillator(
+                 pdf, 3, 4, 5, 6, 7, 8, 9, 10)['KST_3_4_5_6_7_8_9_10']),
+            (gi.port_money_flow_index(ind, high, low, close, volume, 10),
+             lambda pdf: ti.money_flow_index(pdf, 10)['MFI_10']),
+            (gi.port_on_balance_volume(ind, close, volume, 10),
+             lambda pdf: ti.on_balance_volume(pdf, 10)['OBV_10']),
+            (gi.port_ultimate_oscillator(ind, high, low, close),
+             lambda pdf: ti.ultimate_oscillator(pdf)['Ultimate_Osc']),
+            (gi.port_commodity_channel_index(ind, high, low, close, 10),
+             lambda pdf: ti.commodity_channel_index(pdf, 10)['CCI_10']),
+            (gi.port_fractional_diff(ind, close, d=0.5)[0],
+             None)
+        ]
+        for r_cpu, reference in cases:
+            r_cpu = pd.Series(np.asarray(r_cpu))
+            if reference is None:
+                # masked at the beginning of every asset
+                self.assertTrue(np.isnan(r_cpu[half:half+5]).all())
+                continue
+            self.assert_close(r_cpu[:half], reference(self._plow_data))
+            self.assert_close(r_cpu[half:], reference(self._phigh_data))
+
+    @ordered
+    def test_segments(self):
+        '''Test the windows are computed within the rows of every asset'''
+        lengths = [50, 1, 7, 300, 120]
+        offsets = np.cumsum([0] + lengths)
+        indicator = np.zeros(offsets[-1], dtype=np.int32)
+        indicator[offsets[:-1]] = 1
+        segments = gi.get_segments(pd.Series(indicator))
+        np.testing.assert_array_equal(segments.offsets, offsets)
+        np.testing.assert_array_equal(segments.flags(), indicator)
+        self.assertIs(gi.get_segments(segments), segments)
+
+        data = pd.Series(np.random.rand(offsets[-1]))
+        window = 5
+        r_cpu = Rolling(window, data, segments=segments).mean()
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            r_pandas = data[start:end].rolling(window).mean()
+            np.testing.assert_allclose(r_cpu[start:end], r_pandas.values)
+
+        ema = gi.port_exponential_moving_average(segments, data, 3)
+        ema_ind = gi.port_exponential_moving_average(pd.Series(indicator),
+                                                     data, 3)
+        np.testing.assert_array_equal(np.asarray(ema), np.asarray(ema_ind))
+
+        with self.assertRaises(ValueError):
+            Segments([1, 5])
+        with self.assertRaises(ValueError):
+            Segments([0, 5, 3])
+        with self.assertRaises(ValueError):
+            Rolling(window, data, segments=Segments([0, 10]))
+
+
+if __name__ == '__main__':
+    unittest.main()
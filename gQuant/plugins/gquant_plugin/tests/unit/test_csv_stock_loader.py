@@ -0,0 +1,135 @@
+'''
+Csv Stock Loader Unit Tests
+
+To run unittests:
+
+# Using standard library unittest
+
+python -m unittest -v
+python -m unittest tests/unit/test_csv_stock_loader.py -v
+
+or
+
+python -m unittest discover <test_directory>
+python -m unittest discover -s <directory> -p 'test_*.py'
+
+# Using pytest
+# "conda install pytest" or "pip install pytest"
+pytest -v tests
+pytest -v tests/unit/test_csv_stock_loader.py
+
+'''
+import os
+import tempfile
+import warnings
+import unittest
+import numpy as np
+import pandas as pd
+from greenflow_gquant_plugin.dataloader.csvStockLoader import (
+    CsvStockLoader, yyyymmdd_to_days, PANDAS_PORT_NAME)
+from greenflow_gquant_plugin.transform.assetFilterNode import (
+    AssetFilterNode)
+from greenflow.dataframe_flow import TaskGraph, TaskSpecSchema
+from greenflow.dataframe_flow.task import Task
+from .utils import make_orderer
+
+ordered, compare = make_orderer()
+unittest.defaultTestLoader.sortTestMethodsUsing = compare
+
+
+class TestCsvStockLoader(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter('ignore', category=ImportWarning)
+        warnings.simplefilter('ignore', category=DeprecationWarning)
+        size = 1000
+        np.random.seed(10)
+        dates = pd.date_range('1999-01-01', periods=size)
+        self._dates = dates
+        df = pd.DataFrame()
+        df['SM_ID'] = np.random.randint(0, 10, size)
+        df['DTE'] = dates.strftime('%Y%m%d').astype(int)
+        df['SYMBOL'] = 'unused'
+        for col in ['OPEN', 'CLOSE', 'HIGH', 'LOW', 'VOLUME']:
+            df[col] = np.random.rand(size)
+        self._csv_data = df
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._tmp_dir.name, 'stock.csv')
+        df.to_csv(self._path, index=False)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _load(self, conf):
+        node = CsvStockLoader(Task({'id': 'loader',
+                                    'type': 'CsvStockLoader',
+                                    'conf': conf,
+                                    'inputs': {}}))
+        node.outport_connected = lambda port: port == PANDAS_PORT_NAME
+        return node, node.process({})[PANDAS_PORT_NAME]
+
+    @ordered
+    def test_yyyymmdd(self):
+        '''Test the arithmetic parsing of the YYYYMMDD dates'''
+        dates = pd.date_range('1899-12-25', '2100-03-05')
+        days = yyyymmdd_to_days(
+            dates.strftime('%Y%m%d').astype(int).values)
+        np.testing.assert_array_equal(days.astype('datetime64[D]'),
+                                      dates.values.astype('datetime64[D]'))
+
+    @ordered
+    def test_pandas_output(self):
+        '''Test the pandas output in one go and in chunks'''
+        df = self._csv_data
+        _, whole = self._load({'file': self._path})
+        self.assertEqual(list(whole.columns),
+                         ['datetime', 'open', 'close', 'high', 'low',
+                          'asset', 'volume'])
+        np.testing.assert_array_equal(whole['datetime'].values,
+                                      self._dates.values)
+        np.testing.assert_array_equal(whole['asset'].values, df['SM_ID'])
+        np.testing.assert_allclose(whole['volume'].values,
+                                   df['VOLUME'] / 1000)
+
+        node, chunked = self._load({'file': self._path, 'chunksize': 300})
+        pd.testing.assert_frame_equal(chunked, whole)
+        chunks = list(node.iter_chunks())
+        self.assertEqual([len(chunk) for chunk in chunks],
+                         [300, 300, 300, 100])
+
+    @ordered
+    def test_predicate_pushdown(self):
+        '''Test the filters pushed into the loader select the filtered rows,
+        in one go and in chunks'''
+        tspec_list = [{
+            TaskSpecSchema.task_id: 'loader',
+            TaskSpecSchema.node_type: CsvStockLoader,
+            TaskSpecSchema.conf: {'file': self._path, 'chunksize': 300},
+            TaskSpecSchema.inputs: {}
+        }, {
+            TaskSpecSchema.task_id: 'asset',
+            TaskSpecSchema.node_type: AssetFilterNode,
+            TaskSpecSchema.conf: {'asset': 3},
+            TaskSpecSchema.inputs: {'stock_in': 'loader.' + PANDAS_PORT_NAME}
+        }]
+        tgraph = TaskGraph(tspec_list)
+        (rows, ) = tgraph.run(['asset.stock_out'])
+        self.assertEqual(tgraph['loader'].conf['filters'],
+                         [['asset', '==', 3]])
+        _, whole = self._load({'file': self._path})
+        selected = whole[whole['asset'] == 3].reset_index(drop=True)
+        pd.testing.assert_frame_equal(rows.reset_index(drop=True), selected)
+
+        filters = [['datetime', '>=', '1999-06-01'], ['asset', 'in', [2, 5]],
+                   ['close', '<', 0.5]]
+        selected = whole[(whole['datetime'] >= '1999-06-01') &
+                         whole['asset'].isin([2, 5]) &
+                         (whole['close'] < 0.5)].reset_index(drop=True)
+        for conf in ({}, {'chunksize': 300}):
+            conf = dict(conf, file=self._path, filters=filters)
+            _, loaded = self._load(conf)
+            pd.testing.assert_frame_equal(loaded, selected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,6 +24,7 @@ import unittest
 import cudf
 import greenflow_gquant_plugin.cuindicator as gi
 from greenflow_gquant_plugin.transform.indicatorNode import IndicatorNode
+from greenflow_gquant_plugin.transform.indicatorNode import IN_DATA
 from greenflow.dataframe_flow.task import Task
 from .utils import make_orderer
 import numpy as np
@@ -203,6 +204,49 @@ class TestIndicatorNode(unittest.TestCase):
         msg = "bad error %f\n" % (err,)
         self.assertTrue(np.isclose(err, 0, atol=1e-6), msg)
 
+    @ordered
+    def test_fused(self):
+        '''Test that the indicators computed in one fused pass match the
+        indicators computed one by one'''
+        indicators = [{"function": key} for key in IN_DATA
+                      if key != "port_shift"]
+        indicators.append({"function": "port_shift", "columns": ["in"]})
+        # configured twice, computed once
+        indicators.append({"function": "port_macd"})
+        conf = {"indicators": indicators, "remove_na": False}
+        node_obj = {"id": "abc",
+                    "type": "IndicatorNode",
+                    "conf": conf,
+                    "inputs": {}}
+        task = Task(node_obj)
+        inN = IndicatorNode(task)
+        o = inN.process({'stock_in': self._cudf_data.copy()})['stock_out']
+
+        df = self._cudf_data
+        for conf in inN._plan():
+            v = getattr(gi, conf['function'])(
+                df['indicator'], *([df[col] for col in conf['columns']] +
+                                   conf['args']))
+            outputs = conf.get('outputs', [])
+            if isinstance(v, tuple) and outputs:
+                refs = [(inN._compose_name(conf, [out]), getattr(v, out))
+                        for out in outputs]
+            else:
+                if isinstance(v, tuple):
+                    v = v[0]
+                refs = [(inN._compose_name(conf, []), v)]
+            for col, ref in refs:
+                computed = o[col].to_array('pandas')
+                ref = ref.to_array('pandas')
+                np.testing.assert_allclose(computed, ref, atol=1e-6,
+                                           err_msg=col)
+
+        indicator, close = df['indicator'], df['close']
+        with gi.fused() as scope:
+            gi.port_macd(indicator, close, 10, 20)
+            gi.port_exponential_moving_average(indicator, close, 10)
+        self.assertGreater(scope.hits, 0)
+
 
 if __name__ == '__main__':
     unittest.main()
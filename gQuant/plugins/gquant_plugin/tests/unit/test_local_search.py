@@ -0,0 +1,143 @@
+'''
+Local Hyper-parameter Search Unit Tests
+
+To run unittests:
+
+# Using standard library unittest
+
+python -m unittest -v
+python -m unittest tests/unit/test_local_search.py -v
+
+or
+
+python -m unittest discover <test_directory>
+python -m unittest discover -s <directory> -p 'test_*.py'
+
+# Using pytest
+# "conda install pytest" or "pip install pytest"
+pytest -v tests
+pytest -v tests/unit/test_local_search.py
+
+'''
+import warnings
+import unittest
+import numpy as np
+import pandas as pd
+from greenflow_gquant_plugin.ml.localSearch import share_frame, attach_frame
+from greenflow_gquant_plugin.ml.gridRandomSearchNode import (
+    GridRandomSearchNode)
+from greenflow.dataframe_flow.task import Task
+from .utils import make_orderer
+
+ordered, compare = make_orderer()
+unittest.defaultTestLoader.sortTestMethodsUsing = compare
+
+
+class TestLocalSearch(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter('ignore', category=ImportWarning)
+        warnings.simplefilter('ignore', category=DeprecationWarning)
+
+    def _node(self, parameters, num_samples=1, scheduler=None):
+        conf = {'parameters': parameters,
+                'tune': {'num_samples': num_samples},
+                'best': {'metric': 'metric.out', 'mode': 'min'}}
+        if scheduler is not None:
+            conf['scheduler'] = scheduler
+            conf['context'] = {'rounds': {'type': 'number', 'value': 1,
+                                          'map': []}}
+        return GridRandomSearchNode(Task({'id': 'hpo',
+                                          'type': 'GridRandomSearchNode',
+                                          'conf': conf,
+                                          'inputs': {}}))
+
+    @ordered
+    def test_shared_frame(self):
+        '''Test a dataframe is read back from the shared memory'''
+        df = pd.DataFrame({'asset': np.arange(100),
+                           'close': np.random.rand(100),
+                           'name': ['a', 'b'] * 50},
+                          index=np.arange(100, 200))
+        shared, shm = share_frame(df)
+        try:
+            out, attached = attach_frame(shared)
+            pd.testing.assert_frame_equal(out, df)
+            del out
+            attached.close()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    @ordered
+    def test_search_configs(self):
+        '''Test the grid and the sampled trial configs'''
+        grid = [{'name': 'fast', 'search': {'function': 'grid_search',
+                                            'args': [5, 10]}},
+                {'name': 'slow', 'search': {'function': 'grid_search',
+                                            'args': [20, 40, 60]}}]
+        node = self._node(grid, num_samples=4)
+        configs = node._search_configs()
+        # a grid is not repeated without sampled parameters
+        self.assertEqual(len(configs), 6)
+        self.assertEqual(configs[0], {'fast': 5, 'slow': 20})
+        self.assertEqual(configs[-1], {'fast': 10, 'slow': 60})
+
+        sampled = grid[:1] + [
+            {'name': 'rate', 'search': {'function': 'loguniform',
+                                        'args': [0.001, 0.1]}},
+            {'name': 'kind', 'search': {'function': 'choice',
+                                        'args': ['a', 'b']}}]
+        node = self._node(sampled, num_samples=3)
+        configs = node._search_configs()
+        self.assertEqual(len(configs), 6)
+        self.assertEqual([config['fast'] for config in configs],
+                         [5, 10] * 3)
+        for config in configs:
+            self.assertTrue(0.001 <= config['rate'] <= 0.1)
+            self.assertIn(config['kind'], ['a', 'b'])
+
+        metrics = [{'metric.out': 3.0}, {'metric.out': -1.0}] * 3
+        self.assertIs(node._best_config(configs, metrics), configs[1])
+
+        node = self._node([{'name': 'fast',
+                            'search': {'function': 'gamma', 'args': []}}])
+        with self.assertRaises(ValueError):
+            node._search_configs()
+
+    @ordered
+    def test_successive_halving(self):
+        '''Test the configs are pruned rung by rung'''
+        grid = [{'name': 'rate', 'search': {'function': 'grid_search',
+                                            'args': list(range(9))}}]
+        scheduler = {'name': 'successive_halving', 'resource': 'rounds',
+                     'min_resource': 1, 'max_resource': 9,
+                     'reduction_factor': 3}
+        node = self._node(grid, scheduler=scheduler)
+        self.assertEqual(node._rung_resources(), [1, 3, 9])
+        evaluated = []
+
+        def evaluate(configs):
+            evaluated.append(configs)
+            # the configs far from 4 are better with few rounds only
+            return [{'metric.out': abs(config['rate'] - 4) /
+                     config['rounds'] + (config['rate'] % 2) * 10 /
+                     config['rounds'] ** 2} for config in configs]
+
+        best = node._search_best_config(node._search_configs(), evaluate)
+        self.assertEqual(best, {'rate': 4, 'rounds': 9})
+        self.assertEqual([len(configs) for configs in evaluated], [9, 3, 1])
+        self.assertEqual([configs[0]['rounds'] for configs in evaluated],
+                         [1, 3, 9])
+
+        scheduler.update(min_resource=0.1, max_resource=1,
+                         reduction_factor=2)
+        np.testing.assert_allclose(node._rung_resources(),
+                                   [0.1, 0.2, 0.4, 0.8, 1.0])
+        scheduler['resource'] = 'depth'
+        with self.assertRaises(ValueError):
+            node._rung_resources()
+
+
+if __name__ == '__main__':
+    unittest.main()
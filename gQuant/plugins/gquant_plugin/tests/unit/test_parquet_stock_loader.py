@@ -0,0 +1,162 @@
+'''
+Parquet Stock Loader Unit Tests
+
+To run unittests:
+
+# Using standard library unittest
+
+python -m unittest -v
+python -m unittest tests/unit/test_parquet_stock_loader.py -v
+
+or
+
+python -m unittest discover <test_directory>
+python -m unittest discover -s <directory> -p 'test_*.py'
+
+# Using pytest
+# "conda install pytest" or "pip install pytest"
+pytest -v tests
+pytest -v tests/unit/test_parquet_stock_loader.py
+
+'''
+import tempfile
+import warnings
+import unittest
+import numpy as np
+import pandas as pd
+from greenflow_gquant_plugin.dataloader.parquetStockLoader import (
+    ParquetStockLoader, partition_files, PANDAS_PORT_NAME)
+from greenflow_gquant_plugin.dataloader.parquetStockWriter import (
+    ParquetStockWriter)
+from greenflow_gquant_plugin.transform.datetimeFilterNode import (
+    DatetimeFilterNode)
+from greenflow_gquant_plugin.transform.valueFilterNode import (
+    ValueFilterNode)
+from greenflow.dataframe_flow import TaskGraph, TaskSpecSchema
+from greenflow.dataframe_flow.task import Task
+from .utils import make_orderer
+
+ordered, compare = make_orderer()
+unittest.defaultTestLoader.sortTestMethodsUsing = compare
+
+
+class TestParquetStockLoader(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter('ignore', category=ImportWarning)
+        warnings.simplefilter('ignore', category=DeprecationWarning)
+        np.random.seed(10)
+        dates = pd.date_range('2008-06-01', '2011-06-30')
+        assets = [2, 10, 33]
+        df = pd.DataFrame()
+        df['datetime'] = np.tile(dates.values, len(assets))
+        df['asset'] = np.repeat(assets, len(dates))
+        for col in ['open', 'close', 'high', 'low', 'volume']:
+            df[col] = np.random.rand(len(df))
+        self._bars = df
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._path = self._tmp_dir.name
+        writer = ParquetStockWriter(Task({'id': 'writer',
+                                          'type': 'ParquetStockWriter',
+                                          'conf': {'path': self._path,
+                                                   'row_group_size': 50},
+                                          'inputs': {}}))
+        # the writer sorts the bars of every partition by datetime
+        writer.process({'stock_in': df.sample(frac=1.0)})
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _load(self, conf):
+        conf = dict(conf, path=self._path)
+        node = ParquetStockLoader(Task({'id': 'loader',
+                                        'type': 'ParquetStockLoader',
+                                        'conf': conf,
+                                        'inputs': {}}))
+        node.outport_connected = lambda port: port == PANDAS_PORT_NAME
+        return node.process({})[PANDAS_PORT_NAME]
+
+    @ordered
+    def test_partition_pruning(self):
+        '''Test only the partitions of the selection are listed'''
+        self.assertEqual(len(partition_files(self._path)), 12)
+        files = partition_files(self._path, assets=[10, 33],
+                                beg='2009-03-01', end='2010-01-01')
+        self.assertEqual(len(files), 2)
+        self.assertTrue(files[0].endswith('asset=10/year=2009/part.parquet'))
+        self.assertTrue(files[1].endswith('asset=33/year=2009/part.parquet'))
+
+    @ordered
+    def test_load(self):
+        '''Test the loaded bars match the written bars'''
+        df = self._bars
+        loaded = self._load({})
+        pd.testing.assert_frame_equal(
+            loaded[df.columns].reset_index(drop=True), df)
+
+        conf = {'assets': [2, 33], 'beg': '2009-03-05', 'end': '2010-02-01',
+                'columns': ['datetime', 'asset', 'close']}
+        loaded = self._load(conf)
+        self.assertEqual(list(loaded.columns), conf['columns'])
+        selected = df[df['asset'].isin(conf['assets']) &
+                      (df['datetime'] >= conf['beg']) &
+                      (df['datetime'] < conf['end'])]
+        pd.testing.assert_frame_equal(
+            loaded.reset_index(drop=True),
+            selected[conf['columns']].reset_index(drop=True))
+
+        loaded = self._load({'assets': [5]})
+        self.assertEqual(len(loaded), 0)
+        self.assertEqual(loaded['datetime'].dtype, np.dtype('<M8[ns]'))
+
+    @ordered
+    def test_predicate_pushdown(self):
+        '''Test the filters downstream are pushed into the loader'''
+        tspec_list = [{
+            TaskSpecSchema.task_id: 'loader',
+            TaskSpecSchema.node_type: ParquetStockLoader,
+            TaskSpecSchema.conf: {'path': self._path},
+            TaskSpecSchema.inputs: {}
+        }, {
+            TaskSpecSchema.task_id: 'dates',
+            TaskSpecSchema.node_type: DatetimeFilterNode,
+            TaskSpecSchema.conf: {'beg': '2009-03-05', 'end': '2010-02-01'},
+            TaskSpecSchema.inputs: {'stock_in': 'loader.' + PANDAS_PORT_NAME}
+        }, {
+            TaskSpecSchema.task_id: 'values',
+            TaskSpecSchema.node_type: ValueFilterNode,
+            TaskSpecSchema.conf: [{'column': 'close', 'min': 0.5}],
+            TaskSpecSchema.inputs: {'in': 'dates.stock_out'}
+        }]
+        tgraph = TaskGraph(tspec_list)
+        (rows, ) = tgraph.run(['values.out'])
+        conf = tgraph['loader'].conf
+        self.assertEqual(conf['beg'], '2009-03-05')
+        self.assertEqual(conf['end'], '2010-02-01')
+        self.assertEqual(conf['filters'], [['close', '>=', 0.5]])
+
+        df = self._bars
+        selected = df[(df['datetime'] >= '2009-03-05') &
+                      (df['datetime'] < '2010-02-01') &
+                      (df['close'] >= 0.5)]
+        pd.testing.assert_frame_equal(
+            rows[df.columns].reset_index(drop=True),
+            selected.reset_index(drop=True))
+
+    @ordered
+    def test_value_filter_exact(self):
+        '''Test the filter selects the rows of the exact pushed values'''
+        node = ValueFilterNode(Task({'id': 'values',
+                                     'type': 'ValueFilterNode',
+                                     'conf': [{'column': 'close',
+                                               'min': 1e-7,
+                                               'max': 0.5 + 1e-9}],
+                                     'inputs': {}}))
+        df = pd.DataFrame({'close': [5e-8, 1e-7, 0.5, 0.5 + 2e-9]})
+        rows = node.process({node.INPUT_PORT_NAME: df})[
+            node.OUTPUT_PORT_NAME]
+        self.assertEqual(list(rows['close']), [1e-7, 0.5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,238 @@
+'''
+Risk Portfolio Optimizer Unit Tests
+
+To run unittests:
+
+# Using standard library unittest
+
+python -m unittest -v
+python -m unittest tests/unit/test_risk_port_opt.py -v
+
+or
+
+python -m unittest discover <test_directory>
+python -m unittest discover -s <directory> -p 'test_*.py'
+
+# Using pytest
+# "conda install pytest" or "pip install pytest"
+pytest -v tests
+pytest -v tests/unit/test_risk_port_opt.py
+
+'''
+import warnings
+import unittest
+import numpy as np
+import pandas as pd
+from greenflow_gquant_plugin.portofolio.riskModel import (
+    risk_model, mean_variance_weights, bounded_mean_variance_weights,
+    project_capped_simplex, seriation, hrp_weights, rebalance_weights)
+from greenflow_gquant_plugin.portofolio.riskPortOpt import (
+    MinVariancePortOpt, MeanVariancePortOpt, HRPPortOpt)
+from greenflow.dataframe_flow.task import Task
+from .utils import make_orderer
+
+ordered, compare = make_orderer()
+unittest.defaultTestLoader.sortTestMethodsUsing = compare
+
+
+def ledoit_wolf(x):
+    '''The Ledoit-Wolf covariance of the window x asset returns.'''
+    x = x - x.mean(axis=0)
+    length, num = x.shape
+    sample = x.T @ x / length
+    mu = np.trace(sample) / num
+    delta = np.linalg.norm(sample - mu * np.eye(num)) ** 2
+    beta = sum(np.linalg.norm(np.outer(row, row) - sample) ** 2
+               for row in x) / length ** 2
+    shrinkage = min(beta, delta) / delta
+    return shrinkage * mu * np.eye(num) + (1 - shrinkage) * sample
+
+
+def project_bisect(v, lower, upper):
+    '''Project onto the capped simplex by bisection of the shift.'''
+    low, high = v.min() - upper - 1.0, v.max() - lower + 1.0
+    for _ in range(200):
+        shift = (low + high) / 2
+        if np.clip(v - shift, lower, upper).sum() > 1:
+            low = shift
+        else:
+            high = shift
+    return np.clip(v - shift, lower, upper)
+
+
+def hrp_recursive(cov, order):
+    '''Hierarchical risk parity by recursive bisection of the order.'''
+    weights = np.ones(len(cov))
+
+    def variance(items):
+        inv = 1.0 / np.diag(cov)[items]
+        inv /= inv.sum()
+        return inv @ cov[np.ix_(items, items)] @ inv
+
+    def bisect(items):
+        if len(items) < 2:
+            return
+        left, right = items[:len(items) // 2], items[len(items) // 2:]
+        var_left, var_right = variance(left), variance(right)
+        weights[left] *= var_right / (var_left + var_right)
+        weights[right] *= var_left / (var_left + var_right)
+        bisect(left)
+        bisect(right)
+
+    bisect(list(order))
+    return weights
+
+
+class TestRiskPortOpt(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter('ignore', category=ImportWarning)
+        warnings.simplefilter('ignore', category=DeprecationWarning)
+        np.random.seed(0)
+        self._returns = np.random.randn(120, 8) * 0.01 + \
+            np.random.randn(120, 1) * 0.01
+        # an asset without bars in the first windows
+        self._returns[5:50, 2] = np.nan
+        self._steps = np.array([40, 60, 100])
+        self._window = 40
+
+    def _windows(self):
+        model = risk_model(self._returns, self._steps, self._window)
+        for k, step in enumerate(self._steps):
+            eligible = model.eligible[k]
+            x = self._returns[step - self._window:step][:, eligible]
+            yield model, k, eligible, ledoit_wolf(x)
+
+    @ordered
+    def test_risk_model(self):
+        '''Test the factored covariances are the Ledoit-Wolf estimates'''
+        for model, k, eligible, cov in self._windows():
+            self.assertEqual(eligible.sum(), 7 if k < 2 else 8)
+            u = model.u[k][:, eligible]
+            np.testing.assert_allclose(
+                model.d[k] * np.eye(len(cov)) + u.T @ u, cov)
+
+        # no shrinkage leaves the covariances singular
+        for shrinkage in (0.0, -0.5, 1.5):
+            with self.assertRaises(ValueError):
+                risk_model(self._returns, self._steps, self._window,
+                           shrinkage)
+
+    @ordered
+    def test_mean_variance(self):
+        '''Test the closed form minimum variance and mean-variance weights'''
+        min_var = mean_variance_weights(
+            risk_model(self._returns, self._steps, self._window))
+        mean_var = mean_variance_weights(
+            risk_model(self._returns, self._steps, self._window), 3.0)
+        for model, k, eligible, cov in self._windows():
+            expected = np.linalg.solve(cov, np.ones(len(cov)))
+            np.testing.assert_allclose(min_var[k][eligible],
+                                       expected / expected.sum())
+            self.assertTrue((min_var[k][~eligible] == 0).all())
+            # the gradient is the same for all the assets
+            grad = 3.0 * cov @ mean_var[k][eligible] - \
+                model.means[k][eligible]
+            np.testing.assert_allclose(grad, grad[0])
+            self.assertAlmostEqual(mean_var[k].sum(), 1.0)
+
+    @ordered
+    def test_bounded(self):
+        '''Test the bounded weights satisfy the optimality conditions'''
+        model = risk_model(self._returns, self._steps, self._window)
+        weights = bounded_mean_variance_weights(model, 3.0, 0.0, 0.3,
+                                                tol=1e-14)
+        for model, k, eligible, cov in self._windows():
+            w = weights[k][eligible]
+            self.assertAlmostEqual(w.sum(), 1.0)
+            self.assertTrue(((w >= 0.0) & (w <= 0.3)).all())
+            # the gradient is the same for the weights inside the bounds,
+            # not lower at the lower bound and not higher at the upper one
+            grad = 3.0 * cov @ w - model.means[k][eligible]
+            inside = (w > 1e-9) & (w < 0.3 - 1e-9)
+            self.assertTrue(inside.any() and (~inside).any())
+            level = grad[inside].mean()
+            np.testing.assert_allclose(grad[inside], level, atol=1e-9)
+            self.assertTrue((grad[w <= 1e-9] >= level - 1e-9).all())
+            self.assertTrue((grad[w >= 0.3 - 1e-9] <= level + 1e-9).all())
+            self.assertTrue((weights[k][~eligible] == 0).all())
+
+        v = np.random.randn(3, 8)
+        eligible = np.ones((3, 8), dtype=bool)
+        eligible[1, :3] = False
+        eligible[2] = False
+        projected = project_capped_simplex(v, eligible, -0.2, 0.4)
+        np.testing.assert_allclose(projected.sum(axis=1), [1.0, 1.0, 0.0])
+        np.testing.assert_allclose(projected[0],
+                                   project_bisect(v[0], -0.2, 0.4))
+        self.assertTrue((projected[1, :3] == 0).all())
+
+    @ordered
+    def test_hrp(self):
+        '''Test the seriation and the hierarchical risk parity weights'''
+        factors = np.random.randn(200, 2)
+        # the assets of the two factors interleaved
+        corr = np.corrcoef((np.repeat(factors, 3, axis=1)[:, [0, 3, 1, 4,
+                                                              2, 5]] +
+                            np.random.randn(200, 6) * 0.5).T)
+        order = list(seriation(corr))
+        self.assertEqual(sorted(order), list(range(6)))
+        self.assertEqual(sorted(order[:3]) in ([0, 2, 4], [1, 3, 5]), True)
+
+        weights = hrp_weights(
+            risk_model(self._returns, self._steps, self._window))
+        for model, k, eligible, cov in self._windows():
+            std = np.sqrt(np.diag(cov))
+            order = seriation(cov / np.outer(std, std))
+            np.testing.assert_allclose(weights[k][eligible],
+                                       hrp_recursive(cov, order))
+            self.assertTrue((weights[k][~eligible] == 0).all())
+
+    @ordered
+    def test_rebalance(self):
+        '''Test the weights are held between the rebalances'''
+        weights = rebalance_weights(self._returns, self._window, 20,
+                                    mean_variance_weights)
+        model = risk_model(self._returns, np.array([60]), self._window)
+        self.assertTrue((weights[:40] == 0).all())
+        np.testing.assert_allclose(weights[60:80],
+                                   np.repeat(mean_variance_weights(model),
+                                             20, axis=0))
+        np.testing.assert_allclose(weights[40:].sum(axis=1), 1.0)
+
+    @ordered
+    def test_nodes(self):
+        '''Test the nodes add the weights as the signal of the bars'''
+        dates = pd.date_range('2010-01-01', periods=120)
+        df = pd.DataFrame()
+        df['datetime'] = np.tile(dates.values, 8)
+        df['asset'] = np.repeat(np.arange(8), 120)
+        df['returns'] = self._returns.T.ravel()
+        df = df.dropna().sample(frac=1.0)
+        conf = {'window': 40, 'rebalance': 20}
+        for node_type, extra in [(MinVariancePortOpt, {}),
+                                 (MinVariancePortOpt, {'long_only': True,
+                                                       'max_weight': 0.3}),
+                                 (MeanVariancePortOpt, {'risk_aversion': 3}),
+                                 (HRPPortOpt, {})]:
+            task = Task({'id': 'port', 'type': node_type.__name__,
+                         'conf': dict(conf, **extra), 'inputs': {}})
+            out = node_type(task).process(
+                {'stock_in': df.copy()})['stock_out']
+            self.assertEqual(len(out), len(df))
+            total = out.groupby('datetime')['signal'].sum()
+            np.testing.assert_allclose(total[dates[40:]], 1.0)
+            np.testing.assert_allclose(total[dates[:40]], 0.0)
+            if extra.get('long_only'):
+                self.assertTrue(out['signal'].between(0.0, 0.3 + 1e-9).all())
+        weights = rebalance_weights(self._returns, 40, 20,
+                                    mean_variance_weights)
+        task = Task({'id': 'port', 'type': 'MinVariancePortOpt',
+                     'conf': conf, 'inputs': {}})
+        out = MinVariancePortOpt(task).process({'stock_in': df})['stock_out']
+        out = out.set_index(['datetime', 'asset'])['signal']
+        self.assertAlmostEqual(out[(dates[70], 4)], weights[70, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
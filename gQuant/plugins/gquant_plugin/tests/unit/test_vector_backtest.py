@@ -0,0 +1,126 @@
+'''
+Vectorized Backtest Unit Tests
+
+To run unittests:
+
+# Using standard library unittest
+
+python -m unittest -v
+python -m unittest tests/unit/test_vector_backtest.py -v
+
+or
+
+python -m unittest discover <test_directory>
+python -m unittest discover -s <directory> -p 'test_*.py'
+
+# Using pytest
+# "conda install pytest" or "pip install pytest"
+pytest -v tests
+pytest -v tests/unit/test_vector_backtest.py
+
+'''
+import warnings
+import unittest
+import numpy as np
+import pandas as pd
+from greenflow_gquant_plugin.backtest.vectorBackTest import (
+    VectorBackTestNode, to_matrix, backtest)
+from greenflow.dataframe_flow.task import Task
+from .utils import make_orderer
+
+ordered, compare = make_orderer()
+unittest.defaultTestLoader.sortTestMethodsUsing = compare
+
+
+def backtest_loop(bars, leverage, rebalance, cost):
+    '''Backtest the bars date by date, the reference of the tests.'''
+    dates = sorted(bars['datetime'].unique())
+    assets = sorted(bars['asset'].unique())
+    held = pd.Series(0.0, index=assets)
+    net = []
+    for step, date in enumerate(dates):
+        day = bars[bars['datetime'] == date].set_index('asset')
+        if step % rebalance == 0:
+            weights = day['signal'].reindex(assets).fillna(0.0)
+            gross = weights.abs().sum()
+            if gross > leverage:
+                weights = weights * leverage / gross
+            traded = (weights - held).abs().sum()
+            held = weights
+        else:
+            traded = 0.0
+        returns = day['returns'].reindex(assets).fillna(0.0)
+        net.append((held * returns).sum() - cost * traded)
+    return np.array(net)
+
+
+class TestVectorBackTest(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter('ignore', category=ImportWarning)
+        warnings.simplefilter('ignore', category=DeprecationWarning)
+        np.random.seed(3)
+        dates = pd.date_range('2010-01-01', periods=30)
+        assets = [7, 3, 12, 5]
+        df = pd.DataFrame()
+        df['datetime'] = np.tile(dates.values, len(assets))
+        df['asset'] = np.repeat(assets, len(dates))
+        df['signal'] = np.random.choice([-1.0, 0.0, 1.0], len(df))
+        df['returns'] = np.random.randn(len(df)) * 0.01
+        # missing bars and an unordered dataframe
+        self._bars = df.drop(index=[4, 40, 41, 97]).sample(frac=1.0)
+
+    @ordered
+    def test_to_matrix(self):
+        '''Test the bars are pivoted into time x asset matrices'''
+        df = self._bars
+        times, assets, (signal, ) = to_matrix(df, ['signal'])
+        self.assertEqual(list(assets), [3, 5, 7, 12])
+        self.assertEqual(signal.shape, (30, 4))
+        self.assertEqual(np.isnan(signal).sum(), 4)
+        row = df[(df['asset'] == 12) &
+                 (df['datetime'] == pd.Timestamp(times[5]))]
+        self.assertEqual(signal[5, 3], row['signal'].iloc[0])
+
+    @ordered
+    def test_backtest(self):
+        '''Test the vectorized backtest matches the date by date loop'''
+        df = self._bars
+        _, _, (signal, returns) = to_matrix(df, ['signal', 'returns'])
+        for leverage, rebalance in [(10.0, 1), (1.5, 1), (2.0, 4)]:
+            result = backtest(signal, returns, leverage=leverage,
+                              rebalance=rebalance, cost=0.001,
+                              slippage=0.0005)
+            expected = backtest_loop(df, leverage, rebalance, 0.0015)
+            np.testing.assert_allclose(result['strategy_returns'], expected)
+            self.assertTrue((result['leverage'] <= leverage + 1e-12).all())
+
+        result = backtest(signal, returns, sizing='normalize', leverage=2.0)
+        active = np.nan_to_num(signal).any(axis=1)
+        np.testing.assert_allclose(result['leverage'][active], 2.0)
+
+        with self.assertRaises(ValueError):
+            backtest(signal, returns, sizing='kelly')
+
+    @ordered
+    def test_node(self):
+        '''Test the node output per date'''
+        node = VectorBackTestNode(Task({'id': 'backtest',
+                                        'type': 'VectorBackTestNode',
+                                        'conf': {'cost': 0.001,
+                                                 'rebalance': 2},
+                                        'inputs': {}}))
+        out = node.process({'bardata_in': self._bars})['backtest_out']
+        self.assertEqual(list(out.columns),
+                         ['datetime', 'strategy_returns', 'gross_returns',
+                          'costs', 'turnover', 'leverage'])
+        self.assertEqual(len(out), 30)
+        self.assertTrue(out['datetime'].is_monotonic_increasing)
+        self.assertEqual(out['datetime'].dtype, np.dtype('<M8[ns]'))
+        np.testing.assert_allclose(
+            out['strategy_returns'],
+            backtest_loop(self._bars, np.inf, 2, 0.001))
+
+
+if __name__ == '__main__':
+    unittest.main()
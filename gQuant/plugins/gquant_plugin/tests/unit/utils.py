@@ -21,7 +21,8 @@ def error_function(gpu_series, result_series):
     Parameters
     ------
     gpu_series: cudf.Series
-        GPU computation result series
+        GPU computation result series, or pandas.Series computed by the CPU
+        backend
     result_series: pandas.Series
         Pandas computation result series
 
@@ -30,7 +31,10 @@ def error_function(gpu_series, result_series):
     double
         maximum error of the two arrays
     """
-    gpu_arr = gpu_series.to_array(fillna='pandas')
+    if hasattr(gpu_series, 'to_array'):
+        gpu_arr = gpu_series.to_array(fillna='pandas')
+    else:
+        gpu_arr = np.asarray(gpu_series)
     pan_arr = result_series.values
     gpu_arr = gpu_arr[~np.isnan(gpu_arr) & ~np.isinf(gpu_arr)]
     pan_arr = pan_arr[~np.isnan(pan_arr) & ~np.isinf(pan_arr)]
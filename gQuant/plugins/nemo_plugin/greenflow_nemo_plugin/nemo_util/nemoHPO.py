@@ -224,6 +224,8 @@ class NemoHyperTuneNode(GridRandomSearchNode):
         json = conf.json
         if 'properties' in json:
             del json['properties']['metrics']
+            # the trials are run by Ray Tune
+            del json['properties']['engine']
             json['properties']['best'][
                 'properties']['metric']['enum'] = tensors
             json['properties']['scheduler'] = copy.deepcopy(_SCHED_CONF)
@@ -1,4 +1,9 @@
 from collections.abc import Iterable
+import hashlib
+import inspect
+import json
+import os
+import sys
 import warnings
 import dask
 from dask.dataframe import DataFrame as DaskDataFrame
@@ -17,7 +22,8 @@ OUTPUT_TYPE = 'Output_Collector'
 
 
 __all__ = ['NodeTaskGraphMixin', 'OUTPUT_ID', 'OUTPUT_TYPE',
-           'register_validator', 'register_copy_function']
+           'register_validator', 'register_copy_function',
+           'invalidate_setup']
 
 # class NodeIncomingEdge(object):
 #     from_node = 'from_node'
@@ -36,6 +42,35 @@ _VALIDATORS = {}
 _COPYS = {}
 # dictionary of clean up functions
 _CLEANUP = {}
+# dictionary of node class -> code version
+_CODE_VERSIONS = {}
+# counter bumped whenever a node conf or the graph connections change. The
+# memoized ports_setup/meta_setup/conf_schema results of an older epoch are
+# recomputed, as they depend on the conf and on the upstream nodes.
+_SETUP_EPOCH = 0
+
+
+def _code_version(nodetype):
+    '''Version of the node implementation, a hash of the node class source
+    code and the version of the package it belongs to.'''
+    if nodetype not in _CODE_VERSIONS:
+        try:
+            source = inspect.getsource(nodetype)
+        except (OSError, TypeError):
+            # dynamically defined class
+            source = ''
+        package = sys.modules.get(nodetype.__module__.split('.')[0])
+        version = getattr(package, '__version__', '')
+        _CODE_VERSIONS[nodetype] = hashlib.sha1(
+            (source + version).encode()).hexdigest()
+    return _CODE_VERSIONS[nodetype]
+
+
+def invalidate_setup():
+    '''Invalidate the memoized ports_setup, meta_setup and conf_schema
+    results of all the nodes.'''
+    global _SETUP_EPOCH
+    _SETUP_EPOCH += 1
 
 
 def _get_nodetype(node):
@@ -56,16 +91,38 @@ def _get_nodetype(node):
     return keeptypes
 
 
+def _resolve_type(typename):
+    """
+    The type of a dotted type name if its module is imported, else the name.
+    """
+    if isinstance(typename, str):
+        module_name, _, attr = typename.rpartition('.')
+        module = sys.modules.get(module_name)
+        if module is not None and hasattr(module, attr):
+            return getattr(module, attr)
+    return typename
+
+
 def register_validator(typename: type,
                        fun) -> None:
+    """
+    @param typename
+        type, or the dotted name of a type, e.g. 'cudf.DataFrame'. A name
+        is resolved once its module is imported, so the registering plugin
+        does not have to import it.
+    """
     # print('register validator for', typename)
-    _VALIDATORS[typename] = fun
+    _VALIDATORS[_resolve_type(typename)] = fun
 
 
 def register_copy_function(typename: type,
                            fun) -> None:
+    """
+    @param typename
+        type, or the dotted name of a type, see `register_validator`
+    """
     # print('register validator for', typename)
-    _COPYS[typename] = fun
+    _COPYS[_resolve_type(typename)] = fun
 
 
 def register_cleanup(name: str,
@@ -74,6 +131,21 @@ def register_cleanup(name: str,
     _CLEANUP[name] = fun
 
 
+def _registered(registry, typeObj):
+    """
+    Look up the function registered for the type in the registry, matching
+    the type names whose module has been imported since registration. The
+    registry is only read, the nodes may run in threads.
+    """
+    fun = registry.get(typeObj)
+    if fun is not None:
+        return fun
+    for name, fun in list(registry.items()):
+        if isinstance(name, str) and _resolve_type(name) is typeObj:
+            return fun
+    return None
+
+
 class NodeTaskGraphMixin(object):
     '''Relies on mixing in with a Node class that has the following attributes
     and methods:
@@ -96,6 +168,15 @@ class NodeTaskGraphMixin(object):
             _get_output_ports
     '''
 
+    @property
+    def conf(self):
+        return self.__conf
+
+    @conf.setter
+    def conf(self, conf):
+        self.__conf = conf
+        invalidate_setup()
+
     def __getstate__(self):
         state = self.__dict__.copy()
         if 'input_df' in state:
@@ -110,6 +191,18 @@ class NodeTaskGraphMixin(object):
         self.inputs = []
         self.outputs = []
         self.visited = False
+        # number of input connections, computed in TaskGraph.build
+        self.in_degree = 0
+        # ResultCache to look up the outputs under the fingerprint
+        # `result_key`, set for the run
+        self.result_cache = None
+        self.result_key = None
+        # check the outputs against the output meta, set for the run by the
+        # validation mode of TaskGraph.run
+        self.validate_outputs = True
+        # FusedChain run as one step if this node is the head of a chain,
+        # set by the optimization pass of TaskGraph.build
+        self.fused_chain = None
 
         self.input_df = {}
         # input_df format:
@@ -122,6 +215,29 @@ class NodeTaskGraphMixin(object):
         #     typically a data container.
         self.clear_input = True
 
+    def __memoized(self, name, setup_fun):
+        '''The ports, meta and conf schema setups are called over and over
+        while building and validating a graph and meta_setup recurses into
+        the upstream nodes. Compute them once per setup epoch.'''
+        memo = self.__dict__.get('_NodeTaskGraphMixin__setup_memo')
+        if memo is None or memo[0] != _SETUP_EPOCH:
+            memo = (_SETUP_EPOCH, {})
+            self.__setup_memo = memo
+        if name not in memo[1]:
+            memo[1][name] = setup_fun()
+        return memo[1][name]
+
+    def clear_setup(self):
+        '''Drop the memoized setups of this node, e.g. after `process`
+        updated the node state they depend on.'''
+        self.__setup_memo = None
+
+    def meta_setup(self):
+        return self.__memoized('meta', super().meta_setup)
+
+    def conf_schema(self):
+        return self.__memoized('schema', super().conf_schema)
+
     def ports_setup(self):
         """
         overwrite the super class ports_setup so it can calculate the dynamic
@@ -130,6 +246,9 @@ class NodeTaskGraphMixin(object):
         :return: Node ports
         :rtype: NodePorts
         """
+        return self.__memoized('ports', self.__ports_setup)
+
+    def __ports_setup(self):
         # this will filter out the primary class with ports_setup
         nodecls_list = _get_nodetype(self)
         for icls in nodecls_list:
@@ -161,8 +280,8 @@ class NodeTaskGraphMixin(object):
                         port_type: types, dy: True}
         return ports
 
-    def __valide(self, node_output: dict):
-        output_meta = self.meta_setup().outports
+    def __valide(self, node_output: dict, validate_meta=True):
+        output_meta = self.meta_setup().outports if validate_meta else None
         # Validate each port
         out_ports = self._get_output_ports(full_port_spec=True)
         for pname, pspec in out_ports.items():
@@ -209,8 +328,9 @@ class NodeTaskGraphMixin(object):
             #     if len(out_val.columns) == 0 and out_optional:
             #         continue
 
-            if out_type in _VALIDATORS:
-                validator = _VALIDATORS[out_type]
+            validator = _registered(_VALIDATORS, out_type) \
+                if validate_meta else None
+            if validator is not None:
                 meta_to_val = output_meta.get(pname)
                 val_flag = validator(out_val, meta_to_val, self)
                 if not val_flag:
@@ -246,7 +366,7 @@ class NodeTaskGraphMixin(object):
         dy = PortsSpecSchema.dynamic
         for node_input in self.inputs:
             from_node = node_input['from_node']
-            meta_data = copy.deepcopy(from_node.meta_setup())
+            meta_data = from_node.meta_setup()
             from_port_name = node_input['from_port']
             to_port_name = node_input['to_port']
             if from_port_name not in meta_data.outports:
@@ -264,11 +384,14 @@ class NodeTaskGraphMixin(object):
                 )
             else:
                 out_port_name = from_node.uid+'@'+from_port_name
+                # copy, the meta_setup of this node may modify it and the
+                # upstream meta is memoized
+                port_meta = copy.deepcopy(meta_data.outports[from_port_name])
                 if out_port_name in inports and inports[
                         out_port_name].get(dy, False):
-                    output[out_port_name] = meta_data.outports[from_port_name]
+                    output[out_port_name] = port_meta
                 else:
-                    output[to_port_name] = meta_data.outports[from_port_name]
+                    output[to_port_name] = port_meta
         return output
 
     def __set_input_df(self, to_port, df):
@@ -283,46 +406,139 @@ class NodeTaskGraphMixin(object):
             * calls its process function to manipulate the input dataframes
             * set the resulting dataframe to the children nodes as inputs
             * flow each of the chidren nodes
+        The children are flowed iteratively, there is no recursion depth
+        limit on the graph depth. TaskGraph.run schedules the nodes with
+        the precomputed `in_degree` counters instead.
         """
-        if progress_fun is not None:
-            progress_fun(self.uid)
-        input_ready = self.__input_ready()
-        if not input_ready:
-            return
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if progress_fun is not None:
+                progress_fun(node.uid)
+            input_ready = node.__input_ready()
+            if not input_ready:
+                continue
 
-        inputs_data = self.__get_input_df()
-        output_df = self.__call__(inputs_data)
+            inputs_data = node.take_inputs()
+            output_df = node.__call__(inputs_data)
+
+            children = [onode for onode in node.push_outputs(output_df)
+                        if onode.visited]
+            stack.extend(reversed(children))
 
+    def take_inputs(self):
+        """
+        Get the input dataframes gathered for this node. The node's reference
+        to them is dropped afterwards unless `clear_input` is False.
+        returns
+            dict, key is the input port name, value is the input data
+        """
+        inputs_data = self.__get_input_df()
         if self.clear_input:
             self.input_df = {}
+        return inputs_data
 
+    def push_outputs(self, output_df):
+        """
+        Set the output dataframes of this node as inputs of the connected
+        children nodes. It is a generator that yields the child node after
+        each connection is handed its data.
+        @params output_df
+            dict, the output of this node keyed by output port name
+        """
         for out in self.outputs:
             onode = out['to_node']
             iport = out['to_port']
-            oport = out['from_port']
-
-            if oport is not None:
-                if oport not in output_df:
-                    if onode.uid in (OUTPUT_ID,):
-                        onode_msg = 'is listed in task-graph outputs'
-                    else:
-                        onode_msg = 'is required as input to node "{}"'.format(
-                            onode.uid)
-                    err_msg = 'ERROR: Missing output port "{}" from '\
-                        'node "{}". This output {}.'.format(
-                            oport, self.uid, onode_msg)
-                    raise Exception(err_msg)
-                df = output_df[oport]
+            df = self.select_output(out, output_df)
 
             onode.__set_input_df(iport, df)
 
-            if onode.visited:
-                onode.flow(progress_fun)
+            yield onode
+
+    def select_output(self, out, output_df):
+        """
+        Get the output data that is passed along an outgoing connection.
+        @params out
+            dict, an entry of the node outputs with keys to_node, to_port,
+            from_port
+        @params output_df
+            dict, the output of this node keyed by output port name
+        """
+        onode = out['to_node']
+        oport = out['from_port']
+
+        df = None
+        if oport is not None:
+            if oport not in output_df:
+                if onode.uid in (OUTPUT_ID,):
+                    onode_msg = 'is listed in task-graph outputs'
+                else:
+                    onode_msg = 'is required as input to node "{}"'.format(
+                        onode.uid)
+                err_msg = 'ERROR: Missing output port "{}" from '\
+                    'node "{}". This output {}.'.format(
+                        oport, self.uid, onode_msg)
+                raise Exception(err_msg)
+            df = output_df[oport]
+        return df
+
+    def input_mutated(self, iport):
+        '''Whether process modifies the input of port `iport` in place, see
+        `Node.mutates_inputs`.'''
+        mutates = self.mutates_inputs
+        if isinstance(mutates, bool):
+            return mutates
+        return iport in mutates
+
+    def __handoff(self, iport, df_obj):
+        '''Copy the input only if process modifies it in place.'''
+        if self.input_mutated(iport):
+            return self.__make_copy(df_obj)
+        return df_obj
+
+    def fingerprint(self, input_fingerprints):
+        """
+        Fingerprint of the node computation, a hash of the node type, its
+        code version, the conf, the modification times and sizes of its
+        `source_files` and the fingerprints of the connected upstream
+        outputs. Two nodes with the same fingerprint produce the same
+        outputs.
+        @params input_fingerprints
+            dict, key is the input port name, value is the fingerprint of the
+            upstream output connected to it
+        returns
+            str, or None if the node computation cannot be fingerprinted,
+            i.e. the node is not deterministic, it loads or saves a cache,
+            its conf is not json serializable, one of its source files is
+            missing or one of its inputs has no fingerprint
+        """
+        if self.uid == OUTPUT_ID or not self.deterministic or self.save or \
+                not isinstance(self.load, bool) or self.load:
+            return None
+        if any(fp is None for fp in input_fingerprints.values()):
+            return None
+        try:
+            conf = json.dumps(self.conf, sort_keys=True)
+        except TypeError:
+            return None
+        sources = []
+        try:
+            for path in self.source_files():
+                stat = os.stat(path)
+                sources.append((os.path.abspath(path), stat.st_mtime_ns,
+                                stat.st_size))
+        except OSError:
+            return None
+        nodetype = _get_nodetype(self)[0]
+        key = (nodetype.__module__, nodetype.__qualname__,
+               _code_version(nodetype), conf, sources,
+               sorted(input_fingerprints.items()))
+        return hashlib.sha1(repr(key).encode()).hexdigest()
 
     def __make_copy(self, df_obj):
-        typeObj = df_obj.__class__
-        if typeObj in _COPYS:
-            return _COPYS[typeObj](df_obj)
+        copy_fun = _registered(_COPYS, df_obj.__class__)
+        if copy_fun is not None:
+            return copy_fun(df_obj)
         else:
             return df_obj
 
@@ -441,9 +657,11 @@ class NodeTaskGraphMixin(object):
                     .format(self.uid, iport, npartitions_, npartitions))
             for idly, dly in enumerate(ddf_dly_list):
                 # very import to use shallow copy of inputs_not_dly
+                if self.input_mutated(iport):
+                    dly = dask.delayed(df_copy)(dly)
                 inputs_dly.setdefault(idly, inputs_not_dly.copy()).update({
                     # iport: dly.persist()  # DON'T PERSIST HERE
-                    iport: dask.delayed(df_copy)(dly)
+                    iport: dly
                 })
 
         # DEBUGGING
@@ -568,35 +786,68 @@ class NodeTaskGraphMixin(object):
         else:
             return self.process
 
-    def __call__(self, inputs_data):
+    def __call__(self, inputs_data, handoff=True, validate_meta=True):
+        """
+        Compute the node outputs.
+        @params inputs_data
+            dict, key is the input port name, value is the input data
+        @params handoff
+            boolean, copy the inputs process modifies. False hands over the
+            inputs as they are, if the node owns them
+        @params validate_meta
+            boolean, run the registered validators checking the outputs
+            against the output meta, unless `validate_outputs` is False. The
+            outputs are always checked against the output port types
+        returns
+            dict, key is the output port name, value is the output data
+        """
         if self.load:
             if isinstance(self.load, bool):
                 output_df = self.load_cache()
             else:
                 output_df = self.load
         else:
-            # nodes with ports take dictionary as inputs
-            inputs = {iport: self.__make_copy(data_input)
-                      for iport, data_input in inputs_data.items()}
-            if not self.delayed_process:
-                output_df = self.decorate_process()(inputs)
-            else:
-                use_delayed = self.__check_dly_processing_prereq(inputs)
-                if use_delayed:
-                    output_df = self.__delayed_call(inputs)
-                else:
-                    output_df = self.decorate_process()(inputs)
-
+            output_df = self.__lookup_result()
+            if output_df is None:
+                output_df = self.__compute(inputs_data, handoff)
+                if self.result_cache is not None and \
+                        self.result_key is not None:
+                    self.result_cache.put(self.result_key, output_df)
+
+        # process may have updated the conf or state the setups depend on
+        self.clear_setup()
         if self.uid != OUTPUT_ID and output_df is None:
             raise Exception("None output")
         else:
-            self.__valide(output_df)
+            self.__valide(output_df,
+                          validate_meta and self.validate_outputs)
 
         if self.save:
             self.save_cache(output_df)
 
         return output_df
 
+    def __lookup_result(self):
+        if self.result_cache is None or self.result_key is None:
+            return None
+        ports = [out['from_port'] for out in self.outputs
+                 if out['to_node'].visited]
+        return self.result_cache.get(self.result_key, ports)
+
+    def __compute(self, inputs_data, handoff=True):
+        # nodes with ports take dictionary as inputs
+        if handoff:
+            inputs = {iport: self.__handoff(iport, data_input)
+                      for iport, data_input in inputs_data.items()}
+        else:
+            inputs = dict(inputs_data)
+        if not self.delayed_process:
+            return self.decorate_process()(inputs)
+        use_delayed = self.__check_dly_processing_prereq(inputs)
+        if use_delayed:
+            return self.__delayed_call(inputs)
+        return self.decorate_process()(inputs)
+
     def _validate_connected_ports(self):
         """
         Validate the connected port types match
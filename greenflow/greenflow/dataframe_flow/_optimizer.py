@@ -0,0 +1,155 @@
+from ._scheduler import _is_loaded
+from ._node_flow import OUTPUT_ID
+
+__all__ = ['PREDICATE_OPS', 'push_down_predicates', 'FusedChain',
+           'fuse_chains']
+
+# the comparison operators of the (column, op, value) predicates
+PREDICATE_OPS = ('==', '!=', '<', '<=', '>', '>=', 'in')
+
+
+def _find_source(node, iport):
+    '''Walk up from the input port `iport` of a filter node through the
+    filters feeding it to the node with no inputs that loads the rows. Every
+    node on the way must feed only the next one, otherwise a predicate
+    pushed into the loader would drop the rows of another consumer.
+
+    :return: (source node, source output port) or None
+    '''
+    while True:
+        connections = [conn for conn in node.inputs
+                       if conn['to_port'] == iport]
+        if len(connections) != 1:
+            return None
+        source = connections[0]['from_node']
+        oport = connections[0]['from_port']
+        if len(source.outputs) != 1 or _is_loaded(source) or source.save:
+            return None
+        if len(source.inputs) == 0:
+            return source, oport
+        spec = source.pushdown_predicates()
+        if spec is None or spec[1] != oport:
+            return None
+        node, iport = source, spec[0]
+
+
+def push_down_predicates(nodes):
+    '''Optimization pass of TaskGraph.build. The row selections declared by
+    the filter nodes via `Node.pushdown_predicates` are handed to the loader
+    upstream of them via `Node.push_predicates`, so the loader does not
+    read the rows the filters drop. The filter nodes stay in the graph and
+    still select their rows.
+
+    :param nodes: iterable of the graph nodes
+    :return: list of (loader id, filter id) of the pushed predicates
+    '''
+    pushed = []
+    for node in nodes:
+        if _is_loaded(node):
+            continue
+        spec = node.pushdown_predicates()
+        if spec is None:
+            continue
+        iport, _, predicates = spec
+        found = _find_source(node, iport)
+        if found is None:
+            continue
+        source, oport = found
+        conf = source.push_predicates(oport, list(predicates))
+        if conf is None:
+            continue
+        # a new conf, the conf dict is shared with the task spec
+        source.conf = conf
+        pushed.append((source.uid, node.uid))
+    return pushed
+
+
+class FusedChain(object):
+    '''A linear chain of nodes, each one the only consumer of the previous
+    one, that the scheduler runs as one step. The data is handed from node
+    to node directly, without being stored for the scheduler. The outputs
+    of every node are checked against the port types, only the outputs of
+    the last node are validated against the output meta.
+
+    The inputs of the chain are copied for the first node modifying them in
+    place, see `Node.mutates_inputs`. From then on the data handed along the
+    chain is owned by the chain, a node output being either a new object or
+    its owned input, so the nodes further down modify it without copies.
+
+    :ivar nodes: list of the nodes in the order they are run
+    '''
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    @property
+    def head(self):
+        return self.nodes[0]
+
+    @property
+    def tail(self):
+        return self.nodes[-1]
+
+    def __call__(self, inputs_data):
+        owned = False
+        for node in self.nodes:
+            output_df = node(inputs_data, handoff=not owned,
+                             validate_meta=node is self.tail)
+            if node is self.tail:
+                return output_df
+            owned = owned or (len(inputs_data) == 1 and
+                              node.input_mutated(next(iter(inputs_data))))
+            out = node.outputs[0]
+            inputs_data = {out['to_port']: node.select_output(out, output_df)}
+
+    def __repr__(self):
+        return 'FusedChain({})'.format(
+            ' -> '.join(node.uid for node in self.nodes))
+
+
+def _fusable(node):
+    return (node.uid != OUTPUT_ID and not _is_loaded(node) and
+            not node.save and not node.delayed_process)
+
+
+def _fused_child(node):
+    '''The child the node is fused with, its only consumer taking no
+    other inputs, or None.'''
+    if len(node.outputs) != 1 or not _fusable(node):
+        return None
+    child = node.outputs[0]['to_node']
+    if len(child.inputs) != 1 or not _fusable(child):
+        return None
+    return child
+
+
+def fuse_chains(nodes):
+    '''Optimization pass of TaskGraph.build. The maximal linear chains of
+    nodes, where every node is the only consumer of the previous node and
+    takes no other input, are run as one `FusedChain` each. The chain is
+    attached to its first node as `fused_chain`.
+
+    :param nodes: iterable of the graph nodes
+    :return: list of the FusedChain
+    '''
+    nodes = list(nodes)
+    # the nodes fused with their parent do not start a chain
+    fused = set()
+    for node in nodes:
+        child = _fused_child(node)
+        if child is not None:
+            fused.add(child)
+    chains = []
+    for node in nodes:
+        node.fused_chain = None
+        if node in fused:
+            continue
+        chain = [node]
+        child = _fused_child(node)
+        while child is not None:
+            chain.append(child)
+            child = _fused_child(child)
+        if len(chain) > 1:
+            node.fused_chain = FusedChain(chain)
+            chains.append(node.fused_chain)
+    return chains
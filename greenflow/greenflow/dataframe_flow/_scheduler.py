@@ -0,0 +1,365 @@
+from collections import deque
+import concurrent.futures
+import copy
+import sys
+import cloudpickle
+from dask.base import is_dask_collection
+
+__all__ = ['EXECUTORS', 'MemoryReport', 'run_scheduled']
+
+# executor name -> concurrent.futures executor class
+EXECUTORS = {
+    'threads': concurrent.futures.ThreadPoolExecutor,
+    'processes': concurrent.futures.ProcessPoolExecutor
+}
+
+
+def _call_pickled_node(payload):
+    '''Run a node in a worker process. The node classes are usually defined
+    dynamically (see Task.get_node_obj) therefore the node and its inputs are
+    shipped with cloudpickle.
+    '''
+    node, inputs_data = cloudpickle.loads(payload)
+    # a node or a FusedChain
+    return node(inputs_data)
+
+
+class _Neighbour(object):
+    '''Stands in for a node connected to a node run in a worker process. It
+    carries what the node reads from its neighbours, the id and the ports
+    and meta setups of the upstream nodes, but not their confs, loaded data
+    or connections to the rest of the graph.
+    '''
+
+    def __init__(self, uid, visited, ports=None, meta=None):
+        self.uid = uid
+        self.visited = visited
+        self.ports = ports
+        self.meta = meta
+
+    def ports_setup(self):
+        return self.ports
+
+    def meta_setup(self):
+        return self.meta
+
+
+def _detached(node):
+    '''A copy of the node to ship to a worker process, connected to
+    `_Neighbour`s instead of the graph nodes.'''
+    detached = copy.copy(node)
+    detached.inputs = [
+        dict(ient, from_node=_Neighbour(
+            ient['from_node'].uid, ient['from_node'].visited,
+            ient['from_node'].ports_setup(), ient['from_node'].meta_setup()))
+        for ient in node.inputs]
+    detached.outputs = [
+        dict(out, to_node=_Neighbour(out['to_node'].uid,
+                                     out['to_node'].visited))
+        for out in node.outputs]
+    detached.fused_chain = None
+    detached.input_df = {}
+    return detached
+
+
+def _payload(run, inputs_data):
+    '''Pickle a node or a FusedChain and its inputs for `_call_pickled_node`.
+    Only the nodes run are pickled, not the graph they are connected to.
+    '''
+    if hasattr(run, 'nodes'):
+        run = copy.copy(run)
+        run.nodes = [_detached(node) for node in run.nodes]
+    else:
+        run = _detached(run)
+    return cloudpickle.dumps((run, inputs_data))
+
+
+def _is_loaded(node):
+    return not isinstance(node.load, bool) or node.load
+
+
+def _nbytes(obj):
+    '''Estimate the memory held by a node output. Lazy dask collections are
+    not materialized and count as zero.'''
+    if is_dask_collection(obj):
+        return 0
+    if hasattr(obj, 'memory_usage'):
+        # pandas/cudf DataFrame returns a Series, Series returns an int
+        try:
+            usage = obj.memory_usage(index=True)
+        except TypeError:
+            # e.g. pandas Index
+            usage = obj.memory_usage()
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    if hasattr(obj, 'nbytes'):
+        return int(obj.nbytes)
+    return sys.getsizeof(obj)
+
+
+class MemoryReport(object):
+    '''Memory held by the intermediate node outputs during a run. An output
+    is held from the time it is produced until the last node consuming it
+    has finished.
+
+    :ivar peak_bytes: highest number of bytes held at once
+    :ivar peak_node: id of the node whose outputs reached the peak
+    :ivar output_bytes: dict, node id -> bytes of the node outputs used in
+        the run
+    '''
+
+    def __init__(self):
+        self.peak_bytes = 0
+        self.peak_node = None
+        self.output_bytes = {}
+        self.live_bytes = 0
+        # id(obj) -> [nbytes, number of holders]
+        self.__live = {}
+
+    def hold(self, obj, uid):
+        key = id(obj)
+        if key in self.__live:
+            self.__live[key][1] += 1
+            return
+        nbytes = _nbytes(obj)
+        self.__live[key] = [nbytes, 1]
+        self.output_bytes[uid] = self.output_bytes.get(uid, 0) + nbytes
+        self.live_bytes += nbytes
+        if self.live_bytes > self.peak_bytes:
+            self.peak_bytes = self.live_bytes
+            self.peak_node = uid
+
+    def release(self, obj):
+        key = id(obj)
+        entry = self.__live[key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self.__live[key]
+            self.live_bytes -= entry[0]
+
+    def __str__(self):
+        return 'peak intermediate memory:%.3fMB at id:%s' % (
+            self.peak_bytes / 2**20, self.peak_node)
+
+
+class _RunState(object):
+    '''Book keeping of a scheduled run.
+
+    The node outputs are kept in one place keyed by (node, output port)
+    together with the number of consumers taking part in the run. A
+    consumer picks up its inputs when it is dispatched and the entry is
+    dropped once the last consumer has taken it, so an intermediate result
+    is referenced no longer than needed. Nodes which do not take part in the
+    run are never handed any data.
+    '''
+
+    def __init__(self, results=None, result_cache=None):
+        self.report = MemoryReport()
+        # node id -> (fingerprint, outputs) of the previous runs, only used
+        # in the incremental mode
+        self.__results = results
+        # on-disk ResultCache looked up by the nodes
+        self.__result_cache = result_cache
+        self.__fingerprints = {}
+        # number of inputs not yet delivered to a node, starting from the
+        # `in_degree` computed in TaskGraph.build
+        self.__pending = {}
+        # (node, oport) -> [data, number of consumers yet to take it]
+        self.__outputs = {}
+        # node -> the input objects held while the node runs
+        self.__running = {}
+        # the nodes are looked up one by one in the incremental runs and in
+        # the result cache, so the fused chains are only run without them
+        self.use_chains = results is None and result_cache is None
+
+    def chain(self, node):
+        '''The FusedChain run in place of the node, or None.'''
+        return node.fused_chain if self.use_chains else None
+
+    def take_inputs(self, node):
+        '''Move the stored outputs the node consumes into its inputs.'''
+        held = []
+        if not _is_loaded(node):
+            for ient in node.inputs:
+                key = (ient['from_node'], ient['from_port'])
+                entry = self.__outputs[key]
+                data = entry[0]
+                self.report.hold(data, ient['from_node'].uid)
+                held.append(data)
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self.__outputs[key]
+                    self.report.release(data)
+                node.input_df[ient['to_port']] = data
+        self.__running[node] = held
+        return node.take_inputs()
+
+    def lookup(self, node):
+        '''Get the node outputs of a previous run if neither the node nor its
+        upstream changed since. Returns None if the node has to be computed.
+        '''
+        if self.__results is None and self.__result_cache is None:
+            return None
+        input_fingerprints = {}
+        for ient in node.inputs:
+            from_fp = self.__fingerprints.get(ient['from_node'])
+            input_fingerprints[ient['to_port']] = None if from_fp is None \
+                else '{}.{}'.format(from_fp, ient['from_port'])
+        fingerprint = node.fingerprint(input_fingerprints)
+        self.__fingerprints[node] = fingerprint
+        if self.__result_cache is not None:
+            node.result_cache = self.__result_cache
+            node.result_key = fingerprint
+
+        if self.__results is None:
+            return None
+        entry = self.__results.get(node.uid)
+        if fingerprint is None or entry is None or entry[0] != fingerprint:
+            return None
+        output_df = entry[1]
+        for out in node.outputs:
+            if out['to_node'].visited and out['from_port'] not in output_df:
+                # the port was not connected in the previous run
+                return None
+        return output_df
+
+    def release_children(self, node, output_df, ready):
+        '''Store the node outputs for the consumers taking part in the run
+        and queue up the consumers whose inputs are all delivered.'''
+        chain = self.chain(node)
+        if chain is not None:
+            # the outputs of the chain are the outputs of its last node
+            self.__running[chain.tail] = self.__running.pop(node)
+            node = chain.tail
+        for data in self.__running.pop(node):
+            self.report.release(data)
+
+        if self.__results is not None:
+            fingerprint = self.__fingerprints[node]
+            if fingerprint is None:
+                self.__results.pop(node.uid, None)
+            else:
+                self.__results[node.uid] = (fingerprint, output_df)
+
+        for out in node.outputs:
+            onode = out['to_node']
+            # loaded nodes are roots and ignore their inputs
+            if not onode.visited or _is_loaded(onode):
+                continue
+            key = (node, out['from_port'])
+            if key not in self.__outputs:
+                data = node.select_output(out, output_df)
+                self.__outputs[key] = [data, 0]
+                self.report.hold(data, node.uid)
+            self.__outputs[key][1] += 1
+
+            count = self.__pending.get(onode, onode.in_degree) - 1
+            self.__pending[onode] = count
+            if count == 0:
+                ready.append(onode)
+
+
+def _progress(progress_fun, state, node):
+    if progress_fun is None:
+        return
+    chain = state.chain(node)
+    for cnode in [node] if chain is None else chain.nodes:
+        progress_fun(cnode.uid)
+
+
+def _submit(pool, executor, state, node):
+    inputs_data = state.take_inputs(node)
+    run = state.chain(node) or node
+    if executor == 'processes':
+        return pool.submit(_call_pickled_node, _payload(run, inputs_data))
+    return pool.submit(run, inputs_data)
+
+
+def _run_serial(roots, progress_fun, state):
+    ready = deque(roots)
+    while ready:
+        node = ready.popleft()
+        _progress(progress_fun, state, node)
+        output_df = state.lookup(node)
+        inputs_data = state.take_inputs(node)
+        if output_df is None:
+            output_df = (state.chain(node) or node)(inputs_data)
+        del inputs_data
+        state.release_children(node, output_df, ready)
+        del output_df
+
+
+def _run_pool(roots, progress_fun, executor, max_workers, state):
+    ready = deque(roots)
+    running = {}
+    with EXECUTORS[executor](max_workers=max_workers) as pool:
+        try:
+            while ready or running:
+                while ready:
+                    node = ready.popleft()
+                    _progress(progress_fun, state, node)
+                    output_df = state.lookup(node)
+                    if output_df is not None:
+                        state.take_inputs(node)
+                        state.release_children(node, output_df, ready)
+                        continue
+                    running[_submit(pool, executor, state, node)] = node
+
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    state.release_children(node, future.result(), ready)
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+
+
+def run_scheduled(roots, progress_fun=None, executor=None, max_workers=None,
+                  results=None, result_cache=None):
+    """
+    Run the task graph nodes with a topological ready-queue (Kahn's
+    algorithm). A node is queued once all of its inputs are delivered, so
+    each node and connection is visited once and there is no recursion.
+
+    Arguments
+    -------
+    roots: list
+        the root nodes found for the run, i.e. nodes without inputs or nodes
+        loading from cache
+    progress_fun: function
+        called with the node id whenever a node is dispatched
+    executor: str
+        None runs the nodes one by one in the calling thread. One of the
+        `EXECUTORS` keys, 'threads' or 'processes', dispatches every node
+        whose inputs are ready to a pool so independent branches of the graph
+        are computed concurrently.
+    max_workers: int
+        maximum number of workers of the pool. Defaults to the
+        concurrent.futures default.
+    results: dict
+        result store of the incremental mode, node id -> (fingerprint,
+        outputs). A node whose fingerprint matches the stored one is not
+        computed and the stored outputs are used instead. The store is
+        updated with the outputs of the run. None computes every node.
+    result_cache: ResultCache
+        on-disk cache the nodes look up their outputs in by fingerprint
+        before computing them. None disables it.
+
+    Returns
+    -----
+    MemoryReport
+        the memory held by the intermediate results during the run
+
+    """
+    state = _RunState(results, result_cache)
+    if executor is None:
+        _run_serial(roots, progress_fun, state)
+        return state.report
+
+    if executor not in EXECUTORS:
+        raise ValueError(
+            'Unknown executor "{}". Supported executors are: {}'.format(
+                executor, list(EXECUTORS.keys())))
+    _run_pool(roots, progress_fun, executor, max_workers, state)
+    return state.report
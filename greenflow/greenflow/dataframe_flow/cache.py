@@ -1,3 +1,9 @@
+from collections import OrderedDict
+
 CACHE_PORTS = {}
 CACHE_SCHEMA = {}
 CACHE_META = {}
+# taskgraph file path -> ((mtime, size), md5 digest, parsed task spec list)
+CACHE_TASKGRAPH = {}
+# composite node hash key -> the built sub-graph, least recently used first
+CACHE_BUILT = OrderedDict()
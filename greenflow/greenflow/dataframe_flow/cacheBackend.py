@@ -0,0 +1,290 @@
+import os
+import shutil
+import uuid
+import cloudpickle
+import pandas as pd
+
+__all__ = ['CacheBackend', 'PickleCacheBackend', 'HDF5CacheBackend',
+           'ParquetCacheBackend', 'ArrowCacheBackend', 'CACHE_BACKENDS',
+           'get_cache_backend']
+
+# schema metadata key recording the dataframe library of a cached table
+_DF_KIND = b'greenflow.dataframe'
+
+
+def _to_arrow(odf, name, oport):
+    if isinstance(odf, pd.DataFrame):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(odf)
+        kind = b'pandas'
+    elif hasattr(odf, 'to_arrow') and hasattr(odf, 'columns'):
+        # cudf.DataFrame
+        table = odf.to_arrow(preserve_index=True)
+        kind = b'cudf'
+    else:
+        raise Exception(
+            'Task "{}" port "{}" output object of type "{}" is not a '
+            'dataframe. Cannot save to a columnar cache.'
+            .format(name, oport, type(odf)))
+    metadata = dict(table.schema.metadata or {})
+    metadata[_DF_KIND] = kind
+    return table.replace_schema_metadata(metadata)
+
+
+def _from_arrow(table):
+    kind = (table.schema.metadata or {}).get(_DF_KIND, b'pandas')
+    if kind == b'cudf':
+        import cudf
+        return cudf.DataFrame.from_arrow(table)
+    return table.to_pandas()
+
+
+def _index_columns(schema):
+    pandas_meta = schema.pandas_metadata or {}
+    # a RangeIndex is stored in the metadata only, not as a column
+    return [col for col in pandas_meta.get('index_columns', [])
+            if isinstance(col, str)]
+
+
+def _replace_dir(tmp_path, path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+
+
+class CacheBackend(object):
+    '''Storage format of the node output caches, see `Node.save_cache`,
+    `Node.load_cache` and `ResultCache`. A cache entry holds the outputs of
+    one node, a dict of output port name -> object.
+
+    :cvar suffix: appended to the entry path
+    '''
+    suffix = ''
+
+    def save(self, path, output_data, name):
+        '''Save the node outputs.
+
+        Arguments
+        -------
+        path: str
+            entry path including the `suffix`
+        output_data: dict
+            output port name -> object
+        name: str
+            entry name, i.e. the task id, used in the error messages
+        '''
+        raise NotImplementedError
+
+    def load(self, path, ports, name, columns=None):
+        '''Load the node outputs.
+
+        Arguments
+        -------
+        path: str
+            entry path including the `suffix`
+        ports: list
+            output port names to load
+        name: str
+            entry name, i.e. the task id, used in the error messages
+        columns: dict
+            output port name -> list of the columns to load. Ports not in
+            the dict are loaded with all of the columns.
+
+        Returns
+        -----
+        dict
+            output port name -> object
+        '''
+        raise NotImplementedError
+
+
+class PickleCacheBackend(CacheBackend):
+    '''Pickles the outputs into a single file. Handles any picklable output
+    but always reads the whole entry.'''
+    suffix = '.pkl'
+
+    def save(self, path, output_data, name):
+        tmp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+        try:
+            with open(tmp_path, 'wb') as f:
+                cloudpickle.dump(output_data, f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def load(self, path, ports, name, columns=None):
+        with open(path, 'rb') as f:
+            output_data = cloudpickle.load(f)
+        output_df = {}
+        for oport in ports:
+            if oport not in output_data:
+                raise LookupError(
+                    'The task "{}" port "{}" not found in the cache "{}".'
+                    .format(name, oport, path))
+            odf = output_data[oport]
+            if columns and oport in columns:
+                odf = odf[columns[oport]]
+            output_df[oport] = odf
+        return output_df
+
+
+class HDF5CacheBackend(CacheBackend):
+    '''Saves the dataframes in tables of a HDF5 file, one key per port.'''
+    suffix = '.hdf5'
+
+    def save(self, path, output_data, name):
+        with pd.HDFStore(path, mode='w') as hf:
+            for oport, odf in output_data.items():
+                # check for to_hdf attribute
+                if not hasattr(odf, 'to_hdf'):
+                    raise Exception(
+                        'Task "{}" port "{}" output object is missing '
+                        '"to_hdf" attribute. Cannot save to cache.'
+                        .format(name, oport))
+                key = '{}/{}'.format(name, oport)
+                odf.to_hdf(hf, key, format='table', data_columns=True)
+
+    def load(self, path, ports, name, columns=None):
+        columns = {} if columns is None else columns
+        output_df = {}
+        with pd.HDFStore(path, mode='r') as hf:
+            for oport in ports:
+                key = '{}/{}'.format(name, oport)
+                # check hdf store for the key
+                if key not in hf:
+                    raise LookupError(
+                        'The task "{}" port "{}" key "{}" not found in '
+                        'the hdf file "{}". Cannot load from cache.'
+                        .format(name, oport, key, path))
+                output_df[oport] = pd.read_hdf(hf, key,
+                                               columns=columns.get(oport))
+        return output_df
+
+
+class ParquetCacheBackend(CacheBackend):
+    '''Saves each dataframe in a Parquet file of the entry directory. Only
+    the requested columns are read on load.
+
+    :ivar compression: Parquet compression codec, e.g. 'snappy', 'zstd' or
+        None
+    '''
+    suffix = '.parquet'
+
+    def __init__(self, compression='snappy'):
+        self.compression = compression
+
+    def save(self, path, output_data, name):
+        import pyarrow.parquet as pq
+        tmp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+        os.makedirs(tmp_path)
+        try:
+            for oport, odf in output_data.items():
+                pq.write_table(_to_arrow(odf, name, oport),
+                               os.path.join(tmp_path, oport + '.parquet'),
+                               compression=self.compression)
+            _replace_dir(tmp_path, path)
+        finally:
+            if os.path.isdir(tmp_path):
+                shutil.rmtree(tmp_path)
+
+    def load(self, path, ports, name, columns=None):
+        import pyarrow.parquet as pq
+        columns = {} if columns is None else columns
+        output_df = {}
+        for oport in ports:
+            filename = os.path.join(path, oport + '.parquet')
+            if not os.path.exists(filename):
+                raise LookupError(
+                    'The task "{}" port "{}" not found in the cache "{}".'
+                    .format(name, oport, path))
+            # the pandas index columns are added to the projection
+            table = pq.read_table(filename, columns=columns.get(oport),
+                                  use_pandas_metadata=True)
+            output_df[oport] = _from_arrow(table)
+        return output_df
+
+
+class ArrowCacheBackend(CacheBackend):
+    '''Saves each dataframe in an Arrow IPC file of the entry directory. The
+    files are memory mapped on load, so an uncompressed entry is read
+    without copying it into memory first.
+
+    :ivar compression: IPC buffer compression, 'lz4', 'zstd' or None.
+        Compressed buffers have to be decompressed on load.
+    '''
+    suffix = '.arrow'
+
+    def __init__(self, compression=None):
+        self.compression = compression
+
+    def save(self, path, output_data, name):
+        import pyarrow as pa
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        tmp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+        os.makedirs(tmp_path)
+        try:
+            for oport, odf in output_data.items():
+                table = _to_arrow(odf, name, oport)
+                filename = os.path.join(tmp_path, oport + '.arrow')
+                with pa.OSFile(filename, 'wb') as sink:
+                    with pa.ipc.new_file(sink, table.schema,
+                                         options=options) as writer:
+                        writer.write_table(table)
+            _replace_dir(tmp_path, path)
+        finally:
+            if os.path.isdir(tmp_path):
+                shutil.rmtree(tmp_path)
+
+    def load(self, path, ports, name, columns=None):
+        import pyarrow as pa
+        columns = {} if columns is None else columns
+        output_df = {}
+        for oport in ports:
+            filename = os.path.join(path, oport + '.arrow')
+            if not os.path.exists(filename):
+                raise LookupError(
+                    'The task "{}" port "{}" not found in the cache "{}".'
+                    .format(name, oport, path))
+            with pa.memory_map(filename, 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+            if oport in columns:
+                index_cols = [col for col in _index_columns(table.schema)
+                              if col not in columns[oport]]
+                table = table.select(list(columns[oport]) + index_cols)
+            output_df[oport] = _from_arrow(table)
+        return output_df
+
+
+# cache backend name -> CacheBackend class
+CACHE_BACKENDS = {
+    'pickle': PickleCacheBackend,
+    'hdf5': HDF5CacheBackend,
+    'parquet': ParquetCacheBackend,
+    'arrow': ArrowCacheBackend
+}
+
+
+def get_cache_backend(backend=None, default='hdf5'):
+    '''Resolve the cache backend.
+
+    Arguments
+    -------
+    backend: str or CacheBackend
+        a CacheBackend is returned as is, a name is looked up in
+        `CACHE_BACKENDS`. None uses the `GREENFLOW_CACHE_BACKEND` environment
+        variable, or `default` if not set.
+
+    Returns
+    -----
+    CacheBackend
+    '''
+    if isinstance(backend, CacheBackend):
+        return backend
+    if backend is None:
+        backend = os.getenv('GREENFLOW_CACHE_BACKEND', default)
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(
+            'Unknown cache backend "{}". Supported backends are: {}'.format(
+                backend, list(CACHE_BACKENDS.keys())))
+    return CACHE_BACKENDS[backend]()
@@ -1,8 +1,10 @@
 import abc
+import os
 from .task import Task
 from .taskSpecSchema import TaskSpecSchema
 from .portsSpecSchema import PortsSpecSchema, ConfSchema, MetaData, NodePorts
 
+from .cacheBackend import get_cache_backend
 from ._node import _Node
 
 
@@ -81,6 +83,22 @@ class Node(_PortsMixin, _Node):
     '''
 
     cache_dir = '.cache'
+    # Storage format of save_cache/load_cache, a name in CACHE_BACKENDS or a
+    # CacheBackend instance. None uses the GREENFLOW_CACHE_BACKEND
+    # environment variable, by default 'hdf5'.
+    cache_backend = None
+    # Whether process modifies its input objects in place. The inputs are
+    # copied with the registered copy functions before calling process so
+    # that other consumers of the same object are not affected. Set to
+    # False, or to a list of the input port names that are modified, to get
+    # the other inputs handed over without copying.
+    mutates_inputs = True
+    # Whether the outputs of process are determined by the conf, the inputs
+    # and the `source_files`. The incremental runs and the result cache skip
+    # process for a node whose fingerprint matches a stored result. Set to
+    # False for the nodes with side effects, e.g. writing files, so they
+    # run every time.
+    deterministic = True
 
     def __init__(self, task):
         # make sure is is a task object
@@ -162,6 +180,49 @@ class Node(_PortsMixin, _Node):
         """
         pass
 
+    def pushdown_predicates(self):
+        """
+        Declare the rows selection of a filter node, so the predicate
+        pushdown pass of `TaskGraph.build` can apply it in the loader
+        upstream. Override it in a node that only drops rows, i.e. the
+        output port carries the rows of the input port that satisfy the
+        predicates, unchanged.
+        returns
+            None, or a tuple (iport, oport, predicates). predicates is a list
+            of (column, op, value) conditions that all hold for the selected
+            rows, op is one of '==', '!=', '<', '<=', '>', '>=' and 'in'
+        """
+        return None
+
+    def push_predicates(self, oport, predicates):
+        """
+        Apply the predicates of the filter nodes downstream at load time.
+        Called by the predicate pushdown pass of `TaskGraph.build` for a
+        node with no inputs, whose output port `oport` feeds only the
+        filters. The filters still select their rows after the loader, so
+        the loader may apply a part of the predicates only or load a
+        superset of the selected rows.
+        @params oport
+            string, the output port feeding the filters
+        @params predicates
+            list of (column, op, value), see `pushdown_predicates`
+        returns
+            dict, the new conf of the node applying the predicates, or None
+            if none of them can be applied. self.conf must not be modified
+            in place as it is shared with the task spec.
+        """
+        return None
+
+    def source_files(self):
+        """
+        The files process reads its outputs from. Their modification time
+        and size are part of the node fingerprint, so the cached outputs of
+        a loader are not reused once its files change.
+        returns
+            list of file paths
+        """
+        return []
+
     def get_connected_inports(self) -> dict:
         """
         Get all the connected input port information. It is used by individual
@@ -304,22 +365,42 @@ class Node(_PortsMixin, _Node):
         if hasattr(self, '_validate_connected_metadata'):
             self._validate_connected_metadata()
 
-    def load_cache(self, filename=None) -> dict:
+    def _cache_filename(self):
+        backend = get_cache_backend(self.cache_backend)
+        cache_dir = os.getenv('GREENFLOW_CACHE_DIR', self.cache_dir)
+        return os.path.join(cache_dir, self.uid + backend.suffix)
+
+    def load_cache(self, filename=None, columns=None) -> dict:
         """
         Defines the behavior of how to load the cache file from the `filename`.
-        Node can override this method.         Arguments
+        Node can override this method. Default implementation loads the
+        connected output ports with the `cache_backend`.
+
+        Arguments
         -------
         filename: str
             filename of the cache file. Leave as none to use default.
+        columns: dict
+            output port name -> list of the columns to load. Leave as none
+            to load all of the columns.
         returns: dict
             dictionary of the output from this node
         """
-        raise NotImplementedError
+        backend = get_cache_backend(self.cache_backend)
+        if filename is None:
+            filename = self._cache_filename()
+        ports = [oport for oport in self._get_output_ports()
+                 if self.outport_connected(oport)]
+        return backend.load(filename, ports, self.uid, columns)
 
     def save_cache(self, output_data: dict) -> None:
         '''Defines how to save the output of a node to
-        filesystem cache.
+        filesystem cache. Default implementation saves with the
+        `cache_backend`.
 
         :param output_data: The output from :meth:`process`.
         '''
-        raise NotImplementedError
+        backend = get_cache_backend(self.cache_backend)
+        cache_dir = os.getenv('GREENFLOW_CACHE_DIR', self.cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+        backend.save(self._cache_filename(), output_data, self.uid)
@@ -0,0 +1,127 @@
+import json
+from ._node_flow import OUTPUT_ID, OUTPUT_TYPE
+from .taskSpecSchema import TaskSpecSchema
+
+__all__ = ['ParameterSweep']
+
+
+def _spec_key(spec):
+    return json.dumps(spec, sort_keys=True, default=repr)
+
+
+class ParameterSweep(object):
+    '''Run a task graph for many configurations, computing once the nodes
+    the configurations do not change.
+
+    A configuration is a replacement of the task specs, the `replace`
+    argument of `TaskGraph.run`. The nodes whose replaced spec differs
+    between the configurations are affected by the sweep, so are the nodes
+    downstream of them. The other nodes are the invariant prefix of the
+    graph, e.g. the data loading and the indicators of the strategy
+    parameters being searched. The prefix is run once and its outputs
+    consumed by the affected nodes are loaded into the runs of the
+    configurations (see `TaskSpecSchema.load`), which compute only the
+    affected nodes.
+
+    The nodes are assumed deterministic. The prefix outputs are shared by
+    the runs of all the configurations, the nodes modifying their inputs in
+    place get copies of them as usual (see `Node.mutates_inputs`).
+
+    :ivar task_graph: the TaskGraph to run
+    :ivar outputs: list of the "node_id.port" outputs of every configuration
+    '''
+
+    def __init__(self, task_graph, outputs):
+        self.task_graph = task_graph
+        self.outputs = list(outputs)
+
+    def __tasks(self):
+        for task in self.task_graph:
+            if (task[TaskSpecSchema.task_id] == OUTPUT_ID or
+                    task[TaskSpecSchema.node_type] == OUTPUT_TYPE):
+                continue
+            yield task
+
+    def affected(self, configs):
+        '''The ids of the nodes whose specs differ between the
+        configurations and of all the nodes downstream of them.
+
+        :param configs: list of the replace dicts of the configurations
+        :return: set of node ids
+        '''
+        task_ids = set()
+        for config in configs:
+            task_ids.update(config.keys())
+        affected = set(
+            task_id for task_id in task_ids
+            if len(set(_spec_key(config.get(task_id, {}))
+                       for config in configs)) > 1)
+        consumers = {}
+        for task in self.__tasks():
+            for src in task[TaskSpecSchema.inputs].values():
+                consumers.setdefault(src.split('.')[0], []).append(
+                    task[TaskSpecSchema.task_id])
+        stack = list(affected)
+        while stack:
+            for task_id in consumers.get(stack.pop(), []):
+                if task_id not in affected:
+                    affected.add(task_id)
+                    stack.append(task_id)
+        return affected
+
+    def prefix_outputs(self, affected):
+        '''The outputs of the invariant prefix the runs of the
+        configurations load, the prefix outputs consumed by the affected
+        nodes and the requested outputs of the prefix nodes.
+
+        :param affected: set of the ids of the affected nodes
+        :return: list of "node_id.port"
+        '''
+        outputs = []
+        for task in self.__tasks():
+            if task[TaskSpecSchema.task_id] not in affected:
+                continue
+            for src in task[TaskSpecSchema.inputs].values():
+                if src.split('.')[0] not in affected and src not in outputs:
+                    outputs.append(src)
+        for out in self.outputs:
+            if out.split('.')[0] not in affected and out not in outputs:
+                outputs.append(out)
+        return outputs
+
+    def run(self, configs, **run_kwargs):
+        '''Run the task graph for every configuration.
+
+        :param configs: list of the replace dicts of the configurations
+        :param run_kwargs: the other arguments of `TaskGraph.run`, used for
+            the run of the prefix and the runs of the configurations
+        :return: list of the Results of the configurations
+        '''
+        configs = list(configs)
+        if len(configs) == 0:
+            return []
+        affected = self.affected(configs)
+        if len(affected) == 0:
+            result = self.task_graph.run(self.outputs, replace=configs[0],
+                                         **run_kwargs)
+            return [result] * len(configs)
+
+        prefix_outputs = self.prefix_outputs(affected)
+        loads = {}
+        if prefix_outputs:
+            # the prefix nodes have the same specs in all the configurations
+            prefix = self.task_graph.run(prefix_outputs, replace=configs[0],
+                                         **run_kwargs)
+            for out in prefix_outputs:
+                task_id, port = out.split('.')
+                loads.setdefault(task_id, {})[port] = prefix[out]
+        results = []
+        for config in configs:
+            replace = dict(config)
+            for task_id, load in loads.items():
+                replace[task_id] = dict(config.get(task_id, {}))
+                replace[task_id][TaskSpecSchema.load] = load
+            results.append(self.task_graph.run(self.outputs,
+                                               replace=replace,
+                                               **run_kwargs))
+        return results
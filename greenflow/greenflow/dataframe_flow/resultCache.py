@@ -0,0 +1,145 @@
+import os
+import shutil
+import warnings
+from dask.base import is_dask_collection
+from .node import Node
+from .cacheBackend import get_cache_backend
+
+__all__ = ['ResultCache']
+
+# default size cap of the result cache, 10GB
+DEFAULT_MAX_BYTES = 10 * 2**30
+
+
+class ResultCache(object):
+    '''Content addressed on-disk cache of node outputs.
+
+    The outputs of a node are stored in an entry named after the node
+    fingerprint, a hash of the node type, its code version, the conf and the
+    fingerprints of the upstream outputs (see
+    `NodeTaskGraphMixin.fingerprint`). A node whose fingerprint is found in
+    the cache is not computed, so an edited conf or upstream never hits a
+    stale entry. Entries are evicted least recently used first once the
+    total size of the cache exceeds `max_bytes`.
+
+    :ivar cache_dir: directory of the cache entries. Defaults to the
+        "results" directory under the `GREENFLOW_CACHE_DIR` environment
+        variable or `Node.cache_dir`.
+    :ivar max_bytes: size cap of the cache. Defaults to the
+        `GREENFLOW_CACHE_MAX_BYTES` environment variable or 10GB.
+    :ivar backend: CacheBackend of the entries. Defaults to the
+        `GREENFLOW_CACHE_BACKEND` environment variable or 'pickle'. The
+        outputs a backend cannot save are not cached.
+    '''
+
+    def __init__(self, cache_dir=None, max_bytes=None, backend=None):
+        if cache_dir is None:
+            cache_dir = os.path.join(
+                os.getenv('GREENFLOW_CACHE_DIR', Node.cache_dir), 'results')
+        if max_bytes is None:
+            max_bytes = int(os.getenv('GREENFLOW_CACHE_MAX_BYTES',
+                                      DEFAULT_MAX_BYTES))
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.backend = get_cache_backend(backend, default='pickle')
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + self.backend.suffix)
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(self.backend.suffix):
+                yield entry
+
+    def get(self, key, ports=()):
+        '''Get the outputs stored for the fingerprint `key`.
+
+        Arguments
+        -------
+        key: str
+            node fingerprint
+        ports: list
+            output ports the stored outputs have to include
+
+        Returns
+        -----
+        dict
+            the node outputs, or None if not found
+        '''
+        filename = self._path(key)
+        if not os.path.exists(filename):
+            return None
+        try:
+            output_df = self.backend.load(filename, ports, key)
+        except (LookupError, FileNotFoundError):
+            # missing port or evicted meanwhile
+            return None
+        try:
+            # mark as recently used
+            os.utime(filename)
+        except OSError:
+            pass
+        return output_df
+
+    def put(self, key, output_df):
+        '''Store the node outputs under the fingerprint `key` and evict the
+        least recently used entries above the size cap. Lazy dask outputs are
+        not stored.
+        '''
+        if any(is_dask_collection(data) for data in output_df.values()):
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            self.backend.save(self._path(key), output_df, key)
+        except Exception as e:
+            warnings.warn(
+                'Cannot store the outputs "{}" in the result cache: {}'
+                .format(key, e), RuntimeWarning)
+            return
+        self.evict()
+
+    def evict(self):
+        '''Remove the least recently used entries until the cache fits in
+        `max_bytes`.'''
+        entries = []
+        total = 0
+        for entry in self._entries():
+            try:
+                mtime = entry.stat().st_mtime
+                size = _entry_size(entry)
+            except FileNotFoundError:
+                # evicted by another process
+                continue
+            entries.append((mtime, size, entry.path))
+            total += size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+    def clear(self):
+        '''Remove all the entries.'''
+        for entry in self._entries():
+            _remove(entry.path)
+
+
+def _entry_size(entry):
+    '''Size of an entry file, or of the files of an entry directory.'''
+    if not entry.is_dir():
+        return entry.stat().st_size
+    return sum(sub_entry.stat().st_size
+               for sub_entry in os.scandir(entry.path))
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
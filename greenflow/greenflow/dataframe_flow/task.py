@@ -1,4 +1,5 @@
 import os
+import ast
 import importlib
 import pkgutil
 import inspect
@@ -10,13 +11,35 @@ from pathlib import Path
 import sys
 from collections import namedtuple
 import configparser
-from .util import get_file_path
+try:
+    # For python 3.8 and later
+    import importlib.metadata as importlib_metadata
+except ImportError:
+    # prior to python 3.8 need to install importlib-metadata
+    import importlib_metadata
+from .util import get_file_path, lazy_module_attrs
 
 
 __all__ = ['Task']
 
 DEFAULT_MODULE = os.getenv('GREENFLOW_PLUGIN_MODULE', "greenflow.plugin_nodes")
 
+# greenflowrc path -> (mtime, parsed ModuleFiles section)
+_CONFIG_CACHE = {}
+# (module path, module name) -> (mtime, Load) of the loaded module files
+_MODULE_CACHE = {}
+
+Load = namedtuple("Load", "path mod")
+# entry point name -> entry point of the installed greenflow plugins
+_PLUGIN_ENTRY_POINTS = None
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
 
 class ConfigParser(configparser.ConfigParser):
     """Can get options() without defaults
@@ -36,16 +59,56 @@ def get_greenflow_config_modules():
     if 'GREENFLOW_CONFIG' not in os.environ:
         os.environ['GREENFLOW_CONFIG'] = os.getcwd()+'/greenflowrc'
         print(os.environ['GREENFLOW_CONFIG'])
-    config = ConfigParser(defaults=os.environ)
     greenflow_cfg = os.getenv('GREENFLOW_CONFIG', None)
+    # parse the config file only once unless it is modified
+    mtime = _mtime(greenflow_cfg)
+    cached = _CONFIG_CACHE.get(greenflow_cfg)
+    if cached is not None and cached[0] == mtime:
+        return dict(cached[1])
+    config = ConfigParser(defaults=os.environ)
     if Path(greenflow_cfg).is_file():
         config.read(greenflow_cfg)
     if 'ModuleFiles' not in config:
-        return {}
-    modules_names = config.options('ModuleFiles')
-    modules_list = {imod: config['ModuleFiles'][imod]
-                    for imod in modules_names}
-    return modules_list
+        modules_list = {}
+    else:
+        modules_names = config.options('ModuleFiles')
+        modules_list = {imod: config['ModuleFiles'][imod]
+                        for imod in modules_names}
+    _CONFIG_CACHE[greenflow_cfg] = (mtime, modules_list)
+    return dict(modules_list)
+
+
+def plugin_entry_points():
+    '''Index of the plugins registered under the "greenflow.plugin" entry
+    point group, entry point name -> entry point. Nothing is imported.'''
+    global _PLUGIN_ENTRY_POINTS
+    if _PLUGIN_ENTRY_POINTS is None:
+        entry_points = importlib_metadata.entry_points()
+        if hasattr(entry_points, 'select'):
+            entry_points = entry_points.select(group='greenflow.plugin')
+        else:
+            entry_points = entry_points.get('greenflow.plugin', ())
+        _PLUGIN_ENTRY_POINTS = {entry_point.name: entry_point
+                                for entry_point in entry_points}
+    return _PLUGIN_ENTRY_POINTS
+
+
+def load_plugin(name):
+    '''Import the plugin module registered under the entry point `name` and
+    make it importable by that name.
+    @param name
+        string, entry point name
+    @returns
+        module, or None if there is no such plugin
+    '''
+    if name in sys.modules:
+        return sys.modules[name]
+    entry_point = plugin_entry_points().get(name)
+    if entry_point is None:
+        return None
+    mod = entry_point.load()
+    sys.modules[name] = mod
+    return mod
 
 
 # create a task to add path path
@@ -87,11 +150,55 @@ def import_submodules(package, recursive=True, _main_package=None):
             setattr(_main_package, nodecls.__name__, nodecls)
 
 
+def _index_classes(paths, prefix, index):
+    for finder, name, is_pkg in pkgutil.iter_modules(paths):
+        full_name = prefix + name
+        if is_pkg:
+            sub_path = os.path.join(finder.path, name)
+            filename = os.path.join(sub_path, '__init__.py')
+            _index_classes([sub_path], full_name + '.', index)
+        else:
+            filename = os.path.join(finder.path, name + '.py')
+        try:
+            with open(filename, 'rb') as f:
+                tree = ast.parse(f.read(), filename)
+        except (OSError, SyntaxError, ValueError):
+            # e.g. compiled extension module, cannot be indexed
+            continue
+        for stmt in tree.body:
+            if isinstance(stmt, ast.ClassDef):
+                index.setdefault(stmt.name, []).append(full_name)
+
+
+def index_submodules(package):
+    """Lazy alternative to `import_submodules`. Index the classes defined
+    in the submodules of a package by parsing their source, without
+    importing them, and set up the package so that a class is accessed via:
+        NodeClass = getattr(mod, node_type)
+    The submodule defining the class is imported on the first access.
+
+    :param package: package (name or actual module)
+    :type package: module, str
+    :returns: dict, class name -> list of the names of the submodules
+        defining a class of that name
+    """
+    if isinstance(package, str):
+        package = importlib.import_module(package)
+
+    index = {}
+    _index_classes(package.__path__, package.__name__ + '.', index)
+    package.__getattr__, package.__dir__ = lazy_module_attrs(
+        package.__name__, index)
+    return index
+
+
 def load_modules(pathfile, name=None):
     """
     Given a py filename with path information,
     It will load the file as a python
     module, put it into the sys.modules and add the path into the pythonpath.
+    A module file is loaded once per process and loaded again only if the
+    file was modified since.
     @param modulefile
         string, file name
     @returns
@@ -115,15 +222,23 @@ def load_modules(pathfile, name=None):
     else:
         modulepath = filename
 
+    cache_key = (str(Path(modulepath).absolute()), modulename)
+    mtime = _mtime(modulepath)
+    cached = _MODULE_CACHE.get(cache_key)
+    if cached is not None and cached[0] == mtime and \
+            sys.modules.get(modulename) is cached[1].mod:
+        return cached[1]
+
     spec = importlib.util.spec_from_file_location(modulename, str(modulepath))
     mod = importlib.util.module_from_spec(spec)
     sys.modules[spec.name] = mod
     if filename.is_dir():
-        import_submodules(mod)
+        index_submodules(mod)
 
     spec.loader.exec_module(mod)
-    Load = namedtuple("Load", "path mod")
-    return Load(module_dir, mod)
+    loaded = Load(module_dir, mod)
+    _MODULE_CACHE[cache_key] = (mtime, loaded)
+    return loaded
 
 
 class Task(object):
@@ -195,6 +310,8 @@ class Task(object):
             elif (module_name is not None):
                 if module_name in sys.modules:
                     mod = sys.modules[module_name]
+                elif module_name in plugin_entry_points():
+                    mod = load_plugin(module_name)
                 else:
                     loaded = load_modules(
                         modules[module_name], name=module_name)
@@ -1,23 +1,61 @@
 from collections import OrderedDict
 import ruamel.yaml
 from .node import Node
-from ._node_flow import OUTPUT_ID, OUTPUT_TYPE, _CLEANUP
+from ._node_flow import (OUTPUT_ID, OUTPUT_TYPE, _CLEANUP, invalidate_setup,
+                         _get_nodetype, _code_version)
 from .task import Task
 from .taskSpecSchema import TaskSpecSchema
 from .portsSpecSchema import NodePorts, ConfSchema
 import warnings
 import copy
+import hashlib
+import json
 import traceback
 import cloudpickle
 import base64
 from types import ModuleType
 from .util import get_encoded_class
+from ._scheduler import run_scheduled
+from ._optimizer import push_down_predicates, fuse_chains
+from .resultCache import ResultCache
+from .cache import CACHE_TASKGRAPH
+import os
 
 __all__ = ['TaskGraph', 'OutputCollector']
 
 server_task_graph = None
 
 
+VALIDATION_MODES = ('full', 'first', 'off')
+# fingerprints of the graphs validated in the 'first' validation mode
+_VALIDATED_GRAPHS = set()
+
+
+def _read_taskgraph(filename):
+    '''Parse the taskgraph yaml file. A file is parsed once per modification,
+    the parsed task specs are cached by the path and checked against the
+    mtime and size of the file.
+
+    :return: (md5 digest of the file, task spec list). The spec list is
+        shared by the callers, it is copied before building a TaskGraph.
+    '''
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    entry = CACHE_TASKGRAPH.get(path)
+    if entry is None or entry[0] != version:
+        with open(path) as f:
+            text = f.read()
+        yaml = ruamel.yaml.YAML(typ='safe')
+        yaml.constructor.yaml_constructors[
+            u'tag:yaml.org,2002:timestamp'] = \
+            yaml.constructor.yaml_constructors[u'tag:yaml.org,2002:str']
+        obj = yaml.load(text)
+        entry = (version, hashlib.md5(text.encode()).hexdigest(), obj)
+        CACHE_TASKGRAPH[path] = entry
+    return entry[1], entry[2]
+
+
 def add_module_from_base64(module_name, class_str):
     class_obj = cloudpickle.loads(base64.b64decode(class_str))
     class_name = class_obj.__name__
@@ -32,6 +70,8 @@ def add_module_from_base64(module_name, class_str):
 
 
 class OutputCollector(Node):
+    mutates_inputs = False
+
     def meta_setup(self):
         return super().meta_setup()
 
@@ -120,6 +160,10 @@ class TaskGraph(object):
         self.__task_list = {}
         self.__node_dict = {}
         self.__index = None
+        # memory held by the intermediate results in the last run
+        self.memory_report = None
+        # node id -> (fingerprint, outputs) kept for the incremental runs
+        self.__results = {}
         # this is server widget that this taskgraph associated with
         self.__widget = None
 
@@ -197,21 +241,23 @@ class TaskGraph(object):
 
         """
 
-        if (node.visited):
-            return
-        node.visited = True
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if (node.visited):
+                continue
+            node.visited = True
 
-        if len(node.inputs) == 0:
-            inputs.append(node)
-            return
+            if len(node.inputs) == 0:
+                inputs.append(node)
+                continue
 
-        if consider_load and node.load:
-            inputs.append(node)
-            return
+            if consider_load and node.load:
+                inputs.append(node)
+                continue
 
-        for node_in in node.inputs:
-            inode = node_in['from_node']
-            self.__find_roots(inode, inputs, consider_load)
+            for node_in in reversed(node.inputs):
+                stack.append(node_in['from_node'])
 
     def start_labwidget(self):
         from IPython.display import display
@@ -252,7 +298,8 @@ class TaskGraph(object):
     @staticmethod
     def load_taskgraph(filename):
         """
-        load the yaml file to TaskGraph object
+        load the yaml file to TaskGraph object. The file is parsed again only
+        if it was modified since the last load.
 
         Arguments
         -------
@@ -264,14 +311,9 @@ class TaskGraph(object):
             the TaskGraph instance
 
         """
-
-        with open(filename) as f:
-            yaml = ruamel.yaml.YAML(typ='safe')
-            yaml.constructor.yaml_constructors[
-                u'tag:yaml.org,2002:timestamp'] = \
-                yaml.constructor.yaml_constructors[u'tag:yaml.org,2002:str']
-            obj = yaml.load(f)
-        t = TaskGraph(obj)
+        _, obj = _read_taskgraph(filename)
+        # the tasks share the conf dicts of the specs, which may be modified
+        t = TaskGraph(copy.deepcopy(obj))
         return t
 
     def export_task_speclist(self):
@@ -363,7 +405,7 @@ class TaskGraph(object):
                         'shape': 'point'})
         return G
 
-    def build(self, replace=None, profile=False):
+    def build(self, replace=None, profile=False, optimize=True):
         """
         compute the graph structure of the nodes. It will set the input and
         output nodes for each of the node
@@ -372,6 +414,10 @@ class TaskGraph(object):
         -------
         replace: dict
             conf parameters replacement
+        optimize: Boolean
+            run the optimization passes on the built graph, i.e. push the
+            predicates of the filter nodes into the loaders upstream and
+            fuse the linear chains of nodes into one step of the run
         """
         self.__node_dict.clear()
         replace = dict() if replace is None else replace
@@ -434,6 +480,14 @@ class TaskGraph(object):
                     'from_port': src_port
                 })
 
+        # in-degree counters used by the topological scheduler in
+        # :meth:`TaskGraph._run`
+        for node in self.__node_dict.values():
+            node.in_degree = len(node.inputs)
+        # the setups memoized while instantiating the nodes miss the
+        # connections
+        invalidate_setup()
+
         # Columns type checking is done in the :meth:`TaskGraph._run` after the
         # outputs are specified and participating tasks are determined.
 
@@ -441,6 +495,17 @@ class TaskGraph(object):
         # processed
         for k in self.__node_dict.keys():
             self.__node_dict[k].update()
+            # update may change the node conf in place
+            invalidate_setup()
+
+        if optimize:
+            self.__optimize()
+
+    def __optimize(self):
+        '''Rewrite the built graph for a faster run, producing the same
+        outputs.'''
+        push_down_predicates(self.__node_dict.values())
+        fuse_chains(self.__node_dict.values())
 
     def __getitem__(self, key):
         return self.__node_dict[key]
@@ -470,10 +535,17 @@ class TaskGraph(object):
             add_module_from_base64(module_name, encoded_class)
             self.__widget.cache = cacheCopy
 
-    def _run(self, outputs=None, replace=None, profile=False, formated=False):
+    def _run(self, outputs=None, replace=None, profile=False, formated=False,
+             executor=None, max_workers=None, incremental=False,
+             result_cache=None, validation='full'):
+        if validation not in VALIDATION_MODES:
+            raise ValueError(
+                'Unknown validation "{}". Supported validations are: {}'
+                .format(validation, list(VALIDATION_MODES)))
         replace = dict() if replace is None else replace
 
-        self.build(replace, profile)
+        # the graph is optimized once the requested outputs are connected
+        self.build(replace, profile, optimize=False)
 
         graph_outputs = []
         # add the output graph only if the Output Node is not in the graph
@@ -535,15 +607,27 @@ class TaskGraph(object):
                     'from_port': oport
                 })
 
+        outputs_collector_node.in_degree = len(outputs_collector_node.inputs)
+        self.__optimize()
+        invalidate_setup()
         results_task_ids = outputs
 
         inputs = []
         self.__find_roots(outputs_collector_node, inputs, consider_load=True)
 
+        fingerprint = None
+        if validation == 'first':
+            fingerprint = self.__fingerprint(outputs_collector_node)
+        validate = validation == 'full' or (
+            validation == 'first' and fingerprint not in _VALIDATED_GRAPHS)
+
         # Validate metadata prior to running heavy compute
         for node in self.__node_dict.values():
             if not node.visited:
                 continue
+            node.validate_outputs = validate
+            if not validate:
+                continue
 
             # Run ports validation.
             node.validate_connected_ports()
@@ -553,6 +637,11 @@ class TaskGraph(object):
             # node.meta_setup()
             node.validate_connected_metadata()
 
+        results = self.__results if incremental else None
+        if result_cache is True:
+            result_cache = ResultCache()
+        elif not result_cache:
+            result_cache = None
         if self.__widget is not None:
             def progress_fun(uid):
                 cacheCopy = copy.deepcopy(self.__widget.cache)
@@ -563,8 +652,8 @@ class TaskGraph(object):
                     current_node = nodes[0]
                     current_node['busy'] = True
                 self.__widget.cache = cacheCopy
-            for i in inputs:
-                i.flow(progress_fun)
+            report = run_scheduled(inputs, progress_fun, executor,
+                                   max_workers, results, result_cache)
             # clean up the progress
 
             def cleanup():
@@ -578,8 +667,14 @@ class TaskGraph(object):
             t = threading.Thread(target=cleanup)
             t.start()
         else:
-            for i in inputs:
-                i.flow()
+            report = run_scheduled(inputs, None, executor, max_workers,
+                                   results, result_cache)
+
+        if fingerprint is not None:
+            _VALIDATED_GRAPHS.add(fingerprint)
+        self.memory_report = report
+        if profile:
+            print(report)
 
         results_dfs_dict = outputs_collector_node.input_df
         port_map = {}
@@ -602,11 +697,42 @@ class TaskGraph(object):
         else:
             return result
 
+    def __fingerprint(self, outputs_collector_node):
+        '''Fingerprint of the graph to run, a hash of the type, code
+        version, conf and connections of the nodes feeding the outputs. The
+        graphs of the same fingerprint pass the same validations.
+
+        :return: str, or None if a conf is not json serializable
+        '''
+        nodes = [node for node in self.__node_dict.values() if node.visited]
+        if outputs_collector_node not in nodes:
+            nodes.append(outputs_collector_node)
+        key = []
+        for node in sorted(nodes, key=lambda node: node.uid):
+            nodetype = _get_nodetype(node)[0]
+            try:
+                conf = json.dumps(node.conf, sort_keys=True)
+            except TypeError:
+                return None
+            inputs = sorted((inp['to_port'], inp['from_node'].uid,
+                             inp['from_port']) for inp in node.inputs)
+            load = node.load if isinstance(node.load, bool) else True
+            key.append((node.uid, nodetype.__module__,
+                        nodetype.__qualname__, _code_version(nodetype),
+                        conf, inputs, load))
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
     def run_cleanup(self, ui_clean=False):
         for v in _CLEANUP.values():
             v(ui_clean)
 
-    def run(self, outputs=None, replace=None, profile=False, formated=False):
+    def clear_results(self):
+        '''Drop the node outputs kept by the incremental runs.'''
+        self.__results.clear()
+
+    def run(self, outputs=None, replace=None, profile=False, formated=False,
+            executor=None, max_workers=None, incremental=False,
+            result_cache=None, validation='full'):
         """
         Flow the dataframes in the graph to do the data science computations.
 
@@ -618,6 +744,31 @@ class TaskGraph(object):
             a dict that defines the conf parameters replacement
         profile: Boolean
             whether profile the processing time of the nodes or not
+        executor: str
+            None runs the nodes one by one in topological order. Set to
+            'threads' or 'processes' to dispatch every node whose inputs are
+            ready to a thread or process pool, so independent branches run
+            concurrently.
+        max_workers: int
+            maximum number of workers of the executor pool
+        incremental: Boolean
+            keep the node outputs and reuse them in the following incremental
+            runs for the nodes whose type, conf and upstream did not change,
+            so only the nodes downstream of an edit are recomputed. The
+            nodes are assumed deterministic. Nodes loading or saving a cache
+            are always computed. Use `clear_results` to free the kept
+            outputs.
+        result_cache: ResultCache or Boolean
+            on-disk cache of the node outputs keyed by the same fingerprint
+            as the incremental runs, so the outputs are reused across
+            sessions. True uses the default `ResultCache()`.
+        validation: str
+            'full' validates the connected ports and meta before the run and
+            the node outputs against the output meta. 'first' validates a
+            graph in its first run only, the graph reruns of the same node
+            types, confs and connections are not validated again. 'off'
+            skips the validations. The outputs are always checked against
+            the output port types.
 
         Returns
         -----
@@ -632,7 +783,12 @@ class TaskGraph(object):
                 err = ""
                 result = None
                 result = self._run(outputs=outputs, replace=replace,
-                                   profile=profile, formated=formated)
+                                   profile=profile, formated=formated,
+                                   executor=executor,
+                                   max_workers=max_workers,
+                                   incremental=incremental,
+                                   result_cache=result_cache,
+                                   validation=validation)
             except Exception:
                 err = traceback.format_exc()
             finally:
@@ -646,7 +802,11 @@ class TaskGraph(object):
             return result
         else:
             return self._run(outputs=outputs, replace=replace, profile=profile,
-                             formated=formated)
+                             formated=formated, executor=executor,
+                             max_workers=max_workers,
+                             incremental=incremental,
+                             result_cache=result_cache,
+                             validation=validation)
 
     def to_pydot(self, show_ports=False):
         import networkx as nx
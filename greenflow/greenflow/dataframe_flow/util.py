@@ -1,4 +1,6 @@
 import os
+import sys
+import importlib
 import cloudpickle
 import base64
 import pathlib
@@ -31,3 +33,39 @@ def get_encoded_class(classObj):
     pickled = cloudpickle.dumps(classObj)
     encoding = base64.b64encode(pickled).decode()
     return encoding
+
+
+def lazy_module_attrs(package_name, index):
+    """
+    Module level `__getattr__` and `__dir__` (PEP 562) of a plugin package
+    which imports the module of a node only when the node is first accessed.
+    Usage in the package `__init__.py`:
+        _NODE_INDEX = {'MyNode': '.myNode'}
+        __all__ = list(_NODE_INDEX)
+        __getattr__, __dir__ = lazy_module_attrs(__name__, _NODE_INDEX)
+    @param package_name
+        string, name of the package
+    @param index
+        dict, attribute name -> module name, or list of module names to try
+        in order. Relative module names are relative to the package.
+    returns
+        tuple of the `__getattr__` and `__dir__` functions
+    """
+    def __getattr__(name):
+        module_names = index.get(name, ())
+        if isinstance(module_names, str):
+            module_names = [module_names]
+        for module_name in module_names:
+            mod = importlib.import_module(module_name, package_name)
+            if hasattr(mod, name):
+                attr = getattr(mod, name)
+                # next accesses are plain attribute lookups
+                setattr(sys.modules[package_name], name, attr)
+                return attr
+        raise AttributeError('module "{}" has no attribute "{}"'.format(
+            package_name, name))
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package_name])) | set(index))
+
+    return __getattr__, __dir__
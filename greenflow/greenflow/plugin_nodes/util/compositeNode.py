@@ -3,17 +3,22 @@ from greenflow.dataframe_flow import TaskGraph
 from greenflow.dataframe_flow.taskSpecSchema import TaskSpecSchema
 from greenflow.dataframe_flow.portsSpecSchema import ConfSchema
 from greenflow.dataframe_flow.portsSpecSchema import NodePorts, MetaData
-from greenflow.dataframe_flow.cache import (CACHE_META,
+from greenflow.dataframe_flow.cache import (CACHE_META, CACHE_BUILT,
                                          CACHE_PORTS, CACHE_SCHEMA)
+from greenflow.dataframe_flow.taskGraph import _read_taskgraph
+import contextlib
+import copy
 import json
 import os
-import hashlib
 from greenflow.dataframe_flow.util import get_file_path
 import uuid
 
 
 __all__ = ["CompositeNode"]
 
+# number of the built sub-graphs kept in CACHE_BUILT
+MAX_BUILT_GRAPHS = 64
+
 
 def _get_node(port_name):
     return port_name.split('@')[0]
@@ -30,6 +35,10 @@ def fix_port_name(obj, subgraph_node_name):
     return output
 
 
+def _graph_nodes(task_graph):
+    return [task_graph[task[TaskSpecSchema.task_id]] for task in task_graph]
+
+
 def group_ports(input_list):
     """
     group inputs ports by node id
@@ -50,6 +59,8 @@ def group_ports(input_list):
 
 
 class CompositeNode(Node):
+    # the inputs are fed to the sub-graph nodes, which copy them if needed
+    mutates_inputs = False
 
     def update(self):
         self.conf_update()  # update the conf
@@ -61,6 +72,27 @@ class CompositeNode(Node):
         """
         pass
 
+    def _sub_nodes(self):
+        cache_key, task_graph, replacementObj = self._compute_hash_key()
+        if not task_graph:
+            return []
+        task_graph = self._built_task_graph(cache_key, task_graph,
+                                            replacementObj)
+        return _graph_nodes(task_graph)
+
+    @property
+    def deterministic(self):
+        # the sub-graph nodes with side effects run with the composite node
+        return all(node.deterministic for node in self._sub_nodes())
+
+    def source_files(self):
+        files = []
+        if 'taskgraph' in self.conf:
+            files.append(get_file_path(self.conf['taskgraph']))
+        for node in self._sub_nodes():
+            files.extend(node.source_files())
+        return files
+
     def _compute_hash_key(self):
         """
         if hash changed, the port_setup, meta_setup
@@ -75,18 +107,16 @@ class CompositeNode(Node):
         inputs = ()
         replacementObj = {}
         input_node = ""
-        task_graph_obj = None
+        specs = None
         if 'taskgraph' in self.conf:
             try:
                 task_graph = get_file_path(self.conf['taskgraph'])
             except FileNotFoundError:
                 task_graph = None
             if task_graph is not None and os.path.exists(task_graph):
-                with open(task_graph) as f:
-                    task_graph = hashlib.md5(f.read().encode()).hexdigest()
-                task_graph_obj = TaskGraph.load_taskgraph(
-                    get_file_path(self.conf['taskgraph']))
-        self.update_replace(replacementObj, task_graph_obj)
+                # the file is parsed and hashed once per modification
+                task_graph, specs = _read_taskgraph(task_graph)
+        self.update_replace(replacementObj, specs)
         if 'input' in self.conf:
             for inp in self.conf['input']:
                 input_node += inp+","
@@ -94,9 +124,51 @@ class CompositeNode(Node):
                     for i in self.inputs:
                         inputs += (hash(i['from_node']),
                                    i['to_port'], i['from_port'])
-        return (hash((self.uid, task_graph, inputs, json.dumps(self.conf),
-                      input_node, json.dumps(replacementObj))), task_graph_obj,
-                replacementObj)
+        cache_key = hash((self.uid, task_graph, inputs, json.dumps(self.conf),
+                          input_node, json.dumps(replacementObj)))
+        task_graph_obj = None
+        if cache_key in CACHE_BUILT:
+            # built already, see `_built_task_graph`
+            task_graph_obj = CACHE_BUILT[cache_key]
+        elif specs is not None:
+            # the specs are shared by the loads of the file
+            task_graph_obj = TaskGraph(copy.deepcopy(specs))
+        return cache_key, task_graph_obj, replacementObj
+
+    def _built_task_graph(self, cache_key, task_graph, replacementObj):
+        """
+        The sub-graph built with the replacement conf. It is built once per
+        hash key of `_compute_hash_key` and shared by the setups and the
+        runs of the composite node. They connect it to the composite node
+        inputs within `_sub_graph_connected` only.
+        """
+        if cache_key in CACHE_BUILT:
+            CACHE_BUILT.move_to_end(cache_key)
+            return CACHE_BUILT[cache_key]
+        task_graph.build(replace=replacementObj)
+        CACHE_BUILT[cache_key] = task_graph
+        while len(CACHE_BUILT) > MAX_BUILT_GRAPHS:
+            CACHE_BUILT.popitem(last=False)
+        return task_graph
+
+    @contextlib.contextmanager
+    def _sub_graph_connected(self, task_graph):
+        """
+        Undo the connections of `_make_sub_graph_connection` on exit, so the
+        cached sub-graph keeps no reference to the nodes of the outer graph.
+        The setups of the sub-graph nodes memoized with or without the
+        connections are dropped.
+        """
+        nodes = _graph_nodes(task_graph)
+        saved = [(node, node.inputs) for node in nodes]
+        for node in nodes:
+            node.clear_setup()
+        try:
+            yield task_graph
+        finally:
+            for node, inputs in saved:
+                node.inputs = inputs
+                node.clear_setup()
 
     def _make_sub_graph_connection(self, task_graph,
                                    inputNode_fun,
@@ -163,7 +235,8 @@ class CompositeNode(Node):
         inports = {}
         outports = {}
         if task_graph:
-            task_graph.build(replace=replacementObj)
+            task_graph = self._built_task_graph(cache_key, task_graph,
+                                                replacementObj)
 
             def inputNode_fun(inputNode, in_ports):
                 inport = {}
@@ -181,8 +254,9 @@ class CompositeNode(Node):
                         ouport[key] = before_fix[key]
                 outports.update(fix_port_name(ouport, outNode.uid))
 
-            self._make_sub_graph_connection(task_graph,
-                                            inputNode_fun, outNode_fun)
+            with self._sub_graph_connected(task_graph):
+                self._make_sub_graph_connection(task_graph,
+                                                inputNode_fun, outNode_fun)
         output_port = NodePorts(inports=inports, outports=outports)
         CACHE_PORTS[cache_key] = output_port
         return output_port
@@ -195,7 +269,8 @@ class CompositeNode(Node):
         required = {}
         out_meta = {}
         if task_graph:
-            task_graph.build(replace=replacementObj)
+            task_graph = self._built_task_graph(cache_key, task_graph,
+                                                replacementObj)
 
             def inputNode_fun(inputNode, in_ports):
                 req = {}
@@ -215,8 +290,9 @@ class CompositeNode(Node):
                 out_meta.update(fix_port_name(oucols,
                                               outNode.uid))
 
-            self._make_sub_graph_connection(task_graph,
-                                            inputNode_fun, outNode_fun)
+            with self._sub_graph_connected(task_graph):
+                self._make_sub_graph_connection(task_graph,
+                                                inputNode_fun, outNode_fun)
         metadata = MetaData(inports=required, outports=out_meta)
         CACHE_META[cache_key] = metadata
         return metadata
@@ -271,7 +347,8 @@ class CompositeNode(Node):
             "subnodes_conf": {}
         }
         if task_graph:
-            task_graph.build(replace=replacementObj)
+            task_graph = self._built_task_graph(cache_key, task_graph,
+                                                replacementObj)
 
             def inputNode_fun(inputNode, in_ports):
                 pass
@@ -279,26 +356,32 @@ class CompositeNode(Node):
             def outNode_fun(outNode, out_ports):
                 pass
 
-            self._make_sub_graph_connection(task_graph,
-                                            inputNode_fun, outNode_fun)
-
-            ids_in_graph = []
-            in_ports = []
-            out_ports = []
-            for t in task_graph:
-                node_id = t.get('id')
-                if node_id != '':
-                    node = task_graph[node_id]
-                    all_ports = node.ports_setup()
-                    for port in all_ports.inports.keys():
-                        in_ports.append(node_id+'.'+port)
-                    for port in all_ports.outports.keys():
-                        out_ports.append(node_id+'.'+port)
-                    ids_in_graph.append(node_id)
-            json['properties']['input']['items']['enum'] = in_ports
-            json['properties']['output']['items']['enum'] = out_ports
-            json['properties']['subnode_ids']['items']['enum'] = ids_in_graph
-        if 'subnode_ids' in self.conf and task_graph:
+            with self._sub_graph_connected(task_graph):
+                self._make_sub_graph_connection(task_graph,
+                                                inputNode_fun, outNode_fun)
+                self._sub_graph_schema(task_graph, json, ui)
+        out_schema = ConfSchema(json=json, ui=ui)
+        CACHE_SCHEMA[cache_key] = out_schema
+        return out_schema
+
+    def _sub_graph_schema(self, task_graph, json, ui):
+        ids_in_graph = []
+        in_ports = []
+        out_ports = []
+        for t in task_graph:
+            node_id = t.get('id')
+            if node_id != '':
+                node = task_graph[node_id]
+                all_ports = node.ports_setup()
+                for port in all_ports.inports.keys():
+                    in_ports.append(node_id+'.'+port)
+                for port in all_ports.outports.keys():
+                    out_ports.append(node_id+'.'+port)
+                ids_in_graph.append(node_id)
+        json['properties']['input']['items']['enum'] = in_ports
+        json['properties']['output']['items']['enum'] = out_ports
+        json['properties']['subnode_ids']['items']['enum'] = ids_in_graph
+        if 'subnode_ids' in self.conf:
             for subnodeId in self.conf['subnode_ids']:
                 if subnodeId in task_graph:
                     nodeObj = task_graph[subnodeId]
@@ -315,9 +398,6 @@ class CompositeNode(Node):
                             'conf': schema.ui
                         }
                     })
-        out_schema = ConfSchema(json=json, ui=ui)
-        CACHE_SCHEMA[cache_key] = out_schema
-        return out_schema
 
     def update_replace(self, replaceObj, task_graph=None):
         # find the other replacment conf
@@ -345,9 +425,9 @@ class CompositeNode(Node):
         dataframe
         """
         if 'taskgraph' in self.conf:
-            task_graph = TaskGraph.load_taskgraph(
-                get_file_path(self.conf['taskgraph']))
-            task_graph.build()
+            cache_key, task_graph, replacementObj = self._compute_hash_key()
+            task_graph = self._built_task_graph(cache_key, task_graph,
+                                                replacementObj)
 
             outputLists = []
             replaceObj = {}
@@ -355,12 +435,14 @@ class CompositeNode(Node):
 
             def inputNode_fun(inputNode, in_ports):
                 inports = inputNode.ports_setup().inports
+                # the connections are undone after the setup
+                connected = inputNode.inputs
 
                 class InputFeed(Node):
 
                     def meta_setup(self):
                         output = {}
-                        for inp in inputNode.inputs:
+                        for inp in connected:
                             output[inp['to_port']] = inp[
                                 'from_node'].meta_setup().outports[
                                     inp['from_port']]
@@ -409,9 +491,13 @@ class CompositeNode(Node):
                     if self.outport_connected(outNode.uid+'@'+key):
                         outputLists.append(outNode.uid+'.'+key)
 
-            self._make_sub_graph_connection(task_graph,
-                                            inputNode_fun, outNode_fun)
+            with self._sub_graph_connected(task_graph):
+                self._make_sub_graph_connection(task_graph,
+                                                inputNode_fun, outNode_fun)
 
+            # the built sub-graph is shared, run a new one
+            task_graph = TaskGraph.load_taskgraph(
+                get_file_path(self.conf['taskgraph']))
             task_graph.extend(input_feeders)
             self.update_replace(replaceObj, task_graph)
             result = task_graph.run(outputLists, replace=replaceObj)
@@ -1,3 +1,4 @@
+import copy
 from .compositeNode import CompositeNode
 from greenflow.dataframe_flow.cache import CACHE_SCHEMA
 from greenflow.dataframe_flow.portsSpecSchema import (ConfSchema,
@@ -174,7 +175,8 @@ class ContextCompositeNode(CompositeNode):
             typelist.append(obj_temp)
 
         if 'taskgraph' in self.conf:
-            task_graph.build(replace=replacementObj)
+            task_graph = self._built_task_graph(cache_key, task_graph,
+                                                replacementObj)
 
             def inputNode_fun(inputNode, in_ports):
                 pass
@@ -182,24 +184,25 @@ class ContextCompositeNode(CompositeNode):
             def outNode_fun(outNode, out_ports):
                 pass
 
-            self._make_sub_graph_connection(task_graph,
-                                            inputNode_fun, outNode_fun)
-
-            ids_in_graph = []
-            in_ports = []
-            out_ports = []
-            for t in task_graph:
-                node_id = t.get('id')
-                if node_id != '':
-                    node = task_graph[node_id]
-                    all_ports = node.ports_setup()
-                    for port in all_ports.inports.keys():
-                        in_ports.append(node_id+'.'+port)
-                    for port in all_ports.outports.keys():
-                        out_ports.append(node_id+'.'+port)
-                    ids_in_graph.append(node_id)
-            json['properties']['input']['items']['enum'] = in_ports
-            json['properties']['output']['items']['enum'] = out_ports
+            with self._sub_graph_connected(task_graph):
+                self._make_sub_graph_connection(task_graph,
+                                                inputNode_fun, outNode_fun)
+
+                ids_in_graph = []
+                in_ports = []
+                out_ports = []
+                for t in task_graph:
+                    node_id = t.get('id')
+                    if node_id != '':
+                        node = task_graph[node_id]
+                        all_ports = node.ports_setup()
+                        for port in all_ports.inports.keys():
+                            in_ports.append(node_id+'.'+port)
+                        for port in all_ports.outports.keys():
+                            out_ports.append(node_id+'.'+port)
+                        ids_in_graph.append(node_id)
+                json['properties']['input']['items']['enum'] = in_ports
+                json['properties']['output']['items']['enum'] = out_ports
         out_schema = ConfSchema(json=json, ui=ui)
         CACHE_SCHEMA[cache_key] = out_schema
         return out_schema
@@ -216,7 +219,8 @@ class ContextCompositeNode(CompositeNode):
             for task in task_graph:
                 key = task.get('id')
                 newid = key
-                conf = task.get('conf')
+                # the task specs are shared by the loads of the taskgraph
+                conf = copy.deepcopy(task.get('conf'))
                 if newid in replaceObj:
                     replaceObj[newid].update({'conf': conf})
                 else:
@@ -0,0 +1,164 @@
+'''
+greenflow Cache Backend Unit Tests
+
+To run unittests:
+
+# Using standard library unittest
+
+python -m unittest -v
+python -m unittest tests/unit/test_cache_backend.py -v
+
+or
+
+# Using pytest
+# "conda install pytest" or "pip install pytest"
+pytest -v tests
+pytest -v tests/unit/test_cache_backend.py
+
+'''
+import os
+import shutil
+import tempfile
+import warnings
+import unittest
+import numpy as np
+import pandas as pd
+
+from greenflow.dataframe_flow import (Node, PortsSpecSchema, NodePorts,
+                                      MetaData)
+from greenflow.dataframe_flow import (TaskSpecSchema, TaskGraph,
+                                      ResultCache)
+from greenflow.dataframe_flow import (CACHE_BACKENDS, ArrowCacheBackend,
+                                      get_cache_backend)
+
+from .utils import make_orderer
+
+ordered, compare = make_orderer()
+unittest.defaultTestLoader.sortTestMethodsUsing = compare
+
+
+class NodeFrameSource(Node):
+    cache_backend = 'arrow'
+
+    def ports_setup(self):
+        output_ports = {
+            'df_out': {PortsSpecSchema.port_type: pd.DataFrame},
+            'df_neg_out': {PortsSpecSchema.port_type: pd.DataFrame}
+        }
+        return NodePorts(outports=output_ports)
+
+    def meta_setup(self):
+        columns_out = {'x': 'float64', 'y': 'int64'}
+        return MetaData(inports={}, outports={'df_out': columns_out,
+                                              'df_neg_out': columns_out})
+
+    def process(self, inputs):
+        df = pd.DataFrame({'x': np.arange(10) * 0.5, 'y': np.arange(10)},
+                          index=pd.Index(np.arange(10, 20), name='idx'))
+        return {'df_out': df, 'df_neg_out': -df}
+
+
+class TestCacheBackend(unittest.TestCase):
+
+    def setUp(self):
+        self._test_dir = tempfile.mkdtemp()
+        self._cache_env = os.environ.get('GREENFLOW_CACHE_DIR')
+        os.environ['GREENFLOW_CACHE_DIR'] = \
+            os.path.join(self._test_dir, '.cache')
+        self.df = NodeFrameSource.process(None, {})['df_out']
+
+    def tearDown(self):
+        os.environ.pop('GREENFLOW_CACHE_BACKEND', None)
+        if self._cache_env is None:
+            os.environ.pop('GREENFLOW_CACHE_DIR', None)
+        else:
+            os.environ['GREENFLOW_CACHE_DIR'] = self._cache_env
+        shutil.rmtree(self._test_dir)
+
+    @ordered
+    def test_round_trip(self):
+        '''Test that every backend loads back the saved dataframes, with and
+        without column projection.
+        '''
+        for name in CACHE_BACKENDS:
+            backend = get_cache_backend(name)
+            path = os.path.join(self._test_dir, 'node' + backend.suffix)
+            with warnings.catch_warnings():
+                # tables performance warnings on the index name
+                warnings.simplefilter('ignore')
+                backend.save(path, {'df_out': self.df}, 'node')
+            (df, ) = backend.load(path, ['df_out'], 'node').values()
+            pd.testing.assert_frame_equal(df, self.df)
+
+            (df, ) = backend.load(path, ['df_out'], 'node',
+                                  columns={'df_out': ['y']}).values()
+            pd.testing.assert_frame_equal(df, self.df[['y']])
+
+            with self.assertRaises(LookupError):
+                backend.load(path, ['missing'], 'node')
+
+        with self.assertRaises(ValueError):
+            get_cache_backend('csv')
+
+    @ordered
+    def test_compression(self):
+        '''Test that the compressed columnar caches load back.
+        '''
+        for backend in (CACHE_BACKENDS['parquet'](compression='zstd'),
+                        ArrowCacheBackend(compression='zstd')):
+            path = os.path.join(self._test_dir, 'node' + backend.suffix)
+            backend.save(path, {'df_out': self.df}, 'node')
+            (df, ) = backend.load(path, ['df_out'], 'node').values()
+            pd.testing.assert_frame_equal(df, self.df)
+
+    @ordered
+    def test_node_cache_backend(self):
+        '''Test that the node saves and loads its cache with the backend set
+        on the node class, or with the GREENFLOW_CACHE_BACKEND environment
+        variable.
+        '''
+        tgraph = TaskGraph([{
+            TaskSpecSchema.task_id: 'source',
+            TaskSpecSchema.node_type: NodeFrameSource,
+            TaskSpecSchema.conf: {},
+            TaskSpecSchema.inputs: {}
+        }])
+        cache_dir = os.environ['GREENFLOW_CACHE_DIR']
+        outputs = ['source.df_out']
+        tgraph.run(outputs, replace={'source': {TaskSpecSchema.save: True}})
+        self.assertTrue(os.path.isdir(os.path.join(cache_dir,
+                                                   'source.arrow')))
+        (df, ) = tgraph.run(outputs,
+                            replace={'source': {TaskSpecSchema.load: True}})
+        pd.testing.assert_frame_equal(df, self.df)
+
+        os.environ['GREENFLOW_CACHE_BACKEND'] = 'parquet'
+        replace = {'source': {TaskSpecSchema.node_type: type(
+            'NodeFrameDefault', (NodeFrameSource,), {'cache_backend': None})}}
+        replace['source'][TaskSpecSchema.save] = True
+        tgraph.run(outputs, replace=replace)
+        self.assertTrue(os.path.isdir(os.path.join(cache_dir,
+                                                   'source.parquet')))
+
+    @ordered
+    def test_result_cache_backend(self):
+        '''Test the result cache with a columnar backend.
+        '''
+        tgraph = TaskGraph([{
+            TaskSpecSchema.task_id: 'source',
+            TaskSpecSchema.node_type: NodeFrameSource,
+            TaskSpecSchema.conf: {},
+            TaskSpecSchema.inputs: {}
+        }])
+        cache = ResultCache(os.path.join(self._test_dir, 'results'),
+                            backend='parquet')
+        outputs = ['source.df_out', 'source.df_neg_out']
+        for _ in range(2):
+            (df, df_neg) = tgraph.run(outputs, result_cache=cache)
+            pd.testing.assert_frame_equal(df, self.df)
+            pd.testing.assert_frame_equal(df_neg, -self.df)
+        self.assertEqual(len(os.listdir(cache.cache_dir)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
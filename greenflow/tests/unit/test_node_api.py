@@ -20,10 +20,14 @@ pytest -v tests/unit/test_node_api.py
 
 '''
 import os
+import sys
+import shutil
+import tempfile
 import unittest
 
-from greenflow.dataframe_flow import TaskSpecSchema
-from greenflow.dataframe_flow.task import Task
+from greenflow.dataframe_flow import (TaskSpecSchema, TaskGraph,
+                                      PortsSpecSchema, NodePorts, MetaData)
+from greenflow.dataframe_flow.task import Task, load_modules
 from greenflow.dataframe_flow._node import _Node
 from greenflow.dataframe_flow.node import (Node, _PortsMixin)
 from greenflow.dataframe_flow._node_flow import NodeTaskGraphMixin
@@ -34,6 +38,27 @@ ordered, compare = make_orderer()
 unittest.defaultTestLoader.sortTestMethodsUsing = compare
 
 
+class NodeColumnAdd(Node):
+    '''Adds the column named in the conf to the input columns.'''
+    meta_calls = 0
+
+    def ports_setup(self):
+        input_ports = {'in': {PortsSpecSchema.port_type: dict}}
+        output_ports = {'out': {PortsSpecSchema.port_type: dict}}
+        return NodePorts(inports=input_ports, outports=output_ports)
+
+    def meta_setup(self):
+        NodeColumnAdd.meta_calls += 1
+        columns = self.get_input_meta().get('in', {})
+        columns[self.conf['column']] = 'float64'
+        return MetaData(inports={}, outports={'out': columns})
+
+    def process(self, inputs):
+        data = dict(inputs.get('in', {}))
+        data[self.conf['column']] = 0.0
+        return {'out': data}
+
+
 class TestNodeAPI(unittest.TestCase):
 
     def setUp(self):
@@ -110,6 +135,110 @@ class TestNodeAPI(unittest.TestCase):
         self.assertEqual(iports, ['points_df_in'])
         self.assertEqual(oports, ['distance_df', 'distance_abs_df'])
 
+    @ordered
+    def test_node_setup_memoization(self):
+        '''Test that the meta setup of a node is computed once per build,
+        and recomputed when a conf or the connections change.
+        '''
+        depth = 50
+        tspec_list = []
+        for idx in range(depth):
+            tspec_list.append({
+                TaskSpecSchema.task_id: 'col{}'.format(idx),
+                TaskSpecSchema.node_type: NodeColumnAdd,
+                TaskSpecSchema.conf: {'column': 'c{}'.format(idx)},
+                TaskSpecSchema.inputs: {} if idx == 0 else {
+                    'in': 'col{}.out'.format(idx - 1)}
+            })
+        tgraph = TaskGraph(tspec_list)
+        tgraph.build()
+        NodeColumnAdd.meta_calls = 0
+        for idx in range(depth):
+            tgraph['col{}'.format(idx)].validate_connected_metadata()
+        meta = tgraph['col{}'.format(depth - 1)].meta_setup()
+        self.assertEqual(len(meta.outports['out']), depth)
+        self.assertEqual(NodeColumnAdd.meta_calls, depth)
+
+        # the upstream meta is not modified by the downstream nodes
+        self.assertEqual(tgraph['col0'].meta_setup().outports,
+                         {'out': {'c0': 'float64'}})
+
+        tgraph['col0'].conf = {'column': 'first'}
+        meta = tgraph['col{}'.format(depth - 1)].meta_setup()
+        self.assertIn('first', meta.outports['out'])
+        self.assertNotIn('c0', meta.outports['out'])
+
+        (out, ) = tgraph.run(['col{}.out'.format(depth - 1)])
+        self.assertEqual(len(out), depth)
+
+    @ordered
+    def test_node_class_loading(self):
+        '''Test that a node module file is loaded once and loaded again only
+        when it is modified.
+        '''
+        points_cls = type(self.points_task.get_node_obj())
+        distance_cls = type(self.distance_task.get_node_obj())
+        self.assertIs(type(self.points_task.get_node_obj()), points_cls)
+        self.assertIs(points_cls.__module__, distance_cls.__module__)
+
+        test_dir = tempfile.mkdtemp()
+        try:
+            module_file = os.path.join(test_dir, 'edited_nodes.py')
+            shutil.copy(self.points_task[TaskSpecSchema.filepath],
+                        module_file)
+            task = Task({
+                TaskSpecSchema.task_id: 'points_task',
+                TaskSpecSchema.node_type: 'PointNode',
+                TaskSpecSchema.filepath: module_file,
+                TaskSpecSchema.conf: {'npts': 10},
+                TaskSpecSchema.inputs: {}
+            })
+            node_cls = type(task.get_node_obj())
+            self.assertIs(type(task.get_node_obj()), node_cls)
+
+            stat = os.stat(module_file)
+            os.utime(module_file, ns=(stat.st_atime_ns,
+                                      stat.st_mtime_ns + 10**9))
+            self.assertIsNot(type(task.get_node_obj()), node_cls)
+        finally:
+            shutil.rmtree(test_dir)
+
+    @ordered
+    def test_lazy_node_package(self):
+        '''Test that the submodules of a node package are imported only when
+        one of their nodes is used.
+        '''
+        test_dir = tempfile.mkdtemp()
+        try:
+            package_dir = os.path.join(test_dir, 'lazy_nodes')
+            os.makedirs(os.path.join(package_dir, 'sub'))
+            for path in ('__init__.py', os.path.join('sub', '__init__.py')):
+                open(os.path.join(package_dir, path), 'w').close()
+            shutil.copy(self.points_task[TaskSpecSchema.filepath],
+                        os.path.join(package_dir, 'sub', 'points.py'))
+
+            mod = load_modules(package_dir).mod
+            self.assertIn('PointNode', dir(mod))
+            self.assertNotIn('lazy_nodes.sub.points', sys.modules)
+
+            task = Task({
+                TaskSpecSchema.task_id: 'points_task',
+                TaskSpecSchema.node_type: 'PointNode',
+                TaskSpecSchema.filepath: package_dir,
+                TaskSpecSchema.conf: {'npts': 10},
+                TaskSpecSchema.inputs: {}
+            })
+            node = task.get_node_obj()
+            self.assertEqual(type(node).__module__, 'lazy_nodes.sub.points')
+            self.assertIn('lazy_nodes.sub.points', sys.modules)
+            with self.assertRaises(AttributeError):
+                mod.MissingNode
+        finally:
+            shutil.rmtree(test_dir)
+            for name in list(sys.modules):
+                if name.startswith('lazy_nodes'):
+                    del sys.modules[name]
+
 
 if __name__ == '__main__':
     unittest.main()
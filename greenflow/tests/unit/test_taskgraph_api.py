@@ -172,6 +172,38 @@ class TestTaskGraphAPI(unittest.TestCase):
         # self.assertAlmostEqual(dist_sum, 0.0, places, msg, delta)
         self.assertAlmostEqual(dist_sum, 761.062831178)  # match to 7 places
 
+        # peak memory is reached when both distance outputs are held
+        report = self.tgraph.memory_report
+        self.assertEqual(report.peak_node, 'distance_by_df')
+        self.assertEqual(report.peak_bytes,
+                         dist_df_w_df.memory_usage(index=True).sum())
+
+    @ordered
+    def test_run_executor(self):
+        '''Test that a taskgraph runs with the thread and process pool
+        schedulers and gives the same results as the default run.
+        '''
+        outlist = ['distance_by_df.distance_df',
+                   'distance_by_df.distance_abs_df']
+        replace_spec = {
+            'points_task': {
+                TaskSpecSchema.conf: {
+                    'npts': 1000,
+                    'nseed': 2335
+                }
+            }
+        }
+        for executor in ('threads', 'processes'):
+            (dist_df, dist_abs_df) = self.tgraph.run(
+                outputs=outlist, replace=replace_spec, executor=executor,
+                max_workers=2)
+            self.assertAlmostEqual(dist_df['distance_df'].sum(),
+                                   761.062831178)
+            self.assertIn('distance_abs_df', dist_abs_df)
+
+        with self.assertRaises(ValueError):
+            self.tgraph.run(outputs=outlist, executor='gpus')
+
     @ordered
     def test_save(self):
         '''Test that a taskgraph can be save to a yaml file.
@@ -232,6 +264,78 @@ class TestTaskGraphAPI(unittest.TestCase):
 
             self.assertTrue(all_tasks_exist, err_msg)
 
+    @ordered
+    def test_load_parsed_once(self):
+        '''Test that a taskgraph file is parsed again only if modified.
+        '''
+        from greenflow.dataframe_flow.cache import CACHE_TASKGRAPH
+        workflow_file = os.path.join(self._test_dir,
+                                     'test_load_parsed_once.yaml')
+
+        with open(workflow_file, 'w') as wf:
+            wf.write(TASKGRAPH_YAML)
+
+        tgraph = TaskGraph.load_taskgraph(workflow_file)
+        parsed = CACHE_TASKGRAPH[os.path.abspath(workflow_file)]
+        list(tgraph)[0][TaskSpecSchema.conf]['npts'] = 10
+
+        # the cached specs are not modified through the loaded taskgraphs
+        tgraph = TaskGraph.load_taskgraph(workflow_file)
+        self.assertIs(CACHE_TASKGRAPH[os.path.abspath(workflow_file)],
+                      parsed)
+        self.assertEqual(list(tgraph)[0][TaskSpecSchema.conf]['npts'],
+                         1000)
+
+        with open(workflow_file, 'w') as wf:
+            wf.write(TASKGRAPH_YAML.replace('npts: 1000', 'npts: 20000'))
+
+        tgraph = TaskGraph.load_taskgraph(workflow_file)
+        self.assertIsNot(CACHE_TASKGRAPH[os.path.abspath(workflow_file)],
+                         parsed)
+        self.assertEqual(list(tgraph)[0][TaskSpecSchema.conf]['npts'],
+                         20000)
+
+    @ordered
+    def test_composite_built_once(self):
+        '''Test that a composite node builds its sub-graph once and that the
+        cached sub-graph is not left connected to the outer graph.
+        '''
+        from greenflow.plugin_nodes import CompositeNode
+        from greenflow.dataframe_flow.cache import CACHE_BUILT
+        workflow_file = os.path.join(self._test_dir,
+                                     'test_composite_built_once.yaml')
+        with open(workflow_file, 'w') as wf:
+            wf.write(TASKGRAPH_YAML)
+
+        tgraph = TaskGraph([{
+            TaskSpecSchema.task_id: 'points',
+            TaskSpecSchema.node_type: 'PointNode',
+            TaskSpecSchema.conf: {'npts': 1000, 'nseed': 2335},
+            TaskSpecSchema.inputs: []
+        }, {
+            TaskSpecSchema.task_id: 'composite',
+            TaskSpecSchema.node_type: CompositeNode,
+            TaskSpecSchema.conf: {
+                'taskgraph': workflow_file,
+                'input': ['distance_by_df.points_df_in'],
+                'output': ['distance_by_df.distance_df']
+            },
+            TaskSpecSchema.inputs: {
+                'distance_by_df@points_df_in': 'points.points_df_out'
+            }
+        }])
+        (dist_df, ) = tgraph.run(['composite.distance_by_df@distance_df'])
+        self.assertAlmostEqual(dist_df['distance_df'].sum(), 761.062831178)
+
+        composite = tgraph['composite']
+        cache_key, sub_graph, _ = composite._compute_hash_key()
+        self.assertIs(CACHE_BUILT[cache_key], sub_graph)
+        composite.ports_setup()
+        composite.meta_setup()
+        self.assertIs(composite._compute_hash_key()[1], sub_graph)
+        (inp, ) = sub_graph['distance_by_df'].inputs
+        self.assertIs(inp['from_node'], sub_graph['points_task'])
+
     @ordered
     def test_save_load_cache(self):
         '''Test caching of tasks outputs within a taskgraph.
@@ -0,0 +1,247 @@
+'''
+greenflow TaskGraph Optimizer Unit Tests
+
+To run unittests:
+
+# Using standard library unittest
+
+python -m unittest -v
+python -m unittest tests/unit/test_taskgraph_optimizer.py -v
+
+or
+
+# Using pytest
+# "conda install pytest" or "pip install pytest"
+pytest -v tests
+pytest -v tests/unit/test_taskgraph_optimizer.py
+
+'''
+import unittest
+
+from greenflow.dataframe_flow import (Node, PortsSpecSchema, NodePorts,
+                                      MetaData)
+from greenflow.dataframe_flow import (TaskSpecSchema, TaskGraph)
+from greenflow.dataframe_flow._node_flow import register_copy_function
+
+from .utils import make_orderer
+
+ordered, compare = make_orderer()
+unittest.defaultTestLoader.sortTestMethodsUsing = compare
+
+
+class NodeRowsSource(Node):
+    '''Loads the rows 0, 1, ..., size - 1, skipping the rows below the
+    pushed down `min`.'''
+
+    def ports_setup(self):
+        output_ports = {'rows': {PortsSpecSchema.port_type: list}}
+        return NodePorts(outports=output_ports)
+
+    def meta_setup(self):
+        return MetaData(inports={}, outports={'rows': {}})
+
+    def push_predicates(self, oport, predicates):
+        conf = dict(self.conf)
+        for column, op, value in predicates:
+            if column == 'value' and op == '>=':
+                conf['min'] = max(conf.get('min', value), value)
+        return conf if conf != self.conf else None
+
+    def process(self, inputs):
+        return {'rows': list(range(self.conf.get('min', 0),
+                                   self.conf['size']))}
+
+
+class NodeRowsFilter(Node):
+    '''Selects the rows not smaller than `min`.'''
+    mutates_inputs = False
+
+    def ports_setup(self):
+        input_ports = {'rows_in': {PortsSpecSchema.port_type: list}}
+        output_ports = {'rows': {PortsSpecSchema.port_type: list}}
+        return NodePorts(inports=input_ports, outports=output_ports)
+
+    def meta_setup(self):
+        return MetaData(inports={}, outports={'rows': {}})
+
+    def pushdown_predicates(self):
+        return ('rows_in', 'rows', [('value', '>=', self.conf['min'])])
+
+    def process(self, inputs):
+        return {'rows': [row for row in inputs['rows_in']
+                         if row >= self.conf['min']]}
+
+
+class Tally(object):
+    '''Counts the copies made of it.'''
+    copies = 0
+
+    def __init__(self, items):
+        self.items = items
+
+
+def copy_tally(tally):
+    Tally.copies += 1
+    return Tally(list(tally.items))
+
+
+register_copy_function(Tally, copy_tally)
+
+
+class NodeTallySource(Node):
+
+    def ports_setup(self):
+        output_ports = {'tally': {PortsSpecSchema.port_type: Tally}}
+        return NodePorts(outports=output_ports)
+
+    def meta_setup(self):
+        return MetaData(inports={}, outports={'tally': {}})
+
+    def process(self, inputs):
+        return {'tally': Tally([])}
+
+
+class NodeTallyAppend(Node):
+    '''Appends its id to the tally in place.'''
+
+    def ports_setup(self):
+        input_ports = {'tally_in': {PortsSpecSchema.port_type: Tally}}
+        output_ports = {'tally': {PortsSpecSchema.port_type: Tally}}
+        return NodePorts(inports=input_ports, outports=output_ports)
+
+    def meta_setup(self):
+        return MetaData(inports={}, outports={'tally': {}})
+
+    def process(self, inputs):
+        tally = inputs['tally_in']
+        tally.items.append(self.uid)
+        return {'tally': tally}
+
+
+class NodeTallyPass(NodeTallyAppend):
+    mutates_inputs = False
+
+    def process(self, inputs):
+        return {'tally': inputs['tally_in']}
+
+
+def tally_tspec_list(node_types):
+    tspec_list = [{
+        TaskSpecSchema.task_id: 'source',
+        TaskSpecSchema.node_type: NodeTallySource,
+        TaskSpecSchema.conf: {},
+        TaskSpecSchema.inputs: {}
+    }]
+    previous = 'source'
+    for idx, node_type in enumerate(node_types):
+        task_id = 'node{}'.format(idx)
+        tspec_list.append({
+            TaskSpecSchema.task_id: task_id,
+            TaskSpecSchema.node_type: node_type,
+            TaskSpecSchema.conf: {},
+            TaskSpecSchema.inputs: {'tally_in': previous + '.tally'}
+        })
+        previous = task_id
+    return tspec_list
+
+
+def filters_tspec_list(mins):
+    tspec_list = [{
+        TaskSpecSchema.task_id: 'source',
+        TaskSpecSchema.node_type: NodeRowsSource,
+        TaskSpecSchema.conf: {'size': 10},
+        TaskSpecSchema.inputs: {}
+    }]
+    previous = 'source'
+    for idx, min_value in enumerate(mins):
+        task_id = 'filter{}'.format(idx)
+        tspec_list.append({
+            TaskSpecSchema.task_id: task_id,
+            TaskSpecSchema.node_type: NodeRowsFilter,
+            TaskSpecSchema.conf: {'min': min_value},
+            TaskSpecSchema.inputs: {'rows_in': previous + '.rows'}
+        })
+        previous = task_id
+    return tspec_list
+
+
+class TestTaskGraphOptimizer(unittest.TestCase):
+
+    @ordered
+    def test_predicate_pushdown(self):
+        '''Test that the predicates of a chain of filters are pushed into the
+        loader without changing the results or the task specs.
+        '''
+        tgraph = TaskGraph(filters_tspec_list([3, 6]))
+        tgraph.build()
+        self.assertEqual(tgraph['source'].conf, {'size': 10, 'min': 6})
+        self.assertEqual(tgraph['source']._task_obj[TaskSpecSchema.conf],
+                         {'size': 10})
+
+        tgraph.build(optimize=False)
+        self.assertEqual(tgraph['source'].conf, {'size': 10})
+
+        (rows, ) = tgraph.run(['filter1.rows'])
+        self.assertEqual(rows, [6, 7, 8, 9])
+        self.assertEqual(tgraph['source'].conf['min'], 6)
+
+    @ordered
+    def test_predicate_pushdown_shared(self):
+        '''Test that no predicate is pushed past a node whose output has
+        other consumers.
+        '''
+        tgraph = TaskGraph(filters_tspec_list([3, 6]))
+        (all_rows, rows) = tgraph.run(['source.rows', 'filter1.rows'])
+        self.assertEqual(all_rows, list(range(10)))
+        self.assertEqual(rows, [6, 7, 8, 9])
+
+        (rows_3, rows_6) = tgraph.run(['filter0.rows', 'filter1.rows'])
+        self.assertEqual(rows_3, list(range(3, 10)))
+        self.assertEqual(rows_6, [6, 7, 8, 9])
+        self.assertEqual(tgraph['source'].conf['min'], 3)
+
+    @ordered
+    def test_fuse_chains(self):
+        '''Test that a linear chain is run as one step, copying the data
+        only for the first node modifying it.
+        '''
+        node_types = [NodeTallyPass, NodeTallyAppend, NodeTallyPass,
+                      NodeTallyAppend, NodeTallyAppend]
+        tgraph = TaskGraph(tally_tspec_list(node_types))
+        tgraph.build()
+        chain = tgraph['source'].fused_chain
+        self.assertEqual([node.uid for node in chain.nodes],
+                         ['source'] + ['node{}'.format(idx)
+                                       for idx in range(5)])
+        self.assertIsNone(tgraph['node0'].fused_chain)
+
+        for executor in (None, 'threads'):
+            Tally.copies = 0
+            (tally, ) = tgraph.run(['node4.tally'], executor=executor)
+            self.assertEqual(tally.items, ['node1', 'node3', 'node4'])
+            self.assertEqual(Tally.copies, 1)
+
+        tgraph.build(optimize=False)
+        self.assertIsNone(tgraph['source'].fused_chain)
+
+    @ordered
+    def test_fuse_chains_split(self):
+        '''Test that a chain is split at a node with several consumers and
+        that the results of the shared node are not modified.
+        '''
+        tgraph = TaskGraph(tally_tspec_list([NodeTallyAppend] * 4))
+        Tally.copies = 0
+        (shared, tally) = tgraph.run(['node1.tally', 'node3.tally'])
+        self.assertEqual(shared.items, ['node0', 'node1'])
+        self.assertEqual(tally.items, ['node0', 'node1', 'node2', 'node3'])
+        self.assertEqual(Tally.copies, 2)
+        self.assertEqual([node.uid for node in
+                          tgraph['source'].fused_chain.nodes],
+                         ['source', 'node0', 'node1'])
+        self.assertEqual([node.uid for node in
+                          tgraph['node2'].fused_chain.nodes],
+                         ['node2', 'node3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,565 @@
+'''
+greenflow TaskGraph Scheduling Unit Tests
+
+To run unittests:
+
+# Using standard library unittest
+
+python -m unittest -v
+python -m unittest tests/unit/test_taskgraph_scheduler.py -v
+
+or
+
+# Using pytest
+# "conda install pytest" or "pip install pytest"
+pytest -v tests
+pytest -v tests/unit/test_taskgraph_scheduler.py
+
+'''
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import types
+import unittest
+import pandas as pd
+
+from greenflow.dataframe_flow import (Node, PortsSpecSchema, NodePorts,
+                                      MetaData)
+from greenflow.dataframe_flow import (TaskSpecSchema, TaskGraph,
+                                      ResultCache, ParameterSweep)
+from greenflow.dataframe_flow._scheduler import _payload
+from greenflow.dataframe_flow._node_flow import (register_copy_function,
+                                                 register_validator,
+                                                 _registered, _COPYS)
+
+from .utils import make_orderer
+
+ordered, compare = make_orderer()
+unittest.defaultTestLoader.sortTestMethodsUsing = compare
+
+
+class NodeCounterStart(Node):
+
+    def ports_setup(self):
+        output_ports = {'count': {PortsSpecSchema.port_type: int}}
+        return NodePorts(outports=output_ports)
+
+    def meta_setup(self):
+        return MetaData(inports={}, outports={'count': {}})
+
+    def process(self, inputs):
+        return {'count': self.conf.get('start', 0)}
+
+
+class NodeCounterIncr(Node):
+
+    def ports_setup(self):
+        input_ports = {'count_in': {PortsSpecSchema.port_type: int}}
+        output_ports = {'count': {PortsSpecSchema.port_type: int}}
+        return NodePorts(inports=input_ports, outports=output_ports)
+
+    def meta_setup(self):
+        return MetaData(inports={}, outports={'count': {}})
+
+    def process(self, inputs):
+        return {'count': inputs['count_in'] + 1}
+
+
+class NodeCounterSum(Node):
+
+    def ports_setup(self):
+        input_ports = {
+            'count_a': {PortsSpecSchema.port_type: int},
+            'count_b': {PortsSpecSchema.port_type: int}
+        }
+        output_ports = {'count': {PortsSpecSchema.port_type: int}}
+        return NodePorts(inports=input_ports, outports=output_ports)
+
+    def meta_setup(self):
+        return MetaData(inports={}, outports={'count': {}})
+
+    def process(self, inputs):
+        return {'count': inputs['count_a'] + inputs['count_b']}
+
+
+class NodeCounterCalls(NodeCounterIncr):
+    '''Counts the process calls per node id.'''
+    calls = {}
+
+    def process(self, inputs):
+        NodeCounterCalls.calls[self.uid] = \
+            NodeCounterCalls.calls.get(self.uid, 0) + 1
+        return {'count': inputs['count_in'] + self.conf.get('step', 1)}
+
+
+class NodeCsvCount(NodeCounterStart):
+    '''Sums the count column of the csv file.'''
+
+    def source_files(self):
+        return [self.conf['file']]
+
+    def process(self, inputs):
+        return {'count': int(pd.read_csv(self.conf['file'])['count'].sum())}
+
+
+class NodeCountWriter(NodeCounterIncr):
+    '''Writes the count into the file.'''
+    deterministic = False
+
+    def process(self, inputs):
+        with open(self.conf['file'], 'w') as f:
+            f.write(str(inputs['count_in']))
+        return {'count': inputs['count_in']}
+
+
+class Box(object):
+
+    def __init__(self, value):
+        self.value = value
+
+
+register_copy_function(Box, lambda box: Box(box.value))
+
+
+class Checked(object):
+    '''Counts the validations of its instances.'''
+    validations = 0
+
+    def __init__(self, value):
+        self.value = value
+
+
+def validate_checked(checked, meta, node):
+    Checked.validations += 1
+    return True
+
+
+register_validator(Checked, validate_checked)
+
+
+class NodeCheckedSource(Node):
+
+    def ports_setup(self):
+        output_ports = {'checked': {PortsSpecSchema.port_type: Checked}}
+        return NodePorts(outports=output_ports)
+
+    def meta_setup(self):
+        return MetaData(inports={}, outports={'checked': {}})
+
+    def process(self, inputs):
+        return {'checked': Checked(self.conf.get('value', 0))}
+
+
+class NodeBoxSource(Node):
+
+    def ports_setup(self):
+        output_ports = {'box': {PortsSpecSchema.port_type: Box}}
+        return NodePorts(outports=output_ports)
+
+    def meta_setup(self):
+        return MetaData(inports={}, outports={'box': {}})
+
+    def process(self, inputs):
+        return {'box': Box(0)}
+
+
+class NodeBoxWriter(Node):
+
+    def ports_setup(self):
+        input_ports = {'box_in': {PortsSpecSchema.port_type: Box}}
+        output_ports = {'box': {PortsSpecSchema.port_type: Box}}
+        return NodePorts(inports=input_ports, outports=output_ports)
+
+    def meta_setup(self):
+        return MetaData(inports={}, outports={'box': {}})
+
+    def process(self, inputs):
+        box = inputs['box_in']
+        box.value += 1
+        return {'box': box}
+
+
+class NodeBoxReader(NodeBoxWriter):
+    mutates_inputs = False
+
+    def process(self, inputs):
+        return {'box': inputs['box_in']}
+
+
+def chain_tspec_list(prefix, length, start=0):
+    tspec_list = [{
+        TaskSpecSchema.task_id: '{}0'.format(prefix),
+        TaskSpecSchema.node_type: NodeCounterStart,
+        TaskSpecSchema.conf: {'start': start},
+        TaskSpecSchema.inputs: {}
+    }]
+    for idx in range(1, length):
+        tspec_list.append({
+            TaskSpecSchema.task_id: '{}{}'.format(prefix, idx),
+            TaskSpecSchema.node_type: NodeCounterIncr,
+            TaskSpecSchema.conf: {},
+            TaskSpecSchema.inputs: {
+                'count_in': '{}{}.count'.format(prefix, idx - 1)
+            }
+        })
+    return tspec_list
+
+
+class TestTaskGraphScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self._test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._test_dir)
+
+    @ordered
+    def test_deep_chain(self):
+        '''Test that a chain of nodes deeper than the python recursion limit
+        runs.
+        '''
+        depth = 3000
+        tgraph = TaskGraph(chain_tspec_list('node', depth))
+        tgraph.build()
+        self.assertEqual(tgraph['node0'].in_degree, 0)
+        self.assertEqual(tgraph['node1'].in_degree, 1)
+
+        (count, ) = tgraph.run(['node{}.count'.format(depth - 1)])
+        self.assertEqual(count, depth - 1)
+
+    @ordered
+    def test_process_payload(self):
+        '''Test that a node is shipped to a worker process without the other
+        nodes of the graph.
+        '''
+        def payload_size(pad):
+            tspec_list = chain_tspec_list('node', 3, start=1)
+            tspec_list[0][TaskSpecSchema.conf]['pad'] = list(range(pad))
+            tgraph = TaskGraph(tspec_list)
+            tgraph.build()
+            return len(_payload(tgraph['node2'], {'count_in': 2}))
+
+        self.assertEqual(payload_size(10), payload_size(200000))
+
+        tspec_list = chain_tspec_list('node', 3, start=1)
+        tspec_list[0][TaskSpecSchema.conf]['pad'] = list(range(200000))
+        (count, ) = TaskGraph(tspec_list).run(['node2.count'],
+                                              executor='processes',
+                                              max_workers=2)
+        self.assertEqual(count, 3)
+
+    @ordered
+    def test_diamond(self):
+        '''Test that a node with several inputs runs once all of its inputs
+        are computed, also when the branches are of different depth.
+        '''
+        tspec_list = chain_tspec_list('a', 5, start=100) + \
+            chain_tspec_list('b', 2)
+        tspec_list.append({
+            TaskSpecSchema.task_id: 'sum',
+            TaskSpecSchema.node_type: NodeCounterSum,
+            TaskSpecSchema.conf: {},
+            TaskSpecSchema.inputs: {
+                'count_a': 'a4.count',
+                'count_b': 'b1.count'
+            }
+        })
+        tgraph = TaskGraph(tspec_list)
+        for executor in (None, 'threads'):
+            (count, ) = tgraph.run(['sum.count'], executor=executor)
+            self.assertEqual(count, 105)
+
+    @ordered
+    def test_release_outputs(self):
+        '''Test that nodes not taking part in a run are not handed any data
+        and that inputs are released once consumed.
+        '''
+        tspec_list = chain_tspec_list('a', 3)
+        tspec_list.append({
+            TaskSpecSchema.task_id: 'unused',
+            TaskSpecSchema.node_type: NodeCounterIncr,
+            TaskSpecSchema.conf: {},
+            TaskSpecSchema.inputs: {'count_in': 'a0.count'}
+        })
+        tgraph = TaskGraph(tspec_list)
+        (count, ) = tgraph.run(['a2.count'])
+        self.assertEqual(count, 2)
+        for task_id in ('a0', 'a1', 'a2', 'unused'):
+            self.assertEqual(tgraph[task_id].input_df, {})
+        self.assertFalse(tgraph['unused'].visited)
+        self.assertEqual(tgraph.memory_report.live_bytes, 0)
+        self.assertNotIn('unused', tgraph.memory_report.output_bytes)
+
+    @ordered
+    def test_copy_on_write(self):
+        '''Test that inputs are only copied for nodes that modify them.
+        '''
+        tspec_list = [{
+            TaskSpecSchema.task_id: 'source',
+            TaskSpecSchema.node_type: NodeBoxSource,
+            TaskSpecSchema.conf: {},
+            TaskSpecSchema.inputs: {}
+        }]
+        for task_id, node_type in (('reader', NodeBoxReader),
+                                   ('writer', NodeBoxWriter)):
+            tspec_list.append({
+                TaskSpecSchema.task_id: task_id,
+                TaskSpecSchema.node_type: node_type,
+                TaskSpecSchema.conf: {},
+                TaskSpecSchema.inputs: {'box_in': 'source.box'}
+            })
+        tgraph = TaskGraph(tspec_list)
+        (source, reader, writer) = tgraph.run(
+            ['source.box', 'reader.box', 'writer.box'])
+        self.assertIs(reader, source)
+        self.assertIsNot(writer, source)
+        self.assertEqual(source.value, 0)
+        self.assertEqual(writer.value, 1)
+
+        # per port declaration
+        replace = {'writer': {TaskSpecSchema.node_type: type(
+            'NodeBoxPortWriter', (NodeBoxWriter,),
+            {'mutates_inputs': ['other_port']})}}
+        (source, writer) = tgraph.run(['source.box', 'writer.box'],
+                                      replace=replace)
+        self.assertIs(writer, source)
+        self.assertEqual(source.value, 1)
+
+    def _calls_tgraph(self):
+        '''a0 -> b -> c and a0 -> d'''
+        tspec_list = chain_tspec_list('a', 1)
+        for task_id, input_id in (('b', 'a0'), ('c', 'b'), ('d', 'a0')):
+            tspec_list.append({
+                TaskSpecSchema.task_id: task_id,
+                TaskSpecSchema.node_type: NodeCounterCalls,
+                TaskSpecSchema.conf: {},
+                TaskSpecSchema.inputs: {
+                    'count_in': '{}.count'.format(input_id)
+                }
+            })
+        return TaskGraph(tspec_list)
+
+    @ordered
+    def test_incremental(self):
+        '''Test that an incremental run only recomputes the nodes downstream
+        of a conf change.
+        '''
+        tgraph = self._calls_tgraph()
+        outputs = ['c.count', 'd.count']
+        NodeCounterCalls.calls.clear()
+        for executor in (None, 'threads'):
+            (count_c, count_d) = tgraph.run(outputs, executor=executor,
+                                            incremental=True)
+            self.assertEqual((count_c, count_d), (2, 1))
+        self.assertEqual(NodeCounterCalls.calls, {'b': 1, 'c': 1, 'd': 1})
+
+        replace = {'b': {TaskSpecSchema.conf: {'step': 10}}}
+        (count_c, count_d) = tgraph.run(outputs, replace=replace,
+                                        incremental=True)
+        self.assertEqual((count_c, count_d), (11, 1))
+        self.assertEqual(NodeCounterCalls.calls, {'b': 2, 'c': 2, 'd': 1})
+
+        # the default run computes every node
+        (count_c, count_d) = tgraph.run(outputs, replace=replace)
+        self.assertEqual((count_c, count_d), (11, 1))
+        self.assertEqual(NodeCounterCalls.calls, {'b': 3, 'c': 3, 'd': 2})
+
+        tgraph.clear_results()
+        tgraph.run(outputs, replace=replace, incremental=True)
+        self.assertEqual(NodeCounterCalls.calls, {'b': 4, 'c': 4, 'd': 3})
+
+    @ordered
+    def test_result_cache(self):
+        '''Test that the node outputs are reused from the on-disk result
+        cache by a new task graph, and that the least recently used entries
+        are evicted above the size cap.
+        '''
+        cache = ResultCache(os.path.join(self._test_dir, 'results'))
+        outputs = ['c.count', 'd.count']
+        NodeCounterCalls.calls.clear()
+        (count_c, count_d) = self._calls_tgraph().run(
+            outputs, result_cache=cache)
+        self.assertEqual((count_c, count_d), (2, 1))
+        # d computes the same as b, so it is served by the entry of b
+        self.assertEqual(NodeCounterCalls.calls, {'b': 1, 'c': 1})
+        # a0, b, c
+        self.assertEqual(len(os.listdir(cache.cache_dir)), 3)
+
+        for executor in (None, 'threads'):
+            (count_c, count_d) = self._calls_tgraph().run(
+                outputs, executor=executor, result_cache=cache)
+            self.assertEqual((count_c, count_d), (2, 1))
+        self.assertEqual(NodeCounterCalls.calls, {'b': 1, 'c': 1})
+
+        replace = {'b': {TaskSpecSchema.conf: {'step': 10}}}
+        (count_c, count_d) = self._calls_tgraph().run(
+            outputs, replace=replace, result_cache=cache)
+        self.assertEqual((count_c, count_d), (11, 1))
+        self.assertEqual(NodeCounterCalls.calls, {'b': 2, 'c': 2})
+        self.assertEqual(len(os.listdir(cache.cache_dir)), 5)
+
+        cache.max_bytes = 0
+        cache.evict()
+        self.assertEqual(os.listdir(cache.cache_dir), [])
+
+    @ordered
+    def test_side_effects(self):
+        '''Test that the cached runs still run the nodes that are not
+        deterministic and reload the source files that changed.
+        '''
+        csv_file = os.path.join(self._test_dir, 'counts.csv')
+        out_file = os.path.join(self._test_dir, 'count.txt')
+        tgraph = TaskGraph([{
+            TaskSpecSchema.task_id: 'csv',
+            TaskSpecSchema.node_type: NodeCsvCount,
+            TaskSpecSchema.conf: {'file': csv_file},
+            TaskSpecSchema.inputs: {}
+        }, {
+            TaskSpecSchema.task_id: 'writer',
+            TaskSpecSchema.node_type: NodeCountWriter,
+            TaskSpecSchema.conf: {'file': out_file},
+            TaskSpecSchema.inputs: {'count_in': 'csv.count'}
+        }])
+        cache = ResultCache(os.path.join(self._test_dir, 'results'))
+        for run_kwargs in ({'incremental': True}, {'result_cache': cache}):
+            with open(csv_file, 'w') as f:
+                f.write('count\n1\n2\n')
+            for count in (3, 3):
+                if os.path.exists(out_file):
+                    os.remove(out_file)
+                (result, ) = tgraph.run(['writer.count'], **run_kwargs)
+                self.assertEqual(result, count)
+                with open(out_file) as f:
+                    self.assertEqual(f.read(), str(count))
+
+            with open(csv_file, 'w') as f:
+                f.write('count\n1\n2\n30\n')
+            (result, ) = tgraph.run(['writer.count'], **run_kwargs)
+            self.assertEqual(result, 33)
+            with open(out_file) as f:
+                self.assertEqual(f.read(), '33')
+
+    @ordered
+    def test_validation(self):
+        '''Test that the 'first' validation mode validates a graph in its
+        first run only and that the 'off' mode skips the validations.
+        '''
+        def checked_tgraph(value):
+            return TaskGraph([{
+                TaskSpecSchema.task_id: 'a',
+                TaskSpecSchema.node_type: NodeCheckedSource,
+                TaskSpecSchema.conf: {'value': value},
+                TaskSpecSchema.inputs: {}
+            }])
+
+        Checked.validations = 0
+        for validation in ('full', 'full'):
+            checked_tgraph(1).run(['a.checked'], validation=validation)
+        self.assertEqual(Checked.validations, 2)
+
+        Checked.validations = 0
+        for executor in (None, None, 'threads'):
+            (checked, ) = checked_tgraph(2).run(
+                ['a.checked'], executor=executor, validation='first')
+            self.assertEqual(checked.value, 2)
+        self.assertEqual(Checked.validations, 1)
+
+        # a conf change makes a new graph to validate
+        replace = {'a': {TaskSpecSchema.conf: {'value': 3}}}
+        checked_tgraph(2).run(['a.checked'], replace=replace,
+                              validation='first')
+        self.assertEqual(Checked.validations, 2)
+
+        checked_tgraph(4).run(['a.checked'], validation='off')
+        self.assertEqual(Checked.validations, 2)
+
+        with self.assertRaises(ValueError):
+            checked_tgraph(1).run(['a.checked'], validation='none')
+
+    @ordered
+    def test_registered_by_name(self):
+        '''Test that a type registered by name before its module is imported
+        is found from the threads without modifying the registry.
+        '''
+        module = types.ModuleType('lazy_types_mod')
+
+        class Lazy(object):
+            pass
+
+        module.Lazy = Lazy
+        register_copy_function('lazy_types_mod.Lazy', Lazy)
+        self.assertIsNone(_registered(_COPYS, Lazy))
+
+        keys = set(_COPYS)
+        found = []
+        interval = sys.getswitchinterval()
+        sys.modules['lazy_types_mod'] = module
+        try:
+            sys.setswitchinterval(1e-6)
+
+            def lookup():
+                for _ in range(300):
+                    found.append(_registered(_COPYS, Lazy))
+
+            threads = [threading.Thread(target=lookup) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+            del sys.modules['lazy_types_mod']
+            del _COPYS['lazy_types_mod.Lazy']
+        self.assertEqual(found, [Lazy] * 2400)
+        self.assertEqual(set(_COPYS), keys - {'lazy_types_mod.Lazy'})
+
+    @ordered
+    def test_parameter_sweep(self):
+        '''Test that a sweep computes the nodes not affected by the
+        configurations once and shares their outputs without modifying them.
+        '''
+        tgraph = self._calls_tgraph()
+        configs = [{'b': {TaskSpecSchema.conf: {'step': step}}}
+                   for step in (1, 10, 100)]
+        sweep = ParameterSweep(tgraph, ['c.count', 'd.count'])
+        self.assertEqual(sweep.affected(configs), {'b', 'c'})
+        self.assertEqual(sweep.prefix_outputs({'b', 'c'}),
+                         ['a0.count', 'd.count'])
+        NodeCounterCalls.calls.clear()
+        results = sweep.run(configs)
+        self.assertEqual([tuple(result) for result in results],
+                         [(2, 1), (11, 1), (101, 1)])
+        self.assertEqual(NodeCounterCalls.calls, {'b': 3, 'c': 3, 'd': 1})
+
+        # the same specs, one run
+        NodeCounterCalls.calls.clear()
+        results = sweep.run([{}, {'d': {}}])
+        self.assertEqual([tuple(result) for result in results],
+                         [(2, 1), (2, 1)])
+        self.assertEqual(NodeCounterCalls.calls, {'b': 1, 'c': 1, 'd': 1})
+
+        tgraph = TaskGraph([{
+            TaskSpecSchema.task_id: 'source',
+            TaskSpecSchema.node_type: NodeBoxSource,
+            TaskSpecSchema.conf: {},
+            TaskSpecSchema.inputs: {}
+        }, {
+            TaskSpecSchema.task_id: 'writer',
+            TaskSpecSchema.node_type: NodeBoxWriter,
+            TaskSpecSchema.conf: {},
+            TaskSpecSchema.inputs: {'box_in': 'source.box'}
+        }])
+        configs = [{'writer': {TaskSpecSchema.conf: {'trial': trial}}}
+                   for trial in range(3)]
+        results = ParameterSweep(tgraph, ['source.box', 'writer.box']).run(
+            configs, executor='threads')
+        for source, writer in results:
+            self.assertIs(source, results[0][0])
+            self.assertEqual(source.value, 0)
+            self.assertEqual(writer.value, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,15 +4,10 @@ from greenflow.dataframe_flow.task import Task
 from greenflow.dataframe_flow._node_flow import OUTPUT_TYPE, OUTPUT_ID
 from greenflow.dataframe_flow import TaskSpecSchema
 from greenflow.dataframe_flow.task import load_modules, get_greenflow_config_modules
+from greenflow.dataframe_flow.task import plugin_entry_points, load_plugin
 import greenflow.plugin_nodes as plugin_nodes
 import inspect
 import uuid
-try:
-    # For python 3.8 and later
-    import importlib.metadata as importlib_metadata
-except ImportError:
-    # prior to python 3.8 need to install importlib-metadata
-    import importlib_metadata
 from pathlib import Path
 
 dynamic_modules = {}
@@ -294,10 +289,8 @@ def add_nodes():
                 node_lists.append(nodeObj)
 
     # load all the plugins from entry points
-    for entry_point in importlib_metadata.entry_points().get('greenflow.plugin',
-                                                             ()):
-        mod = entry_point.load()
-        modulename = entry_point.name
+    for modulename in plugin_entry_points():
+        mod = load_plugin(modulename)
 
         for node in inspect.getmembers(mod):
             nodecls = node[1]